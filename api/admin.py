@@ -2,8 +2,12 @@ from flask import Blueprint, request, jsonify, session, render_template, redirec
 import logging
 import json
 from datetime import datetime, timedelta, date
-from db.connection import get_db_connection, get_placeholder, execute_query, execute_update, execute_with_returning, is_postgresql
+from db.connection import get_db_connection, get_placeholder, execute_query, execute_update, execute_with_returning, is_postgresql, get_pool_metrics
 from api.utils import log_user_action, admin_required
+from api.response_cache import get_response_cache
+from api import compression
+from api import product_catalog
+from api import ocr_engine
 import bcrypt
 
 admin_api = Blueprint('admin_api', __name__)
@@ -707,3 +711,32 @@ def db_check():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@admin_api.route('/api/admin/db-pool')
+@admin_required
+def db_pool_metrics():
+    """Connection pool usage: checkout wait times, connections in use, exhaustion events."""
+    return jsonify(get_pool_metrics())
+
+@admin_api.route('/api/admin/response-cache')
+@admin_required
+def response_cache_metrics():
+    """Response cache hit rate, evictions and invalidations, overall and per endpoint."""
+    return jsonify(get_response_cache().metrics())
+
+@admin_api.route('/api/admin/compression')
+@admin_required
+def compression_metrics():
+    """Response compression: bytes before/after, ratio and CPU time, per encoding."""
+    return jsonify(compression.stats.metrics())
+
+@admin_api.route('/api/admin/product-catalog')
+@admin_required
+def product_catalog_metrics():
+    """Product catalog cache: cached shops, hits, version checks and reloads in this worker."""
+    return jsonify(product_catalog.cache.metrics())
+
+@admin_api.route('/api/admin/ocr-engine')
+@admin_required
+def ocr_engine_metrics():
+    """OCR engine: recognitions, early exits, passes run and cancelled, wins per configuration."""
+    return jsonify(ocr_engine.engine.metrics())
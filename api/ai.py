@@ -3,14 +3,15 @@ from db.connection import get_db_connection, get_placeholder, execute_query
 from api.utils import get_current_user_id
 from api.plans import get_user_plan_info
 from api.i18n import get_user_language, get_translated_text
-import csv
-from io import StringIO
+from api.response_cache import cached_response
+from api.export_service import FORMATS, csv_chunks, xlsx_chunks
 from datetime import datetime
 
 ai_api = Blueprint('ai_api', __name__)
 
 # AI API Endpoints
 @ai_api.route('/api/ai/customer-segmentation')
+@cached_response('customer-segmentation', ttl=300, depends_on=('bills', 'customers'))
 def get_customer_segmentation():
     """Get customer segmentation analysis using AI/ML."""
     try:
@@ -155,35 +156,25 @@ def export_segmentation_data():
                 'error': 'No data provided for export'
             }), 400
         
-        if format_type == 'csv':
-            # Create CSV data
-            output = StringIO()
-            writer = csv.writer(output)
-            
-            # Write header
+        if format_type in FORMATS:
             headers = ['Customer ID', 'Name', 'Mobile', 'Segment', 'Total Orders', 'Total Spent', 'Avg Order Value', 'Last Visit', 'Customer Value Score']
-            writer.writerow(headers)
-            
-            # Write data
-            for customer in customer_data:
-                writer.writerow([
-                    customer.get('customer_id', ''),
-                    customer.get('customer_name', ''),
-                    customer.get('customer_mobile', ''),
-                    customer.get('segment_label', ''),
-                    customer.get('total_orders', 0),
-                    customer.get('total_spent', 0),
-                    customer.get('avg_order_value', 0),
-                    customer.get('last_order_date', ''),
-                    customer.get('customer_value_score', 0)
-                ])
-            
-            output.seek(0)
+            rows = ([
+                customer.get('customer_id', ''),
+                customer.get('customer_name', ''),
+                customer.get('customer_mobile', ''),
+                customer.get('segment_label', ''),
+                customer.get('total_orders', 0),
+                customer.get('total_spent', 0),
+                customer.get('avg_order_value', 0),
+                customer.get('last_order_date', ''),
+                customer.get('customer_value_score', 0)
+            ] for customer in customer_data)
+            body = csv_chunks(headers, rows) if format_type == 'csv' else xlsx_chunks(headers, rows)
             
             return Response(
-                output.getvalue(),
-                mimetype='text/csv',
-                headers={'Content-Disposition': f'attachment; filename=customer-segmentation-{datetime.now().strftime("%Y%m%d")}.csv'}
+                body,
+                mimetype=FORMATS[format_type],
+                headers={'Content-Disposition': f'attachment; filename=customer-segmentation-{datetime.now().strftime("%Y%m%d")}.{format_type}'}
             )
         
         else:
@@ -1,5 +1,5 @@
 from flask import Blueprint, jsonify, session, request, render_template
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from db.connection import (
     get_db_connection,
     get_placeholder,
@@ -7,21 +7,26 @@ from db.connection import (
     execute_update,
     is_postgresql,
 )
-from api.utils import get_current_user_id, get_date_range, api_error_handler, fetch_payment_methods, fetch_repeated_customers, fetch_top_products_by_where
+from api.utils import get_current_user_id, get_date_range, api_error_handler, fetch_payment_methods, fetch_top_products_by_where, fetch_sales_summary, fetch_sales_trends, date_range_filter, add_months, month_range
 from api.plans import get_user_plan_info
 from api.i18n import get_user_language, translate_text as get_translated_text
+from api.response_cache import cached_response
 
 analytics_api = Blueprint('analytics_api', __name__, url_prefix='/api')
 analytics_pages = Blueprint('analytics_pages', __name__)
 
 def _fetch_top_products(conn, user_id, from_date, to_date, limit=10):
     placeholder = get_placeholder()
-    where_clause = f"b.user_id = {placeholder} AND DATE(b.bill_date) BETWEEN {placeholder} AND {placeholder}"
-    rows = fetch_top_products_by_where(conn, where_clause, (user_id, from_date, to_date), limit=limit)
+    date_filter, date_params = date_range_filter('b.bill_date', from_date, to_date)
+    where_clause = f"b.user_id = {placeholder} AND {date_filter}"
+    rows = fetch_top_products_by_where(conn, where_clause, [user_id] + date_params, limit=limit)
     return [dict(r) for r in rows]
 
 def _fetch_employee_performance(conn, user_id, from_date, to_date):
     placeholder = get_placeholder()
+    # The date range is part of the join so employees without bills in the
+    # period are still listed, with zero bills.
+    date_filter, date_params = date_range_filter('b.bill_date', from_date, to_date)
     rows = execute_query(conn, f'''
         SELECT 
             e.name as employee_name,
@@ -30,42 +35,19 @@ def _fetch_employee_performance(conn, user_id, from_date, to_date):
             AVG(b.total_amount) as avg_bill_value
         FROM employees e
         LEFT JOIN bills b ON e.employee_id = b.master_id AND b.user_id = e.user_id
+            AND {date_filter}
         WHERE e.user_id = {placeholder} 
-        AND (b.bill_date IS NULL OR DATE(b.bill_date) BETWEEN {placeholder} AND {placeholder})
         GROUP BY e.employee_id, e.name
         ORDER BY total_revenue DESC
-    ''', (user_id, from_date, to_date)).fetchall()
+    ''', date_params + [user_id]).fetchall()
     return [dict(r) for r in rows]
 
 def _fetch_payment_methods(conn, user_id, from_date, to_date):
-    placeholder = get_placeholder()
-    rows = execute_query(conn, f'''
-        SELECT 
-            payment_method,
-            COUNT(*) as count,
-            SUM(total_amount) as amount
-        FROM bills 
-        WHERE user_id = {placeholder} 
-        AND DATE(bill_date) BETWEEN {placeholder} AND {placeholder}
-        GROUP BY payment_method
-        ORDER BY amount DESC
-    ''', (user_id, from_date, to_date)).fetchall()
-    return [dict(r) for r in rows]
-
-def _fetch_top_regions(conn, user_id, limit=10):
-    placeholder = get_placeholder()
-    rows = execute_query(conn, f'''
-        SELECT COALESCE(customer_area, 'Unknown') as area, SUM(total_amount) as sales
-        FROM bills
-        WHERE customer_area IS NOT NULL AND customer_area != '' AND user_id = {placeholder}
-        GROUP BY customer_area
-        ORDER BY sales DESC
-        LIMIT {limit}
-    ''', (user_id,)).fetchall()
-    return rows
+    return [dict(r) for r in fetch_payment_methods(conn, user_id, from_date, to_date)]
 
 def _fetch_expense_categories(conn, user_id, from_date, to_date, limit=5):
     placeholder = get_placeholder()
+    date_filter, date_params = date_range_filter('e.expense_date', from_date, to_date)
     rows = execute_query(conn, f'''
         SELECT 
             ec.category_name,
@@ -74,83 +56,14 @@ def _fetch_expense_categories(conn, user_id, from_date, to_date, limit=5):
         FROM expenses e
         JOIN expense_categories ec ON e.category_id = ec.category_id
         WHERE e.user_id = {placeholder} 
-        AND DATE(e.expense_date) BETWEEN {placeholder} AND {placeholder}
+        AND {date_filter}
         GROUP BY ec.category_id, ec.category_name
         ORDER BY total_amount DESC
         LIMIT {limit}
-    ''', (user_id, from_date, to_date)).fetchall()
+    ''', [user_id] + date_params).fetchall()
     return rows
-def _fetch_today_revenue(conn, user_id):
-    placeholder = get_placeholder()
-    if is_postgresql():
-        date_today = "CURRENT_DATE"
-    else:
-        date_today = "DATE('now')"
-    cursor = execute_query(conn, f'''
-        SELECT COALESCE(SUM(total_amount), 0) as total 
-        FROM bills 
-        WHERE DATE(bill_date) = {date_today} AND user_id = {placeholder}
-    ''', (user_id,))
-    result = cursor.fetchone()
-    return result[0] if isinstance(result, tuple) else result['total']
-def _fetch_today_bills_count(conn, user_id):
-    placeholder = get_placeholder()
-    if is_postgresql():
-        date_today = "CURRENT_DATE"
-    else:
-        date_today = "DATE('now')"
-    cursor = execute_query(conn, f'''
-        SELECT COUNT(*) as count 
-        FROM bills 
-        WHERE DATE(bill_date) = {date_today} AND user_id = {placeholder}
-    ''', (user_id,))
-    result = cursor.fetchone()
-    return result[0] if isinstance(result, tuple) else result['count']
-def _fetch_pending_bills_count(conn, user_id):
-    placeholder = get_placeholder()
-    cursor = execute_query(conn, f'''
-        SELECT COUNT(*) as count 
-        FROM bills 
-        WHERE status = 'Pending' AND user_id = {placeholder}
-    ''', (user_id,))
-    result = cursor.fetchone()
-    return result[0] if isinstance(result, tuple) else result['count']
-def _fetch_total_customers(conn, user_id):
-    placeholder = get_placeholder()
-    cursor = execute_query(conn, f'''
-        SELECT COUNT(*) as count FROM customers WHERE user_id = {placeholder}
-    ''', (user_id,))
-    result = cursor.fetchone()
-    return result[0] if isinstance(result, tuple) else result['count']
-def _fetch_today_expenses(conn, user_id):
-    placeholder = get_placeholder()
-    if is_postgresql():
-        date_today = "CURRENT_DATE"
-    else:
-        date_today = "DATE('now')"
-    cursor = execute_query(conn, f'''
-        SELECT COALESCE(SUM(amount), 0) as total 
-        FROM expenses 
-        WHERE DATE(expense_date) = {date_today} AND user_id = {placeholder}
-    ''', (user_id,))
-    result = cursor.fetchone()
-    return result[0] if isinstance(result, tuple) else result['total']
-def _fetch_month_expenses(conn, user_id):
-    placeholder = get_placeholder()
-    if is_postgresql():
-        month_str = "TO_CHAR(expense_date, 'YYYY-MM')"
-        month_str_now = "TO_CHAR(CURRENT_DATE, 'YYYY-MM')"
-    else:
-        month_str = "strftime('%Y-%m', expense_date)"
-        month_str_now = "strftime('%Y-%m', 'now')"
-    cursor = execute_query(conn, f'''
-        SELECT COALESCE(SUM(amount), 0) as total 
-        FROM expenses 
-        WHERE {month_str} = {month_str_now} AND user_id = {placeholder}
-    ''', (user_id,))
-    result = cursor.fetchone()
-    return result[0] if isinstance(result, tuple) else result['total']
 def _fetch_monthly_expense_trends_by_category(conn, user_id, months=6):
+    date_filter, date_params = _trend_window('e.expense_date', 'monthly', months)
     if is_postgresql():
         rows = execute_query(conn, f'''
             SELECT 
@@ -160,10 +73,10 @@ def _fetch_monthly_expense_trends_by_category(conn, user_id, months=6):
             FROM expenses e
             JOIN expense_categories ec ON e.category_id = ec.category_id
             WHERE e.user_id = %s 
-            AND e.expense_date >= CURRENT_DATE - INTERVAL '%s months'
+            AND {date_filter}
             GROUP BY ec.category_id, ec.category_name, TO_CHAR(e.expense_date, 'YYYY-MM')
             ORDER BY month, amount DESC
-        ''', (user_id, months)).fetchall()
+        ''', [user_id] + date_params).fetchall()
     else:
         rows = execute_query(conn, f'''
             SELECT 
@@ -173,176 +86,124 @@ def _fetch_monthly_expense_trends_by_category(conn, user_id, months=6):
             FROM expenses e
             JOIN expense_categories ec ON e.category_id = ec.category_id
             WHERE e.user_id = ? 
-            AND e.expense_date >= date('now', '-' || ? || ' months')
+            AND {date_filter}
             GROUP BY ec.category_id, ec.category_name, strftime('%Y-%m', e.expense_date)
             ORDER BY month, amount DESC
-        ''', (user_id, months)).fetchall()
+        ''', [user_id] + date_params).fetchall()
     return rows
 
- 
+def _trend_start(period, months):
+    """First day of the trailing window a daily/weekly/monthly trend covers."""
+    today = date.today()
+    if period == 'daily':
+        return today - timedelta(days=30)
+    if period == 'weekly':
+        return today - timedelta(days=84)
+    return add_months(today, -months)
+
+def _trend_window(column, period, months):
+    """Date filter for the trailing window a daily/weekly/monthly trend covers."""
+    return date_range_filter(column, _trend_start(period, months))
 
 def _fetch_revenue_trends(conn, user_id, period, months):
-    placeholder = get_placeholder()
     if period == 'daily':
-        if is_postgresql():
-            rows = execute_query(conn, '''
-                SELECT 
-                    DATE(bill_date) as date,
-                    SUM(total_amount) as revenue,
-                    COUNT(*) as invoices,
-                    COUNT(DISTINCT customer_id) as customers
-                FROM bills 
-                WHERE user_id = %s 
-                AND bill_date >= CURRENT_DATE - INTERVAL '30 days'
-                GROUP BY DATE(bill_date)
-                ORDER BY date
-            ''', (user_id,)).fetchall()
-        else:
-            rows = execute_query(conn, '''
-                SELECT 
-                    DATE(bill_date) as date,
-                    SUM(total_amount) as revenue,
-                    COUNT(*) as invoices,
-                    COUNT(DISTINCT customer_id) as customers
-                FROM bills 
-                WHERE user_id = ? 
-                AND bill_date >= date('now', '-30 days')
-                GROUP BY DATE(bill_date)
-                ORDER BY date
-            ''', (user_id,)).fetchall()
-    elif period == 'weekly':
-        if is_postgresql():
-            rows = execute_query(conn, '''
-                SELECT 
-                    TO_CHAR(bill_date, 'IYYY-IW') as week,
-                    SUM(total_amount) as revenue,
-                    COUNT(*) as invoices,
-                    COUNT(DISTINCT customer_id) as customers
-                FROM bills 
-                WHERE user_id = %s 
-                AND bill_date >= CURRENT_DATE - INTERVAL '84 days'
-                GROUP BY TO_CHAR(bill_date, 'IYYY-IW')
-                ORDER BY week
-            ''', (user_id,)).fetchall()
-        else:
-            rows = execute_query(conn, '''
-                SELECT 
-                    strftime('%Y-W%W', bill_date) as week,
-                    SUM(total_amount) as revenue,
-                    COUNT(*) as invoices,
-                    COUNT(DISTINCT customer_id) as customers
-                FROM bills 
-                WHERE user_id = ? 
-                AND bill_date >= date('now', '-84 days')
-                GROUP BY strftime('%Y-W%W', bill_date)
-                ORDER BY week
-            ''', (user_id,)).fetchall()
+        date_filter, date_params = _trend_window('sales_day', period, months)
+        rows = execute_query(conn, f'''
+            SELECT 
+                sales_day as date,
+                revenue,
+                invoice_count as invoices,
+                customer_count as customers
+            FROM daily_shop_sales 
+            WHERE user_id = %s 
+            AND {date_filter}
+            ORDER BY sales_day
+        ''', [user_id] + date_params).fetchall()
+        return [dict(r) for r in rows]
+    start = _trend_start(period, months)
+    if period == 'weekly':
+        label, rows = 'week', fetch_sales_trends(conn, user_id, 'IYYY-IW', start)
     else:
-        if is_postgresql():
-            rows = execute_query(conn, '''
-                SELECT 
-                    TO_CHAR(bill_date, 'YYYY-MM') as month,
-                    SUM(total_amount) as revenue,
-                    COUNT(*) as invoices,
-                    COUNT(DISTINCT customer_id) as customers
-                FROM bills 
-                WHERE user_id = %s 
-                AND bill_date >= CURRENT_DATE - INTERVAL '%s months'
-                GROUP BY TO_CHAR(bill_date, 'YYYY-MM')
-                ORDER BY month
-            ''', (user_id, months)).fetchall()
-        else:
-            rows = execute_query(conn, '''
-                SELECT 
-                    strftime('%Y-%m', bill_date) as month,
-                    SUM(total_amount) as revenue,
-                    COUNT(*) as invoices,
-                    COUNT(DISTINCT customer_id) as customers
-                FROM bills 
-                WHERE user_id = ? 
-                AND bill_date >= date('now', '-' || ? || ' months')
-                GROUP BY strftime('%Y-%m', bill_date)
-                ORDER BY month
-            ''', (user_id, months)).fetchall()
-    return [dict(r) for r in rows]
+        label, rows = 'month', fetch_sales_trends(conn, user_id, 'YYYY-MM', start)
+    return [{label: r['bucket'], 'revenue': r['revenue'], 'invoices': r['invoices'], 'customers': r['customers']} for r in rows]
 
 def _fetch_expense_trends(conn, user_id, period, months):
-    placeholder = get_placeholder()
+    date_filter, date_params = _trend_window('expense_date', period, months)
     if period == 'daily':
         if is_postgresql():
-            rows = execute_query(conn, '''
+            rows = execute_query(conn, f'''
                 SELECT 
                     DATE(expense_date) as date,
                     SUM(amount) as expenses,
                     COUNT(*) as expense_count
                 FROM expenses 
                 WHERE user_id = %s 
-                AND expense_date >= CURRENT_DATE - INTERVAL '30 days'
+                AND {date_filter}
                 GROUP BY DATE(expense_date)
                 ORDER BY date
-            ''', (user_id,)).fetchall()
+            ''', [user_id] + date_params).fetchall()
         else:
-            rows = execute_query(conn, '''
+            rows = execute_query(conn, f'''
                 SELECT 
                     DATE(expense_date) as date,
                     SUM(amount) as expenses,
                     COUNT(*) as expense_count
                 FROM expenses 
                 WHERE user_id = ? 
-                AND expense_date >= date('now', '-30 days')
+                AND {date_filter}
                 GROUP BY DATE(expense_date)
                 ORDER BY date
-            ''', (user_id,)).fetchall()
+            ''', [user_id] + date_params).fetchall()
     elif period == 'weekly':
         if is_postgresql():
-            rows = execute_query(conn, '''
+            rows = execute_query(conn, f'''
                 SELECT 
                     TO_CHAR(expense_date, 'IYYY-IW') as week,
                     SUM(amount) as expenses,
                     COUNT(*) as expense_count
                 FROM expenses 
                 WHERE user_id = %s 
-                AND expense_date >= CURRENT_DATE - INTERVAL '84 days'
+                AND {date_filter}
                 GROUP BY TO_CHAR(expense_date, 'IYYY-IW')
                 ORDER BY week
-            ''', (user_id,)).fetchall()
+            ''', [user_id] + date_params).fetchall()
         else:
-            rows = execute_query(conn, '''
+            rows = execute_query(conn, f'''
                 SELECT 
                     strftime('%Y-W%W', expense_date) as week,
                     SUM(amount) as expenses,
                     COUNT(*) as expense_count
                 FROM expenses 
                 WHERE user_id = ? 
-                AND expense_date >= date('now', '-84 days')
+                AND {date_filter}
                 GROUP BY strftime('%Y-W%W', expense_date)
                 ORDER BY week
-            ''', (user_id,)).fetchall()
+            ''', [user_id] + date_params).fetchall()
     else:
         if is_postgresql():
-            rows = execute_query(conn, '''
+            rows = execute_query(conn, f'''
                 SELECT 
                     TO_CHAR(expense_date, 'YYYY-MM') as month,
                     SUM(amount) as expenses,
                     COUNT(*) as expense_count
                 FROM expenses 
                 WHERE user_id = %s 
-                AND expense_date >= CURRENT_DATE - INTERVAL '%s months'
+                AND {date_filter}
                 GROUP BY TO_CHAR(expense_date, 'YYYY-MM')
                 ORDER BY month
-            ''', (user_id, months)).fetchall()
+            ''', [user_id] + date_params).fetchall()
         else:
-            rows = execute_query(conn, '''
+            rows = execute_query(conn, f'''
                 SELECT 
                     strftime('%Y-%m', expense_date) as month,
                     SUM(amount) as expenses,
                     COUNT(*) as expense_count
                 FROM expenses 
                 WHERE user_id = ? 
-                AND expense_date >= date('now', '-' || ? || ' months')
+                AND {date_filter}
                 GROUP BY strftime('%Y-%m', expense_date)
                 ORDER BY month
-            ''', (user_id, months)).fetchall()
+            ''', [user_id] + date_params).fetchall()
     return [dict(r) for r in rows]
 
 @analytics_pages.route('/financial-insights')
@@ -354,119 +215,186 @@ def financial_insights():
                          get_user_language=get_user_language,
                          get_translated_text=get_translated_text)
 
+# Windows the dashboard widgets cover: the charts, top regions and repeated
+# customers span the last DASHBOARD_MONTHS, trending products the last
+# TRENDING_PRODUCTS_DAYS. Bounded windows keep the cost of the page flat
+# however many years of bills a shop has.
+DASHBOARD_MONTHS = 6
+TRENDING_PRODUCTS_DAYS = 30
+
+# Everything the dashboard shows, in one round trip. Bill totals come from
+# the daily_shop_sales rollup, the rest from range scans on the
+# (user_id, bill_date) / (user_id, expense_date) indexes.
+DASHBOARD_SQL = '''
+    WITH today_sales AS (
+        SELECT revenue, invoice_count
+        FROM daily_shop_sales
+        WHERE user_id = %(user_id)s AND sales_day = %(today)s
+    ), expense_totals AS (
+        SELECT 
+            COALESCE(SUM(amount) FILTER (WHERE expense_date >= %(today)s AND expense_date < %(tomorrow)s), 0) as today,
+            COALESCE(SUM(amount), 0) as month
+        FROM expenses
+        WHERE user_id = %(user_id)s AND expense_date >= %(month_start)s AND expense_date < %(next_month_start)s
+    ), revenue_days AS (
+        SELECT TO_CHAR(sales_day, 'YYYY-MM') as month, revenue, invoice_count, customer_ids
+        FROM daily_shop_sales
+        WHERE user_id = %(user_id)s AND sales_day >= %(trend_start)s
+    ), revenue_customers AS (
+        SELECT month, COUNT(DISTINCT c) as customers
+        FROM revenue_days, unnest(revenue_days.customer_ids) c
+        GROUP BY month
+    ), monthly_revenue AS (
+        SELECT 
+            d.month,
+            SUM(d.revenue) as revenue,
+            SUM(d.invoice_count) as invoices,
+            COALESCE(MAX(rc.customers), 0) as customers
+        FROM revenue_days d
+        LEFT JOIN revenue_customers rc ON rc.month = d.month
+        GROUP BY d.month
+    ), monthly_expenses AS (
+        SELECT TO_CHAR(expense_date, 'YYYY-MM') as month, SUM(amount) as expenses, COUNT(*) as expense_count
+        FROM expenses
+        WHERE user_id = %(user_id)s AND expense_date >= %(trend_start)s
+        GROUP BY TO_CHAR(expense_date, 'YYYY-MM')
+    ), top_regions AS (
+        SELECT customer_area as area, SUM(total_amount) as sales
+        FROM bills
+        WHERE user_id = %(user_id)s AND bill_date >= %(trend_start)s
+        AND customer_area IS NOT NULL AND customer_area != ''
+        GROUP BY customer_area
+        ORDER BY sales DESC
+        LIMIT 10
+    ), trending_products AS (
+        SELECT 
+            COALESCE(bi.product_name, 'Unknown') as product_name,
+            COALESCE(SUM(bi.quantity), 0) as qty_sold,
+            COALESCE(SUM(bi.total_amount), 0) as total_revenue
+        FROM bills b
+        JOIN bill_items bi ON bi.bill_id = b.bill_id
+        WHERE b.user_id = %(user_id)s AND b.bill_date >= %(trending_start)s AND b.bill_date < %(tomorrow)s
+        GROUP BY COALESCE(bi.product_name, 'Unknown')
+        ORDER BY qty_sold DESC, total_revenue DESC
+        LIMIT 10
+    ), repeated_customers AS (
+        SELECT customer_name, COALESCE(customer_phone, '') as customer_phone,
+               COUNT(*) as invoice_count, SUM(total_amount) as total_revenue
+        FROM bills
+        WHERE user_id = %(user_id)s AND bill_date >= %(trend_start)s
+        AND customer_name IS NOT NULL AND customer_name != ''
+        GROUP BY customer_name, customer_phone
+        ORDER BY invoice_count DESC
+        LIMIT 10
+    )
+    SELECT 
+        COALESCE((SELECT revenue FROM today_sales), 0) as total_revenue,
+        COALESCE((SELECT invoice_count FROM today_sales), 0) as total_bills_today,
+        (SELECT COUNT(*) FROM bills WHERE user_id = %(user_id)s AND status = 'Pending') as pending_bills,
+        (SELECT COUNT(*) FROM customers WHERE user_id = %(user_id)s) as total_customers,
+        (SELECT today FROM expense_totals) as total_expenses_today,
+        (SELECT month FROM expense_totals) as total_expenses_month,
+        (SELECT COALESCE(json_agg(r ORDER BY r.month), '[]') FROM monthly_revenue r) as monthly_revenue,
+        (SELECT COALESCE(json_agg(e ORDER BY e.month), '[]') FROM monthly_expenses e) as monthly_expenses,
+        (SELECT COALESCE(json_agg(t ORDER BY t.sales DESC), '[]') FROM top_regions t) as top_regions,
+        (SELECT COALESCE(json_agg(p ORDER BY p.qty_sold DESC, p.total_revenue DESC), '[]') FROM trending_products p) as trending_products,
+        (SELECT COALESCE(json_agg(c ORDER BY c.invoice_count DESC), '[]') FROM repeated_customers c) as repeated_customers
+'''
+
+def _fetch_dashboard(conn, user_id, today=None):
+    today = today or date.today()
+    month_start, month_end = month_range(today)
+    return execute_query(conn, DASHBOARD_SQL, {
+        'user_id': user_id,
+        'today': today,
+        'tomorrow': today + timedelta(days=1),
+        'month_start': month_start,
+        'next_month_start': month_end + timedelta(days=1),
+        'trend_start': add_months(today, -DASHBOARD_MONTHS),
+        'trending_start': today - timedelta(days=TRENDING_PRODUCTS_DAYS),
+    }).fetchone()
+
 @analytics_api.route('/dashboard', methods=['GET'])
 @analytics_api.route('/analytics/dashboard', methods=['GET'])
 @api_error_handler
+@cached_response('dashboard', ttl=30, depends_on=('bills', 'expenses', 'customers'))
 def get_dashboard_data():
     user_id = get_current_user_id()
     conn = get_db_connection()
-    placeholder = get_placeholder()
-    
-    # Date query parts based on DB type
-    if is_postgresql():
-        date_today = "CURRENT_DATE"
-        month_str = "TO_CHAR(expense_date, 'YYYY-MM')"
-        month_str_now = "TO_CHAR(CURRENT_DATE, 'YYYY-MM')"
-        date_6_months = "CURRENT_DATE - INTERVAL '6 months'"
-        bill_month_str = "TO_CHAR(bill_date, 'YYYY-MM')"
-        exp_month_str = "TO_CHAR(expense_date, 'YYYY-MM')"
-    else:
-        date_today = "DATE('now')"
-        month_str = "strftime('%Y-%m', expense_date)"
-        month_str_now = "strftime('%Y-%m', 'now')"
-        date_6_months = "date('now', '-6 months')"
-        bill_month_str = "strftime('%Y-%m', bill_date)"
-        exp_month_str = "strftime('%Y-%m', expense_date)"
-
-    total_revenue = _fetch_today_revenue(conn, user_id)
-    total_bills_today = _fetch_today_bills_count(conn, user_id)
-    pending_bills = _fetch_pending_bills_count(conn, user_id)
-    total_customers = _fetch_total_customers(conn, user_id)
-    total_expenses_today = _fetch_today_expenses(conn, user_id)
-    total_expenses_month = _fetch_month_expenses(conn, user_id)
-    
-    monthly_revenue = _fetch_revenue_trends(conn, user_id, 'monthly', 6)
-    monthly_expenses = _fetch_expense_trends(conn, user_id, 'monthly', 6)
-    top_regions = _fetch_top_regions(conn, user_id, limit=10)
-    from datetime import date
-    today = date.today().strftime('%Y-%m-%d')
-    rows = _fetch_top_products(conn, user_id, '1970-01-01', today, limit=100)
-    rows_sorted = sorted(rows, key=lambda r: (r.get('total_quantity') or 0), reverse=True)[:10]
-    trending_products = [{
-        'product_name': r.get('product_name') or 'Unknown',
-        'qty_sold': r.get('total_quantity') or 0,
-        'total_revenue': r.get('total_revenue') or 0,
-    } for r in rows_sorted]
-    repeated_customers = fetch_repeated_customers(conn, user_id, limit=10)
+    dashboard = _fetch_dashboard(conn, user_id)
     conn.close()
     return jsonify({
-        'total_revenue': float(total_revenue),
-        'total_bills_today': total_bills_today,
-        'pending_bills': pending_bills,
-        'total_customers': total_customers,
-        'total_expenses_today': float(total_expenses_today),
-        'total_expenses_month': float(total_expenses_month),
-        'monthly_revenue': [dict(item) for item in monthly_revenue],
-        'monthly_expenses': [dict(item) for item in monthly_expenses],
-        'top_regions': [dict(item) for item in top_regions],
-        'trending_products': [dict(item) for item in trending_products],
-        'repeated_customers': [dict(item) for item in repeated_customers]
+        'total_revenue': float(dashboard['total_revenue']),
+        'total_bills_today': dashboard['total_bills_today'],
+        'pending_bills': dashboard['pending_bills'],
+        'total_customers': dashboard['total_customers'],
+        'total_expenses_today': float(dashboard['total_expenses_today']),
+        'total_expenses_month': float(dashboard['total_expenses_month']),
+        'monthly_revenue': dashboard['monthly_revenue'],
+        'monthly_expenses': dashboard['monthly_expenses'],
+        'top_regions': dashboard['top_regions'],
+        'trending_products': dashboard['trending_products'],
+        'repeated_customers': dashboard['repeated_customers']
     })
 
 @analytics_api.route('/customer-invoice-heatmap', methods=['GET'])
 @analytics_api.route('/analytics/customer-invoice-heatmap', methods=['GET'])
+@cached_response('customer-invoice-heatmap', ttl=300, depends_on=('bills', 'customers'))
 def customer_invoice_heatmap():
     user_id = get_current_user_id()
     conn = None
     try:
         conn = get_db_connection()
         placeholder = get_placeholder()
+        since = add_months(date.today(), -5).replace(day=1)
+        date_filter, date_params = date_range_filter('bill_date', since)
+        b_date_filter, b_date_params = date_range_filter('b.bill_date', since)
         if is_postgresql():
             months_rows = execute_query(conn, f"""
                 SELECT DISTINCT TO_CHAR(bill_date, 'YYYY-MM') as month
                 FROM bills
-                WHERE bill_date >= CURRENT_DATE - INTERVAL '5 months' AND user_id = {placeholder}
+                WHERE {date_filter} AND user_id = {placeholder}
                 ORDER BY month ASC
-            """, (user_id,)).fetchall()
+            """, date_params + [user_id]).fetchall()
             customers = execute_query(conn, f"""
                 SELECT c.customer_id, c.name, COUNT(b.bill_id) as total_invoices
                 FROM customers c
                 JOIN bills b ON c.customer_id = b.customer_id AND c.user_id = b.user_id
-                WHERE b.bill_date >= CURRENT_DATE - INTERVAL '5 months' AND b.user_id = {placeholder}
+                WHERE {b_date_filter} AND b.user_id = {placeholder}
                 GROUP BY c.customer_id, c.name
                 ORDER BY total_invoices DESC
-            """, (user_id,)).fetchall()
+            """, b_date_params + [user_id]).fetchall()
             counts_rows = execute_query(conn, f"""
                 SELECT customer_id,
                        TO_CHAR(bill_date, 'YYYY-MM') as month,
                        COUNT(*) as count
                 FROM bills
-                WHERE bill_date >= CURRENT_DATE - INTERVAL '5 months' AND user_id = {placeholder}
+                WHERE {date_filter} AND user_id = {placeholder}
                 GROUP BY customer_id, TO_CHAR(bill_date, 'YYYY-MM')
-            """, (user_id,)).fetchall()
+            """, date_params + [user_id]).fetchall()
         else:
             months_rows = execute_query(conn, f"""
                 SELECT DISTINCT strftime('%Y-%m', bill_date) as month
                 FROM bills
-                WHERE bill_date >= date('now', '-5 months', 'start of month') AND user_id = {placeholder}
+                WHERE {date_filter} AND user_id = {placeholder}
                 ORDER BY month ASC
-            """, (user_id,)).fetchall()
+            """, date_params + [user_id]).fetchall()
             customers = execute_query(conn, f"""
                 SELECT c.customer_id, c.name, COUNT(b.bill_id) as total_invoices
                 FROM customers c
                 JOIN bills b ON c.customer_id = b.customer_id AND c.user_id = b.user_id
-                WHERE b.bill_date >= date('now', '-5 months', 'start of month') AND b.user_id = {placeholder}
+                WHERE {b_date_filter} AND b.user_id = {placeholder}
                 GROUP BY c.customer_id, c.name
                 ORDER BY total_invoices DESC
-            """, (user_id,)).fetchall()
+            """, b_date_params + [user_id]).fetchall()
             counts_rows = execute_query(conn, f"""
                 SELECT customer_id,
                        strftime('%Y-%m', bill_date) as month,
                        COUNT(*) as count
                 FROM bills
-                WHERE bill_date >= date('now', '-5 months', 'start of month') AND user_id = {placeholder}
+                WHERE {date_filter} AND user_id = {placeholder}
                 GROUP BY customer_id, strftime('%Y-%m', bill_date)
-            """, (user_id,)).fetchall()
+            """, date_params + [user_id]).fetchall()
         months = []
         for row in months_rows:
             if isinstance(row, tuple):
@@ -528,6 +456,7 @@ def customer_invoice_heatmap():
 @analytics_api.route('/employee-analytics', methods=['GET'])
 @analytics_api.route('/analytics/employee-analytics', methods=['GET'])
 @api_error_handler
+@cached_response('employee-analytics', ttl=120, depends_on=('bills', 'employees'))
 def employee_analytics():
     user_id = get_current_user_id()
     conn = get_db_connection()
@@ -559,6 +488,7 @@ def employee_analytics():
 
 @analytics_api.route('/analytics/financial-overview', methods=['GET'])
 @api_error_handler
+@cached_response('financial-overview', ttl=120, depends_on=('bills', 'expenses'))
 def get_financial_overview():
     """Get comprehensive financial overview with key metrics"""
     user_id = get_current_user_id()
@@ -569,18 +499,8 @@ def get_financial_overview():
     try:
         # Revenue calculations
         placeholder = get_placeholder()
-        revenue_data = execute_query(conn, f'''
-            SELECT 
-                COUNT(*) as total_invoices,
-                SUM(total_amount) as total_revenue,
-                SUM(subtotal) as gross_revenue,
-                SUM(vat_amount) as total_vat,
-                AVG(total_amount) as avg_invoice_value,
-                COUNT(DISTINCT customer_id) as unique_customers
-            FROM bills 
-            WHERE user_id = {placeholder} 
-            AND DATE(bill_date) BETWEEN {placeholder} AND {placeholder}
-        ''', (user_id, from_date, to_date)).fetchone()
+        expense_filter, expense_params = date_range_filter('expense_date', from_date, to_date)
+        revenue_data = fetch_sales_summary(conn, user_id, from_date, to_date)
         
         # Expense calculations
         expense_data = execute_query(conn, f'''
@@ -590,14 +510,14 @@ def get_financial_overview():
                 AVG(amount) as avg_expense_amount
             FROM expenses 
             WHERE user_id = {placeholder} 
-            AND DATE(expense_date) BETWEEN {placeholder} AND {placeholder}
-        ''', (user_id, from_date, to_date)).fetchone()
+            AND {expense_filter}
+        ''', [user_id] + expense_params).fetchone()
         
         # Calculate profit metrics
         total_revenue = float(revenue_data['total_revenue'] or 0)
         total_expenses = float(expense_data['total_expenses_amount'] or 0)
         net_profit = total_revenue - total_expenses
-        gross_profit = float(revenue_data['gross_revenue'] or 0) - total_expenses
+        gross_profit = float(revenue_data['total_subtotal'] or 0) - total_expenses
         
         # Calculate margins
         gross_margin = (gross_profit / total_revenue * 100) if total_revenue > 0 else 0
@@ -622,7 +542,7 @@ def get_financial_overview():
             },
             'revenue': {
                 'total_revenue': total_revenue,
-                'gross_revenue': float(revenue_data['gross_revenue'] or 0),
+                'gross_revenue': float(revenue_data['total_subtotal'] or 0),
                 'total_vat': float(revenue_data['total_vat'] or 0),
                 'total_invoices': revenue_data['total_invoices'],
                 'avg_invoice_value': float(revenue_data['avg_invoice_value'] or 0),
@@ -649,6 +569,7 @@ def get_financial_overview():
 
 @analytics_api.route('/analytics/revenue-trends', methods=['GET'])
 @api_error_handler
+@cached_response('revenue-trends', ttl=120, depends_on=('bills',))
 def get_revenue_trends():
     """Get revenue trends over time"""
     user_id = get_current_user_id()
@@ -668,6 +589,7 @@ def get_revenue_trends():
 @analytics_api.route('/expense-trends', methods=['GET'])
 @analytics_api.route('/analytics/expense-trends', methods=['GET'])
 @api_error_handler
+@cached_response('expense-trends', ttl=120, depends_on=('expenses',))
 def get_expense_trends():
     """Get expense trends over time"""
     user_id = get_current_user_id()
@@ -686,6 +608,7 @@ def get_expense_trends():
 
 @analytics_api.route('/analytics/cash-flow', methods=['GET'])
 @api_error_handler
+@cached_response('cash-flow', ttl=120, depends_on=('bills', 'expenses'))
 def get_cash_flow():
     """Get cash flow analysis"""
     user_id = get_current_user_id()
@@ -696,15 +619,8 @@ def get_cash_flow():
     try:
         # Cash inflows (revenue)
         placeholder = get_placeholder()
-        cash_inflows = execute_query(conn, f'''
-            SELECT 
-                SUM(total_amount) as total_inflow,
-                SUM(advance_paid) as advance_payments,
-                SUM(balance_amount) as pending_payments
-            FROM bills 
-            WHERE user_id = {placeholder} 
-            AND DATE(bill_date) BETWEEN {placeholder} AND {placeholder}
-        ''', (user_id, from_date, to_date)).fetchone()
+        expense_filter, expense_params = date_range_filter('expense_date', from_date, to_date)
+        cash_inflows = fetch_sales_summary(conn, user_id, from_date, to_date)
         
         # Cash outflows (expenses)
         cash_outflows = execute_query(conn, f'''
@@ -713,14 +629,14 @@ def get_cash_flow():
                 COUNT(*) as expense_count
             FROM expenses 
             WHERE user_id = {placeholder} 
-            AND DATE(expense_date) BETWEEN {placeholder} AND {placeholder}
-        ''', (user_id, from_date, to_date)).fetchone()
+            AND {expense_filter}
+        ''', [user_id] + expense_params).fetchone()
         
         payment_methods = fetch_payment_methods(conn, user_id, from_date, to_date)
         
         conn.close()
         
-        total_inflow = float(cash_inflows['total_inflow'] or 0)
+        total_inflow = float(cash_inflows['total_revenue'] or 0)
         total_outflow = float(cash_outflows['total_outflow'] or 0)
         net_cash_flow = total_inflow - total_outflow
         
@@ -746,6 +662,7 @@ def get_cash_flow():
 @analytics_api.route('/business-metrics', methods=['GET'])
 @analytics_api.route('/analytics/business-metrics', methods=['GET'])
 @api_error_handler
+@cached_response('business-metrics', ttl=120, depends_on=('bills', 'expenses', 'customers'))
 def get_business_metrics():
     """Get key business performance metrics"""
     user_id = get_current_user_id()
@@ -755,6 +672,7 @@ def get_business_metrics():
     
     try:
         placeholder = get_placeholder()
+        bill_filter, bill_params = date_range_filter('bill_date', from_date, to_date)
         
         # Customer metrics
         if is_postgresql():
@@ -767,8 +685,8 @@ def get_business_metrics():
                     SUM(total_amount) / COUNT(DISTINCT customer_id) as revenue_per_customer
                 FROM bills 
                 WHERE user_id = {placeholder} 
-                AND DATE(bill_date) BETWEEN {placeholder} AND {placeholder}
-            ''', (user_id, from_date, to_date)).fetchone()
+                AND {bill_filter}
+            ''', [user_id] + bill_params).fetchone()
         else:
             customer_metrics = execute_query(conn, f'''
             SELECT 
@@ -779,8 +697,8 @@ def get_business_metrics():
                 SUM(total_amount) / COUNT(DISTINCT customer_id) as revenue_per_customer
             FROM bills 
                 WHERE user_id = {placeholder} 
-                AND DATE(bill_date) BETWEEN {placeholder} AND {placeholder}
-        ''', (user_id, from_date, to_date)).fetchone()
+                AND {bill_filter}
+        ''', [user_id] + bill_params).fetchone()
         
         # Employee performance
         employee_performance = _fetch_employee_performance(conn, user_id, from_date, to_date)
@@ -812,6 +730,7 @@ def get_business_metrics():
 
 @analytics_api.route('/analytics/expense-breakdown', methods=['GET'])
 @api_error_handler
+@cached_response('expense-breakdown', ttl=120, depends_on=('expenses',))
 def get_expense_breakdown():
     """Get detailed expense breakdown by category"""
     user_id = get_current_user_id()
@@ -821,6 +740,7 @@ def get_expense_breakdown():
     
     try:
         placeholder = get_placeholder()
+        expense_filter, expense_params = date_range_filter('e.expense_date', from_date, to_date)
         
         # Expense breakdown by category
         category_breakdown = execute_query(conn, f'''
@@ -835,10 +755,10 @@ def get_expense_breakdown():
             FROM expenses e
             JOIN expense_categories ec ON e.category_id = ec.category_id
             WHERE e.user_id = {placeholder} 
-            AND DATE(e.expense_date) BETWEEN {placeholder} AND {placeholder}
+            AND {expense_filter}
             GROUP BY ec.category_id, ec.category_name, ec.description
             ORDER BY total_amount DESC
-        ''', (user_id, from_date, to_date)).fetchall()
+        ''', [user_id] + expense_params).fetchall()
         
         monthly_trends = _fetch_monthly_expense_trends_by_category(conn, user_id, months=6)
         
@@ -859,6 +779,7 @@ def get_expense_breakdown():
 
 @analytics_api.route('/analytics/top-products', methods=['GET'])
 @api_error_handler
+@cached_response('top-products', ttl=120, depends_on=('bills',))
 def get_top_products():
     """Get top performing products by revenue"""
     user_id = get_current_user_id()
@@ -0,0 +1,154 @@
+"""
+Fingerprinted static assets.
+
+At startup (or with `python -m api.assets`) every file under static/ is copied
+to static/build/ under a content-hashed name (js/app.js ->
+js/app.3f2a1b9c0d.js) together with precompressed .gz and, when the brotli
+package is installed, .br variants. static/build/manifest.json maps logical
+names to hashed ones. Existing hashed files are kept, so a rebuild only writes
+what changed.
+
+Templates link assets with {{ asset_url('js/app.js') }}. Hashed URLs are
+served with `Cache-Control: public, max-age=31536000, immutable`: a changed
+file gets a new URL, so browsers never need to revalidate. In debug mode, or
+with ASSETS_FINGERPRINT=0, asset_url returns the plain /static/ URL so edits
+show up without a rebuild.
+
+Configuration (environment variables):
+    ASSETS_FINGERPRINT   0 serves plain /static/ URLs (default 1)
+
+Usage:
+    python -m api.assets        # build static/build and the manifest
+"""
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import sys
+
+from flask import request, send_file, abort, url_for
+from werkzeug.utils import safe_join
+
+# Try to import brotli (optional .br variants)
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'static')
+BUILD_DIR = os.path.join(STATIC_DIR, 'build')
+MANIFEST_FILE = 'manifest.json'
+HASH_LENGTH = 10
+COMPRESSIBLE_EXTENSIONS = ('.js', '.css', '.json', '.svg', '.html', '.txt', '.csv', '.map')
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# Preferred first when the browser accepts several.
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+_manifest = {}
+_fingerprint = True
+
+
+def _write(path, data):
+    """Write atomically, so concurrent builds in several workers never serve a partial file."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _compressed_variants(data):
+    yield '.gz', lambda: gzip.compress(data, compresslevel=9, mtime=0)
+    if BROTLI_AVAILABLE:
+        yield '.br', lambda: brotli.compress(data, quality=11)
+
+
+def build(static_dir=STATIC_DIR, build_dir=BUILD_DIR):
+    """Fingerprint every static file into build_dir, write the manifest and return it."""
+    manifest = {}
+    for root, dirs, files in os.walk(static_dir):
+        dirs[:] = sorted(d for d in dirs if os.path.join(root, d) != build_dir)
+        for name in sorted(files):
+            source = os.path.join(root, name)
+            logical = os.path.relpath(source, static_dir).replace(os.sep, '/')
+            with open(source, 'rb') as f:
+                data = f.read()
+            stem, ext = os.path.splitext(logical)
+            hashed = f'{stem}.{hashlib.sha256(data).hexdigest()[:HASH_LENGTH]}{ext}'
+            target = os.path.join(build_dir, hashed)
+            if not os.path.exists(target):
+                _write(target, data)
+            if ext.lower() in COMPRESSIBLE_EXTENSIONS:
+                for suffix, compress in _compressed_variants(data):
+                    if not os.path.exists(target + suffix):
+                        compressed = compress()
+                        if len(compressed) < len(data):
+                            _write(target + suffix, compressed)
+            manifest[logical] = hashed
+    _write(os.path.join(build_dir, MANIFEST_FILE), json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    return manifest
+
+
+def load_manifest(build_dir=BUILD_DIR):
+    try:
+        with open(os.path.join(build_dir, MANIFEST_FILE), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def asset_url(name):
+    """URL of a static file: the fingerprinted copy when there is one, else /static/<name>."""
+    hashed = _manifest.get(name) if _fingerprint else None
+    if hashed:
+        return url_for('pages_api.hashed_static', filename=hashed)
+    return url_for('static', filename=name)
+
+
+def send_asset(filename):
+    """Serve a fingerprinted file, precompressed when the browser accepts it."""
+    path = safe_join(BUILD_DIR, filename)
+    if path is None or filename == MANIFEST_FILE or not os.path.isfile(path):
+        abort(404)
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    encoding = None
+    for candidate, suffix in ENCODINGS:
+        if request.accept_encodings[candidate] > 0 and os.path.isfile(path + suffix):
+            encoding, path = candidate, path + suffix
+            break
+    response = send_file(path, mimetype=mimetype, conditional=True)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    return response
+
+
+def init_app(app):
+    """Build the fingerprinted assets and expose asset_url() to templates."""
+    global _manifest, _fingerprint
+    _fingerprint = not app.debug and os.getenv('ASSETS_FINGERPRINT', '1').lower() in ('1', 'true', 'yes')
+    if _fingerprint:
+        try:
+            _manifest = build()
+        except OSError as e:
+            # A read-only deploy can ship a prebuilt static/build instead.
+            logger.warning(f'Could not build static assets ({e}); using the existing manifest')
+            _manifest = load_manifest()
+    app.add_template_global(asset_url, 'asset_url')
+
+
+def main():
+    manifest = build()
+    print(f"Fingerprinted {len(manifest)} files into {BUILD_DIR} (brotli {'on' if BROTLI_AVAILABLE else 'off'})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
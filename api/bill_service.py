@@ -0,0 +1,312 @@
+"""
+Bill creation service.
+
+Writes the customer upsert, bill header, bill items, loyalty accrual and
+daily sales rollup for one ticket in a single transaction with a single
+commit. A 20-item ticket costs a fixed handful of round trips instead of one
+or more per item.
+"""
+import random
+import re
+import string
+from datetime import date
+
+from psycopg2.extras import execute_values
+
+from db.connection import get_placeholder
+from db.sales_rollup import refresh_days
+
+MAX_BILL_NUMBER_ATTEMPTS = 3
+
+
+class DuplicateBillNumber(Exception):
+    """Raised when no free bill number could be claimed for the new bill."""
+
+
+# Numbers in the shop's own BILL-YYYYMMDD-NNN series are always allocated
+# server side; anything else is a custom number typed by the user.
+BILL_NUMBER_PATTERN = re.compile(r'^BILL-\d{8}-\d+$')
+
+
+def format_bill_number(day, seq):
+    return f"BILL-{day.strftime('%Y%m%d')}-{seq:03d}"
+
+
+def _seed_counter_sql(placeholder):
+    # Highest sequence already used today, so the counter continues any
+    # numbers written before it existed (including timestamp fallbacks).
+    return f'''
+        SELECT COALESCE(MAX(CAST(SUBSTRING(bill_number FROM '^BILL-[0-9]{{8}}-([0-9]{{1,9}})$') AS INTEGER)), 0) AS last_value
+        FROM bills
+        WHERE user_id = {placeholder} AND bill_number LIKE {placeholder}
+    '''
+
+
+def allocate_bill_number(cursor, user_id, day=None):
+    """Claim the next bill number for a shop and day.
+
+    Must run inside the bill transaction: the counter row stays locked until
+    commit and a rollback returns the number, so the series has no gaps.
+    Steady state is a single primary-key UPDATE regardless of bill volume.
+    """
+    placeholder = get_placeholder()
+    day = day or date.today()
+    cursor.execute(f'''
+        UPDATE bill_number_counters SET last_value = last_value + 1
+        WHERE user_id = {placeholder} AND bill_day = {placeholder}
+        RETURNING last_value
+    ''', (user_id, day))
+    row = cursor.fetchone()
+    if row is None:
+        cursor.execute(f'''
+            INSERT INTO bill_number_counters (user_id, bill_day, last_value)
+            SELECT {placeholder}, {placeholder}, ({_seed_counter_sql(placeholder)}) + 1
+            ON CONFLICT (user_id, bill_day)
+            DO UPDATE SET last_value = bill_number_counters.last_value + 1
+            RETURNING last_value
+        ''', (user_id, day, user_id, f"BILL-{day.strftime('%Y%m%d')}-%"))
+        row = cursor.fetchone()
+    return format_bill_number(day, row['last_value'])
+
+
+def peek_bill_number(cursor, user_id, day=None):
+    """Return the number the next bill will most likely get, without claiming it."""
+    placeholder = get_placeholder()
+    day = day or date.today()
+    cursor.execute(f'''
+        SELECT last_value FROM bill_number_counters
+        WHERE user_id = {placeholder} AND bill_day = {placeholder}
+    ''', (user_id, day))
+    row = cursor.fetchone()
+    if row is None:
+        cursor.execute(_seed_counter_sql(placeholder), (user_id, f"BILL-{day.strftime('%Y%m%d')}-%"))
+        row = cursor.fetchone()
+    return format_bill_number(day, row['last_value'] + 1)
+
+
+def load_billing_settings(conn, user_id):
+    """Fetch the VAT mode and default master for a shop in one query."""
+    placeholder = get_placeholder()
+    cursor = conn.cursor()
+    cursor.execute(f'''
+        SELECT s.setting_id, s.include_vat_in_price,
+               (SELECT employee_id FROM employees
+                WHERE user_id = {placeholder} AND is_active = TRUE
+                ORDER BY name LIMIT 1) AS default_master_id
+        FROM (SELECT 1) AS one
+        LEFT JOIN LATERAL (
+            SELECT setting_id, include_vat_in_price FROM shop_settings
+            WHERE user_id = {placeholder} LIMIT 1
+        ) s ON TRUE
+    ''', (user_id, user_id))
+    row = cursor.fetchone()
+    include_vat_in_price = bool(row['include_vat_in_price']) if row['setting_id'] is not None else True
+    return include_vat_in_price, row['default_master_id']
+
+
+def upsert_customer(cursor, user_id, customer):
+    """Find the customer by phone or create it; returns (customer_id, created).
+
+    customer['phone'] must already be in E.164 form
+    (api.phone_numbers.normalize_phone); it is also stored as phone_e164,
+    the column customers are matched on. Existing customers are left untouched.
+    """
+    placeholder = get_placeholder()
+    customer = dict(customer, phone_e164=customer['phone'])
+    columns = ['user_id'] + list(customer)
+    updates = ', '.join(f'{col} = EXCLUDED.{col}' for col in customer if col not in ('phone', 'phone_e164'))
+    cursor.execute(f'''
+        WITH existing AS (
+            SELECT customer_id FROM customers
+            WHERE user_id = {placeholder} AND phone_e164 = {placeholder}
+            LIMIT 1
+        ), created AS (
+            INSERT INTO customers ({', '.join(columns)})
+            SELECT {', '.join([placeholder] * len(columns))}
+            WHERE NOT EXISTS (SELECT 1 FROM existing)
+            ON CONFLICT (user_id, phone_e164) DO UPDATE SET {updates}
+            RETURNING customer_id
+        )
+        SELECT customer_id, FALSE AS created FROM existing
+        UNION ALL
+        SELECT customer_id, TRUE AS created FROM created
+    ''', [user_id, customer['phone_e164'], user_id] + list(customer.values()))
+    row = cursor.fetchone()
+    return row['customer_id'], row['created']
+
+
+def insert_bill(cursor, user_id, bill):
+    """Insert the bill header; returns (bill_id, bill_number, bill_date).
+
+    Series numbers are allocated from the per-day counter; a custom number
+    that is already taken is replaced with the next series number.
+    """
+    placeholder = get_placeholder()
+    bill = dict(bill)
+    columns = ['user_id'] + list(bill)
+    sql = f'''
+        INSERT INTO bills ({', '.join(columns)})
+        VALUES ({', '.join([placeholder] * len(columns))})
+        ON CONFLICT (user_id, bill_number) DO NOTHING
+        RETURNING bill_id, bill_date
+    '''
+    for attempt in range(MAX_BILL_NUMBER_ATTEMPTS):
+        number = bill.get('bill_number')
+        if not number or attempt > 0 or BILL_NUMBER_PATTERN.match(number):
+            bill['bill_number'] = allocate_bill_number(cursor, user_id)
+        cursor.execute(sql, [user_id] + list(bill.values()))
+        row = cursor.fetchone()
+        if row:
+            return row['bill_id'], bill['bill_number'], row['bill_date']
+    raise DuplicateBillNumber('Failed to create bill due to duplicate bill number. Please try again.')
+
+
+def insert_bill_items(cursor, user_id, bill_id, items):
+    """Insert all items of a bill with one multi-row INSERT."""
+    if not items:
+        return
+    columns = ['user_id', 'bill_id'] + list(items[0])
+    rows = [[user_id, bill_id] + [item[col] for col in columns[2:]] for item in items]
+    execute_values(cursor, f'''
+        INSERT INTO bill_items ({', '.join(columns)}) VALUES %s
+    ''', rows, page_size=len(rows))
+
+
+def accrue_loyalty(cursor, user_id, customer_id, bill_id, bill_number, total_amount, enroll=False):
+    """Enroll (optionally) and credit loyalty points for a bill; returns points earned.
+
+    Loyalty is best effort: it runs under a savepoint so a failure never
+    aborts the bill itself.
+    """
+    placeholder = get_placeholder()
+    sql = 'SAVEPOINT bill_loyalty;'
+    params = []
+    if enroll:
+        referral_code = ''.join(random.choices(string.ascii_uppercase + string.digits, k=8))
+        sql += f'''
+            INSERT INTO customer_loyalty (
+                user_id, customer_id, tier_level, referral_code,
+                total_points, available_points, lifetime_points, join_date, is_active
+            )
+            SELECT {placeholder}, {placeholder}, 'Bronze', {placeholder}, 0, 0, 0, CURRENT_DATE, true
+            WHERE NOT EXISTS (
+                SELECT 1 FROM customer_loyalty WHERE user_id = {placeholder} AND customer_id = {placeholder}
+            );
+        '''
+        params += [user_id, customer_id, referral_code, user_id, customer_id]
+    sql += f'''
+        WITH member AS (
+            SELECT cl.customer_id, cl.tier_level,
+                   COALESCE(NULLIF(lc.points_per_aed, 0), 1.0) AS points_per_aed
+            FROM customer_loyalty cl
+            LEFT JOIN loyalty_config lc ON cl.user_id = lc.user_id
+            WHERE cl.user_id = {placeholder} AND cl.customer_id = {placeholder}
+            LIMIT 1
+        ), earned AS (
+            SELECT m.customer_id,
+                   TRUNC(TRUNC({placeholder} * m.points_per_aed) * COALESCE(NULLIF((
+                       SELECT bonus_points_multiplier FROM loyalty_tiers
+                       WHERE user_id = {placeholder} AND tier_level = m.tier_level
+                       LIMIT 1
+                   ), 0), 1.0))::integer AS points
+            FROM member m
+        ), logged AS (
+            INSERT INTO loyalty_transactions (
+                user_id, customer_id, bill_id, points_earned, transaction_type, description
+            )
+            SELECT {placeholder}, customer_id, {placeholder}, points, 'earned', {placeholder} FROM earned
+        ), credited AS (
+            UPDATE customer_loyalty cl SET
+                available_points = cl.available_points + e.points,
+                total_points = cl.total_points + e.points,
+                last_purchase_date = CURRENT_DATE,
+                total_purchases = cl.total_purchases + 1,
+                total_spent = cl.total_spent + {placeholder}
+            FROM earned e
+            WHERE cl.customer_id = e.customer_id
+        )
+        SELECT points FROM earned
+    '''
+    params += [
+        user_id, customer_id,
+        total_amount,
+        user_id,
+        user_id, bill_id, f'Points earned from bill #{bill_number}',
+        total_amount,
+    ]
+    try:
+        cursor.execute(sql, params)
+        row = cursor.fetchone()
+        return row['points'] if row else 0
+    except Exception:
+        cursor.execute('ROLLBACK TO SAVEPOINT bill_loyalty')
+        return 0
+
+
+def create_bill(conn, user_id, customer, bill, items, loyalty=True):
+    """Create a bill with its customer, items, loyalty accrual and sales rollup in one transaction.
+
+    `customer` maps customer columns (must include an E.164 'phone'), `bill` maps bill
+    columns and `items` is a list of bill_items column dicts sharing the same
+    keys. Returns a dict with bill_id, bill_number and loyalty_points_earned.
+    """
+    cursor = conn.cursor()
+    try:
+        customer_id, created = upsert_customer(cursor, user_id, customer)
+        bill = dict(bill, customer_id=customer_id)
+        bill_id, bill_number, bill_date = insert_bill(cursor, user_id, bill)
+        insert_bill_items(cursor, user_id, bill_id, items)
+        refresh_days(cursor, user_id, [bill_date])
+        points = 0
+        if loyalty:
+            points = accrue_loyalty(cursor, user_id, customer_id, bill_id, bill_number,
+                                    bill['total_amount'], enroll=created)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return {
+        'bill_id': bill_id,
+        'bill_number': bill_number,
+        'loyalty_points_earned': points,
+    }
+
+
+def record_payment(conn, user_id, bill_id, advance_paid, balance_amount, status):
+    """Store a bill's new payment state and refresh its rollup day; returns the updated bill."""
+    placeholder = get_placeholder()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f'''
+            UPDATE bills SET advance_paid = {placeholder}, balance_amount = {placeholder}, status = {placeholder}
+            WHERE bill_id = {placeholder} AND user_id = {placeholder}
+            RETURNING *
+        ''', (advance_paid, balance_amount, status, bill_id, user_id))
+        bill = cursor.fetchone()
+        if bill:
+            refresh_days(cursor, user_id, [bill['bill_date']])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return bill
+
+
+def delete_bill(conn, user_id, bill_id):
+    """Delete a bill and its items and refresh its rollup day; returns False if not found."""
+    placeholder = get_placeholder()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f'''
+            DELETE FROM bill_items WHERE bill_id = {placeholder} AND user_id = {placeholder};
+            DELETE FROM bills WHERE bill_id = {placeholder} AND user_id = {placeholder}
+            RETURNING bill_date
+        ''', (bill_id, user_id, bill_id, user_id))
+        row = cursor.fetchone()
+        if row:
+            refresh_days(cursor, user_id, [row['bill_date']])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return row is not None
@@ -1,67 +1,151 @@
 from flask import Blueprint, request, jsonify, session
 import logging
 import json
-from db.connection import get_db_connection, get_placeholder, execute_query, execute_update
+import re
+from collections import Counter
+from db.connection import get_db_connection, get_placeholder, execute_query
 from api.utils import get_current_user_id
-from difflib import SequenceMatcher
+from api.product_matcher import ProductMatcher
+from api.product_catalog import invalidates_catalog
+from psycopg2.extras import execute_values
 
 catalog_api = Blueprint('catalog_api', __name__)
 logger = logging.getLogger(__name__)
 
+# pg_advisory_xact_lock(CATALOG_IMPORT_LOCK, user_id) serializes a shop's catalog imports
+CATALOG_IMPORT_LOCK = 72520042
+
+# Closest matches returned per scanned item (the scanner shows the top 3)
+SIMILAR_PRODUCTS_LIMIT = 5
+
+# Name patterns: garment keywords and materials (plural forms too) and
+# standalone size tokens, so the 's' of "silk shirts" or "men's" is not a size
+GARMENT_KEYWORDS = [
+    'shirt', 'pants', 'dress', 'suit', 'coat', 'blazer', 'kurti', 'saree',
+    'lehenga', 'gown', 'abaya', 'kaftan', 'anarkali', 'palazzo', 'trouser',
+    'blouse', 'salwar', 'patiala', 'sharara', 'gharara', 'jumpsuit'
+]
+SIZE_PATTERNS = ['xs', 's', 'm', 'l', 'xl', 'xxl', 'plus']
+MATERIAL_PATTERNS = ['cotton', 'silk', 'polyester', 'wool', 'linen', 'denim']
+
+NAME_PATTERNS = {keyword: keyword for keyword in GARMENT_KEYWORDS}
+NAME_PATTERNS.update({material: f'material_{material}' for material in MATERIAL_PATTERNS})
+SIZES = {size: f'size_{size}' for size in SIZE_PATTERNS}
+
+def _alternation(words):
+    return '|'.join(re.escape(word) for word in sorted(words, key=len, reverse=True))
+
+NAME_PATTERN_RE = re.compile(
+    rf"(?<![\w'’])(?:({_alternation(NAME_PATTERNS)})(?:e?s)?|({_alternation(SIZES)}))(?![\w'’])"
+)
+
 # Helper Functions
-def analyze_catalog_data(catalog_data):
-    """Analyze catalog data to extract patterns and categories"""
-    analysis = {
-        'total_items': len(catalog_data),
-        'categories': {},
-        'price_ranges': {},
-        'common_patterns': []
-    }
+class CatalogAnalyzer:
+    """Single-pass catalog analysis.
+
+    Feed items with add(); statistics are running totals per category,
+    price range and pattern, so only the products to suggest grow with the
+    catalog.
+    """
     
-    for item in catalog_data:
-        name = item.get('name', '').lower()
+    def __init__(self):
+        self.total_items = 0
+        self.categories = {}
+        self.price_ranges = {}
+        self.patterns = Counter()
+        self.products = {}  # category -> products to suggest
+    
+    def add(self, item):
+        name = item.get('name', '')
         price = item.get('price', 0)
         category = item.get('category', '')
+        self.total_items += 1
         
         # Analyze by category
         if category:
-            if category not in analysis['categories']:
-                analysis['categories'][category] = {
+            cat_data = self.categories.get(category)
+            if cat_data is None:
+                cat_data = self.categories[category] = {
                     'count': 0,
-                    'avg_price': 0,
-                    'min_price': float('inf'),
-                    'max_price': 0,
-                    'products': []
+                    'total_price': 0,
+                    'min_price': price,
+                    'max_price': price
                 }
-            
-            cat_data = analysis['categories'][category]
+                self.products[category] = []
             cat_data['count'] += 1
-            cat_data['products'].append({
-                'name': item.get('name', ''),
-                'price': price,
-                'description': item.get('description', '')
-            })
-            
-            # Update price statistics
-            total_price = cat_data['avg_price'] * (cat_data['count'] - 1) + price
-            cat_data['avg_price'] = total_price / cat_data['count']
+            cat_data['total_price'] += price
             cat_data['min_price'] = min(cat_data['min_price'], price)
             cat_data['max_price'] = max(cat_data['max_price'], price)
+            self.products[category].append({
+                'name': name,
+                'rate': price,
+                'description': item.get('description', '')
+            })
         
         # Analyze price ranges
         price_range = get_price_range(price)
-        if price_range not in analysis['price_ranges']:
-            analysis['price_ranges'][price_range] = 0
-        analysis['price_ranges'][price_range] += 1
+        self.price_ranges[price_range] = self.price_ranges.get(price_range, 0) + 1
         
         # Extract common patterns from product names
-        patterns = extract_name_patterns(name)
-        analysis['common_patterns'].extend(patterns)
+        self.patterns.update(extract_name_patterns(name))
     
-    # Remove duplicates from patterns
-    analysis['common_patterns'] = list(set(analysis['common_patterns']))
+    def analysis(self):
+        """Statistics in the /api/catalog/scan response shape; patterns most frequent first"""
+        return {
+            'total_items': self.total_items,
+            'categories': {
+                category: {
+                    'count': data['count'],
+                    'avg_price': data['total_price'] / data['count'],
+                    'min_price': data['min_price'],
+                    'max_price': data['max_price']
+                }
+                for category, data in self.categories.items()
+            },
+            'price_ranges': dict(self.price_ranges),
+            'common_patterns': [pattern for pattern, _ in self.patterns.most_common()]
+        }
     
-    return analysis
+    def suggestions(self):
+        """Generate product type and product suggestions based on analysis"""
+        suggestions = {
+            'product_types': [],
+            'recommendations': []
+        }
+        
+        # Create product types from categories
+        for category, data in self.categories.items():
+            if data['count'] >= 2:  # Only suggest types with multiple products
+                suggestions['product_types'].append({
+                    'name': category.title(),
+                    'description': f'Products in {category} category with {data["count"]} items',
+                    'products': self.products[category]
+                })
+        
+        # Generate recommendations based on patterns
+        for pattern, _ in self.patterns.most_common(10):  # Limit to top 10 patterns
+            suggestions['recommendations'].append({
+                'pattern': pattern,
+                'suggestion': f'Consider creating a "{pattern.title()}" product type'
+            })
+        
+        # Price range recommendations
+        for price_range, count in self.price_ranges.items():
+            if count >= 3:
+                suggestions['recommendations'].append({
+                    'price_range': price_range,
+                    'count': count,
+                    'suggestion': f'{count} products in {price_range} range - consider bulk pricing'
+                })
+        
+        return suggestions
+
+def analyze_catalog_data(catalog_data):
+    """Analyze catalog items (any iterable) in one pass"""
+    analyzer = CatalogAnalyzer()
+    for item in catalog_data:
+        analyzer.add(item)
+    return analyzer
 
 def get_price_range(price):
     """Categorize price into ranges"""
@@ -77,83 +161,9 @@ def get_price_range(price):
         return 'Luxury (>100)'
 
 def extract_name_patterns(name):
-    """Extract common patterns from product names"""
-    patterns = []
-    
-    # Common keywords that might indicate product types
-    keywords = [
-        'shirt', 'pants', 'dress', 'suit', 'coat', 'blazer', 'kurti', 'saree',
-        'lehenga', 'gown', 'abaya', 'kaftan', 'anarkali', 'palazzo', 'trouser',
-        'blouse', 'salwar', 'patiala', 'sharara', 'gharara', 'jumpsuit'
-    ]
-    
-    for keyword in keywords:
-        if keyword in name:
-            patterns.append(keyword)
-    
-    # Extract size patterns
-    size_patterns = ['xs', 's', 'm', 'l', 'xl', 'xxl', 'plus']
-    for size in size_patterns:
-        if size in name:
-            patterns.append(f'size_{size}')
-    
-    # Extract material patterns
-    material_patterns = ['cotton', 'silk', 'polyester', 'wool', 'linen', 'denim']
-    for material in material_patterns:
-        if material in name:
-            patterns.append(f'material_{material}')
-    
-    return patterns
-
-def generate_product_suggestions(analysis):
-    """Generate product type and product suggestions based on analysis"""
-    suggestions = {
-        'product_types': [],
-        'recommendations': []
-    }
-    
-    # Create product types from categories
-    for category, data in analysis['categories'].items():
-        if data['count'] >= 2:  # Only suggest types with multiple products
-            type_suggestion = {
-                'name': category.title(),
-                'description': f'Products in {category} category with {data["count"]} items',
-                'products': []
-            }
-            
-            # Suggest products for this type
-            for product in data['products']:
-                product_suggestion = {
-                    'name': product['name'],
-                    'rate': product['price'],
-                    'description': product.get('description', '')
-                }
-                type_suggestion['products'].append(product_suggestion)
-            
-            suggestions['product_types'].append(type_suggestion)
-    
-    # Generate recommendations based on patterns
-    if analysis['common_patterns']:
-        pattern_recommendations = []
-        for pattern in analysis['common_patterns'][:10]:  # Limit to top 10 patterns
-            pattern_recommendations.append({
-                'pattern': pattern,
-                'suggestion': f'Consider creating a "{pattern.title()}" product type'
-            })
-        suggestions['recommendations'].extend(pattern_recommendations)
-    
-    # Price range recommendations
-    price_recommendations = []
-    for price_range, count in analysis['price_ranges'].items():
-        if count >= 3:
-            price_recommendations.append({
-                'price_range': price_range,
-                'count': count,
-                'suggestion': f'{count} products in {price_range} range - consider bulk pricing'
-            })
-        suggestions['recommendations'].extend(price_recommendations)
-    
-    return suggestions
+    """Extract common patterns from product names, each once, in order of appearance"""
+    matches = NAME_PATTERN_RE.findall(name.lower())
+    return list(dict.fromkeys(NAME_PATTERNS[keyword] if keyword else SIZES[size] for keyword, size in matches))
 
 def check_existing_items(user_id, suggestions):
     """Check which items already exist in the database"""
@@ -162,16 +172,31 @@ def check_existing_items(user_id, suggestions):
         'product_types': {},
         'products': {}
     }
+    type_suggestions = suggestions.get('product_types', [])
+    product_suggestions = [p for t in type_suggestions for p in t.get('products', [])]
     
     try:
+        # One query per table for the whole scan
+        placeholder = get_placeholder()
+        cursor = execute_query(conn, 
+            f'SELECT type_id, type_name FROM product_types WHERE user_id = {placeholder} AND type_name = ANY({placeholder}) ORDER BY type_id', 
+            (user_id, [t['name'] for t in type_suggestions])
+        )
+        existing_types = {}
+        for row in cursor.fetchall():
+            existing_types.setdefault(row['type_name'], row)
+        cursor = execute_query(conn, 
+            f'SELECT product_id, product_name, rate FROM products WHERE user_id = {placeholder} AND product_name = ANY({placeholder}) ORDER BY product_id', 
+            (user_id, [p['name'] for p in product_suggestions])
+        )
+        existing_products = {}
+        for row in cursor.fetchall():
+            existing_products.setdefault(row['product_name'], row)
+        
         # Check existing product types
-        for type_suggestion in suggestions.get('product_types', []):
+        for type_suggestion in type_suggestions:
             type_name = type_suggestion['name']
-            placeholder = get_placeholder()
-            existing_type = execute_update(conn, 
-                f'SELECT type_id, type_name FROM product_types WHERE user_id = {placeholder} AND type_name = {placeholder}', 
-                (user_id, type_name)
-            ).fetchone()
+            existing_type = existing_types.get(type_name)
             
             if existing_type:
                 existing_items['product_types'][type_name] = {
@@ -185,64 +210,109 @@ def check_existing_items(user_id, suggestions):
                 }
         
         # Check existing products
-        for type_suggestion in suggestions.get('product_types', []):
-            for product_suggestion in type_suggestion.get('products', []):
-                product_name = product_suggestion['name']
-                placeholder = get_placeholder()
-                existing_product = execute_update(conn, 
-                    f'SELECT product_id, product_name, rate FROM products WHERE user_id = {placeholder} AND product_name = {placeholder}', 
-                    (user_id, product_name)
-                ).fetchone()
-                
-                if existing_product:
-                    existing_items['products'][product_name] = {
-                        'exists': True,
-                        'product_id': existing_product['product_id'],
-                        'product_name': existing_product['product_name'],
-                        'current_rate': existing_product['rate'],
-                        'new_rate': product_suggestion['rate']
-                    }
-                else:
-                    existing_items['products'][product_name] = {
-                        'exists': False
-                    }
+        for product_suggestion in product_suggestions:
+            product_name = product_suggestion['name']
+            existing_product = existing_products.get(product_name)
+            
+            if existing_product:
+                existing_items['products'][product_name] = {
+                    'exists': True,
+                    'product_id': existing_product['product_id'],
+                    'product_name': existing_product['product_name'],
+                    'current_rate': existing_product['rate'],
+                    'new_rate': product_suggestion['rate']
+                }
+            else:
+                existing_items['products'][product_name] = {
+                    'exists': False
+                }
         
         return existing_items
         
     finally:
         conn.close()
 
-def find_similar_products(user_id, product_name, threshold=0.8):
-    """Find similar products using fuzzy matching"""
-    
+def load_product_matcher(user_id):
+    """Fuzzy matching index over all of a shop's products"""
     conn = get_db_connection()
-    similar_products = []
-    
     try:
-        # Get all existing products
         placeholder = get_placeholder()
-        existing_products = execute_update(conn, 
-            f'SELECT product_id, product_name, rate FROM products WHERE user_id = {placeholder}', 
+        cursor = execute_query(conn, 
+            f'SELECT product_id, product_name, rate FROM products WHERE user_id = {placeholder} ORDER BY product_id', 
             (user_id,)
-        ).fetchall()
-        
-        for product in existing_products:
-            similarity = SequenceMatcher(None, product_name.lower(), product['product_name'].lower()).ratio()
-            if similarity >= threshold:
-                similar_products.append({
-                    'product_id': product['product_id'],
-                    'product_name': product['product_name'],
-                    'rate': product['rate'],
-                    'similarity': similarity
-                })
-        
-        # Sort by similarity
-        similar_products.sort(key=lambda x: x['similarity'], reverse=True)
-        return similar_products
-        
+        )
+        return ProductMatcher(cursor.fetchall())
     finally:
         conn.close()
 
+def find_similar_products(user_id, product_name, threshold=0.8):
+    """Find similar products using fuzzy matching"""
+    return load_product_matcher(user_id).find(product_name, threshold)
+
+def create_catalog_items(cursor, user_id, suggestions):
+    """Create the missing product types and products of a catalog scan.
+
+    Types are matched on name (UNIQUE per shop), products on name across
+    the shop; existing ones are left alone. A few statements regardless of
+    the catalog size, in the caller's transaction.
+    Returns (created_types, created_products) in suggestion order.
+    """
+    types, products = {}, {}
+    for type_suggestion in suggestions.get('product_types', []):
+        type_name = type_suggestion['name']
+        types.setdefault(type_name, type_suggestion.get('description', f'Products in {type_name} category'))
+        for product_suggestion in type_suggestion.get('products', []):
+            products.setdefault(product_suggestion['name'], (type_name, product_suggestion))
+    if not types:
+        return [], []
+
+    # Imports of the same shop take turns, so the NOT EXISTS below cannot
+    # race another import into creating the same product twice.
+    cursor.execute('SELECT pg_advisory_xact_lock(%s, %s)', (CATALOG_IMPORT_LOCK, user_id))
+    inserted = execute_values(cursor, '''
+        INSERT INTO product_types (user_id, type_name, description) VALUES %s
+        ON CONFLICT (user_id, type_name) DO NOTHING
+        RETURNING type_id, type_name
+    ''', [(user_id, name, description) for name, description in types.items()], page_size=len(types), fetch=True)
+    new_type_ids = {row['type_name']: row['type_id'] for row in inserted}
+    cursor.execute(
+        'SELECT type_id, type_name FROM product_types WHERE user_id = %s AND type_name = ANY(%s)',
+        (user_id, list(types))
+    )
+    type_ids = {row['type_name']: row['type_id'] for row in cursor.fetchall()}
+    created_types = [
+        {'type_id': new_type_ids[name], 'name': name, 'description': description}
+        for name, description in types.items() if name in new_type_ids
+    ]
+
+    created_products = []
+    if products:
+        rows = [
+            (position, user_id, type_ids[type_name], name, product['rate'], product.get('description', ''))
+            for position, (name, (type_name, product)) in enumerate(products.items())
+        ]
+        inserted = execute_values(cursor, '''
+            INSERT INTO products (user_id, type_id, product_name, rate, description)
+            SELECT v.user_id, v.type_id, v.product_name, v.rate, v.description
+            FROM (VALUES %s) AS v (position, user_id, type_id, product_name, rate, description)
+            WHERE NOT EXISTS (
+                SELECT 1 FROM products p WHERE p.user_id = v.user_id AND p.product_name = v.product_name
+            )
+            ORDER BY v.position
+            RETURNING product_id, product_name
+        ''', rows, template='(%s, %s::int, %s::int, %s::varchar, %s::numeric, %s::text)', page_size=len(rows), fetch=True)
+        new_product_ids = {row['product_name']: row['product_id'] for row in inserted}
+        for name, (type_name, product) in products.items():
+            if name in new_product_ids:
+                created_products.append({
+                    'product_id': new_product_ids[name],
+                    'name': name,
+                    'type_name': type_name,
+                    'rate': product['rate'],
+                    'description': product.get('description', '')
+                })
+    return created_types, created_products
+
 # Routes
 @catalog_api.route('/api/catalog/scan', methods=['POST'])
 def scan_catalog():
@@ -259,15 +329,12 @@ def scan_catalog():
             return jsonify({'success': False, 'error': 'No catalog data provided'}), 400
         
         # Analyze catalog data to extract patterns
-        product_analysis = analyze_catalog_data(catalog_data)
-        
-        # Generate suggestions
-        suggestions = generate_product_suggestions(product_analysis)
+        analyzer = analyze_catalog_data(catalog_data)
         
         return jsonify({
             'success': True,
-            'suggestions': suggestions,
-            'analysis': product_analysis
+            'suggestions': analyzer.suggestions(),
+            'analysis': analyzer.analysis()
         })
         
     except Exception as e:
@@ -291,12 +358,13 @@ def check_catalog_duplicates():
         # Check existing items
         existing_items = check_existing_items(user_id, suggestions)
         
-        # Find similar products
+        # Find similar products: index the shop once, then look up each item
+        matcher = load_product_matcher(user_id)
         similar_products = {}
         for type_suggestion in suggestions.get('product_types', []):
             for product_suggestion in type_suggestion.get('products', []):
                 product_name = product_suggestion['name']
-                similar = find_similar_products(user_id, product_name)
+                similar = matcher.find(product_name, limit=SIMILAR_PRODUCTS_LIMIT)
                 if similar:
                     similar_products[product_name] = similar
         
@@ -330,6 +398,7 @@ def check_catalog_duplicates():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @catalog_api.route('/api/catalog/auto-create', methods=['POST'])
+@invalidates_catalog
 def auto_create_products():
     """Automatically create product types and products from catalog scan"""
     try:
@@ -344,65 +413,10 @@ def auto_create_products():
             return jsonify({'success': False, 'error': 'No suggestions provided'}), 400
         
         conn = get_db_connection()
-        created_types = []
-        created_products = []
         
         try:
-            # Create product types first
-            for type_suggestion in suggestions.get('product_types', []):
-                type_name = type_suggestion['name']
-                description = type_suggestion.get('description', f'Products in {type_name} category')
-                
-                # Check if type already exists
-                placeholder = get_placeholder()
-                existing = execute_update(conn, 
-                    f'SELECT type_id FROM product_types WHERE user_id = {placeholder} AND type_name = {placeholder}', 
-                    (user_id, type_name)
-                ).fetchone()
-                
-                if not existing:
-                    cursor = conn.cursor()
-                    placeholder = get_placeholder()
-                    cursor.execute(
-                        f'INSERT INTO product_types (user_id, type_name, description) VALUES ({placeholder}, {placeholder}, {placeholder})',
-                        (user_id, type_name, description)
-                    )
-                    type_id = cursor.lastrowid
-                    created_types.append({
-                        'type_id': type_id,
-                        'name': type_name,
-                        'description': description
-                    })
-                else:
-                    type_id = existing['type_id']
-                
-                # Create products for this type
-                for product_suggestion in type_suggestion.get('products', []):
-                    product_name = product_suggestion['name']
-                    rate = product_suggestion['rate']
-                    product_description = product_suggestion.get('description', '')
-                    
-                    # Check if product already exists
-                    placeholder = get_placeholder()
-                    existing_product = execute_update(conn, 
-                        f'SELECT product_id FROM products WHERE user_id = {placeholder} AND product_name = {placeholder}', 
-                        (user_id, product_name)
-                    ).fetchone()
-                    
-                    if not existing_product:
-                        cursor = conn.cursor()
-                        placeholder = get_placeholder()
-                        cursor.execute(
-                            f'INSERT INTO products (user_id, type_id, product_name, rate, description) VALUES ({placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder})',
-                            (user_id, type_id, product_name, rate, product_description)
-                        )
-                        created_products.append({
-                            'product_id': cursor.lastrowid,
-                            'name': product_name,
-                            'type_name': type_name,
-                            'rate': rate,
-                            'description': product_description
-                        })
+            created_types, created_products = create_catalog_items(conn.cursor(), user_id, suggestions)
+            conn.commit()
             return jsonify({
                 'success': True,
                 'message': f'Successfully created {len(created_types)} product types and {len(created_products)} products',
@@ -0,0 +1,204 @@
+"""
+gzip/brotli compression of dynamic responses.
+
+An after_request hook compresses JSON, HTML, CSV and other text responses
+when the browser accepts it (brotli first, then gzip), adding
+`Vary: Accept-Encoding`. Responses under COMPRESSION_MIN_SIZE bytes, files
+sent with send_file (fingerprinted assets are already precompressed by
+api.assets), partial content and bodyless responses are left alone.
+
+Streamed responses (CSV exports) are compressed chunk by chunk with a sync
+flush after each one, so the client still receives rows as they are
+produced. COMPRESSION_STREAMING=0 sends them uncompressed instead.
+
+Views opt out with @no_compression, e.g. server-sent events that must reach
+the client unbuffered or bodies that are already compressed.
+
+Counters (responses, bytes before/after, CPU seconds spent compressing) are
+per worker and reported by GET /api/admin/compression.
+
+Configuration (environment variables):
+    COMPRESSION_ENABLED         0 turns compression off (default 1)
+    COMPRESSION_MIN_SIZE        smallest body in bytes worth compressing (default 1024)
+    COMPRESSION_GZIP_LEVEL      zlib level 1-9 (default 6)
+    COMPRESSION_BROTLI_QUALITY  brotli quality 0-11 (default 4)
+    COMPRESSION_STREAMING       0 leaves streamed responses uncompressed (default 1)
+"""
+import logging
+import os
+import threading
+import time
+import zlib
+
+from flask import request
+
+# Try to import brotli (optional, preferred over gzip when the browser accepts it)
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSION_ENABLED = os.getenv('COMPRESSION_ENABLED', '1').lower() not in ('0', 'false', 'no')
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', 1024))
+COMPRESSION_GZIP_LEVEL = int(os.getenv('COMPRESSION_GZIP_LEVEL', 6))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv('COMPRESSION_BROTLI_QUALITY', 4))
+COMPRESSION_STREAMING = os.getenv('COMPRESSION_STREAMING', '1').lower() not in ('0', 'false', 'no')
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json', 'application/javascript', 'application/xml', 'image/svg+xml',
+    'text/html', 'text/css', 'text/csv', 'text/javascript', 'text/plain', 'text/xml',
+}
+
+
+class _Stats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}  # encoding -> counters
+
+    def record(self, encoding, bytes_in, bytes_out, cpu_seconds):
+        with self._lock:
+            counters = self._counters.setdefault(
+                encoding, {'responses': 0, 'bytes_in': 0, 'bytes_out': 0, 'cpu_seconds': 0.0})
+            counters['responses'] += 1
+            counters['bytes_in'] += bytes_in
+            counters['bytes_out'] += bytes_out
+            counters['cpu_seconds'] += cpu_seconds
+
+    def metrics(self):
+        with self._lock:
+            encodings = {name: dict(counters) for name, counters in self._counters.items()}
+        bytes_in = sum(c['bytes_in'] for c in encodings.values())
+        bytes_out = sum(c['bytes_out'] for c in encodings.values())
+        for counters in encodings.values():
+            counters['ratio'] = round(counters['bytes_in'] / counters['bytes_out'], 2) if counters['bytes_out'] else 0.0
+            counters['cpu_seconds'] = round(counters['cpu_seconds'], 4)
+        return {
+            'enabled': COMPRESSION_ENABLED,
+            'brotli': BROTLI_AVAILABLE,
+            'min_size': COMPRESSION_MIN_SIZE,
+            'streaming': COMPRESSION_STREAMING,
+            'responses': sum(c['responses'] for c in encodings.values()),
+            'bytes_in': bytes_in,
+            'bytes_out': bytes_out,
+            'ratio': round(bytes_in / bytes_out, 2) if bytes_out else 0.0,
+            'cpu_seconds': round(sum(c['cpu_seconds'] for c in encodings.values()), 4),
+            'encodings': encodings,
+        }
+
+
+stats = _Stats()
+
+
+def no_compression(f):
+    """Send this view's responses uncompressed."""
+    f.no_compression = True
+    return f
+
+
+def choose_encoding(accept_encodings):
+    """Best encoding the client accepts: 'br', 'gzip' or None."""
+    gzip_quality = accept_encodings['gzip']
+    if BROTLI_AVAILABLE and accept_encodings['br'] > 0 and accept_encodings['br'] >= gzip_quality:
+        return 'br'
+    if gzip_quality > 0:
+        return 'gzip'
+    return None
+
+
+def _compressor(encoding):
+    """(compress(chunk), flush(), finish()) for one response body."""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=COMPRESSION_BROTLI_QUALITY)
+        return compressor.process, compressor.flush, compressor.finish
+    # wbits 31: gzip container rather than a bare zlib stream.
+    compressor = zlib.compressobj(COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+    return compressor.compress, lambda: compressor.flush(zlib.Z_SYNC_FLUSH), compressor.flush
+
+
+def compress(data, encoding):
+    compress_chunk, _, finish = _compressor(encoding)
+    return compress_chunk(data) + finish()
+
+
+def _compress_stream(chunks, encoding):
+    compress_chunk, flush, finish = _compressor(encoding)
+    bytes_in = bytes_out = 0
+    cpu_seconds = 0.0
+    try:
+        for chunk in chunks:
+            if not chunk:
+                continue
+            started = time.thread_time()
+            out = compress_chunk(chunk) + flush()
+            cpu_seconds += time.thread_time() - started
+            bytes_in += len(chunk)
+            bytes_out += len(out)
+            yield out
+        started = time.thread_time()
+        out = finish()
+        cpu_seconds += time.thread_time() - started
+        bytes_out += len(out)
+        yield out
+    finally:
+        stats.record(encoding, bytes_in, bytes_out, cpu_seconds)
+
+
+def _skip(app, response):
+    if response.status_code < 200 or response.status_code in (204, 206, 304):
+        return True
+    if response.direct_passthrough or 'Content-Encoding' in response.headers:
+        return True
+    if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return True
+    view = app.view_functions.get(request.endpoint)
+    return getattr(view, 'no_compression', False)
+
+
+def compress_response(app, response):
+    if not COMPRESSION_ENABLED or request.method == 'HEAD' or _skip(app, response):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        if not COMPRESSION_STREAMING:
+            return response
+        original = response.response
+        response.response = _compress_stream(response.iter_encoded(), encoding)
+        if hasattr(original, 'close'):
+            # Closing the response must still release what the original body holds (cursors, files).
+            response.call_on_close(original.close)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < COMPRESSION_MIN_SIZE:
+            return response
+        started = time.thread_time()
+        compressed = compress(data, encoding)
+        stats.record(encoding, len(data), len(compressed), time.thread_time() - started)
+        response.set_data(compressed)
+
+    response.headers['Content-Encoding'] = encoding
+    # The compressed bytes differ from the uncompressed ones, so a strong
+    # validator would be wrong; weak tags still revalidate (api/response_cache.py).
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_app(app):
+    """Compress eligible responses of `app`."""
+    @app.after_request
+    def _compress(response):
+        try:
+            return compress_response(app, response)
+        except Exception as e:
+            logger.error(f'Response compression failed for {request.path}: {e}')
+            return response
@@ -0,0 +1,155 @@
+"""
+Customer search for the customer list and the billing typeahead.
+
+search_customers() returns one ranked, bounded page of a shop's customers:
+
+- phone-like queries (digits, spaces, +, -, parentheses) match prefixes of
+  the normalized phone_e164, so "050 12" finds +971501234567;
+- one or two characters match name prefixes;
+- longer queries match anywhere in the name or business name and, when the
+  pg_trgm extension is installed, also misspelt names (trigram similarity
+  above pg_trgm.similarity_threshold, 0.3 by default).
+
+Rows are ordered by match quality (exact, prefix, substring, fuzzy, plus
+trigram similarity) with a small boost for recently added customers. Prefix
+and phone searches only rank their first SEARCH_CANDIDATES matches in index
+order, so "m" costs the same as "mohammed". Pages continue from a
+`<rank>:<customer_id>` cursor rather than an OFFSET. The indexes are in
+db/migrations/0009_customer_search.sql and 0010_customer_phone_e164.sql.
+"""
+import re
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+from api.phone_numbers import phone_prefix
+from db.connection import execute_query
+
+SEARCH_PAGE_SIZE = 25
+MAX_SEARCH_PAGE_SIZE = 100
+# Prefix and phone searches rank at most this many matches; typing more narrows them.
+SEARCH_CANDIDATES = 500
+# Shorter queries have no trigrams to look up, so they only match prefixes.
+MIN_SUBSTRING_LENGTH = 3
+PHONE_QUERY_PATTERN = re.compile(r'^[\d\s+()-]+$')
+# Up to +0.1 for a customer added today, fading over a few months.
+RECENCY_SQL = "COALESCE(0.1 / (1 + GREATEST(CURRENT_DATE - c.created_at::date, 0) / 30.0), 0)"
+
+_trigram_available = None
+
+
+def trigram_available(conn):
+    """Whether pg_trgm is installed (checked once per process)."""
+    global _trigram_available
+    if _trigram_available is None:
+        cursor = execute_query(conn, "SELECT to_regproc('similarity') IS NOT NULL AS available")
+        _trigram_available = bool(cursor.fetchone()['available'])
+    return _trigram_available
+
+
+def _escape_like(value):
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def search_mode(query):
+    """'phone', 'prefix' or 'text': which kind of match a query gets."""
+    if PHONE_QUERY_PATTERN.match(query) and re.search(r'\d', query):
+        return 'phone'
+    if len(query) < MIN_SUBSTRING_LENGTH:
+        return 'prefix'
+    return 'text'
+
+
+def search_sql(mode, trigram, paged=False):
+    """Ranked search query for `mode`, with psycopg2 named parameters."""
+    if mode == 'phone':
+        match = "c.phone_e164 LIKE %(phone_prefix)s"
+        quality = "1.0"
+        order = "c.phone_e164 USING ~<~"
+    elif mode == 'prefix':
+        match = "lower(c.name) LIKE %(prefix)s"
+        quality = "CASE WHEN lower(c.name) = %(q)s THEN 1.0 ELSE 0.8 END"
+        order = "lower(c.name) USING ~<~"
+    else:
+        conditions = ["lower(c.name) LIKE %(contains)s", "lower(c.business_name) LIKE %(contains)s"]
+        if trigram:
+            conditions.append("lower(c.name) %% %(q)s")
+        match = f"({' OR '.join(conditions)})"
+        quality = '''CASE WHEN lower(c.name) = %(q)s THEN 1.0
+                     WHEN lower(c.name) LIKE %(prefix)s THEN 0.8
+                     WHEN lower(c.business_name) LIKE %(prefix)s THEN 0.7
+                     WHEN lower(c.name) LIKE %(contains)s OR lower(c.business_name) LIKE %(contains)s THEN 0.5
+                     ELSE 0.2 END'''
+        if trigram:
+            quality = f"{quality} + 0.3 * similarity(lower(c.name), %(q)s)"
+        order = None
+    where = f"c.user_id = %(user_id)s AND c.is_active = TRUE AND {match}"
+    source = f"customers c WHERE {where}"
+    if order:
+        # A prefix can match most of the shop ("m", "05"). Rank only the first
+        # candidates in index order (lexicographic, so an exact match comes
+        # first) instead of scoring every match.
+        source = f"(SELECT * FROM customers c WHERE {where} ORDER BY {order} LIMIT %(candidates)s) c"
+    after = "WHERE (search_rank, customer_id) < (%(after_rank)s, %(after_id)s)" if paged else ''
+    return f'''
+        SELECT * FROM (
+            SELECT c.*, ROUND(({quality} + {RECENCY_SQL})::numeric, 4) AS search_rank
+            FROM {source}
+        ) ranked
+        {after}
+        ORDER BY search_rank DESC, customer_id DESC
+        LIMIT %(limit)s
+    '''
+
+
+def search_params(user_id, query, limit):
+    q = query.lower()
+    return {
+        'user_id': user_id,
+        'q': q,
+        'prefix': f'{_escape_like(q)}%',
+        'contains': f'%{_escape_like(q)}%',
+        'phone_prefix': f'{phone_prefix(query)}%',
+        'limit': limit,
+        'candidates': SEARCH_CANDIDATES,
+    }
+
+
+def _parse_search_cursor(cursor):
+    """Split a `<rank>:<customer_id>` cursor; raises ValueError (400) when malformed."""
+    try:
+        rank, customer_id = cursor.split(':')
+        return Decimal(rank), int(customer_id)
+    except (AttributeError, ValueError, InvalidOperation):
+        raise ValueError(f'Invalid cursor: {cursor}')
+
+
+def serialize_customer(row):
+    customer = {}
+    for key, value in dict(row).items():
+        if isinstance(value, (datetime, date)):
+            value = value.isoformat()
+        elif isinstance(value, Decimal):
+            value = float(value)
+        customer[key] = value
+    return customer
+
+
+def search_customers(conn, user_id, query, limit=SEARCH_PAGE_SIZE, cursor=None):
+    """One page of matches: {'customers': [...], 'has_more': bool, 'next_cursor': str or None}."""
+    query = (query or '').strip()
+    limit = min(max(int(limit), 1), MAX_SEARCH_PAGE_SIZE)
+    if not query:
+        return {'customers': [], 'has_more': False, 'next_cursor': None}
+    mode = search_mode(query)
+    params = search_params(user_id, query, limit + 1)
+    if cursor:
+        params['after_rank'], params['after_id'] = _parse_search_cursor(cursor)
+    sql = search_sql(mode, mode == 'text' and trigram_available(conn), paged=bool(cursor))
+    rows = execute_query(conn, sql, params).fetchall()
+    has_more = len(rows) > limit
+    customers = [serialize_customer(row) for row in rows[:limit]]
+    next_cursor = None
+    if has_more:
+        last = rows[limit - 1]
+        next_cursor = f"{last['search_rank']}:{last['customer_id']}"
+    return {'customers': customers, 'has_more': has_more, 'next_cursor': next_cursor}
@@ -1,6 +1,4 @@
 from flask import Blueprint, request, jsonify, session
-import re
-from datetime import datetime
 from db.connection import (
     get_db_connection,
     get_placeholder,
@@ -9,6 +7,10 @@ from db.connection import (
     execute_with_returning,
     get_db_integrity_error,
 )
+from api.response_cache import invalidates
+from api.customer_search import search_customers, serialize_customer, SEARCH_PAGE_SIZE
+from api.utils import api_error_handler
+from api.phone_numbers import normalize_phone
 
 customers_api = Blueprint('customers_api', __name__, url_prefix='/api')
 
@@ -26,11 +28,14 @@ def get_customers():
         search = request.args.get('search', '').strip()
         conn = get_db_connection()
         if phone:
-            phone_digits = re.sub(r'\D', '', phone)
-            placeholder = get_placeholder()
-            cursor = execute_query(conn, f'SELECT * FROM customers WHERE user_id = {placeholder} AND phone = {placeholder} AND is_active = TRUE', (user_id, phone_digits))
-            customers = cursor.fetchall()
+            phone_e164 = normalize_phone(phone)
+            customers = []
+            if phone_e164:
+                placeholder = get_placeholder()
+                cursor = execute_query(conn, f'SELECT * FROM customers WHERE user_id = {placeholder} AND phone_e164 = {placeholder} AND is_active = TRUE', (user_id, phone_e164))
+                customers = cursor.fetchall()
         elif search:
+            # The full filtered list (customer list page); typeahead uses /customers/search
             like_search_lower = f"%{search.lower()}%"
             placeholder = get_placeholder()
             cursor = execute_query(conn, f'SELECT * FROM customers WHERE user_id = {placeholder} AND (LOWER(name) LIKE {placeholder} OR phone LIKE {placeholder} OR LOWER(COALESCE(business_name, \'\')) LIKE {placeholder}) AND is_active = TRUE ORDER BY name', (user_id, like_search_lower, search, like_search_lower))
@@ -40,26 +45,24 @@ def get_customers():
             cursor = execute_query(conn, f'SELECT * FROM customers WHERE user_id = {placeholder} AND is_active = TRUE ORDER BY name', (user_id,))
             customers = cursor.fetchall()
         conn.close()
-
-        customers_list = []
-        for customer in customers:
-            customer_dict = {}
-            for key, value in dict(customer).items():
-                if isinstance(value, datetime):
-                    customer_dict[key] = value.isoformat()
-                elif hasattr(value, '__float__') and not isinstance(value, bool):
-                    customer_dict[key] = float(value)
-                else:
-                    customer_dict[key] = value
-            customers_list.append(customer_dict)
-
-        return jsonify(customers_list)
+        return jsonify([serialize_customer(customer) for customer in customers])
     except Exception as e:
         print(f"Error in get_customers: {e}")
         import traceback
         traceback.print_exc()
         return jsonify({'error': 'Database connection failed. Please check your database configuration.'}), 500
 
+@customers_api.route('/customers/search', methods=['GET'])
+@api_error_handler
+def search_customers_page():
+    """Typeahead search: one ranked page, continued with ?cursor=."""
+    user_id = get_current_user_id()
+    limit = request.args.get('limit', SEARCH_PAGE_SIZE, type=int)
+    conn = get_db_connection()
+    result = search_customers(conn, user_id, request.args.get('q', ''), limit, request.args.get('cursor'))
+    conn.close()
+    return jsonify({'success': True, **result})
+
 @customers_api.route('/customers/<int:customer_id>', methods=['GET'])
 def get_customer(customer_id):
     user_id = get_current_user_id()
@@ -113,6 +116,7 @@ def get_recent_customers():
         return jsonify({'error': str(e)}), 500
 
 @customers_api.route('/customers', methods=['POST'])
+@invalidates('customers')
 def add_customer():
     data = request.get_json()
     name = data.get('name', '').strip()
@@ -130,35 +134,32 @@ def add_customer():
         return jsonify({'error': 'Customer name is required'}), 400
     if not phone:
         return jsonify({'error': 'Customer mobile is required'}), 400
-    phone_digits = re.sub(r'\D', '', phone)
-    if len(phone_digits) < 9 or len(phone_digits) > 15:
-        return jsonify({'error': 'Customer mobile must be 9-15 digits'}), 400
+    phone_e164 = normalize_phone(phone)
+    if not phone_e164:
+        return jsonify({'error': 'Customer mobile must be a valid phone number'}), 400
     if customer_type not in ['Individual', 'Business']:
         return jsonify({'error': 'Customer type must be Individual or Business'}), 400
     if customer_type == 'Business' and not business_name:
         return jsonify({'error': 'Business name is required for Business customers'}), 400
     conn = get_db_connection()
-    if phone_digits:
-        placeholder = get_placeholder()
-        cursor = execute_query(conn,
-            f"""
-            SELECT name FROM customers 
-            WHERE user_id = {placeholder} AND 
-                  REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(phone, ' ', ''), '-', ''), '(', ''), ')', ''), '+', '') = {placeholder}
-                  AND is_active = TRUE
-            """,
-            (user_id, phone_digits)
-        )
-        existing_customer = cursor.fetchone()
-        if existing_customer:
-            conn.close()
-            return jsonify({'error': f'Phone number {phone} is already assigned to customer "{existing_customer["name"]}"'}), 400
+    placeholder = get_placeholder()
+    cursor = execute_query(conn,
+        f"""
+        SELECT name FROM customers 
+        WHERE user_id = {placeholder} AND phone_e164 = {placeholder} AND is_active = TRUE
+        """,
+        (user_id, phone_e164)
+    )
+    existing_customer = cursor.fetchone()
+    if existing_customer:
+        conn.close()
+        return jsonify({'error': f'Phone number {phone} is already assigned to customer "{existing_customer["name"]}"'}), 400
     try:
         placeholder = get_placeholder()
         sql = f'''
-            INSERT INTO customers (user_id, name, phone, trn, city, area, email, address, customer_type, business_name, business_address, is_active)
-            VALUES ({placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder}, TRUE)
-            ON CONFLICT (user_id, phone) DO UPDATE SET
+            INSERT INTO customers (user_id, name, phone, phone_e164, trn, city, area, email, address, customer_type, business_name, business_address, is_active)
+            VALUES ({placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder}, TRUE)
+            ON CONFLICT (user_id, phone_e164) DO UPDATE SET
                 name = EXCLUDED.name,
                 trn = EXCLUDED.trn,
                 city = EXCLUDED.city,
@@ -171,7 +172,7 @@ def add_customer():
                 is_active = TRUE
             RETURNING customer_id
         '''
-        customer_id = execute_with_returning(conn, sql, (user_id, name, phone_digits, trn, city, area, email, address, customer_type, business_name, business_address))
+        customer_id = execute_with_returning(conn, sql, (user_id, name, phone_e164, phone_e164, trn, city, area, email, address, customer_type, business_name, business_address))
         conn.close()
         return jsonify({'id': customer_id, 'message': 'Customer added successfully'})
     except get_db_integrity_error():
@@ -179,6 +180,7 @@ def add_customer():
         return jsonify({'error': 'Customer already exists'}), 400
 
 @customers_api.route('/customers/<int:customer_id>', methods=['PUT'])
+@invalidates('customers')
 def update_customer(customer_id):
     data = request.get_json()
     name = data.get('name', '').strip()
@@ -199,19 +201,18 @@ def update_customer(customer_id):
     if customer_type == 'Business' and not business_name:
         return jsonify({'error': 'Business name is required for Business customers'}), 400
     conn = get_db_connection()
-    phone_digits = re.sub(r'\D', '', phone)
-    if phone and (len(phone_digits) < 9 or len(phone_digits) > 15):
+    phone_e164 = normalize_phone(phone)
+    if phone and not phone_e164:
         conn.close()
-        return jsonify({'error': 'Customer mobile must be 9-15 digits'}), 400
-    if phone_digits:
+        return jsonify({'error': 'Customer mobile must be a valid phone number'}), 400
+    if phone_e164:
         placeholder = get_placeholder()
         cursor = execute_query(conn,
             f"""
             SELECT name FROM customers 
-            WHERE user_id = {placeholder} AND customer_id != {placeholder} AND 
-                  REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(phone, ' ', ''), '-', ''), '(', ''), ')', ''), '+', '') = {placeholder}
+            WHERE user_id = {placeholder} AND customer_id != {placeholder} AND phone_e164 = {placeholder}
             """,
-            (user_id, customer_id, phone_digits)
+            (user_id, customer_id, phone_e164)
         )
         existing_customer = cursor.fetchone()
         if existing_customer:
@@ -220,15 +221,16 @@ def update_customer(customer_id):
     placeholder = get_placeholder()
     sql = f'''
         UPDATE customers 
-        SET name = {placeholder}, phone = {placeholder}, trn = {placeholder}, city = {placeholder}, area = {placeholder}, email = {placeholder}, address = {placeholder}, 
+        SET name = {placeholder}, phone = {placeholder}, phone_e164 = {placeholder}, trn = {placeholder}, city = {placeholder}, area = {placeholder}, email = {placeholder}, address = {placeholder}, 
             customer_type = {placeholder}, business_name = {placeholder}, business_address = {placeholder}
         WHERE customer_id = {placeholder} AND user_id = {placeholder}
     '''
-    execute_update(conn, sql, (name, phone_digits, trn, city, area, email, address, customer_type, business_name, business_address, customer_id, user_id))
+    execute_update(conn, sql, (name, phone_e164 or '', phone_e164, trn, city, area, email, address, customer_type, business_name, business_address, customer_id, user_id))
     conn.close()
     return jsonify({'message': 'Customer updated successfully'})
 
 @customers_api.route('/customers/<int:customer_id>', methods=['DELETE'])
+@invalidates('customers')
 def delete_customer(customer_id):
     user_id = get_current_user_id()
     conn = get_db_connection()
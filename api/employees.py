@@ -6,6 +6,7 @@ from db.connection import (
     execute_with_returning,
     execute_update,
 )
+from api.response_cache import conditional_response, invalidates
 
 employees_api = Blueprint('employees_api', __name__, url_prefix='/api')
 
@@ -16,6 +17,7 @@ def get_current_user_id():
     return user_id
 
 @employees_api.route('/employees', methods=['GET'])
+@conditional_response
 def get_employees():
     user_id = get_current_user_id()
     search = request.args.get('search', '').strip()
@@ -45,6 +47,7 @@ def get_employee(employee_id):
         return jsonify({'error': 'Employee not found'}), 404
 
 @employees_api.route('/employees', methods=['POST'])
+@invalidates('employees')
 def add_employee():
     from api.utils import log_dml_error
     data = request.get_json()
@@ -79,6 +82,7 @@ def add_employee():
     return jsonify({'id': emp_id, 'message': 'Employee added successfully'})
 
 @employees_api.route('/employees/<int:employee_id>', methods=['PUT'])
+@invalidates('employees')
 def update_employee(employee_id):
     from api.utils import log_dml_error
     data = request.get_json()
@@ -116,6 +120,7 @@ def update_employee(employee_id):
     return jsonify({'message': 'Employee updated successfully'})
 
 @employees_api.route('/employees/<int:employee_id>', methods=['DELETE'])
+@invalidates('employees')
 def delete_employee(employee_id):
     user_id = get_current_user_id()
     conn = get_db_connection()
@@ -1,4 +1,4 @@
-from flask import Blueprint, request, jsonify, session, Response, render_template
+from flask import Blueprint, request, jsonify, session, render_template
 from db.connection import (
     get_db_connection,
     get_placeholder,
@@ -9,11 +9,11 @@ from db.connection import (
     is_postgresql
 )
 from datetime import datetime, timedelta
-import csv
-from io import StringIO
-from api.utils import log_user_action, log_dml_error
+from api.utils import log_user_action, log_dml_error, api_error_handler
 from api.plans import get_user_plan_info
 from api.i18n import get_user_language, get_translated_text
+from api.response_cache import invalidates
+from api.export_service import build_export_filters, export_response
 
 expenses_api = Blueprint('expenses_api', __name__)
 
@@ -38,6 +38,7 @@ def get_expense_categories():
     return jsonify([dict(category) for category in categories])
 
 @expenses_api.route('/api/expense-categories', methods=['POST'])
+@invalidates('expenses')
 def add_expense_category():
     """Add new expense category."""
     data = request.get_json()
@@ -69,6 +70,7 @@ def add_expense_category():
         return jsonify({'error': 'Failed to add category'}), 500
 
 @expenses_api.route('/api/expense-categories/<int:category_id>', methods=['PUT'])
+@invalidates('expenses')
 def update_expense_category(category_id):
     """Update expense category."""
     data = request.get_json()
@@ -113,6 +115,7 @@ def update_expense_category(category_id):
         return jsonify({'error': 'Failed to update category'}), 500
 
 @expenses_api.route('/api/expense-categories/<int:category_id>', methods=['DELETE'])
+@invalidates('expenses')
 def delete_expense_category(category_id):
     """Delete expense category (soft delete)."""
     user_id = get_current_user_id()
@@ -222,6 +225,7 @@ def get_expenses():
         return jsonify([])
 
 @expenses_api.route('/api/expenses', methods=['POST'])
+@invalidates('expenses')
 def add_expense():
     """Add new expense."""
     data = request.get_json()
@@ -293,6 +297,7 @@ def get_recurring_expenses():
     return jsonify([dict(expense) for expense in recurring_expenses])
 
 @expenses_api.route('/api/recurring-expenses', methods=['POST'])
+@invalidates('expenses')
 def add_recurring_expense():
     """Add new recurring expense."""
     data = request.get_json()
@@ -380,6 +385,7 @@ def get_expense(expense_id):
         return jsonify({'error': 'Expense not found'}), 404
 
 @expenses_api.route('/api/expenses/<int:expense_id>', methods=['PUT'])
+@invalidates('expenses')
 def update_expense(expense_id):
     """Update expense."""
     data = request.get_json()
@@ -443,6 +449,7 @@ def update_expense(expense_id):
         return jsonify({'error': 'Failed to update expense'}), 500
 
 @expenses_api.route('/api/expenses/<int:expense_id>', methods=['DELETE'])
+@invalidates('expenses')
 def delete_expense(expense_id):
     """Delete expense."""
     user_id = get_current_user_id()
@@ -555,67 +562,22 @@ def expense_report():
     })
 
 @expenses_api.route('/api/expenses/download', methods=['GET'])
+@api_error_handler
 def download_expenses():
-    """Download expenses as CSV."""
+    """Download expenses as CSV (or XLSX with format=xlsx), streamed from the database."""
     user_id = get_current_user_id()
-    
-    # Get query parameters
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
+    where_clause, params = build_export_filters(
+        'expenses', user_id,
+        from_date=request.args.get('start_date'),
+        to_date=request.args.get('end_date'),
+    )
     category_id = request.args.get('category_id')
-    
-    conn = get_db_connection()
-    
-    # Build query
-    query = '''
-        SELECT e.expense_date, ec.category_name, e.amount, e.description, e.payment_method, e.receipt_url
-        FROM expenses e 
-        JOIN expense_categories ec ON e.category_id = ec.category_id 
-        WHERE e.user_id = ? AND ec.user_id = ?
-    '''
-    params = [user_id, user_id]
-    
-    if start_date:
-        query += ' AND e.expense_date >= ?'
-        params.append(start_date)
-    
-    if end_date:
-        query += ' AND e.expense_date <= ?'
-        params.append(end_date)
-    
     if category_id:
-        query += ' AND e.category_id = ?'
+        where_clause += ' AND e.category_id = %s'
         params.append(category_id)
-    
-    query += ' ORDER BY e.expense_date DESC'
-    
-    cursor = execute_query(conn, query, params)
-
-    
-    expenses = cursor.fetchall()
-    conn.close()
-    
-    # Create CSV
-    output = StringIO()
-    writer = csv.writer(output)
-    writer.writerow(['Date', 'Category', 'Amount', 'Description', 'Payment Method', 'Receipt URL'])
-    
-    for expense in expenses:
-        writer.writerow([
-            expense['expense_date'],
-            expense['category_name'],
-            expense['amount'],
-            expense['description'] or '',
-            expense['payment_method'],
-            expense['receipt_url'] or ''
-        ])
-    
-    output.seek(0)
-    return Response(
-        output.getvalue(),
-        mimetype='text/csv',
-        headers={'Content-Disposition': 'attachment; filename=expenses.csv'}
-    )
+    where_clause += ' AND ec.user_id = %s'
+    params.append(user_id)
+    return export_response('expenses', request.args.get('format', 'csv'), where_clause, params, 'expenses')
 
 @expenses_api.route('/expenses')
 def expenses_page():
@@ -0,0 +1,429 @@
+"""
+Streaming CSV/XLSX exports for bills, bill items, customers, expenses and
+loyalty transactions.
+
+Exports never hold the result set in memory:
+- CSV is produced by Postgres itself (`COPY (SELECT ...) TO STDOUT`) and
+  forwarded in chunks as it arrives.
+- XLSX rows come from a server-side (named) cursor, FETCH_SIZE at a time,
+  and are written into a zip stream that is flushed after every batch.
+
+Each export checks out its own pooled connection for the lifetime of the
+response rather than the request-scoped one, because the body is produced
+after the view has returned.
+"""
+import csv
+import logging
+import queue
+import threading
+import uuid
+import zipfile
+from datetime import date, datetime
+from decimal import Decimal
+from io import StringIO
+from xml.sax.saxutils import escape
+
+import psycopg2
+from flask import Response
+
+from db.connection import get_pool
+from api.utils import date_range_filter
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024      # bytes per streamed CSV chunk
+FETCH_SIZE = 2000           # rows per server-side cursor round trip
+COPY_QUEUE_CHUNKS = 16      # chunks buffered between COPY and the client
+XLSX_MAX_ROWS = 1048575     # Excel's sheet limit, minus the header row
+
+FORMATS = {
+    'csv': 'text/csv',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+# Each dataset is a SELECT whose WHERE clause is filled in by the caller.
+# `columns` pairs an SQL expression with its header; the header doubles as the
+# column alias so COPY ... HEADER writes it as-is. `date_column` and
+# `status_column` receive the report filters (from_date/to_date/status).
+DATASETS = {
+    'bills': {
+        'from': 'bills b LEFT JOIN customers c ON b.customer_id = c.customer_id',
+        'user_column': 'b.user_id',
+        'date_column': 'b.bill_date',
+        'status_column': 'b.status',
+        'order_by': 'b.bill_date, b.bill_id',
+        'columns': [
+            ('b.bill_number', 'Bill Number'),
+            ('b.bill_date', 'Date'),
+            ('b.delivery_date', 'Delivery Date'),
+            ('COALESCE(c.name, b.customer_name)', 'Customer'),
+            ('COALESCE(c.phone, b.customer_phone)', 'Phone'),
+            ('b.status', 'Status'),
+            ('b.payment_method', 'Payment Method'),
+            ('b.subtotal', 'Subtotal'),
+            ('b.vat_amount', 'VAT'),
+            ('b.total_amount', 'Total'),
+            ('b.advance_paid', 'Advance Paid'),
+            ('b.balance_amount', 'Balance'),
+        ],
+    },
+    'bill_items': {
+        'from': 'bill_items bi JOIN bills b ON bi.bill_id = b.bill_id',
+        'user_column': 'b.user_id',
+        'date_column': 'b.bill_date',
+        'status_column': 'b.status',
+        'order_by': 'b.bill_date, b.bill_id, bi.item_id',
+        'columns': [
+            ('b.bill_number', 'Bill Number'),
+            ('b.bill_date', 'Date'),
+            ('bi.product_name', 'Product'),
+            ('bi.quantity', 'Quantity'),
+            ('bi.rate', 'Rate'),
+            ('bi.discount', 'Discount %'),
+            ('bi.vat_amount', 'VAT'),
+            ('bi.total_amount', 'Total'),
+        ],
+    },
+    'customers': {
+        'from': 'customers c',
+        'user_column': 'c.user_id',
+        'date_column': 'c.created_at',
+        'status_column': None,
+        'order_by': 'c.customer_id',
+        'columns': [
+            ('c.name', 'Name'),
+            ('c.phone', 'Phone'),
+            ('c.email', 'Email'),
+            ('c.city', 'City'),
+            ('c.area', 'Area'),
+            ('c.customer_type', 'Type'),
+            ('c.business_name', 'Business Name'),
+            ('c.trn', 'TRN'),
+            ('c.created_at', 'Created'),
+        ],
+    },
+    'expenses': {
+        'from': 'expenses e JOIN expense_categories ec ON e.category_id = ec.category_id',
+        'user_column': 'e.user_id',
+        'date_column': 'e.expense_date',
+        'status_column': None,
+        'order_by': 'e.expense_date DESC, e.expense_id DESC',
+        'columns': [
+            ('e.expense_date', 'Date'),
+            ('ec.category_name', 'Category'),
+            ('e.amount', 'Amount'),
+            ("COALESCE(e.description, '')", 'Description'),
+            ('e.payment_method', 'Payment Method'),
+            ("COALESCE(e.receipt_url, '')", 'Receipt URL'),
+        ],
+    },
+    'loyalty_transactions': {
+        'from': '''loyalty_transactions lt
+                   LEFT JOIN customers c ON lt.customer_id = c.customer_id
+                   LEFT JOIN bills b ON lt.bill_id = b.bill_id''',
+        'user_column': 'lt.user_id',
+        'date_column': 'lt.created_at',
+        'status_column': 'lt.transaction_type',
+        'order_by': 'lt.created_at, lt.transaction_id',
+        'columns': [
+            ('lt.created_at', 'Date'),
+            ('c.name', 'Customer'),
+            ('c.phone', 'Phone'),
+            ('lt.transaction_type', 'Type'),
+            ('lt.points_earned', 'Points Earned'),
+            ('lt.points_redeemed', 'Points Redeemed'),
+            ('b.bill_number', 'Bill Number'),
+            ('lt.description', 'Description'),
+        ],
+    },
+}
+
+
+def build_export_filters(dataset, user_id, from_date=None, to_date=None, status=None):
+    """WHERE clause and params for a dataset: the shop, a half-open date range and an optional status."""
+    spec = DATASETS[dataset]
+    where_conditions = [f"{spec['user_column']} = %s"]
+    params = [user_id]
+    if from_date or to_date:
+        date_filter, date_params = date_range_filter(spec['date_column'], from_date, to_date)
+        where_conditions.append(date_filter)
+        params.extend(date_params)
+    if status and spec['status_column']:
+        where_conditions.append(f"{spec['status_column']} = %s")
+        params.append(status)
+    return ' AND '.join(where_conditions), params
+
+
+def export_sql(dataset, where_clause):
+    spec = DATASETS[dataset]
+    # The statement goes through psycopg2 parameter substitution, so a
+    # literal % in a header ("Discount %") has to be doubled.
+    select_list = ', '.join(f'''{expr} AS "{header.replace('%', '%%')}"''' for expr, header in spec['columns'])
+    return f"SELECT {select_list} FROM {spec['from']} WHERE {where_clause} ORDER BY {spec['order_by']}"
+
+
+def export_response(dataset, fmt, where_clause, params, filename):
+    """Streaming download of `dataset` rows matching `where_clause`."""
+    if dataset not in DATASETS:
+        raise ValueError(f'Unknown export: {dataset}')
+    if fmt not in FORMATS:
+        raise ValueError(f'Unsupported export format: {fmt}')
+    sql = export_sql(dataset, where_clause)
+    if fmt == 'csv':
+        body = _copy_csv_chunks(sql, params)
+    else:
+        headers = [header for _, header in DATASETS[dataset]['columns']]
+        body = xlsx_chunks(headers, _server_side_rows(sql, params))
+    # Producing the first chunk runs the query, so SQL errors still become a
+    # normal error response instead of an empty download.
+    first = next(body, b'')
+    return Response(
+        _prepend(first, body),
+        mimetype=FORMATS[fmt],
+        headers={'Content-Disposition': f'attachment; filename={filename}.{fmt}'}
+    )
+
+
+def csv_chunks(headers, rows):
+    """Yield CSV text for rows already in Python, about CHUNK_SIZE characters at a time."""
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(headers)
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _prepend(first, body):
+    try:
+        yield first
+        yield from body
+    finally:
+        body.close()
+
+
+class _ChunkWriter:
+    """File-like sink for COPY that hands CHUNK_SIZE blocks to a bounded queue.
+
+    The queue bound is what keeps memory flat: COPY blocks while the client
+    is slower than the database.
+    """
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.buffer = []
+        self.size = 0
+        self.cancelled = threading.Event()
+
+    def write(self, data):
+        if self.cancelled.is_set():
+            raise IOError('export cancelled by client')
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        self.buffer.append(data)
+        self.size += len(data)
+        if self.size >= CHUNK_SIZE:
+            self.flush()
+        return len(data)
+
+    def flush(self):
+        if self.buffer:
+            chunk = b''.join(self.buffer)
+            self.buffer, self.size = [], 0
+            while not self.cancelled.is_set():
+                try:
+                    self.chunks.put(chunk, timeout=1)
+                    return
+                except queue.Full:
+                    continue
+
+
+def _copy_csv_chunks(sql, params):
+    """Yield CSV bytes produced by COPY, reading them on a helper thread."""
+    pool = get_pool()
+    conn = pool.getconn()
+    chunks = queue.Queue(maxsize=COPY_QUEUE_CHUNKS)
+    writer = _ChunkWriter(chunks)
+    done = object()
+    errors = []
+
+    def run_copy():
+        try:
+            cursor = conn.cursor()
+            query = cursor.mogrify(sql, params).decode('utf-8')
+            cursor.copy_expert(f'COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER)', writer)
+            writer.flush()
+        except Exception as e:
+            errors.append(e)
+        finally:
+            while not writer.cancelled.is_set():
+                try:
+                    chunks.put(done, timeout=1)
+                    break
+                except queue.Full:
+                    continue
+
+    thread = threading.Thread(target=run_copy, name='csv-export', daemon=True)
+    thread.start()
+    try:
+        while True:
+            chunk = chunks.get()
+            if chunk is done:
+                break
+            yield chunk
+        if errors:
+            raise errors[0]
+    finally:
+        # Runs on completion and when the client goes away (generator closed).
+        writer.cancelled.set()
+        thread.join()
+        discard = bool(errors)
+        try:
+            conn.rollback()
+        except psycopg2.Error:
+            discard = True
+        pool.putconn(conn, discard=discard or bool(conn.closed))
+
+
+def _server_side_rows(sql, params):
+    """Yield result tuples through a named cursor, FETCH_SIZE rows per round trip."""
+    pool = get_pool()
+    conn = pool.getconn()
+    discard = False
+    try:
+        cursor = conn.cursor(name=f'export_{uuid.uuid4().hex}', cursor_factory=psycopg2.extensions.cursor)
+        cursor.itersize = FETCH_SIZE
+        cursor.execute(sql, params)
+        for row in cursor:
+            yield row
+        cursor.close()
+    except psycopg2.Error:
+        discard = True
+        raise
+    finally:
+        try:
+            conn.rollback()
+        except psycopg2.Error:
+            discard = True
+        pool.putconn(conn, discard=discard or bool(conn.closed))
+
+
+# Minimal SpreadsheetML package: one sheet with inline strings, no styles.
+_XLSX_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="xl/workbook.xml" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+        '</Relationships>'
+    ),
+    'xl/workbook.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Export" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="worksheets/sheet1.xml" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"/>'
+        '</Relationships>'
+    ),
+}
+
+# Characters XML 1.0 does not allow, even escaped.
+_XML_ILLEGAL = dict.fromkeys(c for c in range(32) if c not in (9, 10, 13))
+
+
+class _ZipSink:
+    """Unseekable file object collecting zip output until the generator drains it."""
+
+    def __init__(self):
+        self.parts = []
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.parts)
+        self.parts = []
+        return data
+
+
+def _column_letter(index):
+    letters = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def _xlsx_row(row_number, values, letters):
+    cells = []
+    for letter, value in zip(letters, values):
+        if value is None:
+            continue
+        ref = f'{letter}{row_number}'
+        if isinstance(value, bool):
+            cells.append(f'<c r="{ref}" t="b"><v>{int(value)}</v></c>')
+        elif isinstance(value, (int, float, Decimal)):
+            cells.append(f'<c r="{ref}"><v>{value}</v></c>')
+        else:
+            if isinstance(value, (date, datetime)):
+                value = value.isoformat(sep=' ') if isinstance(value, datetime) else value.isoformat()
+            text = escape(str(value).translate(_XML_ILLEGAL))
+            cells.append(f'<c r="{ref}" t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>')
+    return f'<row r="{row_number}">{"".join(cells)}</row>'
+
+
+def xlsx_chunks(headers, rows):
+    """Yield an .xlsx file for `headers` and an iterable of row tuples, a batch of rows at a time."""
+    sink = _ZipSink()
+    letters = [_column_letter(i) for i in range(len(headers))]
+    try:
+        with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=1) as archive:
+            for name, content in _XLSX_PARTS.items():
+                archive.writestr(name, content)
+            with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+                sheet.write(b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                            b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>')
+                sheet.write(_xlsx_row(1, headers, letters).encode('utf-8'))
+                batch = []
+                for count, row in enumerate(rows, start=1):
+                    if count > XLSX_MAX_ROWS:
+                        logger.warning(f"XLSX export truncated at {XLSX_MAX_ROWS} rows; use CSV for larger exports")
+                        break
+                    batch.append(_xlsx_row(count + 1, row, letters))
+                    if len(batch) == FETCH_SIZE:
+                        sheet.write(''.join(batch).encode('utf-8'))
+                        batch = []
+                        yield sink.drain()
+                sheet.write(''.join(batch).encode('utf-8'))
+                sheet.write(b'</sheetData></worksheet>')
+        yield sink.drain()
+    finally:
+        # Hand the database cursor back even if the client disconnected.
+        if hasattr(rows, 'close'):
+            rows.close()
@@ -0,0 +1,22 @@
+from flask import Blueprint, request
+from datetime import datetime
+from api.utils import get_current_user_id, api_error_handler
+from api.export_service import DATASETS, build_export_filters, export_response
+
+exports_api = Blueprint('exports_api', __name__)
+
+@exports_api.route('/api/exports/<dataset>', methods=['GET'])
+@api_error_handler
+def export_dataset(dataset):
+    """Stream bills, bill_items, customers, expenses or loyalty_transactions as CSV (default) or XLSX."""
+    if dataset not in DATASETS:
+        raise ValueError(f'Unknown export: {dataset}')
+    user_id = get_current_user_id()
+    where_clause, params = build_export_filters(
+        dataset, user_id,
+        from_date=request.args.get('from_date'),
+        to_date=request.args.get('to_date'),
+        status=request.args.get('status') if request.args.get('status') != 'All' else None,
+    )
+    filename = f"{dataset.replace('_', '-')}-{datetime.now().strftime('%Y%m%d')}"
+    return export_response(dataset, request.args.get('format', 'csv'), where_clause, params, filename)
@@ -0,0 +1,178 @@
+"""
+Batch rendering of printed invoices and receipts.
+
+A batch is a set of bill ids or a filter (date range and status). Bills, items
+and shop settings are read in three set-based queries per chunk of
+BATCH_CHUNK_SIZE bills; each bill is rendered with print_bill.html or
+receipt_template.html exactly as the print views render it, and the process
+pool in api.pdf_renderer converts the pages to PDF while the next chunk is
+being rendered.
+
+Output formats:
+    zip    one PDF per bill
+    pdf    all bills merged into one PDF
+    html   a ZIP of the HTML pages (works without a PDF renderer)
+
+Configuration (environment variables):
+    INVOICE_BATCH_MAX_BILLS   largest batch accepted (default 2000)
+"""
+import os
+import re
+import zipfile
+from collections import defaultdict
+
+from flask import render_template
+
+from db.connection import get_db_connection, get_placeholder, execute_query
+from api import pdf_renderer
+from api.export_service import build_export_filters
+from api.i18n import translate_text
+from api.jobs import create_job, update_job, job_dir, run_in_background
+from api.reports import print_bill_context, receipt_context
+
+TEMPLATES = {'invoice': 'print_bill.html', 'receipt': 'receipt_template.html'}
+FORMATS = ('zip', 'pdf', 'html')
+OUTPUT_FILES = {'zip': 'invoices.zip', 'pdf': 'invoices.pdf', 'html': 'invoices-html.zip'}
+BATCH_CHUNK_SIZE = 100
+MAX_BATCH_BILLS = int(os.getenv('INVOICE_BATCH_MAX_BILLS', 2000))
+
+
+def select_bill_ids(conn, user_id, bill_ids=None, from_date=None, to_date=None, status=None):
+    """Ids of the shop's bills in the batch, in bill date order."""
+    placeholder = get_placeholder()
+    if bill_ids:
+        try:
+            bill_ids = [int(bill_id) for bill_id in bill_ids]
+        except (TypeError, ValueError):
+            raise ValueError('bill_ids must be a list of bill ids')
+        where_clause, params = f'b.user_id = {placeholder} AND b.bill_id = ANY({placeholder})', [user_id, bill_ids]
+    elif from_date or to_date:
+        where_clause, params = build_export_filters('bills', user_id, from_date, to_date, status)
+    else:
+        raise ValueError('Pass bill_ids or a from_date/to_date range')
+    rows = execute_query(conn, f'''
+        SELECT b.bill_id FROM bills b
+        WHERE {where_clause}
+        ORDER BY b.bill_date, b.bill_id
+        LIMIT {MAX_BATCH_BILLS + 1}
+    ''', params).fetchall()
+    if len(rows) > MAX_BATCH_BILLS:
+        raise ValueError(f'A batch is limited to {MAX_BATCH_BILLS} bills; narrow the date range')
+    return [row['bill_id'] for row in rows]
+
+
+def fetch_bills(conn, user_id, bill_ids):
+    """Bills (in date order), their items by bill id and the shop settings: three queries."""
+    placeholder = get_placeholder()
+    bills = execute_query(conn, f'''
+        SELECT b.*, c.name as customer_name, c.phone as customer_phone,
+               c.city as customer_city, c.area as customer_area,
+               c.customer_type, c.business_name, c.business_address,
+               e.name as master_name
+        FROM bills b
+        LEFT JOIN customers c ON b.customer_id = c.customer_id AND c.user_id = b.user_id
+        LEFT JOIN employees e ON b.master_id = e.employee_id AND e.user_id = b.user_id
+        WHERE b.user_id = {placeholder} AND b.bill_id = ANY({placeholder})
+        ORDER BY b.bill_date, b.bill_id
+    ''', (user_id, list(bill_ids))).fetchall()
+    items_by_bill = defaultdict(list)
+    for item in execute_query(conn, f'''
+        SELECT * FROM bill_items
+        WHERE user_id = {placeholder} AND bill_id = ANY({placeholder})
+        ORDER BY bill_id, item_id
+    ''', (user_id, list(bill_ids))):
+        items_by_bill[item['bill_id']].append(item)
+    shop_settings = execute_query(conn, f'SELECT * FROM shop_settings WHERE user_id = {placeholder}',
+                                  (user_id,)).fetchone()
+    return bills, items_by_bill, shop_settings
+
+
+def render_bill_html(template, bill, items, shop_settings, language='en'):
+    """One bill rendered as the print view would, outside any request."""
+    context = print_bill_context(bill, items, shop_settings) if template == 'invoice' \
+        else receipt_context(bill, items, shop_settings)
+    return render_template(TEMPLATES[template],
+                           show_summary=False,
+                           get_user_language=lambda: language,
+                           get_translated_text=lambda text, lang=None: translate_text(text, lang or language),
+                           **context)
+
+
+def bill_filename(bill):
+    name = re.sub(r'[^A-Za-z0-9._-]+', '-', str(bill.get('bill_number') or '')).strip('-')
+    return f"{bill['bill_date']}_{name or bill['bill_id']}"
+
+
+def run_batch(job_id, user_id, bill_ids, template, fmt, language='en'):
+    """Render the batch into JOBS_DIR/<job_id>/, reporting progress on the job."""
+    path = os.path.join(job_dir(job_id), OUTPUT_FILES[fmt])
+    pool = pdf_renderer.get_pool() if fmt != 'html' else None
+    # PDFs are already compressed, so the archive only stores them.
+    archive = zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED if fmt == 'html' else zipfile.ZIP_STORED) \
+        if fmt != 'pdf' else None
+    merged = []
+    completed = 0
+
+    def collect(pending):
+        nonlocal completed
+        for name, page in pending:
+            if fmt == 'html':
+                archive.writestr(f'{name}.html', page)
+            elif fmt == 'zip':
+                archive.writestr(f'{name}.pdf', page.result())
+            else:
+                merged.append(page.result())
+        completed += len(pending)
+        update_job(job_id, completed=completed)
+
+    conn = get_db_connection()
+    try:
+        pending = None
+        for start in range(0, len(bill_ids), BATCH_CHUNK_SIZE):
+            bills, items_by_bill, shop_settings = fetch_bills(conn, user_id, bill_ids[start:start + BATCH_CHUNK_SIZE])
+            conn.commit()
+            pages = [(bill_filename(bill),
+                      render_bill_html(template, bill, items_by_bill[bill['bill_id']], shop_settings, language))
+                     for bill in bills]
+            if pool:
+                pages = [(name, pool.submit(pdf_renderer.html_to_pdf, html)) for name, html in pages]
+            # Collect the previous chunk only now, so the pool converts it
+            # while this chunk was being rendered.
+            if pending is not None:
+                collect(pending)
+            pending = pages
+        if pending is not None:
+            collect(pending)
+    finally:
+        conn.close()
+        if archive is not None:
+            archive.close()
+    if fmt == 'pdf':
+        pdf_renderer.merge_pdfs(merged, path)
+    update_job(job_id, status='done', completed=completed,
+               result={'filename': OUTPUT_FILES[fmt], 'bills': completed, 'size': os.path.getsize(path)})
+
+
+def start_batch(user_id, template='invoice', fmt='zip', bill_ids=None, from_date=None, to_date=None,
+                status=None, language='en'):
+    """Validate a batch request, queue the job and start it; returns the job id."""
+    if template not in TEMPLATES:
+        raise ValueError(f'Unknown template: {template}')
+    if fmt not in FORMATS:
+        raise ValueError(f'Unsupported batch format: {fmt}')
+    if fmt != 'html' and pdf_renderer.PDF_RENDERER is None:
+        raise ValueError('PDF rendering needs weasyprint or xhtml2pdf installed; use format=html')
+    if fmt == 'pdf' and not pdf_renderer.PYPDF_AVAILABLE:
+        raise ValueError('A merged PDF needs pypdf installed; use format=zip')
+    conn = get_db_connection()
+    try:
+        ids = select_bill_ids(conn, user_id, bill_ids, from_date, to_date, status)
+        conn.commit()
+    finally:
+        conn.close()
+    if not ids:
+        raise ValueError('No bills match this batch')
+    params = {'template': template, 'format': fmt, 'from_date': from_date, 'to_date': to_date, 'status': status}
+    job_id = create_job(user_id, 'invoice-batch', params, total=len(ids))
+    run_in_background(job_id, run_batch, job_id, user_id, ids, template, fmt, language)
+    return job_id
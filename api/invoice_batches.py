@@ -0,0 +1,58 @@
+from flask import Blueprint, request, jsonify, send_file
+import os
+from api.utils import get_current_user_id, api_error_handler
+from api.i18n import get_user_language
+from api.jobs import get_job, job_dir
+from api.invoice_batch_service import start_batch
+
+invoice_batches_api = Blueprint('invoice_batches_api', __name__)
+
+def _job_response(job):
+    job_id = job['job_id']
+    job['progress'] = round(job['completed'] * 100 / job['total']) if job['total'] else 0
+    job['status_url'] = f'/api/invoice-batches/{job_id}'
+    if job['status'] == 'done':
+        job['download_url'] = f'/api/invoice-batches/{job_id}/download'
+    return job
+
+@invoice_batches_api.route('/api/invoice-batches', methods=['POST'])
+@api_error_handler
+def create_invoice_batch():
+    """Queue PDFs for a list of bills or a date range: {"bill_ids": [...]} or
+    {"from_date", "to_date", "status"}, with "template" (invoice|receipt) and
+    "format" (zip|pdf|html)."""
+    user_id = get_current_user_id()
+    data = request.get_json(silent=True) or {}
+    job_id = start_batch(
+        user_id,
+        template=data.get('template', 'invoice'),
+        fmt=data.get('format', 'zip'),
+        bill_ids=data.get('bill_ids'),
+        from_date=data.get('from_date'),
+        to_date=data.get('to_date'),
+        status=data.get('status') if data.get('status') != 'All' else None,
+        language=get_user_language(),
+    )
+    return jsonify(_job_response(get_job(job_id, user_id))), 202
+
+@invoice_batches_api.route('/api/invoice-batches/<job_id>', methods=['GET'])
+@api_error_handler
+def invoice_batch_status(job_id):
+    job = get_job(job_id, get_current_user_id())
+    if not job or job['kind'] != 'invoice-batch':
+        return jsonify({'error': 'Batch not found'}), 404
+    return jsonify(_job_response(job))
+
+@invoice_batches_api.route('/api/invoice-batches/<job_id>/download', methods=['GET'])
+@api_error_handler
+def download_invoice_batch(job_id):
+    job = get_job(job_id, get_current_user_id())
+    if not job or job['kind'] != 'invoice-batch':
+        return jsonify({'error': 'Batch not found'}), 404
+    if job['status'] != 'done':
+        return jsonify({'error': f"Batch is {job['status']}"}), 409
+    filename = job['result']['filename']
+    path = os.path.join(job_dir(job_id), filename)
+    if not os.path.exists(path):
+        return jsonify({'error': 'Batch output has expired'}), 410
+    return send_file(path, as_attachment=True, download_name=f"{job['created_at']:%Y%m%d}-{filename}")
@@ -0,0 +1,233 @@
+"""
+Background jobs.
+
+Long-running work (batch invoice PDFs) runs on a thread outside the request
+that created it. The job's row in `jobs` holds its owner, status and progress,
+so any gunicorn worker can answer a status poll; files a job produces are
+written under JOBS_DIR/<job_id>/.
+
+Jobs made of independent items (OCR batches) queue them in `job_items`
+instead: worker threads in any process claim one item at a time under a
+lease (claim_job_item), with a limit on running items per shop, and record
+its result (finish_job_item). Items of a process that died are taken over
+once their lease runs out, so such jobs survive restarts.
+
+Configuration (environment variables):
+    JOBS_DIR    directory for job output (default: <system temp dir>/tajir-jobs)
+"""
+import json
+import logging
+import os
+import tempfile
+import threading
+import uuid
+
+from flask import current_app
+from psycopg2.extras import execute_values
+
+from db.connection import get_db_connection, get_placeholder, execute_query, execute_update
+
+logger = logging.getLogger(__name__)
+
+JOBS_DIR = os.getenv('JOBS_DIR', os.path.join(tempfile.gettempdir(), 'tajir-jobs'))
+JOB_FIELDS = ('status', 'total', 'completed', 'result', 'error')
+# pg_advisory_xact_lock(JOB_CLAIM_LOCK) serializes item claims, so two
+# workers cannot both take a shop's last free slot
+JOB_CLAIM_LOCK = 72520043
+
+
+def create_job(user_id, kind, params=None, total=0):
+    """Record a queued job and return its id."""
+    job_id = uuid.uuid4().hex
+    placeholder = get_placeholder()
+    conn = get_db_connection()
+    try:
+        execute_update(conn, f'''
+            INSERT INTO jobs (job_id, user_id, kind, params, total)
+            VALUES ({placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder})
+        ''', (job_id, user_id, kind, json.dumps(params or {}), total))
+    finally:
+        conn.close()
+    return job_id
+
+
+def update_job(job_id, **fields):
+    """Set status/progress fields; moving to running, done or failed stamps started_at/finished_at."""
+    unknown = set(fields) - set(JOB_FIELDS)
+    if unknown:
+        raise ValueError(f'Unknown job fields: {sorted(unknown)}')
+    if 'result' in fields:
+        fields['result'] = json.dumps(fields['result'])
+    placeholder = get_placeholder()
+    assignments = [f'{name} = {placeholder}' for name in fields] + ['updated_at = CURRENT_TIMESTAMP']
+    if fields.get('status') == 'running':
+        assignments.append('started_at = CURRENT_TIMESTAMP')
+    elif fields.get('status') in ('done', 'failed'):
+        assignments.append('finished_at = CURRENT_TIMESTAMP')
+    conn = get_db_connection()
+    try:
+        execute_update(conn, f"UPDATE jobs SET {', '.join(assignments)} WHERE job_id = {placeholder}",
+                       list(fields.values()) + [job_id])
+    finally:
+        conn.close()
+
+
+def get_job(job_id, user_id):
+    """The job as a dict, or None when it does not exist or belongs to another shop."""
+    placeholder = get_placeholder()
+    conn = get_db_connection()
+    try:
+        job = execute_query(conn, f'''
+            SELECT job_id, kind, status, params, total, completed, result, error,
+                   created_at, started_at, finished_at
+            FROM jobs WHERE job_id = {placeholder} AND user_id = {placeholder}
+        ''', (job_id, user_id)).fetchone()
+        conn.commit()
+    finally:
+        conn.close()
+    return dict(job) if job else None
+
+
+def job_dir(job_id):
+    """Directory for the files a job writes, created on first use."""
+    path = os.path.join(JOBS_DIR, job_id)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def run_in_background(job_id, target, *args):
+    """Run target(*args) on a daemon thread inside an app context.
+
+    The job is marked running first; target marks it done with its result.
+    An exception marks the job failed with the error message.
+    """
+    app = current_app._get_current_object()
+
+    def run():
+        with app.app_context():
+            try:
+                update_job(job_id, status='running')
+                target(*args)
+            except Exception as e:
+                logger.exception(f'Job {job_id} failed')
+                update_job(job_id, status='failed', error=str(e))
+
+    thread = threading.Thread(target=run, name=f'job-{job_id[:8]}', daemon=True)
+    thread.start()
+    return thread
+
+
+def add_job_items(job_id, user_id, items):
+    """Queue a job's items: dicts with 'params', plus 'result' for items already failed.
+
+    Failed items count as completed; a job whose items all failed is done.
+    """
+    rows = [
+        (job_id, position, user_id, 'failed' if 'result' in item else 'queued',
+         json.dumps(item.get('params', {})), json.dumps(item['result']) if 'result' in item else None)
+        for position, item in enumerate(items)
+    ]
+    failed = sum(1 for item in items if 'result' in item)
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        execute_values(cursor, '''
+            INSERT INTO job_items (job_id, position, user_id, status, params, result) VALUES %s
+        ''', rows, page_size=len(rows))
+        cursor.execute('''
+            UPDATE jobs SET completed = %(failed)s, updated_at = CURRENT_TIMESTAMP,
+                status = CASE WHEN %(failed)s >= total THEN 'done' ELSE status END,
+                finished_at = CASE WHEN %(failed)s >= total THEN CURRENT_TIMESTAMP END
+            WHERE job_id = %(job_id)s
+        ''', {'job_id': job_id, 'failed': failed})
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def claim_job_item(kind, per_shop=1, lease=300):
+    """Lease the oldest runnable item of a `kind` job, or None.
+
+    Runnable: queued, or running with an expired lease (its worker died).
+    Shops with `per_shop` items running are skipped, so one shop's large
+    batch cannot hold every worker. The job moves to running with its
+    first item.
+    """
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute('SELECT pg_advisory_xact_lock(%s)', (JOB_CLAIM_LOCK,))
+        cursor.execute('''
+            WITH candidate AS (
+                SELECT i.job_id, i.position
+                FROM job_items i
+                JOIN jobs j ON j.job_id = i.job_id
+                WHERE j.kind = %(kind)s
+                  AND (i.status = 'queued' OR (i.status = 'running' AND i.lease_until < CURRENT_TIMESTAMP))
+                  AND (SELECT COUNT(*) FROM job_items r
+                       WHERE r.user_id = i.user_id AND r.status = 'running'
+                         AND r.lease_until >= CURRENT_TIMESTAMP) < %(per_shop)s
+                ORDER BY j.created_at, i.job_id, i.position
+                LIMIT 1
+            )
+            UPDATE job_items i
+            SET status = 'running', attempts = i.attempts + 1, updated_at = CURRENT_TIMESTAMP,
+                lease_until = CURRENT_TIMESTAMP + make_interval(secs => %(lease)s)
+            FROM candidate c
+            WHERE i.job_id = c.job_id AND i.position = c.position
+            RETURNING i.job_id, i.position, i.user_id, i.params, i.attempts
+        ''', {'kind': kind, 'per_shop': per_shop, 'lease': lease})
+        item = cursor.fetchone()
+        if item:
+            cursor.execute('''
+                UPDATE jobs SET status = 'running', started_at = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP
+                WHERE job_id = %s AND status = 'queued'
+            ''', (item['job_id'],))
+        conn.commit()
+    finally:
+        conn.close()
+    return dict(item) if item else None
+
+
+def finish_job_item(item, result, failed=False):
+    """Record a claimed item's result; returns the job's status, or None if the
+    lease was lost and another worker owns the item now."""
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute('''
+            UPDATE job_items SET status = %(status)s, result = %(result)s, lease_until = NULL,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE job_id = %(job_id)s AND position = %(position)s
+              AND attempts = %(attempts)s AND status = 'running'
+            RETURNING job_id
+        ''', {'status': 'failed' if failed else 'done', 'result': json.dumps(result),
+              'job_id': item['job_id'], 'position': item['position'], 'attempts': item['attempts']})
+        if cursor.fetchone() is None:
+            conn.rollback()
+            return None
+        cursor.execute('''
+            UPDATE jobs SET completed = completed + 1, updated_at = CURRENT_TIMESTAMP,
+                status = CASE WHEN completed + 1 >= total THEN 'done' ELSE status END,
+                finished_at = CASE WHEN completed + 1 >= total THEN CURRENT_TIMESTAMP ELSE finished_at END
+            WHERE job_id = %s
+            RETURNING status
+        ''', (item['job_id'],))
+        status = cursor.fetchone()['status']
+        conn.commit()
+    finally:
+        conn.close()
+    return status
+
+
+def get_job_items(job_id):
+    """Status, params and result of each item, in order."""
+    conn = get_db_connection()
+    try:
+        items = execute_query(conn, '''
+            SELECT position, status, params, result FROM job_items WHERE job_id = %s ORDER BY position
+        ''', (job_id,)).fetchall()
+        conn.commit()
+    finally:
+        conn.close()
+    return [dict(item) for item in items]
@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from db.connection import get_db_connection, get_placeholder, execute_query, execute_update
 from api.utils import get_current_user_id
+from api.response_cache import cached_response, invalidates
 
 loyalty_api = Blueprint('loyalty_api', __name__)
 
@@ -62,6 +63,7 @@ def get_loyalty_config():
         }), 500
 
 @loyalty_api.route('/api/loyalty/config', methods=['PUT'])
+@invalidates('loyalty')
 def update_loyalty_config():
     """Update loyalty program configuration."""
     try:
@@ -181,6 +183,7 @@ def get_loyalty_tiers():
         }), 500
 
 @loyalty_api.route('/api/loyalty/tiers', methods=['POST'])
+@invalidates('loyalty')
 def create_loyalty_tier():
     """Create a new loyalty tier."""
     try:
@@ -321,6 +324,7 @@ def get_customer_loyalty(customer_id):
         }), 500
 
 @loyalty_api.route('/api/loyalty/customers/<int:customer_id>/enroll', methods=['POST'])
+@invalidates('loyalty')
 def enroll_customer_loyalty(customer_id):
     """Enroll a customer in the loyalty program."""
     try:
@@ -454,6 +458,7 @@ def get_loyalty_rewards():
         }), 500
 
 @loyalty_api.route('/api/loyalty/rewards', methods=['POST'])
+@invalidates('loyalty')
 def create_loyalty_reward():
     """Create a new loyalty reward."""
     try:
@@ -527,6 +532,7 @@ def get_personalized_offers():
         }), 500
 
 @loyalty_api.route('/api/loyalty/analytics', methods=['GET'])
+@cached_response('loyalty-analytics', ttl=120, depends_on=('bills', 'customers', 'loyalty'))
 def get_loyalty_analytics():
     """Get loyalty program analytics."""
     try:
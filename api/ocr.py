@@ -1,11 +1,16 @@
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
 import os
+import time
 import logging
 from pathlib import Path
 from datetime import datetime
 from werkzeug.utils import secure_filename
 import pytesseract
 from api.utils import get_current_user_id
+from api.ocr_engine import engine as ocr_engine
+from api import ocr_jobs
+from api.jobs import get_job, get_job_items
+from db.connection import release_request_connection
 
 # Try to import OpenCV and NumPy
 try:
@@ -98,42 +103,9 @@ def extract_text_from_image(image_path):
             # Preprocess image
             processed_image = preprocess_image(image)
         
-        # Extract text using Tesseract
-        # Try different OCR configurations for better results
-        configs = [
-            '--oem 3 --psm 6',  # Default configuration
-            '--oem 3 --psm 3',  # Fully automatic page segmentation
-            '--oem 3 --psm 8',  # Single word
-            '--oem 3 --psm 13'  # Raw line
-        ]
-        
-        best_text = ""
-        best_confidence = 0
-        
-        for config in configs:
-            try:
-                # Extract text with confidence
-                data = pytesseract.image_to_data(processed_image, config=config, output_type=pytesseract.Output.DICT)
-                
-                # Calculate average confidence
-                confidences = [int(conf) for conf in data['conf'] if int(conf) > 0]
-                if confidences:
-                    avg_confidence = sum(confidences) / len(confidences)
-                    
-                    # Extract text
-                    text = ' '.join([word for word, conf in zip(data['text'], data['conf']) if int(conf) > 30])
-                    
-                    if avg_confidence > best_confidence and text.strip():
-                        best_confidence = avg_confidence
-                        best_text = text
-                        
-            except Exception as e:
-                logger.warning(f"OCR config {config} failed: {e}")
-                continue
-        
-        # If no good results, try simple text extraction
-        if not best_text.strip():
-            best_text = pytesseract.image_to_string(processed_image)
+        # Extract text using Tesseract: all configurations in parallel,
+        # stopping at the first confident one (see api/ocr_engine.py)
+        best_text, best_confidence = ocr_engine.recognize(processed_image)
         
         return {
             'text': best_text.strip(),
@@ -212,7 +184,7 @@ def ocr_extract_text():
 
 @ocr_api.route('/api/ocr/extract-batch', methods=['POST'])
 def ocr_extract_batch():
-    """Extract text from multiple uploaded images"""
+    """Queue multiple uploaded images for OCR; poll status_url or stream events_url for the results"""
     try:
         user_id = get_current_user_id()
         if not user_id:
@@ -222,70 +194,83 @@ def ocr_extract_batch():
         if 'images' not in request.files:
             return jsonify({'success': False, 'error': 'No image files uploaded'}), 400
         
-        files = request.files.getlist('images')
-        if not files or files[0].filename == '':
-            return jsonify({'success': False, 'error': 'No files selected'}), 400
-        
-        # Validate file types
-        allowed_extensions = {'png', 'jpg', 'jpeg', 'gif', 'bmp', 'tiff', 'webp'}
-        results = []
-        
-        # Create uploads directory if it doesn't exist
-        upload_dir = Path('uploads')
-        upload_dir.mkdir(exist_ok=True)
-        
-        for file in files:
-            if file.filename == '':
-                continue
-                
-            if not ('.' in file.filename and 
-                    file.filename.rsplit('.', 1)[1].lower() in allowed_extensions):
-                results.append({
-                    'filename': file.filename,
-                    'success': False,
-                    'error': 'Invalid file type'
-                })
-                continue
-            
-            try:
-                # Save uploaded file
-                filename = secure_filename(file.filename)
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                unique_filename = f"{timestamp}_{filename}"
-                file_path = upload_dir / unique_filename
-                
-                file.save(str(file_path))
-                
-                # Extract text using OCR
-                result = extract_text_from_image(str(file_path))
-                
-                # Clean up uploaded file
-                try:
-                    os.remove(str(file_path))
-                except:
-                    pass
-                
-                results.append({
-                    'filename': file.filename,
-                    'success': result['success'],
-                    'text': result.get('text', ''),
-                    'confidence': result.get('confidence', 0),
-                    'error': result.get('error', '')
-                })
-                
-            except Exception as e:
-                results.append({
-                    'filename': file.filename,
-                    'success': False,
-                    'error': str(e)
-                })
+        try:
+            job_id = ocr_jobs.enqueue_batch(user_id, request.files.getlist('images'))
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
         
-        return jsonify({
-            'success': True,
-            'results': results,
-            'message': f'Processed {len(results)} images'
-        })
+        return jsonify(batch_status(job_id, user_id)), 202
         
     except Exception as e:
         logger.error(f"Batch OCR extraction error: {e}")
-        return jsonify({'success': False, 'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+def batch_status(job_id, user_id):
+    """The batch's progress and the results so far (None for images not recognized yet)"""
+    job = get_job(job_id, user_id)
+    if not job or job['kind'] != ocr_jobs.JOB_KIND:
+        return None
+    results = [item['result'] for item in get_job_items(job_id)]
+    return {
+        'success': True,
+        'job_id': job_id,
+        'status': job['status'],
+        'total': job['total'],
+        'completed': job['completed'],
+        'progress': round(job['completed'] * 100 / job['total']) if job['total'] else 0,
+        'results': results,
+        'message': f"Processed {job['completed']} of {job['total']} images",
+        'status_url': f'/api/ocr/jobs/{job_id}',
+        'events_url': f'/api/ocr/jobs/{job_id}/events',
+    }
+
+@ocr_api.route('/api/ocr/jobs/<job_id>', methods=['GET'])
+def ocr_batch_status(job_id):
+    """Poll an OCR batch"""
+    user_id = get_current_user_id()
+    if not user_id:
+        return jsonify({'success': False, 'error': 'User not authenticated'}), 401
+    status = batch_status(job_id, user_id)
+    if status is None:
+        return jsonify({'success': False, 'error': 'Batch not found'}), 404
+    return jsonify(status)
+
+@ocr_api.route('/api/ocr/jobs/<job_id>/events', methods=['GET'])
+def ocr_batch_events(job_id):
+    """Server-sent events for an OCR batch: a progress event whenever it changes, then done.
+
+    The stream ends after OCR_EVENTS_TIMEOUT seconds; EventSource reconnects.
+    The pooled connection is only held while polling.
+    """
+    user_id = get_current_user_id()
+    if not user_id:
+        return jsonify({'success': False, 'error': 'User not authenticated'}), 401
+    if batch_status(job_id, user_id) is None:
+        return jsonify({'success': False, 'error': 'Batch not found'}), 404
+    release_request_connection()
+
+    def events():
+        deadline = time.monotonic() + ocr_jobs.EVENTS_TIMEOUT
+        last = None
+        yield 'retry: 2000\n\n'
+        while True:
+            status = batch_status(job_id, user_id)
+            release_request_connection()
+            payload = current_app.json.dumps(status)
+            if payload != last:
+                yield f'event: progress\ndata: {payload}\n\n'
+                last = payload
+            if status['status'] in ('done', 'failed'):
+                yield f'event: done\ndata: {payload}\n\n'
+                return
+            if time.monotonic() > deadline:
+                return
+            time.sleep(ocr_jobs.EVENTS_POLL_INTERVAL)
+
+    response = Response(stream_with_context(events()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+# Workers start (or resume queued batches) with the first request of a process
+ocr_api.before_app_request(ocr_jobs.start_workers)
@@ -0,0 +1,211 @@
+"""
+Parallel Tesseract OCR with early exit.
+
+extract_text_from_image() used to run four page segmentation modes one after
+another (each a tesseract process started by pytesseract, each re-encoding
+the image to a temporary PNG), then possibly a fifth image_to_string pass.
+OcrEngine instead:
+
+- writes the preprocessed image to disk once and hands every pass the path;
+- runs the passes concurrently on a shared, bounded worker pool. Workers
+  only wait on their tesseract child, so threads are enough: at most
+  OCR_WORKERS tesseract processes run at a time across all requests, and
+  at most OCR_WORKERS passes of one image are in flight;
+- starts the modes that won most often first and returns as soon as one
+  reaches OCR_CONFIDENCE_THRESHOLD. Remaining modes are never started;
+  passes already running finish in the background (their result is
+  dropped);
+- builds the fallback text (no word above the confidence cut) from the
+  automatic page segmentation pass instead of running tesseract again.
+
+Tesseract parallelizes internally with OpenMP; with several passes at once
+that oversubscribes the cores, so OMP_THREAD_LIMIT defaults to 1 for the
+tesseract children when OCR_WORKERS > 1.
+
+Configuration (environment variables):
+    OCR_WORKERS                  concurrent tesseract processes per app process (default: CPU count, max 4)
+    OCR_CONFIDENCE_THRESHOLD     average word confidence that ends a recognition early (default 80; 101 disables)
+    OCR_TIMEOUT                  seconds before a single pass is abandoned (default 30)
+"""
+import os
+import logging
+import tempfile
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import pytesseract
+
+logger = logging.getLogger(__name__)
+
+# Tried in this order until some win; ties keep this order
+OCR_CONFIGS = [
+    '--oem 3 --psm 6',   # Uniform block of text (receipts)
+    '--oem 3 --psm 3',   # Fully automatic page segmentation
+    '--oem 3 --psm 8',   # Single word
+    '--oem 3 --psm 13',  # Raw line
+]
+# Words at or below this confidence are left out of the text
+WORD_CONFIDENCE = 30
+# The pass whose words become the text when no pass has a confident word
+FALLBACK_CONFIG = '--oem 3 --psm 3'
+
+
+def score(data):
+    """(text, average confidence) of one image_to_data result."""
+    confidences = [float(conf) for conf in data['conf'] if float(conf) > 0]
+    if not confidences:
+        return '', 0
+    text = ' '.join(word for word, conf in zip(data['text'], data['conf']) if float(conf) > WORD_CONFIDENCE)
+    return text, sum(confidences) / len(confidences)
+
+
+def all_words(data):
+    return ' '.join(word for word in data['text'] if word.strip())
+
+
+class OcrEngine:
+    """Runs OCR_CONFIGS against an image concurrently; recognize() returns the best pass."""
+
+    def __init__(self, workers=4, confidence_threshold=80, timeout=30, configs=OCR_CONFIGS):
+        self.workers = workers
+        self.confidence_threshold = confidence_threshold
+        self.timeout = timeout
+        self.configs = list(configs)
+        self._executor = None
+        self._lock = threading.Lock()
+        self.wins = Counter()
+        self.recognitions = 0
+        self.early_exits = 0
+        self.passes = 0
+        self.skipped = 0
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                if self.workers > 1:
+                    os.environ.setdefault('OMP_THREAD_LIMIT', '1')
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='ocr')
+            return self._executor
+
+    def ordered_configs(self):
+        """Configs by how often they produced the best result, most first."""
+        with self._lock:
+            return sorted(self.configs, key=lambda config: -self.wins[config])
+
+    def _run(self, path, config):
+        data = pytesseract.image_to_data(path, config=config, output_type=pytesseract.Output.DICT,
+                                         timeout=self.timeout)
+        with self._lock:
+            self.passes += 1
+        return data
+
+    def recognize(self, image):
+        """OCR a preprocessed image (OpenCV array or PIL image); returns (text, confidence)."""
+        fd, path = tempfile.mkstemp(prefix='ocr_', suffix='.png')
+        os.close(fd)
+        try:
+            save_image(image, path)
+        except Exception:
+            os.remove(path)
+            raise
+        # Passes still running after an early exit read the image; whoever
+        # finishes last (this call or one of them) removes it.
+        holders = [1]
+
+        def release(_=None):
+            with self._lock:
+                holders[0] -= 1
+                last = holders[0] == 0
+            if last:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+        def submit(config):
+            with self._lock:
+                holders[0] += 1
+            future = pool.submit(self._run, path, config)
+            future.add_done_callback(release)
+            return future
+
+        pool = self._pool()
+        try:
+            return self._collect(submit)
+        finally:
+            release()
+
+    def _collect(self, submit):
+        # At most `workers` passes of one image in flight, so an early exit
+        # leaves nothing queued behind it
+        configs = iter(self.ordered_configs())
+        futures = {}
+        for config in configs:
+            futures[submit(config)] = config
+            if len(futures) >= self.workers:
+                break
+        best_text, best_confidence, best_config = '', 0, None
+        fallback = ''
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                config = futures[future]
+                try:
+                    data = future.result()
+                except Exception as e:
+                    logger.warning(f"OCR config {config} failed: {e}")
+                    continue
+                if config == FALLBACK_CONFIG:
+                    fallback = all_words(data)
+                text, confidence = score(data)
+                if confidence > best_confidence and text.strip():
+                    best_text, best_confidence, best_config = text, confidence, config
+            if best_confidence >= self.confidence_threshold:
+                break
+            for config in configs:
+                future = submit(config)
+                futures[future] = config
+                pending.add(future)
+                if len(pending) >= self.workers:
+                    break
+        skipped = len(self.configs) - len(futures)
+        with self._lock:
+            self.recognitions += 1
+            self.skipped += skipped
+            if skipped or pending:
+                self.early_exits += 1
+            if best_config:
+                self.wins[best_config] += 1
+        if not best_text.strip():
+            best_text = fallback
+        return best_text.strip(), best_confidence
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'confidence_threshold': self.confidence_threshold,
+                'recognitions': self.recognitions,
+                'early_exits': self.early_exits,
+                'passes': self.passes,
+                'skipped_passes': self.skipped,
+                'wins': dict(self.wins),
+            }
+
+
+def save_image(image, path):
+    if hasattr(image, 'save'):
+        image.save(path)
+    else:
+        import cv2
+        if not cv2.imwrite(path, image):
+            raise ValueError('Could not write the preprocessed image')
+
+
+engine = OcrEngine(
+    workers=int(os.getenv('OCR_WORKERS', min(os.cpu_count() or 1, 4))),
+    confidence_threshold=float(os.getenv('OCR_CONFIDENCE_THRESHOLD', 80)),
+    timeout=float(os.getenv('OCR_TIMEOUT', 30)),
+)
@@ -0,0 +1,154 @@
+"""
+Asynchronous OCR batches.
+
+POST /api/ocr/extract-batch saves the uploaded images under
+JOBS_DIR/<job_id>/, queues one job item per image (see api/jobs.py) and
+answers 202 with the job id straight away. Worker threads in every app
+process claim images one at a time and run them through
+extract_text_from_image(), so the images of a batch are recognized in
+parallel, across processes too, while the request thread is free.
+
+- Items are leased: a process that dies mid-image loses its lease after
+  OCR_JOB_LEASE seconds and another worker redoes the image, so queued and
+  interrupted batches resume after a restart. An image is tried at most
+  OCR_JOB_MAX_ATTEMPTS times.
+- At most OCR_JOBS_PER_SHOP images of one shop are recognized at a time,
+  across all processes; other shops' images go ahead of the rest of a large
+  batch.
+- Workers start with the first request a process serves (gunicorn forks
+  after app creation), so a restarted process resumes with its first
+  request, typically a client polling its batch.
+- Progress: GET /api/ocr/jobs/<job_id> to poll, or
+  GET /api/ocr/jobs/<job_id>/events for server-sent events.
+
+Configuration (environment variables):
+    OCR_JOB_WORKERS         worker threads per app process (default 2; 0 disables)
+    OCR_JOBS_PER_SHOP       images of one shop recognized at once (default 2)
+    OCR_JOB_LEASE           seconds an image may run before another worker takes it over (default 300)
+    OCR_JOB_MAX_ATTEMPTS    tries per image (default 3)
+    OCR_JOB_POLL            seconds between queue checks when idle (default 2)
+    OCR_BATCH_MAX_IMAGES    images accepted per batch (default 50)
+    OCR_EVENTS_TIMEOUT      seconds an /events stream stays open before the client reconnects (default 300)
+"""
+import os
+import time
+import logging
+import threading
+
+from werkzeug.utils import secure_filename
+
+from api.jobs import create_job, add_job_items, claim_job_item, finish_job_item, job_dir
+
+logger = logging.getLogger(__name__)
+
+JOB_KIND = 'ocr-batch'
+ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'bmp', 'tiff', 'webp'}
+WORKERS = int(os.getenv('OCR_JOB_WORKERS', 2))
+PER_SHOP = int(os.getenv('OCR_JOBS_PER_SHOP', 2))
+LEASE = int(os.getenv('OCR_JOB_LEASE', 300))
+MAX_ATTEMPTS = int(os.getenv('OCR_JOB_MAX_ATTEMPTS', 3))
+POLL_INTERVAL = float(os.getenv('OCR_JOB_POLL', 2))
+MAX_IMAGES = int(os.getenv('OCR_BATCH_MAX_IMAGES', 50))
+EVENTS_TIMEOUT = int(os.getenv('OCR_EVENTS_TIMEOUT', 300))
+EVENTS_POLL_INTERVAL = 1
+
+_wake = threading.Event()
+_workers_lock = threading.Lock()
+_workers_pid = None
+
+
+def allowed_image(filename):
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+
+
+def enqueue_batch(user_id, files):
+    """Store uploaded images and queue them as one job; returns the job id."""
+    files = [file for file in files if file.filename]
+    if not files:
+        raise ValueError('No files selected')
+    if len(files) > MAX_IMAGES:
+        raise ValueError(f'A batch is limited to {MAX_IMAGES} images')
+    job_id = create_job(user_id, JOB_KIND, {'filenames': [file.filename for file in files]}, total=len(files))
+    directory = job_dir(job_id)
+    items = []
+    for position, file in enumerate(files):
+        if not allowed_image(file.filename):
+            items.append({'params': {'filename': file.filename},
+                          'result': image_result(file.filename, error='Invalid file type')})
+            continue
+        stored = f'{position:04d}_{secure_filename(file.filename) or "image"}'
+        file.save(os.path.join(directory, stored))
+        items.append({'params': {'filename': file.filename, 'path': stored}})
+    add_job_items(job_id, user_id, items)
+    start_workers()
+    _wake.set()
+    return job_id
+
+
+def image_result(filename, result=None, error=None):
+    """One image's entry in the batch results (the shape the endpoint always returned)."""
+    result = result or {'success': False, 'error': error}
+    return {
+        'filename': filename,
+        'success': result['success'],
+        'text': result.get('text', ''),
+        'confidence': result.get('confidence', 0),
+        'error': result.get('error', ''),
+    }
+
+
+def process_item(item):
+    """Recognize one claimed image and record the result."""
+    from api.ocr import extract_text_from_image
+
+    params = item['params']
+    path = os.path.join(job_dir(item['job_id']), params['path'])
+    if item['attempts'] > MAX_ATTEMPTS:
+        result = image_result(params['filename'], error=f'Gave up after {MAX_ATTEMPTS} attempts')
+    elif not os.path.exists(path):
+        result = image_result(params['filename'], error='Uploaded image is no longer available')
+    else:
+        result = image_result(params['filename'], extract_text_from_image(path))
+    status = finish_job_item(item, result, failed=not result['success'])
+    if status is None:
+        return  # Lease lost; the worker that took over records the result
+    try:
+        os.remove(path)
+        if status == 'done':
+            os.rmdir(job_dir(item['job_id']))
+    except OSError:
+        pass
+
+
+def work():
+    """Worker thread: claim and recognize images until the process exits."""
+    while True:
+        try:
+            item = claim_job_item(JOB_KIND, per_shop=PER_SHOP, lease=LEASE)
+        except Exception:
+            logger.exception('Could not claim an OCR job item')
+            item = None
+        if item is None:
+            _wake.wait(POLL_INTERVAL)
+            _wake.clear()
+            continue
+        try:
+            process_item(item)
+        except Exception:
+            # The lease runs out and the image is retried
+            logger.exception(f"OCR job {item['job_id']} image {item['position']} failed")
+            time.sleep(POLL_INTERVAL)
+
+
+def start_workers():
+    """Start this process's worker threads once (again after a fork)."""
+    global _workers_pid
+    pid = os.getpid()
+    if WORKERS <= 0 or _workers_pid == pid:
+        return
+    with _workers_lock:
+        if _workers_pid == pid:
+            return
+        for n in range(WORKERS):
+            threading.Thread(target=work, name=f'ocr-job-{n}', daemon=True).start()
+        _workers_pid = pid
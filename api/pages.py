@@ -5,6 +5,7 @@ from db.connection import get_db_connection, execute_query, get_placeholder
 from api.plans import get_user_plan_info
 from api.i18n import get_user_language, translate_text as get_translated_text
 from api.utils import get_current_user_id
+from api.assets import send_asset
 
 pages_api = Blueprint('pages_api', __name__)
 logger = logging.getLogger(__name__)
@@ -199,13 +200,7 @@ def login():
                         get_user_language=get_user_language,
                         get_translated_text=get_translated_text)
 
-@pages_api.route('/static/<path:filename>')
-def static_with_cache_busting(filename):
-    """Serve static files with cache-busting headers."""
-    response = send_from_directory(os.path.join(current_app.root_path, 'static'), filename)
-    response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-    response.headers['Pragma'] = 'no-cache'
-    response.headers['Expires'] = '0'
-    # Add timestamp to force cache refresh
-    response.headers['Last-Modified'] = 'Thu, 01 Jan 1970 00:00:00 GMT'
-    return response
+@pages_api.route('/static/build/<path:filename>')
+def hashed_static(filename):
+    """Serve fingerprinted static files (see api/assets.py); they never change, so they cache for a year."""
+    return send_asset(filename)
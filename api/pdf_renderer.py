@@ -0,0 +1,108 @@
+"""
+Local HTML-to-PDF conversion for printed invoices and receipts.
+
+WeasyPrint is used when it is installed and its Pango system libraries are
+present (best CSS support and Arabic shaping); otherwise xhtml2pdf, which is
+pure Python. Merged PDFs are assembled with pypdf. Nothing calls out to a
+network service.
+
+Conversion is CPU-bound, so it runs in a process pool. The pool uses the
+spawn start method: renderer processes do not inherit the web worker's
+threads or database connections.
+
+Configuration (environment variables):
+    INVOICE_PDF_WORKERS   renderer processes per web worker (default: CPU count)
+    INVOICE_PDF_FONT      path to a TTF with Arabic glyphs, embedded by xhtml2pdf
+                          (WeasyPrint picks up installed system fonts)
+"""
+import io
+import os
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+# Try to import WeasyPrint (preferred renderer; OSError when Pango is missing)
+try:
+    import weasyprint
+    WEASYPRINT_AVAILABLE = True
+except (ImportError, OSError):
+    WEASYPRINT_AVAILABLE = False
+    weasyprint = None
+
+# Try to import xhtml2pdf (pure-Python fallback renderer)
+try:
+    from xhtml2pdf import pisa
+    XHTML2PDF_AVAILABLE = True
+except ImportError:
+    XHTML2PDF_AVAILABLE = False
+    pisa = None
+
+# Try to import pypdf (merging per-bill PDFs into one document)
+try:
+    from pypdf import PdfWriter
+    PYPDF_AVAILABLE = True
+except ImportError:
+    PYPDF_AVAILABLE = False
+    PdfWriter = None
+
+logger = logging.getLogger(__name__)
+
+if WEASYPRINT_AVAILABLE:
+    PDF_RENDERER = 'weasyprint'
+elif XHTML2PDF_AVAILABLE:
+    PDF_RENDERER = 'xhtml2pdf'
+else:
+    PDF_RENDERER = None
+
+PDF_WORKERS = int(os.getenv('INVOICE_PDF_WORKERS', os.cpu_count() or 2))
+PDF_FONT = os.getenv('INVOICE_PDF_FONT', '')
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def html_to_pdf(html):
+    """PDF bytes for one rendered HTML page."""
+    if PDF_RENDERER is None:
+        raise RuntimeError('No HTML-to-PDF renderer installed (weasyprint or xhtml2pdf)')
+    if PDF_RENDERER == 'weasyprint':
+        return weasyprint.HTML(string=html).write_pdf()
+    if PDF_FONT:
+        font_css = (f"@font-face {{ font-family: 'InvoiceFont'; src: url('{PDF_FONT}'); }} "
+                    f"body {{ font-family: 'InvoiceFont'; }}")
+        html = html.replace('</head>', f'<style>{font_css}</style></head>', 1)
+    output = io.BytesIO()
+    status = pisa.CreatePDF(html, dest=output)
+    if status.err:
+        raise RuntimeError(f'xhtml2pdf failed with {status.err} error(s)')
+    return output.getvalue()
+
+
+def merge_pdfs(pdfs, path):
+    """Write the PDFs, in order, as one document at `path`."""
+    if not PYPDF_AVAILABLE:
+        raise RuntimeError('Merging PDFs needs pypdf')
+    writer = PdfWriter()
+    for pdf in pdfs:
+        writer.append(io.BytesIO(pdf))
+    with open(path, 'wb') as f:
+        writer.write(f)
+
+
+def _init_worker():
+    # xhtml2pdf warns about every unsupported CSS property and missing glyph.
+    logging.getLogger('xhtml2pdf').setLevel(logging.ERROR)
+
+
+def get_pool():
+    """This worker's renderer process pool, created on first use."""
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = ProcessPoolExecutor(max_workers=PDF_WORKERS,
+                                        mp_context=multiprocessing.get_context('spawn'),
+                                        initializer=_init_worker)
+            _pool_pid = os.getpid()
+        return _pool
@@ -0,0 +1,77 @@
+"""
+Phone number normalization.
+
+Customers are keyed on phone_e164 (`+<country code><number>`), so
+'050 123 4567', '0501234567', '971501234567' and '+971 50 123 4567' are the
+same customer. Numbers typed without a country code are UAE numbers, as
+WhatsApp links have always assumed; a trunk 0 after the country code
+(+971 050 ...) is dropped.
+
+A number needs at least MIN_NATIONAL_DIGITS digits after its country code
+('12345' is not '+97112345'). For numbers typed in international form the
+country code's length is unknown, so one digit is assumed: at least 9
+digits in all, as customer validation has always required.
+
+normalize_phone() mirrors the normalize_phone_e164() SQL function from
+db/migrations/0010_customer_phone_e164.sql; keep the two in step.
+"""
+import re
+
+DEFAULT_COUNTRY_CODE = '971'
+MIN_NATIONAL_DIGITS = 8
+MAX_DIGITS = 15
+
+
+def _with_country_code(digits, international, country_code=None):
+    """(digits with the country code, length of that country code)"""
+    code_length = 1
+    if international:
+        pass
+    elif digits.startswith('00'):
+        digits = digits[2:]
+    elif country_code:
+        if digits.startswith(country_code):
+            digits = digits[len(country_code):]
+        if digits.startswith('0'):
+            digits = digits[1:]
+        digits = country_code + digits
+        code_length = len(country_code)
+    elif digits.startswith(DEFAULT_COUNTRY_CODE) and len(digits) >= 11:
+        code_length = len(DEFAULT_COUNTRY_CODE)
+    elif digits.startswith('0'):
+        digits = DEFAULT_COUNTRY_CODE + digits[1:]
+        code_length = len(DEFAULT_COUNTRY_CODE)
+    else:
+        digits = DEFAULT_COUNTRY_CODE + digits
+        code_length = len(DEFAULT_COUNTRY_CODE)
+    if digits.startswith(DEFAULT_COUNTRY_CODE + '0'):
+        digits = DEFAULT_COUNTRY_CODE + digits[len(DEFAULT_COUNTRY_CODE) + 1:]
+    return digits, code_length
+
+
+def normalize_phone(phone, country_code=None):
+    """E.164 form of a phone number ('+971501234567'), or None when it cannot be one.
+
+    `country_code` (digits, e.g. '44') applies to numbers typed without '+'.
+    """
+    phone = (phone or '').strip()
+    digits = re.sub(r'\D', '', phone)
+    if not digits:
+        return None
+    country_code = re.sub(r'\D', '', country_code or '')
+    digits, code_length = _with_country_code(digits, phone.startswith('+'), country_code)
+    if len(digits) - code_length < MIN_NATIONAL_DIGITS or len(digits) > MAX_DIGITS:
+        return None
+    return '+' + digits
+
+
+def phone_prefix(query):
+    """E.164 prefix for a partly typed number: '050 12' -> '+9715012'."""
+    query = query.strip()
+    digits = re.sub(r'\D', '', query)
+    if not query.startswith('+') and DEFAULT_COUNTRY_CODE.startswith(digits):
+        # '9', '97': the start of the country code itself.
+        return '+' + digits
+    if not query.startswith('+') and digits.startswith(DEFAULT_COUNTRY_CODE):
+        return '+' + _with_country_code(digits, True)[0]
+    return '+' + _with_country_code(digits, query.startswith('+'))[0]
@@ -0,0 +1,196 @@
+"""
+Per-shop product catalog cache.
+
+Barcode scans and the billing product picker read a shop's active products
+many times a minute while the catalog changes a few times a day. Each worker
+keeps every recently used shop's catalog in memory, indexed for the reads the
+product endpoints serve:
+
+- barcode -> products (a dict probe per scan);
+- product id -> product;
+- type id -> products (the picker's type grouping);
+- trigrams of product and type names -> products, so `?search=` intersects a
+  few small sets instead of running LIKE '%x%' over the shop.
+
+Freshness: migration 0011 gives each shop a catalog version that triggers
+move forward on any write to products or product_types. A worker re-reads
+that version (one primary-key lookup) at most every
+PRODUCT_CATALOG_CHECK_INTERVAL seconds per shop and reloads the catalog when
+it moved, so a write in another worker shows up within the interval. Writes
+through this worker's own endpoints (@invalidates_catalog) drop the cached
+copy at once. Between checks, lookups do not touch Postgres.
+
+Configuration (environment variables):
+    PRODUCT_CATALOG_CHECK_INTERVAL   seconds between version checks per shop (default 2; 0 checks every read)
+    PRODUCT_CATALOG_MAX_SHOPS        catalogs kept per worker, least recently used dropped (default 256)
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import make_response
+
+from api.utils import get_current_user_id
+from db.connection import get_db_connection, execute_query
+
+# Queries shorter than a trigram are matched by scanning the shop's names.
+TRIGRAM_LENGTH = 3
+
+
+def _trigrams(text):
+    return {text[i:i + TRIGRAM_LENGTH] for i in range(len(text) - TRIGRAM_LENGTH + 1)}
+
+
+class ProductCatalog:
+    """One shop's active products and product types at one catalog version (read-only)."""
+
+    def __init__(self, version, types, products):
+        self.version = version
+        self.types = types          # ordered by type_name
+        self.products = products    # ordered by type_name, product_name
+        self.by_id = {}
+        self.by_barcode = {}
+        self.by_type = {}
+        self._search_keys = []      # (lowered product name, lowered type name) per product
+        self._trigram_index = {}    # trigram -> set of positions in products
+        for position, product in enumerate(products):
+            self.by_id[product['product_id']] = product
+            if product.get('barcode'):
+                self.by_barcode.setdefault(product['barcode'], []).append(product)
+            self.by_type.setdefault(product['type_id'], []).append(product)
+            keys = ((product['product_name'] or '').lower(), (product.get('type_name') or '').lower())
+            self._search_keys.append(keys)
+            for trigram in _trigrams(keys[0]) | _trigrams(keys[1]):
+                self._trigram_index.setdefault(trigram, set()).add(position)
+
+    def find_barcode(self, barcode):
+        return self.by_barcode.get(barcode, [])
+
+    def products_of_type(self, type_id):
+        return self.by_type.get(type_id, [])
+
+    def search(self, query):
+        """Products whose name or type name contains `query` (case-insensitive), in catalog order."""
+        query = query.lower()
+        if len(query) < TRIGRAM_LENGTH:
+            positions = range(len(self.products))
+        else:
+            candidates = sorted((self._trigram_index.get(t, set()) for t in _trigrams(query)), key=len)
+            positions = sorted(set.intersection(*candidates))
+        return [
+            self.products[p] for p in positions
+            if query in self._search_keys[p][0] or query in self._search_keys[p][1]
+        ]
+
+
+def load_catalog(conn, user_id):
+    """Read a shop's catalog from the database."""
+    # The version is read first: a write committed between the two reads
+    # gives newer rows under an older version, which the next check reloads.
+    # The other order could keep stale rows under a current version.
+    version = fetch_version(conn, user_id)
+    cursor = execute_query(conn, 'SELECT * FROM product_types WHERE user_id = %s ORDER BY type_name', (user_id,))
+    types = [dict(row) for row in cursor.fetchall()]
+    cursor = execute_query(conn, '''
+        SELECT p.*, pt.type_name
+        FROM products p
+        JOIN product_types pt ON p.type_id = pt.type_id
+        WHERE p.user_id = %s AND pt.user_id = %s AND p.is_active = TRUE
+        ORDER BY pt.type_name, p.product_name
+    ''', (user_id, user_id))
+    products = [dict(row) for row in cursor.fetchall()]
+    return ProductCatalog(version, types, products)
+
+
+def fetch_version(conn, user_id):
+    cursor = execute_query(conn, 'SELECT version FROM catalog_versions WHERE user_id = %s', (user_id,))
+    row = cursor.fetchone()
+    return row['version'] if row else 0
+
+
+class CatalogCache:
+    """Catalogs of recently used shops, revalidated against catalog_versions."""
+
+    def __init__(self, check_interval=2.0, max_shops=256):
+        self.check_interval = check_interval
+        self.max_shops = max_shops
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # user_id -> [catalog, checked_at]
+        self.hits = 0
+        self.version_checks = 0
+        self.loads = 0
+        self.invalidations = 0
+
+    def get(self, user_id, connect=get_db_connection):
+        """The shop's catalog; `connect` is only called when the database has to be consulted."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                self._entries.move_to_end(user_id)
+                if now - entry[1] < self.check_interval:
+                    self.hits += 1
+                    return entry[0]
+        conn = connect()
+        try:
+            if entry is not None:
+                with self._lock:
+                    self.version_checks += 1
+                if fetch_version(conn, user_id) == entry[0].version:
+                    entry[1] = now
+                    return entry[0]
+            catalog = load_catalog(conn, user_id)
+        finally:
+            conn.close()
+        with self._lock:
+            self.loads += 1
+            current = self._entries.get(user_id)
+            if current is None or current[0].version <= catalog.version:
+                self._entries[user_id] = [catalog, now]
+                self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_shops:
+                self._entries.popitem(last=False)
+        return catalog
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'shops': len(self._entries),
+                'hits': self.hits,
+                'version_checks': self.version_checks,
+                'loads': self.loads,
+                'invalidations': self.invalidations,
+                'check_interval': self.check_interval,
+            }
+
+
+cache = CatalogCache(
+    check_interval=float(os.getenv('PRODUCT_CATALOG_CHECK_INTERVAL', 2)),
+    max_shops=int(os.getenv('PRODUCT_CATALOG_MAX_SHOPS', 256)),
+)
+
+
+def get_catalog(user_id):
+    return cache.get(user_id)
+
+
+def invalidates_catalog(f):
+    """Drop the current shop's cached catalog after a successful write view."""
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        response = make_response(f(*args, **kwargs))
+        if response.status_code < 400:
+            cache.invalidate(get_current_user_id())
+        return response
+    return wrapper
@@ -0,0 +1,167 @@
+"""
+Fuzzy product name matching for catalog imports.
+
+The duplicate check compares every scanned catalog item with every product
+of the shop. Scoring each pair with difflib is O(scanned x existing), so
+ProductMatcher indexes the shop's names once and scores only a shortlist:
+
+1. index: the character trigrams of each lowercased name (padded with a
+   space on each side, so word edges and short names have trigrams too),
+   each stored as a bitmask of the products containing it, plus a bitmask
+   per name length;
+2. blocking: a few dozen big-integer ANDs/ORs per query find the products
+   that share enough trigrams with it (Dice coefficient at least the ratio
+   threshold minus DICE_SLACK) and whose length can reach the threshold at
+   all (difflib's ratio is at most 2 * min(len) / (len_a + len_b));
+3. scoring: an upper bound on ratio() from the length of the longest
+   common subsequence (difflib's matching blocks are one), computed with a
+   few integer operations per character from per-product character
+   bitmasks; then
+   SequenceMatcher.ratio(), as before, on what is left, best bound first.
+   Each product keeps its own SequenceMatcher, so difflib indexes its name
+   once. With a `limit`, scoring stops once no remaining candidate can beat
+   the matches found.
+
+Similarities are difflib's, as before. A pair can still reach the threshold
+with little trigram overlap (words reordered, typos in every word); those
+are missed. benchmarks/bench_product_matcher.py measures how often.
+"""
+import math
+from difflib import SequenceMatcher
+
+NGRAM_SIZE = 3
+# Blocking keeps products with a trigram Dice coefficient of at least
+# threshold - DICE_SLACK. True matches at 0.8 start around Dice 0.45.
+DICE_SLACK = 0.3
+
+
+def ngrams(text):
+    padded = f' {text} '
+    return {padded[i:i + NGRAM_SIZE] for i in range(len(padded) - NGRAM_SIZE + 1)}
+
+
+def _bitmask(positions, size):
+    bits = bytearray(size // 8 + 1)
+    for position in positions:
+        bits[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(bits, 'little')
+
+
+def _positions(mask):
+    while mask:
+        lowest = mask & -mask
+        yield lowest.bit_length() - 1
+        mask ^= lowest
+
+
+def _char_masks(text):
+    masks = {}
+    for position, char in enumerate(text):
+        masks[char] = masks.get(char, 0) | 1 << position
+    return masks
+
+
+def _lcs_length(text, char_masks, length):
+    """Length of the longest common subsequence of `text` and the `length`-character string behind `char_masks`."""
+    # Bit-parallel LCS (Allison-Dix / Hyyro): one pass over `text`, the row kept in one integer.
+    full = (1 << length) - 1
+    row = full
+    for char in text:
+        mask = char_masks.get(char)
+        if mask:
+            matches = row & mask
+            row = ((row + matches) | (row - matches)) & full
+    return length - bin(row).count('1')
+
+
+class ProductMatcher:
+    """Trigram index over a shop's product names; find() returns the products similar to a name."""
+
+    def __init__(self, products):
+        self.products = [dict(product) for product in products]
+        self._names = [(product['product_name'] or '').lower() for product in self.products]
+        self._grams = [ngrams(name) for name in self._names]
+        self._char_masks = [_char_masks(name) for name in self._names]
+        # One SequenceMatcher per product with the product name as seq2, built on
+        # first use: difflib indexes seq2, so scoring a query only sets seq1.
+        self._matchers = {}
+        postings, lengths, sizes = {}, {}, {}
+        for position, name in enumerate(self._names):
+            for gram in self._grams[position]:
+                postings.setdefault(gram, []).append(position)
+            lengths.setdefault(len(name), []).append(position)
+            sizes.setdefault(len(self._grams[position]), []).append(position)
+        size = len(self.products)
+        self._gram_masks = {gram: _bitmask(positions, size) for gram, positions in postings.items()}
+        self._length_masks = {length: _bitmask(positions, size) for length, positions in lengths.items()}
+        self._size_masks = {count: _bitmask(positions, size) for count, positions in sizes.items()}
+
+    def _candidates(self, name, grams, threshold):
+        """Positions of the products worth scoring against `name`."""
+        if threshold <= DICE_SLACK:
+            # Too loose to block on; score everything.
+            return range(len(self.products))
+        dice = threshold - DICE_SLACK
+        shortest = math.ceil(len(name) * threshold / (2 - threshold))
+        longest = math.floor(len(name) * (2 - threshold) / threshold)
+        masks = [self._gram_masks[gram] for gram in grams if gram in self._gram_masks]
+        # Trigrams a product with `count` of them must share with `name`. A name
+        # has at most as many trigrams as characters, so longer counts are out.
+        needed = {}
+        for count in self._size_masks:
+            shared = max(1, math.ceil(dice * (len(grams) + count) / 2 - 1e-9))
+            if count <= longest and shared <= len(masks):
+                needed[count] = shared
+        if not needed:
+            return []
+        most = max(needed.values())
+        # at_least[k]: products containing at least k of the trigrams seen so far.
+        at_least = [-1] + [0] * most
+        for seen, mask in enumerate(masks, 1):
+            # Levels above the number of trigrams seen so far are still empty.
+            for k in range(min(seen, most), 0, -1):
+                at_least[k] |= at_least[k - 1] & mask
+        similar_grams = 0
+        for count, shared in needed.items():
+            similar_grams |= at_least[shared] & self._size_masks[count]
+        length_mask = 0
+        for length in range(shortest, longest + 1):
+            length_mask |= self._length_masks.get(length, 0)
+        return list(_positions(similar_grams & length_mask))
+
+    def find(self, product_name, threshold=0.8, limit=None):
+        """Products whose name ratio with `product_name` is at least `threshold`, most similar first."""
+        name = (product_name or '').lower()
+        grams = ngrams(name)
+        if not grams:
+            return []
+        bounded = []
+        for position in self._candidates(name, grams, threshold):
+            length = len(self._names[position])
+            bound = 2 * _lcs_length(name, self._char_masks[position], length) / (len(name) + length)
+            if bound >= threshold:
+                bounded.append((bound, position))
+        bounded.sort(reverse=True)
+
+        scored = []
+        for bound, position in bounded:
+            if limit and len(scored) >= limit and scored[limit - 1][0] >= bound:
+                break
+            matcher = self._matchers.get(position)
+            if matcher is None:
+                matcher = self._matchers[position] = SequenceMatcher(None, '', self._names[position])
+            matcher.set_seq1(name)
+            similarity = matcher.ratio()
+            if similarity >= threshold:
+                scored.append((similarity, position))
+                scored.sort(key=lambda item: item[0], reverse=True)
+        similar = []
+        for similarity, position in scored[:limit]:
+            product = self.products[position]
+            similar.append({
+                'product_id': product['product_id'],
+                'product_name': product['product_name'],
+                'rate': product['rate'],
+                'similarity': similarity,
+            })
+        return similar
@@ -7,6 +7,8 @@ from db.connection import (
     execute_with_returning,
     get_db_integrity_error,
 )
+from api.response_cache import conditional_response
+from api.product_catalog import get_catalog, invalidates_catalog
 
 products_api = Blueprint('products_api', __name__, url_prefix='/api')
 
@@ -17,74 +19,40 @@ def get_current_user_id():
     return user_id
 
 @products_api.route('/product-types', methods=['GET'])
+@conditional_response
 def get_product_types():
-    user_id = get_current_user_id()
-    conn = get_db_connection()
-    placeholder = get_placeholder()
-    cursor = execute_query(conn, f'SELECT * FROM product_types WHERE user_id = {placeholder} ORDER BY type_name', (user_id,))
-    types = cursor.fetchall()
-    conn.close()
-    return jsonify([dict(type) for type in types])
+    catalog = get_catalog(get_current_user_id())
+    return jsonify(catalog.types)
 
 @products_api.route('/products', methods=['GET'])
+@conditional_response
 def get_products():
-    user_id = get_current_user_id()
+    # Served from the in-process catalog (api/product_catalog.py); a barcode
+    # scan is a dict lookup.
+    catalog = get_catalog(get_current_user_id())
     search = request.args.get('search', '').strip()
     barcode = request.args.get('barcode', '').strip()
-    conn = get_db_connection()
+    type_id = request.args.get('type_id', type=int)
     if barcode:
-        placeholder = get_placeholder()
-        cursor = execute_query(conn, f'''
-            SELECT p.*, pt.type_name 
-            FROM products p 
-            JOIN product_types pt ON p.type_id = pt.type_id 
-            WHERE p.user_id = {placeholder} AND pt.user_id = {placeholder} AND p.is_active = TRUE AND p.barcode = {placeholder}
-            ORDER BY pt.type_name, p.product_name
-        ''', (user_id, user_id, barcode))
-        products = cursor.fetchall()
+        products = catalog.find_barcode(barcode)
     elif search:
-        like_search = f"%{search}%"
-        placeholder = get_placeholder()
-        cursor = execute_query(conn, f'''
-            SELECT p.*, pt.type_name 
-            FROM products p 
-            JOIN product_types pt ON p.type_id = pt.type_id 
-            WHERE p.user_id = {placeholder} AND pt.user_id = {placeholder} AND p.is_active = TRUE AND (p.product_name LIKE {placeholder} OR pt.type_name LIKE {placeholder})
-            ORDER BY pt.type_name, p.product_name
-        ''', (user_id, user_id, like_search, like_search))
-        products = cursor.fetchall()
+        products = catalog.search(search)
+    elif type_id is not None:
+        products = catalog.products_of_type(type_id)
     else:
-        placeholder = get_placeholder()
-        cursor = execute_query(conn, f'''
-            SELECT p.*, pt.type_name 
-            FROM products p 
-            JOIN product_types pt ON p.type_id = pt.type_id 
-            WHERE p.user_id = {placeholder} AND pt.user_id = {placeholder} AND p.is_active = TRUE 
-            ORDER BY pt.type_name, p.product_name
-        ''', (user_id, user_id))
-        products = cursor.fetchall()
-    conn.close()
-    return jsonify([dict(product) for product in products])
+        products = catalog.products
+    return jsonify(products)
 
 @products_api.route('/products/<int:product_id>', methods=['GET'])
 def get_product(product_id):
-    user_id = get_current_user_id()
-    conn = get_db_connection()
-    placeholder = get_placeholder()
-    cursor = execute_query(conn, f'''
-        SELECT p.*, pt.type_name 
-        FROM products p 
-        JOIN product_types pt ON p.type_id = pt.type_id 
-        WHERE p.product_id = {placeholder} AND p.user_id = {placeholder} AND pt.user_id = {placeholder} AND p.is_active = TRUE
-    ''', (product_id, user_id, user_id))
-    product = cursor.fetchone()
-    conn.close()
+    product = get_catalog(get_current_user_id()).by_id.get(product_id)
     if product:
-        return jsonify(dict(product))
+        return jsonify(product)
     else:
         return jsonify({'error': 'Product not found'}), 404
 
 @products_api.route('/products', methods=['POST'])
+@invalidates_catalog
 def add_product():
     data = request.get_json()
     type_id = data.get('type_id')
@@ -122,6 +90,7 @@ def add_product():
         return jsonify({'error': 'Product already exists'}), 400
 
 @products_api.route('/products/<int:product_id>', methods=['PUT'])
+@invalidates_catalog
 def update_product(product_id):
     data = request.get_json()
     name = data.get('product_name', '').strip()
@@ -160,6 +129,7 @@ def update_product(product_id):
     return jsonify({'message': 'Product updated successfully'})
 
 @products_api.route('/products/<int:product_id>', methods=['DELETE'])
+@invalidates_catalog
 def delete_product(product_id):
     user_id = get_current_user_id()
     conn = get_db_connection()
@@ -170,6 +140,7 @@ def delete_product(product_id):
     return jsonify({'message': 'Product deleted successfully'})
 
 @products_api.route('/product-types', methods=['POST'])
+@invalidates_catalog
 def add_product_type():
     data = request.get_json()
     name = data.get('name', '').strip()
@@ -191,6 +162,7 @@ def add_product_type():
         return jsonify({'error': 'Product type already exists'}), 400
 
 @products_api.route('/product-types/<int:type_id>', methods=['DELETE'])
+@invalidates_catalog
 def delete_product_type(type_id):
     user_id = get_current_user_id()
     conn = get_db_connection()
@@ -0,0 +1,101 @@
+"""
+QR code rendering for printed invoices and receipts.
+
+qrcode computes the module matrix; PNG and SVG output are written straight
+from that matrix (zlib + struct for PNG, a run-length path for SVG), so PIL is
+never involved. Rendered images are cached by payload, format and error
+correction level in a bounded LRU: reprinting a bill reuses the image instead
+of re-encoding it. Printed bills use level L; thermal receipts use M (what
+qrcode.make() used for them), which tolerates more print damage.
+
+Configuration (environment variables):
+    QR_CODE_CACHE_SIZE   cached images per worker (default 1024)
+    QR_CODE_FORMAT       png | svg, the format used on printed bills (default png)
+"""
+import os
+import zlib
+import struct
+import base64
+import logging
+from functools import lru_cache
+
+import qrcode
+
+logger = logging.getLogger(__name__)
+
+QR_CODE_CACHE_SIZE = int(os.getenv('QR_CODE_CACHE_SIZE', 1024))
+QR_CODE_FORMAT = os.getenv('QR_CODE_FORMAT', 'png').lower()
+MIME_TYPES = {'png': 'image/png', 'svg': 'image/svg+xml'}
+if QR_CODE_FORMAT not in MIME_TYPES:
+    logger.warning(f"Unknown QR_CODE_FORMAT={QR_CODE_FORMAT!r}; using png")
+    QR_CODE_FORMAT = 'png'
+
+BOX_SIZE = 10
+BORDER = 4
+ERROR_CORRECTION = {
+    'L': qrcode.constants.ERROR_CORRECT_L,
+    'M': qrcode.constants.ERROR_CORRECT_M,
+    'Q': qrcode.constants.ERROR_CORRECT_Q,
+    'H': qrcode.constants.ERROR_CORRECT_H,
+}
+
+
+def qr_matrix(payload, error_correction='L'):
+    """Module matrix (True = dark), including the quiet-zone border."""
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=ERROR_CORRECTION[error_correction],
+        box_size=BOX_SIZE,
+        border=BORDER,
+    )
+    qr.add_data(payload)
+    qr.make(fit=True)
+    return qr.get_matrix()
+
+
+def _png_chunk(tag, data):
+    return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data))
+
+
+def matrix_to_png(matrix, box_size=BOX_SIZE):
+    """Black-and-white 1-bit PNG, each module box_size pixels square."""
+    size = len(matrix) * box_size
+    padding = '1' * (-size % 8)
+    scanlines = []
+    for row in matrix:
+        bits = ''.join(('0' if dark else '1') * box_size for dark in row) + padding
+        scanline = b'\x00' + int(bits, 2).to_bytes(len(bits) // 8, 'big')
+        scanlines.append(scanline * box_size)
+    header = struct.pack('>IIBBBBB', size, size, 1, 0, 0, 0, 0)   # 1-bit grayscale
+    return (b'\x89PNG\r\n\x1a\n' + _png_chunk(b'IHDR', header)
+            + _png_chunk(b'IDAT', zlib.compress(b''.join(scanlines), 9)) + _png_chunk(b'IEND', b''))
+
+
+def matrix_to_svg(matrix):
+    """SVG with one path; each horizontal run of dark modules is one rectangle."""
+    size = len(matrix)
+    runs = []
+    for y, row in enumerate(matrix):
+        x = 0
+        while x < size:
+            if row[x]:
+                start = x
+                while x < size and row[x]:
+                    x += 1
+                runs.append(f'M{start},{y}h{x - start}v1h-{x - start}z')
+            else:
+                x += 1
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {size} {size}" shape-rendering="crispEdges">'
+            f'<rect width="{size}" height="{size}" fill="#fff"/><path d="{"".join(runs)}" fill="#000"/></svg>').encode('utf-8')
+
+
+@lru_cache(maxsize=QR_CODE_CACHE_SIZE)
+def render_qr_code(payload, image_format='png', error_correction='L'):
+    """Base64 image of `payload`, cached by content. See render_qr_code.cache_info() for hit rates."""
+    if image_format not in MIME_TYPES:
+        raise ValueError(f'Unsupported QR code format: {image_format}')
+    if error_correction not in ERROR_CORRECTION:
+        raise ValueError(f'Unsupported QR error correction level: {error_correction}')
+    matrix = qr_matrix(payload, error_correction)
+    image = matrix_to_png(matrix) if image_format == 'png' else matrix_to_svg(matrix)
+    return base64.b64encode(image).decode('ascii')
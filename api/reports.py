@@ -2,11 +2,14 @@ from flask import Blueprint, request, jsonify, render_template, Response, redire
 import csv
 import math
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime
 from io import StringIO
 from num2words import num2words
 from db.connection import get_db_connection, get_placeholder, execute_query, is_postgresql
-from api.utils import get_current_user_id, generate_zatca_qr_code, api_error_handler, fetch_top_customers, fetch_top_products_by_where
+from api.utils import get_current_user_id, generate_zatca_qr_code, api_error_handler, fetch_top_customers, fetch_top_products_by_where, fetch_sales_summary, date_range_filter, month_range
+from api.export_service import export_response
+from api.response_cache import cached_response
+from api.qr_codes import render_qr_code, QR_CODE_FORMAT, MIME_TYPES as QR_MIME_TYPES
 from api.i18n import number_to_arabic_words, get_translated_text, get_user_language
 
 logger = logging.getLogger(__name__)
@@ -23,12 +26,10 @@ def _build_common_bill_filters(user_id, filters, base_alias='b'):
     area = filters.get('area')
     status = filters.get('status')
     products = filters.get('products')
-    if from_date:
-        where_conditions.append(f'DATE({base_alias}.bill_date) >= {conn_placeholder}')
-        params.append(from_date)
-    if to_date:
-        where_conditions.append(f'DATE({base_alias}.bill_date) <= {conn_placeholder}')
-        params.append(to_date)
+    if from_date or to_date:
+        date_filter, date_params = date_range_filter(f'{base_alias}.bill_date', from_date, to_date)
+        where_conditions.append(date_filter)
+        params.extend(date_params)
     if products and products != ['All Products']:
         placeholders = ','.join([conn_placeholder for _ in products])
         where_conditions.append(f'''EXISTS (
@@ -48,29 +49,16 @@ def _build_common_bill_filters(user_id, filters, base_alias='b'):
         params.append(status)
     return ' AND '.join(where_conditions), params
 
-def _get_bill_items_discount_and_products(conn, bill_id, user_id):
-    placeholder = get_placeholder()
-    items_cursor = execute_query(conn, f'''
-        SELECT product_name, rate, quantity, discount 
-        FROM bill_items 
-        WHERE bill_id = {placeholder} AND user_id = {placeholder}
-    ''', (bill_id, user_id))
-    items = items_cursor.fetchall()
-    discount_amounts = []
-    product_names = []
-    for it in items:
-        it_d = dict(it)
-        try:
-            rate = float(it_d.get('rate') or 0)
-            qty = float(it_d.get('quantity') or 0)
-            disc = float(it_d.get('discount') or 0)
-        except Exception:
-            rate = qty = disc = 0.0
-        discount_amounts.append(round(rate * qty * disc / 100.0, 2))
-        pn = it_d.get('product_name')
-        if pn:
-            product_names.append(pn)
-    return discount_amounts, (', '.join(product_names) if product_names else None)
+INVOICE_PAGE_SIZE = 100
+MAX_INVOICE_PAGE_SIZE = 500
+
+def _parse_invoice_cursor(cursor):
+    """Split a `<bill_date>:<bill_id>` page cursor; raises ValueError (400) when malformed."""
+    try:
+        bill_date, bill_id = cursor.split(':')
+        return datetime.strptime(bill_date, '%Y-%m-%d').date(), int(bill_id)
+    except (AttributeError, ValueError):
+        raise ValueError(f'Invalid cursor: {cursor}')
 
 def _build_employee_name_filter(base_alias, employee_names, user_id):
     if not employee_names or employee_names == ['All Employees']:
@@ -84,6 +72,17 @@ def _build_employee_name_filter(base_alias, employee_names, user_id):
     params = list(employee_names) + [user_id]
     return clause, params
 
+def _summary_totals(summary):
+    return {
+        'total_invoices': summary['total_invoices'],
+        'total_revenue': summary['total_revenue'],
+        'total_vat_collected': summary['total_vat'],
+        'total_subtotal': summary['total_subtotal'],
+        'total_discounts': 0,
+        'avg_invoice_value': summary['avg_invoice_value'],
+        'unique_customers': summary['unique_customers'],
+    }
+
 
 def get_invoice_summary_data(user_id, current_date=None):
     """Get comprehensive summary data for invoices."""
@@ -92,63 +91,15 @@ def get_invoice_summary_data(user_id, current_date=None):
     
     conn = get_db_connection()
     
-    # Get current month data
-    current_month_start = current_date.replace(day=1)
-    # Handle December case for next month calculation
-    if current_date.month == 12:
-        next_month = current_date.replace(year=current_date.year + 1, month=1, day=1)
-    else:
-        next_month = current_date.replace(month=current_date.month + 1, day=1)
-    current_month_end = next_month - timedelta(days=1)
-    
-    # Get current year data
-    current_year_start = current_date.replace(month=1, day=1)
-    current_year_end = current_date.replace(month=12, day=31)
+    # Current month, current year and all time, read from the daily rollup
+    month_from, month_to = month_range(current_date)
+    month_data = _summary_totals(fetch_sales_summary(conn, user_id, month_from, month_to))
+    year_data = _summary_totals(fetch_sales_summary(
+        conn, user_id, current_date.replace(month=1, day=1), current_date.replace(month=12, day=31)))
+    all_time_data = _summary_totals(fetch_sales_summary(conn, user_id))
     
-    # Current month summary
+    b_month_filter, month_params = date_range_filter('b.bill_date', month_from, month_to)
     placeholder = get_placeholder()
-    month_data = execute_query(conn, f'''
-        SELECT 
-            COUNT(*) as total_invoices,
-            SUM(total_amount) as total_revenue,
-            SUM(vat_amount) as total_vat_collected,
-            SUM(subtotal) as total_subtotal,
-            SUM(0) as total_discounts,
-            AVG(total_amount) as avg_invoice_value,
-            COUNT(DISTINCT customer_id) as unique_customers
-        FROM bills 
-        WHERE user_id = {placeholder} 
-        AND DATE(bill_date) BETWEEN {placeholder} AND {placeholder}
-    ''', (user_id, current_month_start, current_month_end)).fetchone()
-    
-    # Current year summary
-    year_data = execute_query(conn, f'''
-        SELECT 
-            COUNT(*) as total_invoices,
-            SUM(total_amount) as total_revenue,
-            SUM(vat_amount) as total_vat_collected,
-            SUM(subtotal) as total_subtotal,
-            SUM(0) as total_discounts,
-            AVG(total_amount) as avg_invoice_value,
-            COUNT(DISTINCT customer_id) as unique_customers
-        FROM bills 
-        WHERE user_id = {placeholder} 
-        AND DATE(bill_date) BETWEEN {placeholder} AND {placeholder}
-    ''', (user_id, current_year_start, current_year_end)).fetchone()
-    
-    # All time summary
-    all_time_data = execute_query(conn, f'''
-        SELECT 
-            COUNT(*) as total_invoices,
-            SUM(total_amount) as total_revenue,
-            SUM(vat_amount) as total_vat_collected,
-            SUM(subtotal) as total_subtotal,
-            SUM(0) as total_discounts,
-            AVG(total_amount) as avg_invoice_value,
-            COUNT(DISTINCT customer_id) as unique_customers
-        FROM bills 
-        WHERE user_id = {placeholder}
-    ''', (user_id,)).fetchone()
     
     # Get top selling products (current month)
     top_products = execute_query(conn, f'''
@@ -159,22 +110,22 @@ def get_invoice_summary_data(user_id, current_date=None):
         FROM bill_items bi
         JOIN bills b ON bi.bill_id = b.bill_id
         WHERE b.user_id = {placeholder} 
-        AND DATE(b.bill_date) BETWEEN {placeholder} AND {placeholder}
+        AND {b_month_filter}
         GROUP BY bi.product_name
         ORDER BY total_revenue DESC
         LIMIT 5
-    ''', (user_id, current_month_start, current_month_end)).fetchall()
+    ''', [user_id] + month_params).fetchall()
     
     # Get top customers (current month)
-    where_clause = f"b.user_id = {placeholder} AND DATE(b.bill_date) BETWEEN {placeholder} AND {placeholder}"
-    top_customers = fetch_top_customers(conn, where_clause, (user_id, current_month_start, current_month_end), limit=5)
+    where_clause = f"b.user_id = {placeholder} AND {b_month_filter}"
+    top_customers = fetch_top_customers(conn, where_clause, [user_id] + month_params, limit=5)
     
     conn.close()
     
     return {
-        'current_month': dict(month_data) if month_data else {},
-        'current_year': dict(year_data) if year_data else {},
-        'all_time': dict(all_time_data) if all_time_data else {},
+        'current_month': month_data,
+        'current_year': year_data,
+        'all_time': all_time_data,
         'top_products': [dict(product) for product in top_products],
         'top_customers': [dict(customer) for customer in top_customers],
         'generated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
@@ -241,12 +192,8 @@ def get_filtered_invoice_summary(user_id, filters=None):
         'top_customers': [dict(c) for c in top_customers]
     }
 
-@reports_api.route('/api/reports/invoices', methods=['GET'])
-@api_error_handler
-def get_invoices_report():
-    user_id = get_current_user_id()
-    conn = get_db_connection()
-    placeholder = get_placeholder()
+def _invoice_report_filters(user_id):
+    """WHERE clause and params for the invoice report filters in the query string."""
     filters = {
         'from_date': request.args.get('from_date'),
         'to_date': request.args.get('to_date'),
@@ -261,35 +208,77 @@ def get_invoices_report():
         emp_clause, emp_params = _build_employee_name_filter('b', employees, user_id)
         where_clause = f"{where_clause}{emp_clause}"
         params.extend(emp_params)
+    return where_clause, params
+
+@reports_api.route('/api/reports/invoices', methods=['GET'])
+@api_error_handler
+def get_invoices_report():
+    user_id = get_current_user_id()
+    placeholder = get_placeholder()
+    where_clause, params = _invoice_report_filters(user_id)
+    limit = min(max(request.args.get('limit', INVOICE_PAGE_SIZE, type=int), 1), MAX_INVOICE_PAGE_SIZE)
+    cursor_arg = request.args.get('cursor')
+    if cursor_arg:
+        # Keyset pagination: resume strictly after the last row of the previous page.
+        where_clause = f"{where_clause} AND (b.bill_date, b.bill_id) < ({placeholder}, {placeholder})"
+        params.extend(_parse_invoice_cursor(cursor_arg))
+    # Item discounts and product names for the whole page come from one
+    # grouped pass over bill_items instead of a query per bill.
     query = f'''
-        SELECT 
-            b.bill_id,
-            b.bill_number,
-            b.bill_date,
-            b.delivery_date,
-            b.subtotal,
-            b.vat_amount,
-            b.total_amount,
-            b.status,
-            COALESCE(c.name, '') as customer_name
-        FROM bills b
-        LEFT JOIN customers c ON b.customer_id = c.customer_id
-        WHERE {where_clause}
-        ORDER BY b.bill_date DESC
-        LIMIT 100
+        WITH page AS (
+            SELECT 
+                b.bill_id,
+                b.bill_number,
+                b.bill_date,
+                b.delivery_date,
+                b.subtotal,
+                b.vat_amount,
+                b.total_amount,
+                b.status,
+                COALESCE(c.name, '') as customer_name
+            FROM bills b
+            LEFT JOIN customers c ON b.customer_id = c.customer_id
+            WHERE {where_clause}
+            ORDER BY b.bill_date DESC, b.bill_id DESC
+            LIMIT {limit + 1}
+        )
+        SELECT page.*, items.discount_amounts, items.products
+        FROM page
+        LEFT JOIN (
+            SELECT 
+                bill_id,
+                array_agg(ROUND(COALESCE(rate, 0) * COALESCE(quantity, 0) * COALESCE(discount, 0) / 100.0, 2) ORDER BY item_id) as discount_amounts,
+                string_agg(NULLIF(product_name, ''), ', ' ORDER BY item_id) as products
+            FROM bill_items
+            WHERE user_id = {placeholder} AND bill_id IN (SELECT bill_id FROM page)
+            GROUP BY bill_id
+        ) items ON items.bill_id = page.bill_id
+        ORDER BY page.bill_date DESC, page.bill_id DESC
     '''
-    cursor = execute_query(conn, query, params)
+    conn = get_db_connection()
+    cursor = execute_query(conn, query, params + [user_id])
     rows = cursor.fetchall()
+    conn.close()
+    has_more = len(rows) > limit
     invoices = []
-    for r in rows:
+    for r in rows[:limit]:
         d = dict(r)
-        bill_id = d.get('bill_id')
-        discount_amounts, products_str = _get_bill_items_discount_and_products(conn, bill_id, user_id)
-        d['discount_amounts'] = discount_amounts
-        d['products'] = products_str
+        d['discount_amounts'] = [float(amount) for amount in d['discount_amounts'] or []]
         invoices.append(d)
-    conn.close()
-    return jsonify({'success': True, 'invoices': invoices})
+    next_cursor = None
+    if has_more:
+        last = invoices[-1]
+        next_cursor = f"{last['bill_date'].isoformat()}:{last['bill_id']}"
+    return jsonify({'success': True, 'invoices': invoices, 'has_more': has_more, 'next_cursor': next_cursor})
+
+@reports_api.route('/api/reports/invoices/download', methods=['GET'])
+@api_error_handler
+def download_invoices_report():
+    """Stream every bill matching the invoice report filters as CSV (or XLSX with format=xlsx)."""
+    user_id = get_current_user_id()
+    where_clause, params = _invoice_report_filters(user_id)
+    filename = f"invoices-{datetime.now().strftime('%Y%m%d')}"
+    return export_response('bills', request.args.get('format', 'csv'), where_clause, params, filename)
 
 @reports_api.route('/api/invoice-summary', methods=['POST'])
 @api_error_handler
@@ -299,45 +288,25 @@ def invoice_summary():
     filters = data.get('filters') or {}
     result = get_filtered_invoice_summary(user_id, filters)
     return jsonify(result)
-@reports_api.route('/api/bills/<int:bill_id>/print', methods=['GET'])
-def print_bill(bill_id):
+@reports_api.route('/api/invoice-summary', methods=['GET'])
+@api_error_handler
+@cached_response('invoice-summary', ttl=300, depends_on=('bills', 'customers'))
+def invoice_period_summary():
+    """Month, year and all-time totals around `date` (default today), for the printed bill summary."""
     user_id = get_current_user_id()
-    logger.info(f"DEBUG: print_bill called for bill_id: {bill_id}")
-    
-    conn = get_db_connection()
-    placeholder = get_placeholder()
-    cursor = execute_query(conn, f'''
-        SELECT b.*, c.name as customer_name, c.phone as customer_phone, 
-               c.city as customer_city, c.area as customer_area,
-               c.customer_type, c.business_name, c.business_address,
-               e.name as master_name
-        FROM bills b
-        LEFT JOIN customers c ON b.customer_id = c.customer_id AND c.user_id = b.user_id
-        LEFT JOIN employees e ON b.master_id = e.employee_id AND e.user_id = b.user_id
-        WHERE b.bill_id = {placeholder} AND b.user_id = {placeholder}
-    ''', (bill_id, user_id))
-    bill = cursor.fetchone()
-    
-    if not bill:
-        conn.close()
-        return jsonify({'error': 'Bill not found'}), 404
-    
-    # Get shop settings first
-    placeholder = get_placeholder()
-    cursor = execute_query(conn, f'SELECT * FROM shop_settings WHERE user_id = {placeholder}', (user_id,))
-    shop_settings = cursor.fetchone()
+    current_date = request.args.get('date')
+    if current_date:
+        try:
+            current_date = datetime.strptime(current_date, '%Y-%m-%d').date()
+        except ValueError:
+            raise ValueError(f'Invalid date: {current_date}')
+    return jsonify(get_invoice_summary_data(user_id, current_date))
 
-    # Check if VAT should be recalculated for display
+def print_bill_context(bill, items, shop_settings):
+    """Template variables for print_bill.html: display totals, amounts in words and the FTA QR code."""
+    shop_settings = dict(shop_settings) if shop_settings else {}
     # Default to True since user says prices include VAT
-    shop_settings_dict = dict(shop_settings) if shop_settings else {}
-    include_vat_in_price = bool(shop_settings_dict.get('include_vat_in_price', True))
-
-    # Get bill items
-    cursor = execute_query(conn, f'''
-        SELECT * FROM bill_items WHERE bill_id = {placeholder} AND user_id = {placeholder}
-    ''', (bill_id, user_id))
-    items = cursor.fetchall()
-    conn.close()
+    include_vat_in_price = bool(shop_settings.get('include_vat_in_price', True))
 
     # Calculate discount amount for each item and recalculate totals if needed
     items_with_discount = []
@@ -357,7 +326,6 @@ def print_bill(bill_id):
         items_with_discount.append(item_dict)
     
     bill = dict(bill)
-    shop_settings = shop_settings_dict
 
     # Handle VAT calculation based on include_vat_in_price setting
     if include_vat_in_price:
@@ -381,11 +349,6 @@ def print_bill(bill_id):
         bill['total_amount'] = round(correct_total_amount, 2)
         bill['balance_amount'] = round(correct_balance_amount, 2)
 
-    logger.info(f"DEBUG: Retrieved bill data: {bill}")
-    logger.info(f"DEBUG: Bill notes from database: '{bill.get('notes')}'")
-    logger.info(f"DEBUG: Notes type: {type(bill.get('notes'))}")
-    logger.info(f"DEBUG: include_vat_in_price: {include_vat_in_price}")
-    
     # Generate amount_in_words for the balance_amount
     try:
         amount = float(bill.get('balance_amount', 0))
@@ -420,22 +383,194 @@ def print_bill(bill_id):
         logger.info(f"DEBUG: Error generating QR code: {e}")
         qr_code_base64 = None
     
-    # Get summary data
-    bill_date = bill.get('bill_date', datetime.now().date())
-    if isinstance(bill_date, str):
-        bill_date = datetime.strptime(bill_date, '%Y-%m-%d').date()
-    summary_data = get_invoice_summary_data(user_id, bill_date)
-    
     # Check if VAT should be displayed based on VAT amount
     # If VAT amount is 0, don't show VAT sections
     should_show_vat = bill.get('should_show_vat', bill.get('vat_amount', 0) > 0)
     
-    # Get bill template setting from shop settings
-    bill_template = shop_settings.get('bill_template', 'default')
-    
     # Get currency information from shop settings
     currency_code = shop_settings.get('currency_code', 'AED')
     currency_symbol = shop_settings.get('currency_symbol', 'د.إ')
+
+    return {
+        'bill': bill,
+        'items': items_with_discount,
+        'amount_in_words': amount_in_words,
+        'arabic_amount_in_words': arabic_amount_in_words,
+        'qr_code_base64': qr_code_base64,
+        'qr_code_mime': QR_MIME_TYPES[QR_CODE_FORMAT],
+        'shop_settings': shop_settings,
+        'should_show_vat': should_show_vat,
+        'include_vat_in_price': include_vat_in_price,
+        'currency_code': currency_code,
+        'currency_symbol': currency_symbol,
+    }
+
+def receipt_context(bill, items, shop_settings):
+    """Template variables for receipt_template.html: per-line amounts, totals and the QR code."""
+    # Convert rows to dicts for safe access and pre-compute line totals
+    bill = dict(bill)
+    shop_settings = dict(shop_settings) if shop_settings else {}
+    items_dicts = []
+    for i in items:
+        item = dict(i)
+        try:
+            rate = float(item.get('rate') or 0)
+            qty = float(item.get('quantity') or 0)
+            discount = float(item.get('discount') or 0)
+        except Exception:
+            rate = qty = discount = 0.0
+        gross = rate * qty
+        discount_amount = gross * discount / 100.0
+        net_amount = gross - discount_amount
+        item['rate_float'] = rate
+        item['quantity_float'] = qty
+        item['discount_float'] = discount
+        item['gross_amount'] = round(gross, 2)
+        item['discount_amount'] = round(discount_amount, 2)
+        item['net_amount'] = round(net_amount, 2)
+        items_dicts.append(item)
+    items = items_dicts
+    
+    # Determine if VAT should be shown
+    show_vat = bool(bill.get('should_show_vat', bill.get('vat_amount', 0) > 0))
+    
+    # Get currency symbol
+    currency_symbol = "AED"
+    # Include VAT in price flag from shop settings
+    include_vat_in_price = bool(shop_settings.get('include_vat_in_price', False))
+    
+    # Calculate VAT percentage dynamically
+    vat_percent = 0
+    if bill.get('subtotal') and float(bill.get('subtotal')) > 0:
+        vat_amount_val = float(bill.get('vat_amount', 0))
+        subtotal_val = float(bill.get('subtotal', 0))
+        vat_percent = (vat_amount_val / subtotal_val) * 100
+    
+    # Precompute monetary totals as floats to avoid Decimal/float mix
+    try:
+        gross_amount = round(float(bill.get('subtotal') or 0), 2)
+    except Exception:
+        gross_amount = 0.0
+    try:
+        discount_amount = round(float(bill.get('discount') or 0), 2)
+    except Exception:
+        discount_amount = 0.0
+    total_before_tax = round(gross_amount - discount_amount, 2)
+    try:
+        tax_amount = round(float(bill.get('vat_amount') or 0), 2)
+    except Exception:
+        tax_amount = 0.0
+    try:
+        net_amount = round(float(bill.get('total_amount') or (total_before_tax + tax_amount)), 2)
+    except Exception:
+        net_amount = round(total_before_tax + tax_amount, 2)
+    try:
+        advance_paid = round(float(bill.get('advance_paid') or bill.get('advance_payment') or 0), 2)
+    except Exception:
+        advance_paid = 0.0
+    change_amount = round(max(0.0, advance_paid - net_amount), 2)
+
+    # Current date/time for template
+    now = datetime.now()
+    current_date = now.date()
+    current_time = now
+    # Bill date display
+    bill_date = bill.get('bill_date', current_date)
+    try:
+        bill_date_display = bill_date.strftime('%d %b %Y')
+    except Exception:
+        bill_date_display = str(bill_date)
+
+    # For receipt display, show net amount as integer (floor)
+    net_amount_integer = int(math.floor(net_amount))
+
+    # Distribute VAT across items when VAT is included in price
+    total_net_no_vat = sum(i.get('net_amount', 0) for i in items)
+    if bool(shop_settings.get('include_vat_in_price', False)) and total_net_no_vat > 0 and tax_amount > 0:
+        for i in items:
+            share = (i.get('net_amount', 0) / total_net_no_vat)
+            i['display_amount'] = round(i.get('net_amount', 0) + tax_amount * share, 2)
+    else:
+        for i in items:
+            i['display_amount'] = round(i.get('net_amount', 0), 2)
+
+    # Generate QR code image (base64)
+    qr_code_base64 = None
+    try:
+        payload = f"INV:{bill.get('bill_number','')}|DATE:{bill_date_display}|TOTAL:{net_amount:.2f}|VAT:{tax_amount:.2f}"
+        # Level M, as qrcode.make() drew it: thermal prints smudge
+        qr_code_base64 = render_qr_code(payload, QR_CODE_FORMAT, error_correction='M')
+    except Exception:
+        pass
+
+    return {
+        'bill': bill,
+        'items': items,
+        'shop_settings': shop_settings,
+        'show_vat': show_vat,
+        'currency_symbol': currency_symbol,
+        'vat_percent': vat_percent,
+        'current_date': current_date,
+        'current_time': current_time,
+        'bill_date_display': bill_date_display,
+        'gross_amount': gross_amount,
+        'discount_amount': discount_amount,
+        'total_before_tax': total_before_tax,
+        'tax_amount': tax_amount,
+        'net_amount': net_amount,
+        'net_amount_integer': net_amount_integer,
+        'advance_paid': advance_paid,
+        'change_amount': change_amount,
+        'qr_code_base64': qr_code_base64,
+        'qr_code_mime': QR_MIME_TYPES[QR_CODE_FORMAT],
+        'include_vat_in_price': include_vat_in_price,
+    }
+
+@reports_api.route('/api/bills/<int:bill_id>/print', methods=['GET'])
+def print_bill(bill_id):
+    user_id = get_current_user_id()
+    logger.info(f"DEBUG: print_bill called for bill_id: {bill_id}")
+    
+    conn = get_db_connection()
+    placeholder = get_placeholder()
+    cursor = execute_query(conn, f'''
+        SELECT b.*, c.name as customer_name, c.phone as customer_phone, 
+               c.city as customer_city, c.area as customer_area,
+               c.customer_type, c.business_name, c.business_address,
+               e.name as master_name
+        FROM bills b
+        LEFT JOIN customers c ON b.customer_id = c.customer_id AND c.user_id = b.user_id
+        LEFT JOIN employees e ON b.master_id = e.employee_id AND e.user_id = b.user_id
+        WHERE b.bill_id = {placeholder} AND b.user_id = {placeholder}
+    ''', (bill_id, user_id))
+    bill = cursor.fetchone()
+    
+    if not bill:
+        conn.close()
+        return jsonify({'error': 'Bill not found'}), 404
+    
+    # Get shop settings first
+    placeholder = get_placeholder()
+    cursor = execute_query(conn, f'SELECT * FROM shop_settings WHERE user_id = {placeholder}', (user_id,))
+    shop_settings = cursor.fetchone()
+
+    # Get bill items
+    cursor = execute_query(conn, f'''
+        SELECT * FROM bill_items WHERE bill_id = {placeholder} AND user_id = {placeholder}
+    ''', (bill_id, user_id))
+    items = cursor.fetchall()
+    conn.close()
+
+    context = print_bill_context(bill, items, shop_settings)
+    logger.info(f"DEBUG: Retrieved bill data: {context['bill']}")
+    logger.info(f"DEBUG: include_vat_in_price: {context['include_vat_in_price']}")
+    
+    # The shop summary is opt-in (?summary=1) and fetched by the page from
+    # /api/invoice-summary, so printing stays at the three queries above.
+    show_summary = request.args.get('summary') == '1'
+    
+    # Get bill template setting from shop settings
+    bill_template = context['shop_settings'].get('bill_template', 'default')
     
     # Choose template based on setting
     if bill_template == 'receipt':
@@ -443,20 +578,11 @@ def print_bill(bill_id):
         return redirect(f'/bills/{bill_id}/receipt')
     else:
         # Use default template
-        return render_template('print_bill.html', 
-                             bill=bill, 
-                             items=items_with_discount,
-                             amount_in_words=amount_in_words,
-                             arabic_amount_in_words=arabic_amount_in_words,
-                             qr_code_base64=qr_code_base64,
-                             shop_settings=shop_settings,
-                             summary_data=summary_data,
-                             should_show_vat=should_show_vat,
-                             include_vat_in_price=include_vat_in_price,
-                             currency_code=currency_code,
-                             currency_symbol=currency_symbol,
+        return render_template('print_bill.html',
+                             show_summary=show_summary,
                              get_user_language=get_user_language,
-                             get_translated_text=get_translated_text)
+                             get_translated_text=get_translated_text,
+                             **context)
 
 @reports_api.route('/bills/<int:bill_id>/receipt', methods=['GET'])
 def print_receipt(bill_id):
@@ -493,127 +619,7 @@ def print_receipt(bill_id):
         
         conn.close()
         
-        # Convert rows to dicts for safe access and pre-compute line totals
-        bill = dict(bill)
-        shop_settings = dict(shop_settings) if shop_settings else {}
-        items_dicts = []
-        for i in items:
-            item = dict(i)
-            try:
-                rate = float(item.get('rate') or 0)
-                qty = float(item.get('quantity') or 0)
-                discount = float(item.get('discount') or 0)
-            except Exception:
-                rate = qty = discount = 0.0
-            gross = rate * qty
-            discount_amount = gross * discount / 100.0
-            net_amount = gross - discount_amount
-            item['rate_float'] = rate
-            item['quantity_float'] = qty
-            item['discount_float'] = discount
-            item['gross_amount'] = round(gross, 2)
-            item['discount_amount'] = round(discount_amount, 2)
-            item['net_amount'] = round(net_amount, 2)
-            items_dicts.append(item)
-        items = items_dicts
-        
-        # Determine if VAT should be shown
-        show_vat = bool(bill.get('should_show_vat', bill.get('vat_amount', 0) > 0))
-        
-        # Get currency symbol
-        currency_symbol = "AED"
-        # Include VAT in price flag from shop settings
-        include_vat_in_price = bool(shop_settings.get('include_vat_in_price', False))
-        
-        # Calculate VAT percentage dynamically
-        vat_percent = 0
-        if bill.get('subtotal') and float(bill.get('subtotal')) > 0:
-            vat_amount_val = float(bill.get('vat_amount', 0))
-            subtotal_val = float(bill.get('subtotal', 0))
-            vat_percent = (vat_amount_val / subtotal_val) * 100
-        
-        # Precompute monetary totals as floats to avoid Decimal/float mix
-        try:
-            gross_amount = round(float(bill.get('subtotal') or 0), 2)
-        except Exception:
-            gross_amount = 0.0
-        try:
-            discount_amount = round(float(bill.get('discount') or 0), 2)
-        except Exception:
-            discount_amount = 0.0
-        total_before_tax = round(gross_amount - discount_amount, 2)
-        try:
-            tax_amount = round(float(bill.get('vat_amount') or 0), 2)
-        except Exception:
-            tax_amount = 0.0
-        try:
-            net_amount = round(float(bill.get('total_amount') or (total_before_tax + tax_amount)), 2)
-        except Exception:
-            net_amount = round(total_before_tax + tax_amount, 2)
-        try:
-            advance_paid = round(float(bill.get('advance_paid') or bill.get('advance_payment') or 0), 2)
-        except Exception:
-            advance_paid = 0.0
-        change_amount = round(max(0.0, advance_paid - net_amount), 2)
-
-        # Current date/time for template
-        now = datetime.now()
-        current_date = now.date()
-        current_time = now
-        # Bill date display
-        bill_date = bill.get('bill_date', current_date)
-        try:
-            bill_date_display = bill_date.strftime('%d %b %Y')
-        except Exception:
-            bill_date_display = str(bill_date)
-
-        # For receipt display, show net amount as integer (floor)
-        net_amount_integer = int(math.floor(net_amount))
-
-        # Distribute VAT across items when VAT is included in price
-        total_net_no_vat = sum(i.get('net_amount', 0) for i in items)
-        if bool(shop_settings.get('include_vat_in_price', False)) and total_net_no_vat > 0 and tax_amount > 0:
-            for i in items:
-                share = (i.get('net_amount', 0) / total_net_no_vat)
-                i['display_amount'] = round(i.get('net_amount', 0) + tax_amount * share, 2)
-        else:
-            for i in items:
-                i['display_amount'] = round(i.get('net_amount', 0), 2)
-
-        # Generate QR code image (base64)
-        qr_code_base64 = None
-        try:
-            import qrcode
-            import base64
-            from io import BytesIO
-            payload = f"INV:{bill.get('bill_number','')}|DATE:{bill_date_display}|TOTAL:{net_amount:.2f}|VAT:{tax_amount:.2f}"
-            img = qrcode.make(payload)
-            buf = BytesIO()
-            img.save(buf, format='PNG')
-            qr_code_base64 = base64.b64encode(buf.getvalue()).decode('utf-8')
-        except Exception:
-            pass
-
-        return render_template('receipt_template.html',
-                             bill=bill,
-                             items=items,
-                             shop_settings=shop_settings,
-                             show_vat=show_vat,
-                             currency_symbol=currency_symbol,
-                             vat_percent=vat_percent,
-                             current_date=current_date,
-                             current_time=current_time,
-                             bill_date_display=bill_date_display,
-                             gross_amount=gross_amount,
-                             discount_amount=discount_amount,
-                             total_before_tax=total_before_tax,
-                             tax_amount=tax_amount,
-                             net_amount=net_amount,
-                             net_amount_integer=net_amount_integer,
-                             advance_paid=advance_paid,
-                             change_amount=change_amount,
-                             qr_code_base64=qr_code_base64,
-                             include_vat_in_price=include_vat_in_price)
+        return render_template('receipt_template.html', **receipt_context(bill, items, shop_settings))
         
     except Exception as e:
         print(f"Error generating receipt: {e}")
@@ -0,0 +1,332 @@
+"""
+Per-tenant response cache for read-heavy analytics endpoints.
+
+Responses are cached under (user_id, endpoint, normalized query string) plus
+the shop's current version of every data scope the endpoint reads (bills,
+expenses, customers, ...). A write bumps the versions of the scopes it
+touches, so the next read builds a new key and the stale entries simply age
+out; nothing has to enumerate or delete keys.
+
+Backends:
+- memory: in-process LRU with per-entry TTLs (the default). Each gunicorn
+  worker has its own cache and its own version counters.
+- redis: shared by all workers (RESPONSE_CACHE_URL). Needs the optional
+  `redis` package; falls back to memory when it is missing.
+
+Configuration (environment variables):
+    RESPONSE_CACHE_ENABLED       0 turns the cache off entirely (default 1)
+    RESPONSE_CACHE_BACKEND       memory | redis (default memory)
+    RESPONSE_CACHE_URL           redis://host:6379/0 for the redis backend
+    RESPONSE_CACHE_MAX_ENTRIES   LRU capacity of the memory backend (default 2048)
+    RESPONSE_CACHE_DISABLED      comma-separated endpoint names to bypass
+
+Read-mostly reference endpoints (products, cities, shop settings, ...) use
+conditional_response instead: a weak ETag hashed from the shop id and the
+body, `Cache-Control: private, no-cache`, and a bodyless 304 when the
+browser's If-None-Match still matches. Hashing the body rather than using the
+scope versions keeps ETags valid across workers with the memory backend.
+"""
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from functools import wraps
+
+from flask import make_response, request
+
+from api.utils import get_current_user_id
+
+# Try to import redis (optional shared backend)
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+# Data scopes writes invalidate and cached endpoints depend on.
+SCOPES = ('bills', 'expenses', 'customers', 'employees', 'loyalty')
+
+
+class MemoryBackend:
+    """Thread-safe in-process LRU with per-entry expiry."""
+
+    name = 'memory'
+
+    def __init__(self, max_entries=2048):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # key -> (expires_at, value)
+        self._versions = {}             # (user_id, scope) -> int
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def versions(self, user_id, scopes):
+        with self._lock:
+            return [self._versions.get((user_id, scope), 0) for scope in scopes]
+
+    def bump(self, user_id, scopes):
+        with self._lock:
+            for scope in scopes:
+                self._versions[(user_id, scope)] = self._versions.get((user_id, scope), 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def size(self):
+        with self._lock:
+            return len(self._entries)
+
+
+class RedisBackend:
+    """Backend shared by all workers; entries expire through Redis TTLs."""
+
+    name = 'redis'
+    # Version counters outlive any entry TTL so a bump is never forgotten
+    # while entries built on the previous version can still be read.
+    VERSION_TTL = 7 * 24 * 3600
+
+    def __init__(self, url, prefix='rc'):
+        self._redis = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self.evictions = None   # done by the server (maxmemory-policy)
+        self.expirations = None
+
+    def _version_key(self, user_id, scope):
+        return f'{self.prefix}:v:{user_id}:{scope}'
+
+    def get(self, key):
+        return self._redis.get(f'{self.prefix}:e:{key}')
+
+    def set(self, key, value, ttl):
+        self._redis.set(f'{self.prefix}:e:{key}', value, ex=max(1, int(ttl)))
+
+    def versions(self, user_id, scopes):
+        values = self._redis.mget([self._version_key(user_id, scope) for scope in scopes])
+        return [int(v) if v is not None else 0 for v in values]
+
+    def bump(self, user_id, scopes):
+        pipe = self._redis.pipeline()
+        for scope in scopes:
+            pipe.incr(self._version_key(user_id, scope))
+            pipe.expire(self._version_key(user_id, scope), self.VERSION_TTL)
+        pipe.execute()
+
+    def clear(self):
+        for key in self._redis.scan_iter(f'{self.prefix}:e:*'):
+            self._redis.delete(key)
+
+    def size(self):
+        return None
+
+
+class ResponseCache:
+    """Response cache front end: key building, enable flags and hit/miss stats."""
+
+    def __init__(self, backend, enabled=True, disabled_endpoints=()):
+        self.backend = backend
+        self.enabled = enabled
+        self.disabled_endpoints = set(disabled_endpoints)
+        self._lock = threading.Lock()
+        self._stats = {}    # endpoint -> {'hits': n, 'misses': n, 'bypassed': n}
+        self.invalidations = 0
+        self.errors = 0
+
+    def is_enabled(self, endpoint):
+        return self.enabled and endpoint not in self.disabled_endpoints
+
+    def record(self, endpoint, outcome):
+        with self._lock:
+            counters = self._stats.setdefault(endpoint, {'hits': 0, 'misses': 0, 'bypassed': 0})
+            counters[outcome] += 1
+
+    def record_error(self, operation, error):
+        with self._lock:
+            self.errors += 1
+        logger.warning(f"Response cache {operation} failed: {error}")
+
+    def key(self, user_id, endpoint, args, scopes):
+        """Cache key for one tenant, endpoint and query string at the current scope versions.
+
+        Today's date is part of the key: "today" and trailing-window figures
+        must not be served from yesterday's entry.
+        """
+        normalized = '&'.join(f'{name}={value}' for name, value in sorted(args.items(multi=True)))
+        versions = '.'.join(str(v) for v in self.backend.versions(user_id, scopes))
+        digest = hashlib.sha1(normalized.encode('utf-8')).hexdigest()[:16]
+        return f'{user_id}:{endpoint}:{date.today().isoformat()}:{versions}:{digest}'
+
+    def invalidate(self, user_id, *scopes):
+        """Bump the shop's version of each scope; cached responses built on older versions stop matching."""
+        if user_id is None:
+            return
+        try:
+            self.backend.bump(user_id, scopes or SCOPES)
+            with self._lock:
+                self.invalidations += 1
+        except Exception as e:
+            self.record_error(f'invalidation for user {user_id}', e)
+
+    def metrics(self):
+        with self._lock:
+            endpoints = {name: dict(counters) for name, counters in self._stats.items()}
+            invalidations, errors = self.invalidations, self.errors
+        hits = sum(c['hits'] for c in endpoints.values())
+        misses = sum(c['misses'] for c in endpoints.values())
+        return {
+            'backend': self.backend.name,
+            'enabled': self.enabled,
+            'disabled_endpoints': sorted(self.disabled_endpoints),
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / (hits + misses), 3) if hits + misses else 0.0,
+            'evictions': self.backend.evictions,
+            'expirations': self.backend.expirations,
+            'invalidations': invalidations,
+            'errors': errors,
+            'entries': self.backend.size(),
+            'endpoints': endpoints,
+        }
+
+
+_cache = None
+_cache_pid = None
+_cache_lock = threading.Lock()
+
+
+def _create_cache():
+    backend_name = os.getenv('RESPONSE_CACHE_BACKEND', 'memory').lower()
+    backend = None
+    if backend_name == 'redis':
+        if not REDIS_AVAILABLE:
+            logger.warning("RESPONSE_CACHE_BACKEND=redis but the redis package is not installed; using memory")
+        elif not os.getenv('RESPONSE_CACHE_URL'):
+            logger.warning("RESPONSE_CACHE_BACKEND=redis but RESPONSE_CACHE_URL is not set; using memory")
+        else:
+            backend = RedisBackend(os.getenv('RESPONSE_CACHE_URL'))
+    if backend is None:
+        backend = MemoryBackend(max_entries=int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', 2048)))
+    disabled = [name.strip() for name in os.getenv('RESPONSE_CACHE_DISABLED', '').split(',') if name.strip()]
+    return ResponseCache(
+        backend,
+        enabled=os.getenv('RESPONSE_CACHE_ENABLED', '1').lower() not in ('0', 'false', 'no'),
+        disabled_endpoints=disabled,
+    )
+
+
+def get_response_cache():
+    """Return the process-wide response cache, creating it on first use (and again after a fork)."""
+    global _cache, _cache_pid
+    pid = os.getpid()
+    if _cache is None or _cache_pid != pid:
+        with _cache_lock:
+            if _cache is None or _cache_pid != pid:
+                _cache = _create_cache()
+                _cache_pid = pid
+    return _cache
+
+
+def invalidate(user_id, *scopes):
+    get_response_cache().invalidate(user_id, *scopes)
+
+
+def cached_response(endpoint, ttl=60, depends_on=SCOPES):
+    """Cache a GET view's successful JSON responses per shop.
+
+    `endpoint` names the entry in stats and in RESPONSE_CACHE_DISABLED;
+    `depends_on` lists the scopes whose writes make the response stale.
+    """
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            cache = get_response_cache()
+            user_id = get_current_user_id()
+            if request.method != 'GET' or user_id is None or not cache.is_enabled(endpoint):
+                cache.record(endpoint, 'bypassed')
+                return f(*args, **kwargs)
+            try:
+                # Versions are read before the view runs: if a write lands
+                # meanwhile, this response is stored under the old key.
+                key = cache.key(user_id, endpoint, request.args, depends_on)
+                body = cache.backend.get(key)
+            except Exception as e:
+                cache.record_error(f'read of {endpoint}', e)
+                return f(*args, **kwargs)
+            if body is not None:
+                cache.record(endpoint, 'hits')
+                response = make_response(body)
+                response.mimetype = 'application/json'
+                response.headers['X-Cache'] = 'HIT'
+                return response
+            cache.record(endpoint, 'misses')
+            response = make_response(f(*args, **kwargs))
+            if response.status_code == 200 and response.mimetype == 'application/json':
+                try:
+                    cache.backend.set(key, response.get_data(), ttl)
+                except Exception as e:
+                    cache.record_error(f'write of {endpoint}', e)
+            response.headers['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
+
+
+def invalidates(*scopes):
+    """Bump the current shop's scope versions after a successful write view."""
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            response = make_response(f(*args, **kwargs))
+            if response.status_code < 400:
+                invalidate(get_current_user_id(), *scopes)
+            return response
+        return wrapper
+    return decorator
+
+
+def conditional_response(f):
+    """Answer GETs with an ETag and 304 Not Modified when the client's copy is current.
+
+    Goes above cached_response when both are used, so cache hits are
+    revalidated too.
+    """
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        response = make_response(f(*args, **kwargs))
+        if request.method != 'GET' or response.status_code != 200 or response.is_streamed:
+            return response
+        # The shop id is part of the tag: after switching accounts in the same
+        # browser, the old account's copy must not match.
+        digest = hashlib.sha1(f'{get_current_user_id()}:'.encode('utf-8'))
+        digest.update(response.get_data())
+        response.set_etag(digest.hexdigest(), weak=True)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response.make_conditional(request)
+    return wrapper
@@ -7,6 +7,7 @@ from db.connection import (
     execute_with_returning,
 )
 from api.utils import log_user_action
+from api.response_cache import conditional_response
 
 shop_settings_api = Blueprint('shop_settings_api', __name__, url_prefix='/api')
 
@@ -78,6 +79,7 @@ def delete_vat_rate(vat_id):
     return jsonify({'message': 'VAT rate deleted successfully'})
 
 @shop_settings_api.route('/areas', methods=['GET'])
+@conditional_response
 def get_areas():
     city = request.args.get('city', '').strip()
     conn = get_db_connection()
@@ -98,6 +100,7 @@ def get_areas():
     return jsonify([row['area_name'] for row in areas])
 
 @shop_settings_api.route('/cities', methods=['GET'])
+@conditional_response
 def get_cities():
     area = request.args.get('area', '').strip()
     conn = get_db_connection()
@@ -134,6 +137,7 @@ def restore_backup(filename):
     return jsonify({'error': 'Dropbox backup functionality has been removed.'}), 501
 
 @shop_settings_api.route('/shop-settings', methods=['GET'])
+@conditional_response
 def get_shop_settings():
     """Get current shop settings."""
     try:
@@ -408,6 +412,7 @@ def update_shop_settings():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @shop_settings_api.route('/currencies', methods=['GET'])
+@conditional_response
 def get_currencies():
     """Get list of supported currencies."""
     currencies = {
@@ -475,6 +480,7 @@ def get_currencies():
     })
 
 @shop_settings_api.route('/timezones', methods=['GET'])
+@conditional_response
 def get_timezones():
     """Get list of supported timezones."""
     timezones = {
@@ -1,42 +1,22 @@
 import json
 import logging
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from functools import wraps
 from flask import session, redirect, url_for, jsonify
-from db.connection import get_db_connection, get_placeholder, execute_update, execute_with_returning, execute_query
-import qrcode
-import base64
-from io import BytesIO
+from db.connection import get_db_connection, get_own_connection, get_placeholder, execute_update, execute_with_returning, execute_query
+from api.qr_codes import render_qr_code, QR_CODE_FORMAT
 
 logger = logging.getLogger(__name__)
 
-def generate_zatca_qr_code(seller_name, seller_trn, invoice_number, timestamp, total_with_vat, vat_amount):
+def generate_zatca_qr_code(seller_name, seller_trn, invoice_number, timestamp, total_with_vat, vat_amount, image_format=None):
     """
     Generate QR code data in ZATCA format for FTA compliance
     Format: Seller Name, TRN, Timestamp, Total with VAT, VAT Amount
+    Returns the base64 image (PNG, or SVG with image_format='svg'); reprints are served from cache.
     """
     # Create QR data in ZATCA format
     qr_data = f"{seller_name}\n{seller_trn}\n{timestamp}\n{total_with_vat}\n{vat_amount}"
-    
-    # Generate QR code
-    qr = qrcode.QRCode(
-        version=1,
-        error_correction=qrcode.constants.ERROR_CORRECT_L,
-        box_size=10,
-        border=4,
-    )
-    qr.add_data(qr_data)
-    qr.make(fit=True)
-    
-    # Create QR code image
-    qr_image = qr.make_image(fill_color="black", back_color="white")
-    
-    # Convert to base64 for embedding in HTML
-    buffer = BytesIO()
-    qr_image.save(buffer, format='PNG')
-    qr_base64 = base64.b64encode(buffer.getvalue()).decode()
-    
-    return qr_base64
+    return render_qr_code(qr_data, image_format or QR_CODE_FORMAT)
 
 def get_current_user_id():
     """Get current user_id from session, fallback to None for proper authentication."""
@@ -61,18 +41,21 @@ def admin_required(f):
 def log_user_action(action, user_id=None, details=None):
     """Log user actions for audit trail."""
     try:
-        conn = get_db_connection()
-        placeholder = get_placeholder()
-        execute_update(conn, f'''
-            INSERT INTO user_actions (created_at, action, user_id, details)
-            VALUES ({placeholder}, {placeholder}, {placeholder}, {placeholder})
-        ''', (
-            datetime.now().isoformat(),
-            action,
-            user_id,
-            json.dumps(details) if details else None
-        ))
-        conn.close()
+        # Own connection: commits independently of the caller's transaction
+        conn = get_own_connection()
+        try:
+            placeholder = get_placeholder()
+            execute_update(conn, f'''
+                INSERT INTO user_actions (created_at, action, user_id, details)
+                VALUES ({placeholder}, {placeholder}, {placeholder}, {placeholder})
+            ''', (
+                datetime.now().isoformat(),
+                action,
+                user_id,
+                json.dumps(details) if details else None
+            ))
+        finally:
+            conn.close()
     except Exception as e:
         logger.error(f"Failed to log user action: {e}")
 
@@ -89,22 +72,25 @@ def log_dml_error(operation, table, error, user_id=None, data=None):
         logger.error(error_msg)
         
         # Log to database (if possible)
+        # Own connection: the caller's transaction has usually just failed
         try:
-            conn = get_db_connection()
-            placeholder = get_placeholder()
-            execute_with_returning(conn, f'''
-                INSERT INTO error_logs (timestamp, level, operation, table_name, error_message, user_id, data_snapshot)
-                VALUES ({placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder})
-            ''', (
-                datetime.now().isoformat(),
-                'ERROR',
-                operation,
-                table,
-                str(error),
-                user_id,
-                json.dumps(data) if data else None
-            ))
-            conn.close()
+            conn = get_own_connection()
+            try:
+                placeholder = get_placeholder()
+                execute_with_returning(conn, f'''
+                    INSERT INTO error_logs (timestamp, level, operation, table_name, error_message, user_id, data_snapshot)
+                    VALUES ({placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder})
+                ''', (
+                    datetime.now().isoformat(),
+                    'ERROR',
+                    operation,
+                    table,
+                    str(error),
+                    user_id,
+                    json.dumps(data) if data else None
+                ))
+            finally:
+                conn.close()
         except Exception as db_log_error:
             # If database logging fails, log to file only
             logger.error(f"Failed to log to database: {db_log_error}")
@@ -132,6 +118,48 @@ def get_date_range(request, default_days=30):
         raise ValueError('Invalid date range')
     return from_str, to_str
 
+def _as_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    parsed = parse_date(str(value))
+    if parsed is None:
+        raise ValueError(f'Invalid date: {value}')
+    return parsed
+
+def date_range_filter(column, from_date=None, to_date=None):
+    """Build an index-friendly filter for an inclusive range of days.
+
+    Emits `column >= from_date AND column < to_date + 1 day` so the column is
+    never wrapped in DATE()/TO_CHAR() and a (user_id, <date column>) index
+    stays usable; the half-open upper bound also covers timestamp columns.
+    Either bound may be omitted. Returns (where_sql, params).
+    """
+    placeholder = get_placeholder()
+    conditions = []
+    params = []
+    if from_date:
+        conditions.append(f'{column} >= {placeholder}')
+        params.append(_as_date(from_date))
+    if to_date:
+        conditions.append(f'{column} < {placeholder}')
+        params.append(_as_date(to_date) + timedelta(days=1))
+    return ' AND '.join(conditions) or 'TRUE', params
+
+def add_months(day, months):
+    """Same day `months` months away, clamped to the end of shorter months."""
+    month_index = day.year * 12 + day.month - 1 + months
+    year, month = divmod(month_index, 12)
+    month += 1
+    next_month = date(year + (month == 12), month % 12 + 1, 1)
+    return date(year, month, min(day.day, (next_month - timedelta(days=1)).day))
+
+def month_range(day):
+    """First and last day of the month containing `day`."""
+    first = day.replace(day=1)
+    return first, add_months(first, 1) - timedelta(days=1)
+
 def api_error_handler(f):
     @wraps(f)
     def wrapper(*args, **kwargs):
@@ -177,17 +205,67 @@ def fetch_top_products_by_where(conn, where_clause, params, limit=5):
     return cursor.fetchall()
 def fetch_payment_methods(conn, user_id, from_date, to_date):
     placeholder = get_placeholder()
+    date_filter, date_params = date_range_filter('sales_day', from_date, to_date)
     rows = execute_query(conn, f'''
         SELECT 
-            payment_method,
-            COUNT(*) as count,
-            SUM(total_amount) as amount
-        FROM bills 
-        WHERE user_id = {placeholder} 
-        AND DATE(bill_date) BETWEEN {placeholder} AND {placeholder}
-        GROUP BY payment_method
+            m.key as payment_method,
+            SUM((m.value->>'count')::int) as count,
+            SUM((m.value->>'amount')::numeric) as amount
+        FROM daily_shop_sales d, jsonb_each(d.payment_methods) m
+        WHERE d.user_id = {placeholder} 
+        AND {date_filter}
+        GROUP BY m.key
         ORDER BY amount DESC
-    ''', (user_id, from_date, to_date)).fetchall()
+    ''', [user_id] + date_params).fetchall()
+    return rows
+def fetch_sales_summary(conn, user_id, from_date=None, to_date=None):
+    """Bill totals of one shop over a date range (all time by default), read from daily_shop_sales."""
+    placeholder = get_placeholder()
+    date_filter, date_params = date_range_filter('sales_day', from_date, to_date)
+    params = [user_id] + date_params
+    row = execute_query(conn, f'''
+        WITH days AS (
+            SELECT * FROM daily_shop_sales
+            WHERE user_id = {placeholder} 
+            AND {date_filter}
+        )
+        SELECT 
+            COALESCE(SUM(invoice_count), 0) as total_invoices,
+            SUM(revenue) as total_revenue,
+            SUM(subtotal) as total_subtotal,
+            SUM(vat_amount) as total_vat,
+            SUM(revenue) / NULLIF(SUM(invoice_count), 0) as avg_invoice_value,
+            (SELECT COUNT(DISTINCT c) FROM days, unnest(days.customer_ids) c) as unique_customers,
+            SUM(advance_paid) as advance_payments,
+            SUM(balance_amount) as pending_payments
+        FROM days
+    ''', params).fetchone()
+    return row
+def fetch_sales_trends(conn, user_id, bucket_format, from_date=None, to_date=None):
+    """Revenue, invoices and distinct customers per TO_CHAR(sales_day, bucket_format) bucket."""
+    placeholder = get_placeholder()
+    date_filter, date_params = date_range_filter('sales_day', from_date, to_date)
+    rows = execute_query(conn, f'''
+        WITH days AS (
+            SELECT TO_CHAR(sales_day, '{bucket_format}') as bucket, revenue, invoice_count, customer_ids
+            FROM daily_shop_sales
+            WHERE user_id = {placeholder} 
+            AND {date_filter}
+        ), customers AS (
+            SELECT bucket, COUNT(DISTINCT c) as customers
+            FROM days, unnest(days.customer_ids) c
+            GROUP BY bucket
+        )
+        SELECT 
+            d.bucket,
+            SUM(d.revenue) as revenue,
+            SUM(d.invoice_count) as invoices,
+            COALESCE(MAX(cu.customers), 0) as customers
+        FROM days d
+        LEFT JOIN customers cu ON cu.bucket = d.bucket
+        GROUP BY d.bucket
+        ORDER BY d.bucket
+    ''', [user_id] + date_params).fetchall()
     return rows
 def fetch_repeated_customers(conn, user_id, limit=10):
     placeholder = get_placeholder()
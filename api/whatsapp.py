@@ -1,8 +1,8 @@
 from flask import Blueprint, request, jsonify
-import re
 import urllib.parse
 from db.connection import get_db_connection, get_placeholder, execute_query
 from api.utils import get_current_user_id
+from api.phone_numbers import normalize_phone
 from plan_manager import plan_manager
 from api.i18n import get_user_language
 
@@ -106,28 +106,9 @@ Advance Paid: AED {bill_data.get('advance_paid', 0):.2f}
 
 def generate_whatsapp_share_link(phone_number, message):
     """Generate WhatsApp share link"""
-    # Remove any non-digit characters from phone number
-    clean_phone = ''.join(filter(str.isdigit, phone_number))
-    
-    # Handle international numbers (starting with +)
-    if phone_number.strip().startswith('+'):
-        # Trust the country code provided in the input
-        pass
-    else:
-        # Handle UAE phone numbers properly (legacy behavior or local input)
-        if clean_phone:
-            if clean_phone.startswith('971'):
-                # Already has country code
-                pass
-            elif clean_phone.startswith('0'):
-                # Remove leading 0 and add 971
-                clean_phone = '971' + clean_phone[1:]
-            elif len(clean_phone) == 9:
-                # 9-digit number, add 971
-                clean_phone = '971' + clean_phone
-            else:
-                # Add 971 prefix as default fallback for UAE
-                clean_phone = '971' + clean_phone
+    # Same E.164 rules as customer records; wa.me wants the digits without '+'
+    phone_e164 = normalize_phone(phone_number)
+    clean_phone = phone_e164[1:] if phone_e164 else ''.join(filter(str.isdigit, phone_number))
     
     # URL encode the message
     encoded_message = urllib.parse.quote(message)
@@ -153,8 +134,7 @@ def send_bill_whatsapp(bill_id):
             return jsonify({'success': False, 'error': 'Phone number is required'}), 400
         
         # Validate phone number format
-        phone_digits = re.sub(r'\D', '', phone_number)
-        if len(phone_digits) < 9:
+        if not normalize_phone(phone_number):
             return jsonify({'success': False, 'error': 'Invalid phone number format.'}), 400
         
         # Check if user has WhatsApp feature access
@@ -8,6 +8,7 @@ load_dotenv()
 import logging
 from api.logging_config import setup_logging
 from db.init import init_db
+from db.connection import init_app as init_db_pool
 from api.customers import customers_api
 from api.products import products_api
 from api.bills import bills_api
@@ -21,14 +22,18 @@ from api.plans import plans_api
 from api.subscriptions import subscriptions_api
 from api.auth import auth_api
 from api.reports import reports_api
+from api.exports import exports_api
+from api.invoice_batches import invoice_batches_api
 from api.email import email_api
 from api.setup import setup_api
-from api.i18n import i18n_api
+from api.i18n import i18n_api, init_app as init_i18n
 from api.whatsapp import whatsapp_api
 from api.loyalty import loyalty_api
 from api.ocr import ocr_api, setup_ocr
 from api.ai import ai_api
 from api.pages import pages_api
+from api.assets import init_app as init_assets
+from api.compression import init_app as init_compression
 
 def create_app():
     logger = setup_logging()
@@ -40,8 +45,20 @@ def create_app():
     app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
     app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 0
     app.config['TEMPLATES_AUTO_RELOAD'] = True
+    init_db_pool(app)
+    init_i18n(app)
+    init_assets(app)
+    init_compression(app)
     @app.after_request
     def after_request(response):
+        if request.endpoint == 'static':
+            # Plain /static/ URLs revalidate against their ETag (304 when unchanged).
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        if response.cache_control.immutable or response.cache_control.private:
+            # Fingerprinted assets (api/assets.py) keep their year-long cache;
+            # conditional API responses (api/response_cache.py) keep their ETag policy.
+            return response
         response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
         response.headers['Pragma'] = 'no-cache'
         response.headers['Expires'] = '0'
@@ -60,6 +77,8 @@ def create_app():
     app.register_blueprint(subscriptions_api)
     app.register_blueprint(auth_api)
     app.register_blueprint(reports_api)
+    app.register_blueprint(exports_api)
+    app.register_blueprint(invoice_batches_api)
     app.register_blueprint(email_api)
     app.register_blueprint(setup_api)
     app.register_blueprint(ai_api)
@@ -0,0 +1,124 @@
+"""
+Benchmark POST /api/bills with a 20-item laundry ticket.
+
+Runs against the database configured in the environment (DATABASE_URL or
+PG*/POSTGRES_* variables) through the Flask test client, and reports
+latency percentiles plus the number of database round trips per request.
+
+Usage:
+    python benchmarks/bench_create_bill.py [iterations] [items]
+"""
+import os
+import sys
+import time
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+import psycopg2
+import psycopg2.extensions
+from psycopg2.extras import RealDictCursor
+
+COUNTS = {'connects': 0, 'statements': 0, 'commits': 0, 'rollbacks': 0}
+
+
+class CountingCursor(RealDictCursor):
+    def execute(self, query, vars=None):
+        COUNTS['statements'] += 1
+        return super().execute(query, vars)
+
+
+class CountingConnection(psycopg2.extensions.connection):
+    def cursor(self, *args, **kwargs):
+        kwargs['cursor_factory'] = CountingCursor
+        return super().cursor(*args, **kwargs)
+
+    def commit(self):
+        COUNTS['commits'] += 1
+        return super().commit()
+
+    def rollback(self):
+        COUNTS['rollbacks'] += 1
+        return super().rollback()
+
+
+_connect = psycopg2.connect
+
+
+def counting_connect(*args, **kwargs):
+    COUNTS['connects'] += 1
+    kwargs['connection_factory'] = CountingConnection
+    return _connect(*args, **kwargs)
+
+
+psycopg2.connect = counting_connect
+
+from app import create_app  # noqa: E402
+
+
+def make_payload(i, n_items):
+    items = [{
+        'product_id': None,
+        'product_name': f'Item {j}',
+        'quantity': 1 + (j % 3),
+        'rate': 5 + j,
+        'discount': 0,
+        'notes': '',
+    } for j in range(n_items)]
+    subtotal = sum(item['quantity'] * item['rate'] for item in items)
+    return {
+        'bill': {
+            'customer_name': f'Bench Customer {i % 50}',
+            'customer_phone': f'50{1000000 + i % 50}',
+            'country_code': '971',
+            'customer_city': 'Dubai',
+            'customer_area': 'Karama',
+            'payment_method': 'Cash',
+            'subtotal': subtotal,
+            'advance_paid': 0,
+            'notes': '',
+        },
+        'items': items,
+    }
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    n_items = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    app = create_app()
+    client = app.test_client()
+
+    # Warm up (imports, first connection, plan caches).
+    for i in range(5):
+        client.post('/api/bills', json=make_payload(i, n_items))
+
+    for key in COUNTS:
+        COUNTS[key] = 0
+    timings = []
+    failures = 0
+    for i in range(iterations):
+        started = time.perf_counter()
+        response = client.post('/api/bills', json=make_payload(i, n_items))
+        timings.append((time.perf_counter() - started) * 1000)
+        if response.status_code != 200:
+            failures += 1
+
+    print(f"POST /api/bills x{iterations} ({n_items} items per bill), failures: {failures}")
+    print(f"  p50: {percentile(timings, 50):.2f} ms")
+    print(f"  p99: {percentile(timings, 99):.2f} ms")
+    print(f"  mean: {statistics.mean(timings):.2f} ms")
+    for key, value in COUNTS.items():
+        print(f"  {key} per request: {value / iterations:.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""
+Benchmark customer search on a shop with 100k customers.
+
+Builds a throwaway schema (base schema + migrations), seeds one large shop
+plus smaller neighbours, then runs typeahead queries the way a cashier types
+them and prints median and p95 latency per query:
+
+  before  the old /api/customers?search= query: LIKE '%q%' on every column,
+          no LIMIT, every match converted in Python
+  after   api.customer_search.search_customers, one ranked page of 25
+
+Substring and fuzzy matches use the pg_trgm indexes when the server has the
+extension; without it they fall back to LIKE and the "text" rows show it.
+
+Usage:
+    python benchmarks/bench_customer_search.py [customers] [runs]
+"""
+import os
+import sys
+import time
+import uuid
+import statistics
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from api import customer_search  # noqa: E402
+from db.connection import create_connection  # noqa: E402
+from db.init import apply_schema_file  # noqa: E402
+from db.migrate import run_migrations  # noqa: E402
+
+SHOP = 1
+
+SEED_SQL = '''
+    INSERT INTO users (user_id, email, shop_name, password_hash)
+    SELECT s, 'shop' || s || '@tajir.local', 'Shop ' || s, 'x' FROM generate_series(1, 21) s;
+
+    INSERT INTO customers (user_id, name, phone, phone_e164, business_name, customer_type, created_at)
+    SELECT s, first_names[1 + (n * 7 + s) %% 20] || ' ' || last_names[1 + (n * 13 + s) %% 20] || ' ' || n,
+           '05' || lpad(s::text, 2, '0') || lpad(n::text, 6, '0'),
+           '+9715' || lpad(s::text, 2, '0') || lpad(n::text, 6, '0'),
+           CASE WHEN n %% 10 = 0 THEN last_names[1 + n %% 20] || ' Trading LLC' END,
+           CASE WHEN n %% 10 = 0 THEN 'Business' ELSE 'Individual' END,
+           NOW() - (n %% 1000) * INTERVAL '1 day'
+    FROM generate_series(1, 21) s,
+         generate_series(1, CASE WHEN s = %(shop)s THEN %(customers)s ELSE %(customers)s / 20 END) n,
+         (SELECT ARRAY['Mohammed', 'Ahmed', 'Fatima', 'Aisha', 'Omar', 'Ali', 'Priya', 'Rahul', 'Maria', 'John',
+                       'Hassan', 'Layla', 'Yusuf', 'Noor', 'Sara', 'Khalid', 'Anil', 'Deepa', 'Joseph', 'Mariam'] AS first_names,
+                 ARRAY['Al Mansouri', 'Khan', 'Sharma', 'Hussain', 'Nair', 'Fernandes', 'Al Hashimi', 'Patel', 'Rahman', 'Menon',
+                       'Siddiqui', 'Al Zaabi', 'Thomas', 'Iqbal', 'Das', 'Qureshi', 'Pillai', 'Farooq', 'George', 'Saleh'] AS last_names) names;
+'''
+
+# What a cashier types, keystroke by keystroke.
+QUERIES = ['m', 'mo', 'moh', 'moham', 'mohammed kh', 'khan', 'trading', 'mohamed', '05', '0501000', '050100012']
+
+
+def old_search(conn, user_id, search):
+    like_search_lower = f"%{search.lower()}%"
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT * FROM customers WHERE user_id = %s AND (LOWER(name) LIKE %s OR phone LIKE %s
+        OR LOWER(COALESCE(business_name, '')) LIKE %s) AND is_active = TRUE ORDER BY name
+    ''', (user_id, like_search_lower, search, like_search_lower))
+    customers = []
+    for customer in cursor.fetchall():
+        customer_dict = {}
+        for key, value in dict(customer).items():
+            if isinstance(value, datetime):
+                customer_dict[key] = value.isoformat()
+            elif hasattr(value, '__float__') and not isinstance(value, bool):
+                customer_dict[key] = float(value)
+            else:
+                customer_dict[key] = value
+        customers.append(customer_dict)
+    return customers
+
+
+def timed(fn, runs):
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = fn()
+        times.append((time.perf_counter() - started) * 1000)
+    times.sort()
+    return statistics.median(times), times[int(len(times) * 0.95) - 1], result
+
+
+def main():
+    customers = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    conn = create_connection()
+    schema = f'bench_search_{uuid.uuid4().hex[:8]}'
+    cursor = conn.cursor()
+    cursor.execute(f'CREATE SCHEMA {schema}')
+    # public stays on the path so an installed pg_trgm is visible.
+    cursor.execute(f'SET search_path TO {schema}, public')
+    conn.commit()
+    try:
+        apply_schema_file(conn)
+        run_migrations(conn)
+        cursor = conn.cursor()
+        cursor.execute(SEED_SQL, {'shop': SHOP, 'customers': customers})
+        cursor.execute('ANALYZE customers')
+        conn.commit()
+
+        trigram = customer_search.trigram_available(conn)
+        print(f"{customers:,} customers in the shop, pg_trgm {'on' if trigram else 'off'}, {runs} runs each\n")
+        print(f"{'query':14} {'mode':7} {'before ms':>10} {'p95':>8} {'rows':>7}   {'after ms':>9} {'p95':>8} {'rows':>5}")
+        for query in QUERIES:
+            before, before_p95, old_rows = timed(lambda: old_search(conn, SHOP, query), runs)
+            after, after_p95, page = timed(lambda: customer_search.search_customers(conn, SHOP, query), runs)
+            conn.rollback()
+            print(f"{query:14} {customer_search.search_mode(query):7} {before:10.1f} {before_p95:8.1f} {len(old_rows):7}"
+                  f"   {after:9.1f} {after_p95:8.1f} {len(page['customers']):5}")
+    finally:
+        conn.rollback()
+        conn.autocommit = True
+        conn.cursor().execute(f'DROP SCHEMA {schema} CASCADE')
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+"""
+Benchmark the /api/dashboard queries on a shop with several years of bills.
+
+Builds a throwaway schema (base schema + migrations), seeds one shop with
+~100k bills over four years next to a crowd of smaller shops, fills the
+daily_shop_sales rollup, then times:
+
+  before  the eleven sequential queries the dashboard used to run, with
+          trending products taken from a 100-row all-history scan
+  after   api.analytics.DASHBOARD_SQL, one round trip
+
+and prints p50/p95 latency of the whole dashboard for each.
+
+Usage:
+    python benchmarks/bench_dashboard.py [bills] [runs]
+"""
+import os
+import sys
+import time
+import uuid
+import statistics
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from api.analytics import _fetch_dashboard  # noqa: E402
+from api.utils import month_range, add_months  # noqa: E402
+from db.connection import create_connection  # noqa: E402
+from db.init import apply_schema_file  # noqa: E402
+from db.migrate import run_migrations  # noqa: E402
+from db.sales_rollup import rebuild  # noqa: E402
+
+SHOP = 1
+OTHER_SHOPS = 99
+OTHER_SHOP_BILLS = 2000
+DAYS = 4 * 365
+
+SEED_SQL = '''
+    INSERT INTO users (user_id, email, shop_name, password_hash)
+    SELECT s, 'shop' || s || '@tajir.local', 'Shop ' || s, 'x' FROM generate_series(1, %(shops)s) s;
+
+    INSERT INTO expense_categories (user_id, category_name)
+    SELECT s, 'Category ' || c FROM generate_series(1, %(shops)s) s, generate_series(1, 5) c;
+
+    INSERT INTO customers (user_id, name, phone)
+    SELECT s, 'Customer ' || c, '5' || lpad((s * 100000 + c)::text, 8, '0')
+    FROM generate_series(1, %(shops)s) s, generate_series(1, 2000) c;
+
+    INSERT INTO bills (user_id, customer_id, customer_name, customer_phone, customer_area, bill_number,
+                       bill_date, subtotal, vat_amount, total_amount, advance_paid, balance_amount,
+                       status, payment_method)
+    SELECT u, c.customer_id, c.name, c.phone, 'Area ' || (n %% 40), 'BILL-' || u || '-' || n,
+           CURRENT_DATE - (n %% %(days)s), (n %% 200) + 10, ((n %% 200) + 10) * 0.05, ((n %% 200) + 10) * 1.05,
+           0, ((n %% 200) + 10) * 1.05,
+           CASE WHEN n %% 7 = 0 THEN 'Pending' ELSE 'Paid' END,
+           CASE WHEN n %% 3 = 0 THEN 'Card' ELSE 'Cash' END
+    FROM (
+        SELECT %(shop)s AS u, n FROM generate_series(1, %(bills)s) n
+        UNION ALL
+        SELECT s, n FROM generate_series(2, %(shops)s) s, generate_series(1, %(other_bills)s) n
+    ) seed
+    JOIN customers c ON c.user_id = seed.u AND c.phone = '5' || lpad((seed.u * 100000 + n %% 2000 + 1)::text, 8, '0')
+    ORDER BY CURRENT_DATE - (n %% %(days)s), seed.u;  -- bills arrive in date order
+
+    INSERT INTO bill_items (user_id, bill_id, product_name, quantity, rate, total_amount)
+    SELECT user_id, bill_id, 'Product ' || ((bill_id + i) %% 60), i, subtotal / 2, subtotal / 2
+    FROM bills, generate_series(1, 2) i
+    ORDER BY bill_id;
+
+    INSERT INTO expenses (user_id, category_id, expense_date, amount)
+    SELECT ec.user_id, ec.category_id, CURRENT_DATE - (e %% %(days)s), (e %% 300) + 5
+    FROM expense_categories ec, generate_series(1, 2000) e;
+'''
+
+
+def legacy_queries(today):
+    """The dashboard's previous sequential queries, as (sql, params)."""
+    tomorrow = today + timedelta(days=1)
+    month_start, month_end = month_range(today)
+    trend_start = add_months(today, -6)
+    return [
+        ('SELECT COALESCE(SUM(total_amount), 0) FROM bills WHERE bill_date >= %s AND bill_date < %s AND user_id = %s',
+         [today, tomorrow, SHOP]),
+        ('SELECT COUNT(*) FROM bills WHERE bill_date >= %s AND bill_date < %s AND user_id = %s',
+         [today, tomorrow, SHOP]),
+        ("SELECT COUNT(*) FROM bills WHERE status = 'Pending' AND user_id = %s", [SHOP]),
+        ('SELECT COUNT(*) FROM customers WHERE user_id = %s', [SHOP]),
+        ('SELECT COALESCE(SUM(amount), 0) FROM expenses WHERE expense_date >= %s AND expense_date < %s AND user_id = %s',
+         [today, tomorrow, SHOP]),
+        ('SELECT COALESCE(SUM(amount), 0) FROM expenses WHERE expense_date >= %s AND expense_date < %s AND user_id = %s',
+         [month_start, month_end + timedelta(days=1), SHOP]),
+        ("SELECT TO_CHAR(bill_date, 'YYYY-MM') as month, SUM(total_amount), COUNT(*), COUNT(DISTINCT customer_id) "
+         "FROM bills WHERE user_id = %s AND bill_date >= %s GROUP BY 1 ORDER BY 1", [SHOP, trend_start]),
+        ("SELECT TO_CHAR(expense_date, 'YYYY-MM') as month, SUM(amount), COUNT(*) "
+         "FROM expenses WHERE user_id = %s AND expense_date >= %s GROUP BY 1 ORDER BY 1", [SHOP, trend_start]),
+        ("SELECT COALESCE(customer_area, 'Unknown') as area, SUM(total_amount) as sales FROM bills "
+         "WHERE customer_area IS NOT NULL AND customer_area != '' AND user_id = %s "
+         "GROUP BY customer_area ORDER BY sales DESC LIMIT 10", [SHOP]),
+        ('SELECT bi.product_name, SUM(bi.quantity), SUM(bi.total_amount) as total_revenue, COUNT(DISTINCT b.bill_id) '
+         'FROM bill_items bi JOIN bills b ON bi.bill_id = b.bill_id '
+         'LEFT JOIN customers c ON b.customer_id = c.customer_id '
+         'WHERE b.user_id = %s AND b.bill_date >= %s AND b.bill_date < %s '
+         'GROUP BY bi.product_name ORDER BY total_revenue DESC LIMIT 100', [SHOP, date(1970, 1, 1), tomorrow]),
+        ("SELECT COALESCE(customer_name, 'Unknown'), COALESCE(customer_phone, ''), COUNT(*) as invoice_count, "
+         "SUM(total_amount) FROM bills WHERE customer_name IS NOT NULL AND customer_name != '' AND user_id = %s "
+         "GROUP BY customer_name, customer_phone ORDER BY invoice_count DESC LIMIT 10", [SHOP]),
+    ]
+
+
+def timed(fn, runs):
+    fn()  # warm the cache
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[max(0, int(len(timings) * 0.95) - 1)]
+
+
+def main():
+    bills = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    conn = create_connection()
+    schema = f'bench_dashboard_{uuid.uuid4().hex[:8]}'
+    cursor = conn.cursor()
+    cursor.execute(f'CREATE SCHEMA {schema}')
+    cursor.execute(f'SET search_path TO {schema}')
+    conn.commit()
+    try:
+        apply_schema_file(conn)
+        run_migrations(conn)
+        print(f"Seeding shop {SHOP} with {bills:,} bills over {DAYS} days (+{OTHER_SHOPS} shops x {OTHER_SHOP_BILLS:,})...")
+        started = time.perf_counter()
+        cursor = conn.cursor()
+        cursor.execute(SEED_SQL, {'shop': SHOP, 'shops': OTHER_SHOPS + 1, 'bills': bills,
+                                  'other_bills': OTHER_SHOP_BILLS, 'days': DAYS})
+        conn.commit()
+        rebuild(conn)
+        conn.autocommit = True
+        cursor = conn.cursor()
+        for table in ('bills', 'bill_items', 'expenses', 'customers', 'daily_shop_sales'):
+            cursor.execute(f'VACUUM ANALYZE {table}')
+        conn.autocommit = False
+        print(f"  seeded in {time.perf_counter() - started:.1f}s\n")
+
+        today = date.today()
+        queries = legacy_queries(today)
+
+        def before():
+            cursor = conn.cursor()
+            for sql, params in queries:
+                cursor.execute(sql, params)
+                cursor.fetchall()
+            conn.rollback()
+
+        def after():
+            _fetch_dashboard(conn, SHOP, today)
+            conn.rollback()
+
+        print(f"{'dashboard':10} {'p50 ms':>10} {'p95 ms':>10}")
+        for label, fn in (('before', before), ('after', after)):
+            p50, p95 = timed(fn, runs)
+            print(f"{label:10} {p50:10.2f} {p95:10.2f}")
+    finally:
+        conn.rollback()
+        conn.autocommit = True
+        conn.cursor().execute(f'DROP SCHEMA {schema} CASCADE')
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,225 @@
+"""
+Benchmark the analytics/report date filters on a large shop.
+
+Builds a throwaway schema (base schema + migrations), seeds one shop with
+~1M bills spread over three years next to a crowd of smaller shops, then
+runs the main query of each analytics/report endpoint twice:
+
+  before  DATE(col) BETWEEN / TO_CHAR(col) = ... filters, plain
+          (user_id, date) indexes
+  after   half-open ranges from api.utils.date_range_filter, covering
+          (user_id, date) INCLUDE (...) indexes from migration 0004
+
+and prints median latency plus the scan nodes of each plan.
+
+Usage:
+    python benchmarks/bench_date_ranges.py [bills] [runs]
+"""
+import os
+import sys
+import time
+import uuid
+import statistics
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from api.utils import date_range_filter, month_range, add_months  # noqa: E402
+from db.connection import create_connection  # noqa: E402
+from db.init import apply_schema_file  # noqa: E402
+from db.migrate import run_migrations  # noqa: E402
+
+SHOP = 1
+OTHER_SHOPS = 99
+OTHER_SHOP_BILLS = 2000
+
+SEED_SQL = '''
+    INSERT INTO users (user_id, email, shop_name, password_hash)
+    SELECT s, 'shop' || s || '@tajir.local', 'Shop ' || s, 'x' FROM generate_series(1, %(shops)s) s;
+
+    INSERT INTO expense_categories (user_id, category_name)
+    SELECT s, 'Category ' || c FROM generate_series(1, %(shops)s) s, generate_series(1, 5) c;
+
+    INSERT INTO customers (user_id, name, phone)
+    SELECT s, 'Customer ' || c, '5' || lpad((s * 100000 + c)::text, 8, '0')
+    FROM generate_series(1, %(shops)s) s, generate_series(1, 500) c;
+
+    INSERT INTO bills (user_id, customer_id, bill_number, bill_date, subtotal, vat_amount, total_amount,
+                       advance_paid, balance_amount, status, payment_method)
+    SELECT u, NULL, 'BILL-' || u || '-' || n, CURRENT_DATE - (n %% 1095),
+           (n %% 200) + 10, ((n %% 200) + 10) * 0.05, ((n %% 200) + 10) * 1.05,
+           0, ((n %% 200) + 10) * 1.05,
+           CASE WHEN n %% 7 = 0 THEN 'Pending' ELSE 'Paid' END,
+           CASE WHEN n %% 3 = 0 THEN 'Card' ELSE 'Cash' END
+    FROM (
+        SELECT %(shop)s AS u, n FROM generate_series(1, %(bills)s) n
+        UNION ALL
+        SELECT s, n FROM generate_series(2, %(shops)s) s, generate_series(1, %(other_bills)s) n
+    ) seed;
+
+    UPDATE bills b SET customer_id = c.customer_id
+    FROM customers c
+    WHERE c.user_id = b.user_id AND c.phone = '5' || lpad((b.user_id * 100000 + b.bill_id %% 500 + 1)::text, 8, '0');
+
+    INSERT INTO bill_items (user_id, bill_id, product_name, quantity, rate, total_amount)
+    SELECT user_id, bill_id, 'Product ' || (bill_id %% 40), 1, subtotal, subtotal FROM bills;
+
+    INSERT INTO expenses (user_id, category_id, expense_date, amount)
+    SELECT ec.user_id, ec.category_id, CURRENT_DATE - (e %% 1095), (e %% 300) + 5
+    FROM expense_categories ec, generate_series(1, 2000) e;
+'''
+
+
+def endpoint_queries(today):
+    """(endpoint, legacy sql, legacy params, new sql, new params) for each endpoint."""
+    from_30 = today - timedelta(days=30)
+    month_first, month_last = month_range(today)
+    year_first, year_last = today.replace(month=1, day=1), today.replace(month=12, day=31)
+    queries = []
+
+    def add(endpoint, legacy_sql, legacy_params, new_template, column, from_date, to_date, extra_params=()):
+        date_filter, date_params = date_range_filter(column, from_date, to_date)
+        queries.append((endpoint, legacy_sql, [SHOP] + list(legacy_params) + list(extra_params),
+                        new_template.format(date_filter=date_filter), [SHOP] + date_params + list(extra_params)))
+
+    revenue_sql = '''
+        SELECT COUNT(*) as total_invoices, SUM(total_amount) as total_revenue, SUM(subtotal) as gross_revenue,
+               SUM(vat_amount) as total_vat, AVG(total_amount) as avg_invoice_value,
+               COUNT(DISTINCT customer_id) as unique_customers
+        FROM bills WHERE user_id = %s AND {date_filter}
+    '''
+    add('dashboard: today revenue',
+        'SELECT COALESCE(SUM(total_amount), 0) FROM bills WHERE user_id = %s AND DATE(bill_date) = CURRENT_DATE', [],
+        'SELECT COALESCE(SUM(total_amount), 0) FROM bills WHERE user_id = %s AND {date_filter}',
+        'bill_date', today, today)
+    add('dashboard: month expenses',
+        "SELECT COALESCE(SUM(amount), 0) FROM expenses WHERE user_id = %s AND TO_CHAR(expense_date, 'YYYY-MM') = TO_CHAR(CURRENT_DATE, 'YYYY-MM')", [],
+        'SELECT COALESCE(SUM(amount), 0) FROM expenses WHERE user_id = %s AND {date_filter}',
+        'expense_date', month_first, month_last)
+    add('analytics/revenue-trends (6 months)',
+        "SELECT TO_CHAR(bill_date, 'YYYY-MM') as month, SUM(total_amount), COUNT(*), COUNT(DISTINCT customer_id) FROM bills "
+        "WHERE user_id = %s AND bill_date >= CURRENT_DATE - INTERVAL '6 months' GROUP BY 1 ORDER BY 1", [],
+        "SELECT TO_CHAR(bill_date, 'YYYY-MM') as month, SUM(total_amount), COUNT(*), COUNT(DISTINCT customer_id) FROM bills "
+        "WHERE user_id = %s AND {date_filter} GROUP BY 1 ORDER BY 1",
+        'bill_date', add_months(today, -6), None)
+    add('analytics/financial-overview: revenue',
+        revenue_sql.format(date_filter='DATE(bill_date) BETWEEN %s AND %s'), [from_30, today],
+        revenue_sql, 'bill_date', from_30, today)
+    add('analytics/financial-overview: expenses',
+        'SELECT COUNT(*), SUM(amount), AVG(amount) FROM expenses WHERE user_id = %s AND DATE(expense_date) BETWEEN %s AND %s', [from_30, today],
+        'SELECT COUNT(*), SUM(amount), AVG(amount) FROM expenses WHERE user_id = %s AND {date_filter}',
+        'expense_date', from_30, today)
+    add('analytics/cash-flow: payment methods',
+        'SELECT payment_method, COUNT(*), SUM(total_amount) AS amount FROM bills WHERE user_id = %s '
+        'AND DATE(bill_date) BETWEEN %s AND %s GROUP BY payment_method ORDER BY amount DESC', [from_30, today],
+        'SELECT payment_method, COUNT(*), SUM(total_amount) AS amount FROM bills WHERE user_id = %s '
+        'AND {date_filter} GROUP BY payment_method ORDER BY amount DESC',
+        'bill_date', from_30, today)
+    add('analytics/top-products',
+        'SELECT bi.product_name, SUM(bi.quantity), SUM(bi.total_amount) AS total_revenue FROM bill_items bi '
+        'JOIN bills b ON bi.bill_id = b.bill_id WHERE b.user_id = %s AND DATE(b.bill_date) BETWEEN %s AND %s '
+        'GROUP BY bi.product_name ORDER BY total_revenue DESC LIMIT 10', [from_30, today],
+        'SELECT bi.product_name, SUM(bi.quantity), SUM(bi.total_amount) AS total_revenue FROM bill_items bi '
+        'JOIN bills b ON bi.bill_id = b.bill_id WHERE b.user_id = %s AND {date_filter} '
+        'GROUP BY bi.product_name ORDER BY total_revenue DESC LIMIT 10',
+        'b.bill_date', from_30, today)
+    add('reports invoice summary: current year',
+        revenue_sql.format(date_filter='DATE(bill_date) BETWEEN %s AND %s'), [year_first, year_last],
+        revenue_sql, 'bill_date', year_first, year_last)
+    add('reports/invoices: date filter',
+        'SELECT COUNT(*), SUM(total_amount) FROM bills b WHERE b.user_id = %s '
+        'AND DATE(b.bill_date) >= %s AND DATE(b.bill_date) <= %s', [month_first, today],
+        'SELECT COUNT(*), SUM(total_amount) FROM bills b WHERE b.user_id = %s AND {date_filter}',
+        'b.bill_date', month_first, today)
+    return queries
+
+
+def scan_nodes(plan, found=None):
+    found = [] if found is None else found
+    if 'Scan' in plan['Node Type']:
+        label = plan['Node Type']
+        if plan.get('Index Name'):
+            label += f" ({plan['Index Name']})"
+        if plan['Node Type'] == 'Index Only Scan':
+            label += f" heap fetches={plan.get('Heap Fetches', 0)}"
+        found.append(label)
+    for child in plan.get('Plans', []):
+        scan_nodes(child, found)
+    return found
+
+
+def measure(cursor, sql, params, runs):
+    cursor.execute('EXPLAIN (ANALYZE, FORMAT JSON) ' + sql, params)
+    plan = cursor.fetchone()['QUERY PLAN'][0]['Plan']
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        cursor.execute(sql, params)
+        cursor.fetchall()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), scan_nodes(plan)
+
+
+def main():
+    bills = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 15
+    conn = create_connection()
+    schema = f'bench_dates_{uuid.uuid4().hex[:8]}'
+    cursor = conn.cursor()
+    cursor.execute(f'CREATE SCHEMA {schema}')
+    cursor.execute(f'SET search_path TO {schema}')
+    conn.commit()
+    try:
+        apply_schema_file(conn)
+        run_migrations(conn)
+        print(f"Seeding shop {SHOP} with {bills:,} bills (+{OTHER_SHOPS} shops x {OTHER_SHOP_BILLS:,})...")
+        started = time.perf_counter()
+        cursor = conn.cursor()
+        cursor.execute(SEED_SQL, {'shop': SHOP, 'shops': OTHER_SHOPS + 1, 'bills': bills,
+                                  'other_bills': OTHER_SHOP_BILLS})
+        conn.commit()
+        conn.autocommit = True
+        cursor = conn.cursor()
+        for table in ('bills', 'bill_items', 'expenses', 'customers', 'expense_categories'):
+            cursor.execute(f'VACUUM ANALYZE {table}')
+        conn.autocommit = False
+        print(f"  seeded in {time.perf_counter() - started:.1f}s\n")
+
+        queries = endpoint_queries(date.today())
+        results = {}
+
+        # Before: legacy predicates on the plain (user_id, date) indexes. The
+        # index swap runs in a transaction that is rolled back afterwards.
+        cursor = conn.cursor()
+        cursor.execute('DROP INDEX idx_bills_user_date_id_covering')
+        cursor.execute('DROP INDEX idx_expenses_user_date_covering')
+        cursor.execute('CREATE INDEX idx_bills_user_date ON bills(user_id, bill_date)')
+        cursor.execute('CREATE INDEX idx_expenses_user_date ON expenses(user_id, expense_date)')
+        cursor.execute('ANALYZE bills')
+        cursor.execute('ANALYZE expenses')
+        for endpoint, legacy_sql, legacy_params, _, _ in queries:
+            results[endpoint] = [measure(cursor, legacy_sql, legacy_params, runs)]
+        conn.rollback()
+
+        cursor = conn.cursor()
+        for endpoint, _, _, new_sql, new_params in queries:
+            results[endpoint].append(measure(cursor, new_sql, new_params, runs))
+        conn.rollback()
+
+        print(f"{'endpoint':42} {'before ms':>10} {'after ms':>10} {'speedup':>8}")
+        for endpoint, ((before_ms, before_scans), (after_ms, after_scans)) in results.items():
+            print(f"{endpoint:42} {before_ms:10.2f} {after_ms:10.2f} {before_ms / after_ms:7.1f}x")
+            print(f"    before: {', '.join(before_scans)}")
+            print(f"    after:  {', '.join(after_scans)}")
+    finally:
+        conn.rollback()
+        conn.autocommit = True
+        conn.cursor().execute(f'DROP SCHEMA {schema} CASCADE')
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""
+Benchmark bill exports on a shop with a large bill history.
+
+Builds a throwaway schema (base schema + migrations), seeds one shop with
+1M bills by default, then exports them three ways and reports the time and
+the peak Python memory (tracemalloc) of each:
+
+  legacy  fetchall() into a StringIO CSV, as the old download views did
+  csv     api.export_service: COPY ... TO STDOUT streamed in chunks
+  xlsx    api.export_service: named cursor into a streamed .xlsx
+
+Usage:
+    python benchmarks/bench_exports.py [bills]
+"""
+import os
+import sys
+import csv
+import time
+import uuid
+import tracemalloc
+from io import StringIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+SCHEMA = f'bench_exports_{uuid.uuid4().hex[:8]}'
+# Pooled connections opened by the export service land in the bench schema.
+os.environ['PGOPTIONS'] = f'-c search_path={SCHEMA}'
+
+from api.export_service import build_export_filters, export_sql, export_response  # noqa: E402
+from db.connection import create_connection, get_db_connection  # noqa: E402
+from db.init import apply_schema_file  # noqa: E402
+from db.migrate import run_migrations  # noqa: E402
+
+SHOP = 1
+
+SEED_SQL = '''
+    INSERT INTO users (user_id, email, shop_name, password_hash) VALUES (%(shop)s, 'export@tajir.local', 'Export', 'x');
+
+    INSERT INTO bills (user_id, customer_name, customer_phone, bill_number, bill_date, delivery_date,
+                       subtotal, vat_amount, total_amount, advance_paid, balance_amount, status, payment_method)
+    SELECT %(shop)s, 'Customer ' || (n %% 5000), '5' || lpad((n %% 5000)::text, 8, '0'), 'BILL-' || n,
+           CURRENT_DATE - (n %% 1460), CURRENT_DATE - (n %% 1460) + 7,
+           (n %% 200) + 10, ((n %% 200) + 10) * 0.05, ((n %% 200) + 10) * 1.05, 0, ((n %% 200) + 10) * 1.05,
+           CASE WHEN n %% 7 = 0 THEN 'Pending' ELSE 'Paid' END, 'Cash'
+    FROM generate_series(1, %(bills)s) n;
+'''
+
+
+def measure(fn):
+    tracemalloc.start()
+    started = time.perf_counter()
+    size = fn()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, size
+
+
+def main():
+    bills = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    conn = create_connection()
+    cursor = conn.cursor()
+    cursor.execute(f'CREATE SCHEMA {SCHEMA}')
+    cursor.execute(f'SET search_path TO {SCHEMA}')
+    conn.commit()
+    try:
+        apply_schema_file(conn)
+        run_migrations(conn)
+        print(f"Seeding shop {SHOP} with {bills:,} bills...")
+        cursor = conn.cursor()
+        cursor.execute(SEED_SQL, {'shop': SHOP, 'bills': bills})
+        conn.commit()
+        conn.autocommit = True
+        conn.cursor().execute('VACUUM ANALYZE bills')
+        conn.autocommit = False
+
+        where_clause, params = build_export_filters('bills', SHOP)
+
+        def legacy():
+            db = get_db_connection()
+            cursor = db.cursor()
+            cursor.execute(export_sql('bills', where_clause), params)
+            rows = cursor.fetchall()
+            db.close()
+            output = StringIO()
+            writer = csv.writer(output)
+            writer.writerow(rows[0].keys())
+            for row in rows:
+                writer.writerow(row.values())
+            return len(output.getvalue().encode('utf-8'))
+
+        def streamed(fmt):
+            def run():
+                response = export_response('bills', fmt, where_clause, params, 'bills')
+                size = sum(len(chunk) for chunk in response.response)
+                response.close()
+                return size
+            return run
+
+        print(f"{'export':8} {'seconds':>10} {'peak MB':>10} {'output MB':>10}")
+        for label, fn in (('legacy', legacy), ('csv', streamed('csv')), ('xlsx', streamed('xlsx'))):
+            elapsed, peak, size = measure(fn)
+            print(f"{label:8} {elapsed:10.2f} {peak / 2**20:10.1f} {size / 2**20:10.1f}")
+    finally:
+        conn.rollback()
+        conn.autocommit = True
+        conn.cursor().execute(f'DROP SCHEMA {SCHEMA} CASCADE')
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
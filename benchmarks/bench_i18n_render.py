@@ -0,0 +1,102 @@
+"""
+Benchmark template rendering with the compiled translation catalogs.
+
+Captures the render context of /app and of a printed bill, then renders
+app.html and print_bill.html repeatedly with two translators:
+
+  before  the old translate_text, which rebuilt the whole catalog as a dict
+          literal on every call (regenerated here from translations/*.json)
+  after   api.i18n.translate_text, one lookup in a pre-compiled catalog
+
+and prints the mean render time for each, plus the cost of one lookup.
+
+Usage:
+    python benchmarks/bench_i18n_render.py [user_id] [bill_id] [runs]
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+import flask  # noqa: E402
+from api import i18n  # noqa: E402
+from app import create_app  # noqa: E402
+
+
+def legacy_translator():
+    """Rebuild the pre-catalog translate_text: the full dict literal evaluated per call."""
+    i18n.load_catalogs()
+    body = ',\n'.join(
+        f'{language!r}: {{' + ', '.join(f'{k!r}: {v!r}' for k, v in catalog.items()) + ", 'default': text}"
+        for language, catalog in i18n._sources.items()
+    )
+    namespace = {}
+    exec(f'def translate_text(text, language="en"):\n'
+         f'    translations = {{{body}}}\n'
+         f'    return translations.get(language, {{}}).get(text, text)\n', namespace)
+    translate_text = namespace['translate_text']
+
+    def get_translated_text(text, language=None):
+        return translate_text(text, language or i18n.get_user_language())
+    return translate_text, get_translated_text
+
+
+def capture_render(app, client, url):
+    """Request `url` and return (template, context) instead of the rendered page."""
+    captured = {}
+    original = flask.render_template
+
+    def capture(template, **context):
+        captured['template'], captured['context'] = template, context
+        return original(template, **context)
+
+    for module in ('api.pages', 'api.reports'):
+        setattr(sys.modules[module], 'render_template', capture)
+    try:
+        response = client.get(url)
+    finally:
+        for module in ('api.pages', 'api.reports'):
+            setattr(sys.modules[module], 'render_template', original)
+    if 'template' not in captured:
+        raise SystemExit(f'{url} did not render a template (status {response.status_code})')
+    return captured['template'], captured['context']
+
+
+def main():
+    user_id = int(sys.argv[1]) if len(sys.argv) > 1 else 2
+    bill_id = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    runs = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+    app = create_app()
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = user_id
+        sess['language'] = 'ar'
+
+    pages = [capture_render(app, client, '/app')]
+    if bill_id:
+        pages.append(capture_render(app, client, f'/api/bills/{bill_id}/print'))
+
+    legacy_translate, legacy_get = legacy_translator()
+    print(f"one lookup: before {timeit.timeit(lambda: legacy_translate('dashboard', 'ar'), number=10000) * 100:.2f} us, "
+          f"after {timeit.timeit(lambda: i18n.translate_text('dashboard', 'ar'), number=10000) * 100:.2f} us\n")
+
+    print(f"{'template':20} {'before ms':>10} {'after ms':>10}")
+    for template, context in pages:
+        with app.test_request_context():
+            flask.session['user_id'] = user_id
+            flask.session['language'] = 'ar'
+            timings = []
+            for translator in (legacy_get, i18n.get_translated_text):
+                ctx = dict(context, get_translated_text=translator)
+                app.jinja_env.globals['get_translated_text'] = translator
+                flask.render_template(template, **ctx)  # compile and cache the template
+                timings.append(timeit.timeit(lambda: flask.render_template(template, **ctx), number=runs) / runs * 1000)
+        print(f"{template:20} {timings[0]:10.2f} {timings[1]:10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+Benchmark batch invoice rendering.
+
+Builds a throwaway schema (base schema + migrations), seeds one shop with a
+month of bills, then runs api.invoice_batch_service.run_batch over them for
+each output format and prints invoices per minute:
+
+  html   fetch + template rendering only (the part that runs in the web worker)
+  zip    one PDF per bill, converted by the renderer process pool
+  pdf    the same, merged into one document
+
+Usage:
+    python benchmarks/bench_invoice_batch.py [bills] [formats]
+    python benchmarks/bench_invoice_batch.py 500 html,zip
+"""
+import os
+import sys
+import time
+import uuid
+import logging
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from api import jobs, pdf_renderer  # noqa: E402
+from api.invoice_batch_service import run_batch  # noqa: E402
+from db.connection import create_connection, get_pool  # noqa: E402
+from db.init import apply_schema_file  # noqa: E402
+from db.migrate import run_migrations  # noqa: E402
+
+SHOP = 1
+
+SEED_SQL = '''
+    INSERT INTO users (user_id, email, shop_name, password_hash)
+    VALUES (%(shop)s, 'shop@tajir.local', 'Bench Shop', 'x');
+
+    INSERT INTO shop_settings (user_id, shop_name, trn, address, shop_mobile)
+    VALUES (%(shop)s, 'Bench Shop', '100234567890003', 'Karama, Dubai', '+971500000000');
+
+    INSERT INTO customers (user_id, name, phone, city, area)
+    SELECT %(shop)s, 'Customer ' || c, '5' || lpad(c::text, 8, '0'), 'Dubai', 'Karama'
+    FROM generate_series(1, 200) c;
+
+    INSERT INTO bills (user_id, customer_id, customer_name, customer_phone, bill_number, bill_date,
+                       subtotal, vat_amount, total_amount, advance_paid, balance_amount, status, notes)
+    SELECT %(shop)s, c.customer_id, c.name, c.phone, 'BILL-' || n, CURRENT_DATE - (n %% 30),
+           (n %% 200) + 10, ((n %% 200) + 10) * 0.05, ((n %% 200) + 10) * 1.05, 0, ((n %% 200) + 10) * 1.05,
+           'Pending', 'Deliver after 5pm'
+    FROM generate_series(1, %(bills)s) n
+    JOIN customers c ON c.user_id = %(shop)s AND c.phone = '5' || lpad((n %% 200 + 1)::text, 8, '0');
+
+    INSERT INTO bill_items (user_id, bill_id, product_name, quantity, rate, discount, total_amount)
+    SELECT user_id, bill_id, 'Product ' || i, i, subtotal / 3, 0, subtotal / 3
+    FROM bills, generate_series(1, 3) i;
+'''
+
+
+def main():
+    bills = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    formats = sys.argv[2].split(',') if len(sys.argv) > 2 else ['html', 'zip', 'pdf']
+    conn = create_connection()
+    schema = f'bench_batch_{uuid.uuid4().hex[:8]}'
+    cursor = conn.cursor()
+    cursor.execute(f'CREATE SCHEMA {schema}')
+    cursor.execute(f'SET search_path TO {schema}')
+    conn.commit()
+    # Pooled connections opened by the app use the bench schema too.
+    os.environ['PGOPTIONS'] = f'-c search_path={schema}'
+    try:
+        apply_schema_file(conn)
+        run_migrations(conn)
+        cursor = conn.cursor()
+        cursor.execute(SEED_SQL, {'shop': SHOP, 'bills': bills})
+        cursor.execute('SELECT bill_id FROM bills ORDER BY bill_date, bill_id')
+        bill_ids = [row['bill_id'] for row in cursor.fetchall()]
+        conn.commit()
+
+        from app import create_app
+        logging.disable(logging.WARNING)
+        app = create_app()
+        jobs.JOBS_DIR = tempfile.mkdtemp(prefix='bench-batch-')
+        print(f"{len(bill_ids):,} bills, renderer {pdf_renderer.PDF_RENDERER or 'none'}, "
+              f"{pdf_renderer.PDF_WORKERS} renderer process(es)\n")
+        if pdf_renderer.PDF_RENDERER:
+            # Start the renderer processes before timing.
+            list(pdf_renderer.get_pool().map(pdf_renderer.html_to_pdf, ['<html><body>warm</body></html>'] * pdf_renderer.PDF_WORKERS))
+
+        print(f"{'format':8} {'seconds':>10} {'invoices/min':>14} {'MB':>8}")
+        with app.app_context():
+            for fmt in formats:
+                if fmt != 'html' and not pdf_renderer.PDF_RENDERER:
+                    print(f"{fmt:8} skipped: no PDF renderer installed")
+                    continue
+                job_id = jobs.create_job(SHOP, 'invoice-batch', {'format': fmt}, total=len(bill_ids))
+                started = time.perf_counter()
+                run_batch(job_id, SHOP, bill_ids, 'invoice', fmt)
+                elapsed = time.perf_counter() - started
+                size = jobs.get_job(job_id, SHOP)['result']['size'] / 1e6
+                print(f"{fmt:8} {elapsed:10.1f} {len(bill_ids) / elapsed * 60:14.0f} {size:8.1f}")
+    finally:
+        get_pool().closeall()
+        conn.rollback()
+        conn.autocommit = True
+        conn.cursor().execute(f'DROP SCHEMA {schema} CASCADE')
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
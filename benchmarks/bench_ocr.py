@@ -0,0 +1,139 @@
+"""
+Benchmark receipt OCR: the old sequential passes against api.ocr_engine.
+
+The corpus is a directory of receipt photos. Without one, a synthetic corpus
+is generated (and kept) in benchmarks/ocr_corpus/: itemized laundry and
+tailoring receipts rendered with PIL, slightly rotated, blurred and noisy
+like phone photos. Each image is preprocessed the way api/ocr.py does, then
+recognized:
+
+  before  the old extract_text_from_image loop: four image_to_data passes
+          (--psm 6, 3, 8, 13) one after another on the in-memory image,
+          plus image_to_string when none produced confident text
+  after   OcrEngine with OCR_WORKERS workers (default 4), the confidence
+          threshold from OCR_CONFIDENCE_THRESHOLD (default 80), warmed on
+          the corpus once so its configuration order has been learnt
+
+Prints median and p95 seconds per receipt for both, the speedup, how often
+the engine exited early, and how often both returned the same text.
+Needs the tesseract binary.
+
+Usage:
+    python benchmarks/bench_ocr.py [corpus_dir] [receipts]
+"""
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytesseract  # noqa: E402
+from PIL import Image, ImageDraw, ImageFilter, ImageFont  # noqa: E402
+
+from api.ocr import preprocess_image, OPENCV_AVAILABLE, cv2  # noqa: E402
+from api.ocr_engine import OcrEngine, score  # noqa: E402
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ocr_corpus')
+ITEMS = ['Shirt', 'Trouser', 'Abaya', 'Kandura', 'Suit 2pc', 'Blanket', 'Curtain', 'Jacket', 'Saree', 'Thobe']
+SERVICES = ['Wash & Press', 'Dry Clean', 'Press Only', 'Alteration', 'Stitching']
+
+
+def make_receipt(rng, path):
+    font = ImageFont.load_default(size=rng.choice([22, 26, 30]))
+    lines = [rng.choice(['AL NOOR TAILORING', 'QUICK WASH LAUNDRY', 'STAR DRY CLEANERS']),
+             f'Bill No: {rng.randint(1000, 99999)}   Date: {rng.randint(1, 28):02d}/0{rng.randint(1, 9)}/2026',
+             '-' * 32]
+    total = 0
+    for _ in range(rng.randint(4, 12)):
+        qty, rate = rng.randint(1, 5), rng.choice([3, 5, 8, 12, 15, 25, 40])
+        total += qty * rate
+        lines.append(f'{rng.choice(ITEMS)} {rng.choice(SERVICES)}  {qty} x {rate:.2f}  {qty * rate:.2f}')
+    lines += ['-' * 32, f'Subtotal AED {total:.2f}', f'VAT 5% AED {total * 0.05:.2f}',
+              f'TOTAL AED {total * 1.05:.2f}', 'Thank you for your visit']
+    height = 60 + 40 * len(lines)
+    image = Image.new('L', (900, height), 235 + rng.randint(0, 20))
+    draw = ImageDraw.Draw(image)
+    for i, line in enumerate(lines):
+        draw.text((40, 30 + 40 * i), line, fill=rng.randint(0, 60), font=font)
+    image = image.rotate(rng.uniform(-2.5, 2.5), expand=True, fillcolor=240)
+    image = image.filter(ImageFilter.GaussianBlur(rng.uniform(0.3, 1.0)))
+    noise = Image.effect_noise(image.size, rng.uniform(8, 20))
+    image = Image.blend(image, noise, 0.12)
+    image.convert('RGB').save(path, quality=80)
+
+
+def corpus(directory, count):
+    if not os.path.isdir(directory) or not os.listdir(directory):
+        os.makedirs(directory, exist_ok=True)
+        rng = random.Random(7)
+        for i in range(count):
+            make_receipt(rng, os.path.join(directory, f'receipt_{i:03d}.jpg'))
+    names = sorted(n for n in os.listdir(directory) if n.lower().endswith(('.png', '.jpg', '.jpeg', '.tiff', '.bmp')))
+    return [os.path.join(directory, name) for name in names[:count]]
+
+
+def load(path):
+    if OPENCV_AVAILABLE:
+        return preprocess_image(cv2.imread(path))
+    return Image.open(path)
+
+
+def sequential(image):
+    best_text, best_confidence = '', 0
+    for config in ['--oem 3 --psm 6', '--oem 3 --psm 3', '--oem 3 --psm 8', '--oem 3 --psm 13']:
+        data = pytesseract.image_to_data(image, config=config, output_type=pytesseract.Output.DICT)
+        text, confidence = score(data)
+        if confidence > best_confidence and text.strip():
+            best_text, best_confidence = text, confidence
+    if not best_text.strip():
+        best_text = pytesseract.image_to_string(image)
+    return best_text.strip()
+
+
+def summary(times):
+    times = sorted(times)
+    return statistics.median(times), times[max(int(len(times) * 0.95) - 1, 0)]
+
+
+def main():
+    directory = sys.argv[1] if len(sys.argv) > 1 else CORPUS_DIR
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    try:
+        version = pytesseract.get_tesseract_version()
+    except Exception as e:
+        sys.exit(f'tesseract is not available: {e}')
+    images = [load(path) for path in corpus(directory, count)]
+    engine = OcrEngine(
+        workers=int(os.getenv('OCR_WORKERS', 4)),
+        confidence_threshold=float(os.getenv('OCR_CONFIDENCE_THRESHOLD', 80)),
+    )
+    for image in images:
+        engine.recognize(image)
+    warm = engine.metrics()
+
+    before, after, same = [], [], 0
+    for image in images:
+        started = time.perf_counter()
+        old_text = sequential(image)
+        before.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        new_text, _ = engine.recognize(image)
+        after.append(time.perf_counter() - started)
+        same += old_text == new_text
+
+    metrics = engine.metrics()
+    before_median, before_p95 = summary(before)
+    after_median, after_p95 = summary(after)
+    print(f"{len(images)} receipts from {directory}, tesseract {version}, {engine.workers} workers, "
+          f"{os.cpu_count()} CPUs\n")
+    print(f"before (sequential passes): median {before_median:.2f} s, p95 {before_p95:.2f} s")
+    print(f"after  (ocr_engine):        median {after_median:.2f} s, p95 {after_p95:.2f} s")
+    print(f"speedup: {before_median / after_median:.1f}x median, {sum(before) / sum(after):.1f}x total")
+    print(f"early exits: {metrics['early_exits'] - warm['early_exits']}/{len(images)}, "
+          f"wins: {metrics['wins']}, same text as before: {same}/{len(images)}")
+
+
+if __name__ == '__main__':
+    main()
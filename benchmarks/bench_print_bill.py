@@ -0,0 +1,146 @@
+"""
+Benchmark printing bills for a shop with a long history.
+
+Builds a throwaway schema (base schema + migrations), seeds one shop with
+~500k bills, fills the daily_shop_sales rollup, then prints 1,000 of its
+bills through GET /api/bills/<id>/print:
+
+  before  the print view followed by get_invoice_summary_data() for the
+          bill's date, which the view used to run on every print
+  after   the print view alone; the summary is loaded by the page from
+          /api/invoice-summary only when printed with ?summary=1
+
+and prints throughput and queries per print for each. Every bill has its own
+QR payload, so the QR cache does not help either run.
+
+Usage:
+    python benchmarks/bench_print_bill.py [bills] [prints]
+"""
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+import logging  # noqa: E402
+from api import reports, utils  # noqa: E402
+from db.connection import create_connection, get_pool  # noqa: E402
+from db.init import apply_schema_file  # noqa: E402
+from db.migrate import run_migrations  # noqa: E402
+from db.sales_rollup import rebuild  # noqa: E402
+
+SHOP = 1
+DAYS = 4 * 365
+
+SEED_SQL = '''
+    INSERT INTO users (user_id, email, shop_name, password_hash)
+    VALUES (%(shop)s, 'shop@tajir.local', 'Bench Shop', 'x');
+
+    INSERT INTO shop_settings (user_id, shop_name, trn) VALUES (%(shop)s, 'Bench Shop', '100234567890003');
+
+    INSERT INTO customers (user_id, name, phone)
+    SELECT %(shop)s, 'Customer ' || c, '5' || lpad(c::text, 8, '0') FROM generate_series(1, 5000) c;
+
+    INSERT INTO bills (user_id, customer_id, customer_name, customer_phone, bill_number, bill_date,
+                       subtotal, vat_amount, total_amount, advance_paid, balance_amount, status)
+    SELECT %(shop)s, c.customer_id, c.name, c.phone, 'BILL-' || n, CURRENT_DATE - (n %% %(days)s),
+           (n %% 200) + 10, ((n %% 200) + 10) * 0.05, ((n %% 200) + 10) * 1.05, 0, ((n %% 200) + 10) * 1.05,
+           CASE WHEN n %% 7 = 0 THEN 'Pending' ELSE 'Paid' END
+    FROM generate_series(1, %(bills)s) n
+    JOIN customers c ON c.user_id = %(shop)s AND c.phone = '5' || lpad((n %% 5000 + 1)::text, 8, '0')
+    ORDER BY CURRENT_DATE - (n %% %(days)s);
+
+    INSERT INTO bill_items (user_id, bill_id, product_name, quantity, rate, discount, total_amount)
+    SELECT user_id, bill_id, 'Product ' || ((bill_id + i) %% 60), i, subtotal / 2, 0, subtotal / 2
+    FROM bills, generate_series(1, 2) i
+    ORDER BY bill_id;
+'''
+
+
+class QueryCounter:
+    """Wrap execute_query in the modules the print path uses and count calls."""
+
+    def __init__(self):
+        self.count = 0
+        self._original = reports.execute_query
+
+    def __call__(self, *args, **kwargs):
+        self.count += 1
+        return self._original(*args, **kwargs)
+
+    def install(self):
+        reports.execute_query = utils.execute_query = self
+
+
+def main():
+    bills = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    prints = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    conn = create_connection()
+    schema = f'bench_print_{uuid.uuid4().hex[:8]}'
+    cursor = conn.cursor()
+    cursor.execute(f'CREATE SCHEMA {schema}')
+    cursor.execute(f'SET search_path TO {schema}')
+    conn.commit()
+    # Pooled connections opened by the app use the bench schema too.
+    os.environ['PGOPTIONS'] = f'-c search_path={schema}'
+    try:
+        apply_schema_file(conn)
+        run_migrations(conn)
+        print(f"Seeding shop {SHOP} with {bills:,} bills over {DAYS} days...")
+        started = time.perf_counter()
+        cursor = conn.cursor()
+        cursor.execute(SEED_SQL, {'shop': SHOP, 'bills': bills, 'days': DAYS})
+        conn.commit()
+        rebuild(conn)
+        conn.autocommit = True
+        cursor = conn.cursor()
+        for table in ('bills', 'bill_items', 'customers', 'shop_settings', 'daily_shop_sales'):
+            cursor.execute(f'VACUUM ANALYZE {table}')
+        cursor.execute('SELECT bill_id, bill_date FROM bills WHERE user_id = %s ORDER BY random() LIMIT %s',
+                       (SHOP, 2 * prints))
+        sample = cursor.fetchall()
+        conn.autocommit = False
+        print(f"  seeded in {time.perf_counter() - started:.1f}s\n")
+
+        from app import create_app
+        logging.disable(logging.INFO)
+        app = create_app()
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['user_id'] = SHOP
+        counter = QueryCounter()
+        counter.install()
+
+        def before(bill):
+            response = client.get(f"/api/bills/{bill['bill_id']}/print")
+            with app.app_context():
+                reports.get_invoice_summary_data(SHOP, bill['bill_date'])
+            return response
+
+        def after(bill):
+            return client.get(f"/api/bills/{bill['bill_id']}/print")
+
+        print(f"{'print_bill':10} {'bills/s':>10} {'ms/bill':>10} {'queries':>10}")
+        for label, fn, batch in (('before', before, sample[:prints]), ('after', after, sample[prints:])):
+            fn(batch[0])  # warm the pool and templates
+            counter.count = 0
+            started = time.perf_counter()
+            for bill in batch:
+                assert fn(bill).status_code == 200
+            elapsed = time.perf_counter() - started
+            print(f"{label:10} {len(batch) / elapsed:10.1f} {elapsed / len(batch) * 1000:10.2f} "
+                  f"{counter.count / len(batch):10.1f}")
+    finally:
+        get_pool().closeall()
+        conn.rollback()
+        conn.autocommit = True
+        conn.cursor().execute(f'DROP SCHEMA {schema} CASCADE')
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
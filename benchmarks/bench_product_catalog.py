@@ -0,0 +1,139 @@
+"""
+Benchmark product lookups: barcode scans, name search and the full list.
+
+Builds a throwaway schema (base schema + migrations), seeds one shop's
+catalog, then times each lookup two ways and prints median and p95 latency:
+
+  before  the old /api/products queries (products JOIN product_types, with
+          LIKE '%q%' for search), one round trip per request
+  after   api.product_catalog.CatalogCache in steady state (within the
+          version check interval), plus the cost of a version check and of
+          a full reload after a write
+
+Usage:
+    python benchmarks/bench_product_catalog.py [products] [runs]
+"""
+import os
+import sys
+import time
+import uuid
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from api.product_catalog import CatalogCache  # noqa: E402
+from db.connection import create_connection  # noqa: E402
+from db.init import apply_schema_file  # noqa: E402
+from db.migrate import run_migrations  # noqa: E402
+
+SHOP = 1
+
+SEED_SQL = '''
+    INSERT INTO users (user_id, email, shop_name, password_hash) VALUES (1, 'shop1@tajir.local', 'Shop 1', 'x');
+
+    INSERT INTO product_types (user_id, type_name)
+    SELECT 1, 'Type ' || t FROM generate_series(1, 20) t;
+
+    INSERT INTO products (user_id, type_id, product_name, rate, barcode)
+    SELECT 1, pt.type_id, (ARRAY['Shirt', 'Trouser', 'Abaya', 'Kandura', 'Suit', 'Blanket', 'Curtain', 'Jacket'])[1 + p %% 8] || ' ' || p,
+           5 + p %% 50, '6291' || lpad(p::text, 8, '0')
+    FROM generate_series(1, %(products)s) p
+    JOIN product_types pt ON pt.user_id = 1 AND pt.type_name = 'Type ' || (1 + p %% 20);
+'''
+
+OLD_LIST_SQL = '''
+    SELECT p.*, pt.type_name
+    FROM products p
+    JOIN product_types pt ON p.type_id = pt.type_id
+    WHERE p.user_id = %s AND pt.user_id = %s AND p.is_active = TRUE {where}
+    ORDER BY pt.type_name, p.product_name
+'''
+
+
+class Borrowed:
+    """The benchmark's connection, handed to the cache without letting it close it."""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def close(self):
+        pass
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def timed(fn, runs):
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = fn()
+        times.append((time.perf_counter() - started) * 1000)
+    times.sort()
+    return statistics.median(times), times[int(len(times) * 0.95) - 1], result
+
+
+def old_query(conn, where='', params=()):
+    cursor = conn.cursor()
+    cursor.execute(OLD_LIST_SQL.format(where=where), (SHOP, SHOP) + params)
+    return [dict(row) for row in cursor.fetchall()]
+
+
+def main():
+    products = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    conn = create_connection()
+    schema = f'bench_catalog_{uuid.uuid4().hex[:8]}'
+    cursor = conn.cursor()
+    cursor.execute(f'CREATE SCHEMA {schema}')
+    cursor.execute(f'SET search_path TO {schema}')
+    conn.commit()
+    try:
+        apply_schema_file(conn)
+        run_migrations(conn)
+        cursor = conn.cursor()
+        cursor.execute(SEED_SQL, {'products': products})
+        cursor.execute('ANALYZE products')
+        conn.commit()
+
+        steady = CatalogCache(check_interval=3600)
+        steady.get(SHOP, connect=lambda: Borrowed(conn))
+        conn.rollback()
+        barcode = f'6291{products // 2:08d}'
+        cases = [
+            ('barcode scan', lambda: old_query(conn, 'AND p.barcode = %s', (barcode,)),
+             lambda: steady.get(SHOP).find_barcode(barcode)),
+            ("search 'kan'", lambda: old_query(conn, 'AND (p.product_name LIKE %s OR pt.type_name LIKE %s)', ('%kan%', '%kan%')),
+             lambda: steady.get(SHOP).search('kan')),
+            ("search 'suit 1'", lambda: old_query(conn, 'AND (p.product_name LIKE %s OR pt.type_name LIKE %s)', ('%Suit 1%', '%Suit 1%')),
+             lambda: steady.get(SHOP).search('suit 1')),
+            ('full list', lambda: old_query(conn), lambda: steady.get(SHOP).products),
+        ]
+        print(f"{products:,} products in the shop, {runs} runs each\n")
+        print(f"{'lookup':16} {'before ms':>10} {'p95':>8} {'rows':>6}   {'after ms':>9} {'p95':>8} {'rows':>6}")
+        for name, before_fn, after_fn in cases:
+            before, before_p95, old_rows = timed(before_fn, runs)
+            conn.rollback()
+            after, after_p95, new_rows = timed(after_fn, runs)
+            print(f"{name:16} {before:10.3f} {before_p95:8.3f} {len(old_rows):6}   {after:9.4f} {after_p95:8.4f} {len(new_rows):6}")
+
+        checking = CatalogCache(check_interval=0)
+        checking.get(SHOP, connect=lambda: Borrowed(conn))
+        check, check_p95, _ = timed(lambda: checking.get(SHOP, connect=lambda: Borrowed(conn)), runs)
+        conn.rollback()
+        reload_ms, reload_p95, _ = timed(lambda: CatalogCache().get(SHOP, connect=lambda: Borrowed(conn)), max(runs // 10, 5))
+        conn.rollback()
+        print(f"\nversion check (once per PRODUCT_CATALOG_CHECK_INTERVAL per shop): {check:.3f} ms (p95 {check_p95:.3f})")
+        print(f"full reload after a write: {reload_ms:.1f} ms (p95 {reload_p95:.1f})")
+    finally:
+        conn.rollback()
+        conn.autocommit = True
+        conn.cursor().execute(f'DROP SCHEMA {schema} CASCADE')
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
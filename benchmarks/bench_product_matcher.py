@@ -0,0 +1,117 @@
+"""
+Benchmark the catalog duplicate check's fuzzy matching.
+
+Generates a shop with 5,000 products and a scanned catalog of 2,000 items
+(about a third of them near-duplicates of existing products: typos, case,
+extra words) and matches every catalog item against the shop:
+
+  before  the old find_similar_products loop: SequenceMatcher.ratio()
+          against every product (timed on a sample and extrapolated; the
+          old code also re-read all products from the database per item)
+  after   api.product_matcher.ProductMatcher: one index build, then
+          trigram blocking and difflib on the shortlist
+
+Recall is the share of the brute-force matches (over the sample) that the
+index also returns.
+
+Usage:
+    python benchmarks/bench_product_matcher.py [products] [catalog_items] [sample]
+"""
+import os
+import random
+import sys
+import time
+from difflib import SequenceMatcher
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.product_matcher import ProductMatcher  # noqa: E402
+
+GARMENTS = ['Shirt', 'Trouser', 'Abaya', 'Kandura', 'Suit', 'Blanket', 'Curtain', 'Jacket', 'Saree', 'Kurti',
+            'Blazer', 'Dress', 'Gown', 'Coat', 'Sherwani', 'Lehenga', 'Thobe', 'Shayla', 'Kaftan', 'Duvet',
+            'Jeans', 'Skirt', 'Sweater', 'Hoodie', 'Tie', 'Scarf', 'Pillow Cover', 'Bedsheet', 'Towel', 'Carpet']
+SERVICES = ['Dry Clean', 'Wash & Press', 'Press Only', 'Steam Iron', 'Stain Removal', 'Alteration', 'Express Wash']
+DETAILS = ['Silk', 'Cotton', 'Wool', 'Linen', 'Kids', 'Ladies', 'Gents', 'Heavy', 'Embroidered', 'Double', 'King', 'XL']
+COLOURS = ['White', 'Black', 'Navy', 'Beige', 'Maroon', 'Olive', 'Grey', 'Cream', 'Teal', 'Mustard', 'Rose', 'Khaki']
+SYLLABLES = ['al', 'ba', 'ka', 'mi', 'ra', 'zo', 'ne', 'ti', 'sha', 'ro', 'lu', 'vi', 'da', 'mo', 'qa', 'fe']
+
+
+def product_names(rng, count):
+    """Distinct names shaped like real price lists: a brand or line, a garment, often a detail, colour or service."""
+    brands = sorted({''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))).title() for _ in range(400)})
+    names = set()
+    while len(names) < count:
+        parts = [rng.choice(brands), rng.choice(GARMENTS)]
+        if rng.random() < 0.6:
+            parts.insert(1, rng.choice(DETAILS))
+        if rng.random() < 0.5:
+            parts.append(rng.choice(COLOURS))
+        if rng.random() < 0.5:
+            parts.append(rng.choice(SERVICES))
+        names.add(' '.join(parts))
+    return sorted(names)
+
+
+def near_duplicate(rng, name):
+    change = rng.choice(['typo', 'case', 'drop', 'swap'])
+    if change == 'typo':
+        i = rng.randrange(len(name))
+        return name[:i] + rng.choice('aeiourstn') + name[i + 1:]
+    if change == 'case':
+        return name.upper()
+    words = name.split()
+    if change == 'drop' and len(words) > 3:
+        words.pop(0)
+    elif len(words) > 1:
+        i = rng.randrange(len(words) - 1)
+        words[i], words[i + 1] = words[i + 1], words[i]
+    return ' '.join(words)
+
+
+def brute_force(products, product_name, threshold=0.8):
+    similar = []
+    for product in products:
+        similarity = SequenceMatcher(None, product_name.lower(), product['product_name'].lower()).ratio()
+        if similarity >= threshold:
+            similar.append(product['product_id'])
+    return similar
+
+
+def main():
+    shop_size = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+    catalog_size = int(sys.argv[2]) if len(sys.argv) > 2 else 2_000
+    sample = int(sys.argv[3]) if len(sys.argv) > 3 else 50
+    rng = random.Random(42)
+    names = product_names(rng, shop_size + catalog_size)
+    rng.shuffle(names)
+    products = [{'product_id': i, 'product_name': name, 'rate': 10} for i, name in enumerate(names[:shop_size], 1)]
+    catalog = [
+        near_duplicate(rng, rng.choice(products)['product_name']) if rng.random() < 0.35 else name
+        for name in names[shop_size:]
+    ]
+
+    started = time.perf_counter()
+    matcher = ProductMatcher(products)
+    build = time.perf_counter() - started
+    started = time.perf_counter()
+    results = [matcher.find(name) for name in catalog]
+    after = time.perf_counter() - started
+
+    sampled = catalog[:sample]
+    started = time.perf_counter()
+    expected = [brute_force(products, name) for name in sampled]
+    before = (time.perf_counter() - started) / len(sampled) * len(catalog)
+
+    found = sum(len({p['product_id'] for p in results[i]} & set(ids)) for i, ids in enumerate(expected))
+    total = sum(len(ids) for ids in expected)
+    extra = sum(len({p['product_id'] for p in results[i]} - set(ids)) for i, ids in enumerate(expected))
+
+    print(f"{catalog_size:,} catalog items against {shop_size:,} products\n")
+    print(f"before (brute force, extrapolated from {len(sampled)} items): {before:8.2f} s")
+    print(f"after  (index build {build * 1000:.0f} ms + matching):        {build + after:8.2f} s")
+    print(f"matches: {sum(len(r) for r in results):,} for {sum(1 for r in results if r):,} items; "
+          f"recall on the sample {found}/{total}, extra {extra}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+import time
+
+import pytest
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Everything a shop can own, children before the tables they reference.
+SHOP_TABLES = (
+    'loyalty_transactions', 'customer_loyalty', 'loyalty_tiers', 'loyalty_config',
+    'bill_items', 'bills', 'bill_number_counters', 'daily_shop_sales', 'customers', 'employees',
+    'expenses', 'expense_categories', 'products', 'product_types', 'catalog_versions',
+    'job_items', 'jobs', 'shop_settings', 'user_plans', 'user_actions', 'error_logs', 'users',
+)
+
+
+@pytest.fixture
+def make_test_shop():
+    """Creates throwaway shops (skipping without PostgreSQL); everything they own is deleted afterwards."""
+    from db.connection import get_db_connection
+
+    user_ids = []
+
+    def make(shop_name='Test Shop'):
+        try:
+            conn = get_db_connection()
+        except Exception as e:
+            pytest.skip(f"PostgreSQL not available: {e}")
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT INTO users (email, shop_name, password_hash, is_active)
+            VALUES (%s, %s, 'x', TRUE)
+            RETURNING user_id
+        ''', (f'test-shop-{time.time_ns()}@tajir.local', shop_name))
+        user_ids.append(cursor.fetchone()['user_id'])
+        conn.commit()
+        conn.close()
+        return user_ids[-1]
+
+    yield make
+
+    if user_ids:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        for table in SHOP_TABLES:
+            cursor.execute(f'DELETE FROM {table} WHERE user_id = ANY(%s)', (user_ids,))
+        conn.commit()
+        conn.close()
+
+
+@pytest.fixture
+def test_shop(make_test_shop):
+    """The user_id of a throwaway shop."""
+    return make_test_shop()
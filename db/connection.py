@@ -1,11 +1,22 @@
 import os
 import re
+import logging
+import threading
 from datetime import datetime
 import psycopg2
 from psycopg2.extras import RealDictCursor
+from flask import g, has_app_context
+from db.pool import ConnectionPool, PooledConnection
 
+logger = logging.getLogger(__name__)
 
-def get_db_connection():
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def create_connection():
+    """Open a dedicated, unpooled connection (migrations, maintenance scripts)."""
     database_url = os.getenv('DATABASE_URL')
     pg_host = os.getenv('PGHOST') or os.getenv('POSTGRES_HOST')
 
@@ -28,6 +39,97 @@ def get_db_connection():
         return psycopg2.connect(**pg_config)
 
 
+def get_pool():
+    """Return the process-wide connection pool, creating it on first use.
+
+    The pool is rebuilt after a fork so gunicorn workers never share sockets
+    inherited from the master process.
+    """
+    global _pool, _pool_pid
+    pid = os.getpid()
+    if _pool is None or _pool_pid != pid:
+        with _pool_lock:
+            if _pool is None or _pool_pid != pid:
+                _pool = ConnectionPool(
+                    create_connection,
+                    min_size=int(os.getenv('DB_POOL_MIN_SIZE', 1)),
+                    max_size=int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+                    max_lifetime=float(os.getenv('DB_POOL_MAX_LIFETIME', 1800)),
+                    max_idle=float(os.getenv('DB_POOL_MAX_IDLE', 300)),
+                    timeout=float(os.getenv('DB_POOL_TIMEOUT', 10)),
+                    ping_interval=float(os.getenv('DB_POOL_PING_INTERVAL', 5)),
+                )
+                _pool_pid = pid
+    return _pool
+
+
+def get_pool_metrics():
+    return get_pool().metrics()
+
+
+class _RequestLease:
+    """The single pooled connection owned by the current app context."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.handles = 0
+
+    def release_handle(self, conn):
+        self.handles -= 1
+        if self.handles == 0 and not conn.closed:
+            # Match psycopg2's close(): uncommitted work is discarded once the
+            # last caller lets go, but the socket stays leased to the request.
+            try:
+                if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except Exception:
+                pass
+
+
+def get_db_connection():
+    """Return a connection handle.
+
+    Inside an app context every call shares one pooled connection which is
+    returned to the pool on teardown; elsewhere (init_db, scripts) each call
+    checks out its own connection and close() returns it.
+    """
+    if not has_app_context():
+        return get_own_connection()
+
+    pool = get_pool()
+
+    lease = g.get('_db_lease')
+    if lease is None or lease.conn.closed:
+        if lease is not None:
+            pool.putconn(lease.conn, discard=True)
+        lease = _RequestLease(pool.getconn())
+        g._db_lease = lease
+    lease.handles += 1
+    return PooledConnection(lease.conn, lease.release_handle)
+
+
+def get_own_connection():
+    """Check out a pooled connection that is not shared with the request.
+
+    Its commits and rollbacks never touch the request's transaction, so
+    audit and error logging can commit while the caller's work is still
+    open or already aborted. close() returns it to the pool.
+    """
+    pool = get_pool()
+    return PooledConnection(pool.getconn(), pool.putconn)
+
+
+def release_request_connection(exc=None):
+    lease = g.pop('_db_lease', None)
+    if lease is not None:
+        get_pool().putconn(lease.conn, discard=bool(lease.conn.closed))
+
+
+def init_app(app):
+    """Return the request-scoped connection to the pool on app teardown."""
+    app.teardown_appcontext(release_request_connection)
+
+
 def get_db_integrity_error():
     return psycopg2.IntegrityError
 
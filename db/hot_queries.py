@@ -0,0 +1,165 @@
+"""
+Registry of hot-path queries.
+
+Each entry mirrors a query a blueprint runs on a busy page (bill lists,
+dashboards, lookups). test_schema_indexes.py EXPLAINs every entry against a
+seeded database and fails if any of them falls back to a sequential scan on
+a large table, so a new query on a hot page should be registered here next
+to the index that serves it (see db/migrations).
+
+Parameters use psycopg2 named placeholders: user_id, bill_id, customer_id,
+bill_number, phone, barcode, from_date and to_date, plus q, prefix,
+contains, phone_prefix and limit for customer search. Date ranges are
+half-open (from_date inclusive, to_date exclusive), as built by
+api.utils.date_range_filter.
+"""
+from api.customer_search import search_sql
+
+# Tables big enough per tenant that a sequential scan is a regression.
+# Small per-shop lookup tables (product_types, shop_settings, ...) are not
+# listed: the planner is right to scan them.
+INDEXED_TABLES = (
+    'bills',
+    'bill_items',
+    'customers',
+    'expenses',
+    'loyalty_transactions',
+    'customer_loyalty',
+    'products',
+    'daily_shop_sales',
+)
+
+HOT_QUERIES = {
+    # api/bills.py
+    'bills_list': '''
+        SELECT b.*, c.name as customer_name
+        FROM bills b
+        LEFT JOIN customers c ON b.customer_id = c.customer_id AND c.user_id = b.user_id
+        WHERE b.user_id = %(user_id)s
+        ORDER BY b.bill_date DESC, b.bill_id DESC
+    ''',
+    'bill_by_number': '''
+        SELECT * FROM bills WHERE bill_number = %(bill_number)s AND user_id = %(user_id)s
+    ''',
+    'bill_items': '''
+        SELECT * FROM bill_items WHERE bill_id = %(bill_id)s AND user_id = %(user_id)s
+    ''',
+    # api/analytics.py
+    'today_revenue': '''
+        SELECT COALESCE(SUM(total_amount), 0) as total
+        FROM bills
+        WHERE bill_date >= %(from_date)s AND bill_date < %(to_date)s AND user_id = %(user_id)s
+    ''',
+    'pending_bills': '''
+        SELECT COUNT(*) as count
+        FROM bills
+        WHERE status = 'Pending' AND user_id = %(user_id)s
+    ''',
+    'payment_methods': '''
+        SELECT m.key as payment_method, SUM((m.value->>'count')::int) as count, SUM((m.value->>'amount')::numeric) as amount
+        FROM daily_shop_sales d, jsonb_each(d.payment_methods) m
+        WHERE d.user_id = %(user_id)s
+        AND sales_day >= %(from_date)s AND sales_day < %(to_date)s
+        GROUP BY m.key
+        ORDER BY amount DESC
+    ''',
+    'sales_summary': '''
+        SELECT SUM(invoice_count), SUM(revenue), SUM(subtotal), SUM(vat_amount),
+               (SELECT COUNT(DISTINCT c) FROM daily_shop_sales d, unnest(d.customer_ids) c
+                WHERE d.user_id = %(user_id)s AND d.sales_day >= %(from_date)s AND d.sales_day < %(to_date)s)
+        FROM daily_shop_sales
+        WHERE user_id = %(user_id)s
+        AND sales_day >= %(from_date)s AND sales_day < %(to_date)s
+    ''',
+    'customer_invoices': '''
+        SELECT c.customer_id, c.name, COUNT(b.bill_id) as total_invoices
+        FROM customers c
+        JOIN bills b ON c.customer_id = b.customer_id AND c.user_id = b.user_id
+        WHERE b.bill_date >= %(from_date)s AND b.user_id = %(user_id)s
+        GROUP BY c.customer_id, c.name
+        ORDER BY total_invoices DESC
+    ''',
+    'trending_products': '''
+        SELECT bi.product_name, SUM(bi.quantity) as qty_sold, SUM(bi.total_amount) as total_revenue
+        FROM bills b
+        JOIN bill_items bi ON bi.bill_id = b.bill_id
+        WHERE b.user_id = %(user_id)s AND b.bill_date >= %(from_date)s AND b.bill_date < %(to_date)s
+        GROUP BY bi.product_name
+        ORDER BY qty_sold DESC
+        LIMIT 10
+    ''',
+    'expense_categories': '''
+        SELECT ec.category_name, SUM(e.amount) as total_amount, COUNT(*) as expense_count
+        FROM expenses e
+        JOIN expense_categories ec ON e.category_id = ec.category_id
+        WHERE e.user_id = %(user_id)s
+        AND e.expense_date >= %(from_date)s AND e.expense_date < %(to_date)s
+        GROUP BY ec.category_id, ec.category_name
+        ORDER BY total_amount DESC
+        LIMIT 5
+    ''',
+    # api/reports.py
+    'invoice_report_page': '''
+        WITH page AS (
+            SELECT b.bill_id, b.bill_number, b.bill_date, b.total_amount, COALESCE(c.name, '') as customer_name
+            FROM bills b
+            LEFT JOIN customers c ON b.customer_id = c.customer_id
+            WHERE b.user_id = %(user_id)s AND (b.bill_date, b.bill_id) < (%(to_date)s, %(bill_id)s)
+            ORDER BY b.bill_date DESC, b.bill_id DESC
+            LIMIT 101
+        )
+        SELECT page.*, items.discount_amounts, items.products
+        FROM page
+        LEFT JOIN (
+            SELECT bill_id,
+                   array_agg(ROUND(COALESCE(rate, 0) * COALESCE(quantity, 0) * COALESCE(discount, 0) / 100.0, 2) ORDER BY item_id) as discount_amounts,
+                   string_agg(NULLIF(product_name, ''), ', ' ORDER BY item_id) as products
+            FROM bill_items
+            WHERE user_id = %(user_id)s AND bill_id IN (SELECT bill_id FROM page)
+            GROUP BY bill_id
+        ) items ON items.bill_id = page.bill_id
+        ORDER BY page.bill_date DESC, page.bill_id DESC
+    ''',
+    # api/customers.py
+    'customers_list': '''
+        SELECT * FROM customers WHERE user_id = %(user_id)s AND is_active = TRUE ORDER BY name
+    ''',
+    'customer_by_phone': '''
+        SELECT * FROM customers WHERE user_id = %(user_id)s AND phone_e164 = %(phone)s AND is_active = TRUE
+    ''',
+    # api/customer_search.py (the trigram variant needs pg_trgm, so only the btree-backed modes)
+    'customer_search_prefix': search_sql('prefix', trigram=False),
+    'customer_search_phone': search_sql('phone', trigram=False),
+    # api/expenses.py
+    'expenses_range': '''
+        SELECT e.*, ec.category_name
+        FROM expenses e
+        JOIN expense_categories ec ON e.category_id = ec.category_id
+        WHERE e.user_id = %(user_id)s AND ec.user_id = %(user_id)s
+        AND e.expense_date >= %(from_date)s AND e.expense_date <= %(to_date)s
+        ORDER BY e.expense_date DESC
+    ''',
+    # api/loyalty.py
+    'loyalty_points_issued': '''
+        SELECT COUNT(*) FROM loyalty_transactions
+        WHERE user_id = %(user_id)s AND transaction_type = 'earned'
+    ''',
+    'loyalty_history': '''
+        SELECT * FROM loyalty_transactions
+        WHERE user_id = %(user_id)s AND customer_id = %(customer_id)s
+        ORDER BY created_at DESC
+        LIMIT 10
+    ''',
+    'loyalty_profile': '''
+        SELECT * FROM customer_loyalty
+        WHERE user_id = %(user_id)s AND customer_id = %(customer_id)s
+    ''',
+    # api/product_catalog.py (barcode scans are served from memory)
+    'product_catalog_load': '''
+        SELECT p.*, pt.type_name
+        FROM products p
+        JOIN product_types pt ON p.type_id = pt.type_id
+        WHERE p.user_id = %(user_id)s AND pt.user_id = %(user_id)s AND p.is_active = TRUE
+        ORDER BY pt.type_name, p.product_name
+    ''',
+}
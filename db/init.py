@@ -3,11 +3,14 @@ import logging
 import json
 from datetime import datetime
 from db.connection import get_db_connection, execute_query, get_placeholder, execute_with_returning
+from db.migrate import run_migrations
 from api.utils import log_dml_error
 import bcrypt
 
 logger = logging.getLogger(__name__)
 
+SCHEMA_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database_schema_postgresql.sql')
+
 def init_db():
     need_init = False
     # For PostgreSQL, check if tables exist
@@ -24,65 +27,9 @@ def init_db():
         need_init = True
     
     if need_init:
-        # Use PostgreSQL schema file
-        # Path relative to project root (assuming this file is in db/)
-        schema_file = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database_schema_postgresql.sql')
-        
-        try:
-            with open(schema_file, 'r') as f:
-                schema = f.read()
-        except FileNotFoundError:
-            print(f"Schema file {schema_file} not found")
-            return
-        
         conn = get_db_connection()
         try:
-            # For PostgreSQL, execute statements one by one
-            statements = schema.split(';')
-            cursor = conn.cursor()
-            # print(f"Executing {len(statements)} statements from schema file...")
-            executed_count = 0
-            for i, statement in enumerate(statements):
-                statement = statement.strip()
-                # print(f"Statement {i+1} (length: {len(statement)}): {statement[:50]}...")
-                
-                # Skip empty statements
-                if not statement:
-                    # print(f"Skipping statement {i+1} (empty)")
-                    continue
-                
-                # Skip pure comment statements (lines that are only comments)
-                if statement.startswith('--') and not any(keyword in statement.upper() for keyword in ['CREATE', 'INSERT', 'ALTER', 'DROP', 'SELECT', 'UPDATE', 'DELETE']):
-                    # print(f"Skipping statement {i+1} (pure comment)")
-                    continue
-                
-                # Execute the statement
-                try:
-                    # print(f"Executing statement {i+1}: {statement[:100]}...")
-                    cursor.execute(statement)
-                    executed_count += 1
-                    # print(f"✅ Statement {i+1} executed successfully")
-                except Exception as stmt_error:
-                    # print(f"❌ Warning: Failed to execute statement {i+1}: {stmt_error}")
-                    # print(f"Statement: {statement}")
-                    # Continue with other statements
-                    pass
-            
-            # print(f"Successfully executed {executed_count} statements")
-            conn.commit()  # Commit the transaction
-            cursor.close()
-            
-            # Verify tables were created
-            try:
-                verify_cursor = conn.cursor()
-                verify_cursor.execute("SELECT table_name FROM information_schema.tables WHERE table_schema = 'public'")
-                tables = verify_cursor.fetchall()
-                # print(f"Tables created: {[table[0] for table in tables]}")
-                verify_cursor.close()
-            except Exception as verify_error:
-                # print(f"Error verifying tables: {verify_error}")
-                pass
-            
+            apply_schema_file(conn)
             logger.info("PostgreSQL database initialized successfully")
         except Exception as e:
             log_dml_error("INIT", "database", e)
@@ -115,6 +62,14 @@ def init_db():
         except Exception as e:
             logger.error(f"Failed to ensure demo user: {e}")
     
+    # Bring every database, new or old, up to the latest schema version
+    try:
+        applied = run_migrations()
+        if applied:
+            logger.info(f"Applied migrations: {', '.join(map(repr, applied))}")
+    except Exception as e:
+        logger.error(f"Failed to apply database migrations: {e}")
+
     # Always clean up corrupted data, regardless of whether initialization was needed
     try:
         conn = get_db_connection()
@@ -150,6 +105,36 @@ def init_db():
             logger.error(f"Failed to ensure demo user: {e}")
 
 
+def apply_schema_file(conn, schema_file=SCHEMA_FILE):
+    """Create the base schema from database_schema_postgresql.sql.
+
+    Each statement runs under its own savepoint, so one failing statement is
+    logged and skipped instead of aborting every statement after it.
+    Schema changes after the base file belong in db/migrations.
+    """
+    with open(schema_file, 'r') as f:
+        schema = f.read()
+    cursor = conn.cursor()
+    executed_count = 0
+    for statement in schema.split(';'):
+        statement = statement.strip()
+        # Skip empty and pure comment statements
+        lines = [line for line in statement.splitlines() if line.strip() and not line.strip().startswith('--')]
+        if not lines:
+            continue
+        cursor.execute('SAVEPOINT schema_statement')
+        try:
+            cursor.execute(statement)
+            cursor.execute('RELEASE SAVEPOINT schema_statement')
+            executed_count += 1
+        except Exception as stmt_error:
+            cursor.execute('ROLLBACK TO SAVEPOINT schema_statement')
+            logger.warning(f"Schema statement failed ({stmt_error}): {lines[0][:80]}")
+    conn.commit()
+    cursor.close()
+    return executed_count
+
+
 def cleanup_corrupted_data(conn):
     """Clean up corrupted data in the database."""
     try:
@@ -165,8 +150,10 @@ def cleanup_corrupted_data(conn):
                OR expense_date > '2100-12-31'
         """)
         
-        # Reset sequence if needed
+        # Reset sequences if needed
         cursor.execute("SELECT setval('expenses_expense_id_seq', (SELECT COALESCE(MAX(expense_id), 1) FROM expenses))")
+        cursor.execute("SELECT setval(pg_get_serial_sequence('bills','bill_id'), COALESCE((SELECT MAX(bill_id) FROM bills),0)+1, false)")
+        cursor.execute("SELECT setval(pg_get_serial_sequence('bill_items','item_id'), COALESCE((SELECT MAX(item_id) FROM bill_items),0)+1, false)")
         
         conn.commit()
         print("✓ Corrupted data cleaned up successfully")
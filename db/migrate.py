@@ -0,0 +1,199 @@
+"""
+Versioned schema migrations for Tajir POS.
+
+Migrations live in db/migrations as NNNN_description.sql and are applied in
+version order, each in its own transaction. Every applied file is recorded in
+schema_migrations with a SHA-256 checksum; editing a migration after it has
+been applied is reported as an error instead of silently diverging.
+
+A file whose first line is `-- migrate: no-transaction` runs one statement
+at a time in autocommit mode, which CREATE INDEX CONCURRENTLY requires.
+Statements in such files are separated by a semicolon at the end of a line.
+
+Usage:
+    python -m db.migrate            # apply pending migrations
+    python -m db.migrate status     # show applied and pending migrations
+"""
+import hashlib
+import logging
+import os
+import re
+import sys
+
+from db.connection import create_connection
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), 'migrations')
+MIGRATION_FILE_PATTERN = re.compile(r'^(\d{4})_([a-z0-9_]+)\.sql$')
+NO_TRANSACTION_MARKER = '-- migrate: no-transaction'
+# Serializes runners across gunicorn workers and deploys.
+ADVISORY_LOCK_ID = 72520041
+
+
+class MigrationError(Exception):
+    pass
+
+
+class Migration:
+    def __init__(self, version, name, path):
+        self.version = version
+        self.name = name
+        self.path = path
+        with open(path, 'r', encoding='utf-8') as f:
+            self.sql = f.read()
+        self.checksum = hashlib.sha256(self.sql.encode('utf-8')).hexdigest()
+        self.transactional = not self.sql.lstrip().startswith(NO_TRANSACTION_MARKER)
+
+    def statements(self):
+        for chunk in re.split(r';\s*$', self.sql, flags=re.MULTILINE):
+            lines = [line for line in chunk.splitlines() if line.strip() and not line.strip().startswith('--')]
+            if lines:
+                yield '\n'.join(lines)
+
+    def __repr__(self):
+        return f'{self.version:04d}_{self.name}'
+
+
+def discover_migrations(directory=MIGRATIONS_DIR):
+    migrations = []
+    for filename in sorted(os.listdir(directory)):
+        match = MIGRATION_FILE_PATTERN.match(filename)
+        if match:
+            migrations.append(Migration(int(match.group(1)), match.group(2), os.path.join(directory, filename)))
+    versions = [m.version for m in migrations]
+    if len(versions) != len(set(versions)):
+        raise MigrationError(f'Duplicate migration version in {directory}')
+    return migrations
+
+
+def _ensure_migrations_table(conn):
+    cursor = conn.cursor()
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            checksum CHAR(64) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.commit()
+
+
+def _applied_migrations(conn):
+    cursor = conn.cursor()
+    cursor.execute('SELECT version, name, checksum, applied_at FROM schema_migrations ORDER BY version')
+    rows = cursor.fetchall()
+    conn.commit()
+    return {row['version']: row for row in rows}
+
+
+def _verify_checksums(migrations, applied):
+    for migration in migrations:
+        row = applied.get(migration.version)
+        if row and row['checksum'].strip() != migration.checksum:
+            raise MigrationError(
+                f'Migration {migration!r} was modified after it was applied '
+                f'(recorded checksum {row["checksum"][:12]}, file checksum {migration.checksum[:12]})'
+            )
+    known = {m.version for m in migrations}
+    for version, row in applied.items():
+        if version not in known:
+            logger.warning(f"Applied migration {version:04d}_{row['name']} has no file in {MIGRATIONS_DIR}")
+
+
+def _apply(conn, migration):
+    cursor = conn.cursor()
+    record_sql = 'INSERT INTO schema_migrations (version, name, checksum) VALUES (%s, %s, %s)'
+    record_params = (migration.version, migration.name, migration.checksum)
+    if migration.transactional:
+        try:
+            cursor.execute(migration.sql)
+            cursor.execute(record_sql, record_params)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    else:
+        conn.autocommit = True
+        try:
+            for statement in migration.statements():
+                cursor.execute(statement)
+            cursor.execute(record_sql, record_params)
+        finally:
+            conn.autocommit = False
+
+
+def run_migrations(conn=None, directory=MIGRATIONS_DIR):
+    """Apply all pending migrations; returns the list of migrations applied."""
+    own_conn = conn is None
+    conn = conn or create_connection()
+    applied_now = []
+    try:
+        cursor = conn.cursor()
+        cursor.execute('SELECT pg_advisory_lock(%s)', (ADVISORY_LOCK_ID,))
+        conn.commit()
+        try:
+            _ensure_migrations_table(conn)
+            migrations = discover_migrations(directory)
+            applied = _applied_migrations(conn)
+            _verify_checksums(migrations, applied)
+            for migration in migrations:
+                if migration.version in applied:
+                    continue
+                logger.info(f"Applying migration {migration!r}")
+                try:
+                    _apply(conn, migration)
+                except Exception as e:
+                    raise MigrationError(f'Migration {migration!r} failed: {e}') from e
+                applied_now.append(migration)
+        finally:
+            cursor = conn.cursor()
+            cursor.execute('SELECT pg_advisory_unlock(%s)', (ADVISORY_LOCK_ID,))
+            conn.commit()
+    finally:
+        if own_conn:
+            conn.close()
+    return applied_now
+
+
+def migration_status(conn=None, directory=MIGRATIONS_DIR):
+    """Return (migration, applied_at or None) for every known migration."""
+    own_conn = conn is None
+    conn = conn or create_connection()
+    try:
+        _ensure_migrations_table(conn)
+        applied = _applied_migrations(conn)
+        migrations = discover_migrations(directory)
+        _verify_checksums(migrations, applied)
+        return [(m, applied[m.version]['applied_at'] if m.version in applied else None) for m in migrations]
+    finally:
+        if own_conn:
+            conn.close()
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    command = argv[0] if argv else 'up'
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    try:
+        if command == 'up':
+            applied = run_migrations()
+            print(f"Applied {len(applied)} migration(s)" + (': ' + ', '.join(map(repr, applied)) if applied else ''))
+        elif command == 'status':
+            for migration, applied_at in migration_status():
+                state = f'applied {applied_at:%Y-%m-%d %H:%M}' if applied_at else 'pending'
+                print(f'{migration!r:50} {state}')
+        else:
+            print(__doc__)
+            return 2
+    except MigrationError as e:
+        print(f"Migration error: {e}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    from dotenv import load_dotenv
+    load_dotenv()
+    sys.exit(main())
@@ -0,0 +1,11 @@
+-- Bill creation relies on ON CONFLICT (user_id, bill_number) and on the
+-- per-shop, per-day counter used to allocate BILL-YYYYMMDD-NNN numbers.
+CREATE UNIQUE INDEX IF NOT EXISTS uniq_bills_user_billno ON bills(user_id, bill_number);
+
+CREATE TABLE IF NOT EXISTS bill_number_counters (
+    user_id INTEGER NOT NULL,
+    bill_day DATE NOT NULL,
+    last_value INTEGER NOT NULL,
+    PRIMARY KEY (user_id, bill_day),
+    FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
+);
@@ -0,0 +1,99 @@
+-- Columns the blueprints read and write that older databases created from
+-- database_schema_postgresql.sql are missing. Every change is idempotent so
+-- databases that were patched by hand are left as they are.
+
+ALTER TABLE bills
+    ADD COLUMN IF NOT EXISTS customer_name VARCHAR(255),
+    ADD COLUMN IF NOT EXISTS customer_phone VARCHAR(20),
+    ADD COLUMN IF NOT EXISTS customer_city VARCHAR(100),
+    ADD COLUMN IF NOT EXISTS customer_area VARCHAR(100),
+    ADD COLUMN IF NOT EXISTS customer_trn VARCHAR(50),
+    ADD COLUMN IF NOT EXISTS customer_type VARCHAR(20),
+    ADD COLUMN IF NOT EXISTS business_name VARCHAR(255),
+    ADD COLUMN IF NOT EXISTS business_address TEXT,
+    ADD COLUMN IF NOT EXISTS uuid VARCHAR(64),
+    ADD COLUMN IF NOT EXISTS payment_method VARCHAR(50) DEFAULT 'Cash',
+    ADD COLUMN IF NOT EXISTS subtotal DECIMAL(10,2) DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS vat_amount DECIMAL(10,2) DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS advance_paid DECIMAL(10,2) DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS status VARCHAR(20) DEFAULT 'Pending',
+    ADD COLUMN IF NOT EXISTS master_id INTEGER,
+    ADD COLUMN IF NOT EXISTS notes TEXT;
+
+ALTER TABLE bill_items
+    ADD COLUMN IF NOT EXISTS user_id INTEGER,
+    ADD COLUMN IF NOT EXISTS discount DECIMAL(10,2) DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS advance_paid DECIMAL(10,2) DEFAULT 0;
+
+UPDATE bill_items bi SET user_id = b.user_id
+FROM bills b
+WHERE bi.bill_id = b.bill_id AND bi.user_id IS NULL;
+
+ALTER TABLE customers
+    ADD COLUMN IF NOT EXISTS is_active BOOLEAN DEFAULT TRUE;
+
+ALTER TABLE employees
+    ADD COLUMN IF NOT EXISTS address TEXT;
+
+ALTER TABLE shop_settings
+    ADD COLUMN IF NOT EXISTS include_vat_in_price BOOLEAN DEFAULT TRUE,
+    ADD COLUMN IF NOT EXISTS bill_template VARCHAR(50),
+    ADD COLUMN IF NOT EXISTS currency_code VARCHAR(10) DEFAULT 'AED',
+    ADD COLUMN IF NOT EXISTS currency_symbol VARCHAR(10) DEFAULT 'AED';
+
+ALTER TABLE expenses
+    ADD COLUMN IF NOT EXISTS payment_method VARCHAR(50);
+
+ALTER TABLE loyalty_config
+    ADD COLUMN IF NOT EXISTS program_name VARCHAR(100),
+    ADD COLUMN IF NOT EXISTS is_active BOOLEAN DEFAULT TRUE,
+    ADD COLUMN IF NOT EXISTS points_per_aed DECIMAL(10,2) DEFAULT 1.0,
+    ADD COLUMN IF NOT EXISTS aed_per_point DECIMAL(10,4) DEFAULT 0.01,
+    ADD COLUMN IF NOT EXISTS min_points_redemption INTEGER DEFAULT 100,
+    ADD COLUMN IF NOT EXISTS max_points_redemption_percent DECIMAL(5,2) DEFAULT 20,
+    ADD COLUMN IF NOT EXISTS birthday_bonus_points INTEGER DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS anniversary_bonus_points INTEGER DEFAULT 0;
+
+ALTER TABLE loyalty_tiers
+    ADD COLUMN IF NOT EXISTS tier_level VARCHAR(20),
+    ADD COLUMN IF NOT EXISTS points_threshold INTEGER DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS discount_percent DECIMAL(5,2) DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS bonus_points_multiplier DECIMAL(4,2) DEFAULT 1.0,
+    ADD COLUMN IF NOT EXISTS free_delivery BOOLEAN DEFAULT FALSE,
+    ADD COLUMN IF NOT EXISTS priority_service BOOLEAN DEFAULT FALSE,
+    ADD COLUMN IF NOT EXISTS exclusive_offers BOOLEAN DEFAULT FALSE,
+    ADD COLUMN IF NOT EXISTS color_code VARCHAR(20),
+    ADD COLUMN IF NOT EXISTS is_active BOOLEAN DEFAULT TRUE;
+
+ALTER TABLE customer_loyalty
+    ADD COLUMN IF NOT EXISTS tier_level VARCHAR(20) DEFAULT 'Bronze',
+    ADD COLUMN IF NOT EXISTS birthday DATE,
+    ADD COLUMN IF NOT EXISTS anniversary_date DATE,
+    ADD COLUMN IF NOT EXISTS total_points INTEGER DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS available_points INTEGER DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS lifetime_points INTEGER DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS total_purchases INTEGER DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS total_spent DECIMAL(12,2) DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS last_purchase_date DATE,
+    ADD COLUMN IF NOT EXISTS join_date DATE DEFAULT CURRENT_DATE;
+
+ALTER TABLE loyalty_transactions
+    ADD COLUMN IF NOT EXISTS customer_id INTEGER,
+    ADD COLUMN IF NOT EXISTS points_earned INTEGER DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS points_redeemed INTEGER DEFAULT 0;
+
+-- The code records transactions by customer, not by loyalty profile.
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM information_schema.columns
+               WHERE table_schema = current_schema() AND table_name = 'loyalty_transactions'
+                 AND column_name = 'loyalty_id' AND is_nullable = 'NO') THEN
+        ALTER TABLE loyalty_transactions ALTER COLUMN loyalty_id DROP NOT NULL;
+    END IF;
+    IF EXISTS (SELECT 1 FROM information_schema.columns
+               WHERE table_schema = current_schema() AND table_name = 'loyalty_transactions'
+                 AND column_name = 'points_change' AND is_nullable = 'NO') THEN
+        ALTER TABLE loyalty_transactions ALTER COLUMN points_change DROP NOT NULL;
+    END IF;
+END
+$$;
@@ -0,0 +1,22 @@
+-- migrate: no-transaction
+-- Composite indexes for the tenant-scoped queries the blueprints run on
+-- every dashboard, list and lookup. Built CONCURRENTLY so a deploy does not
+-- block writes on large tables. test_schema_indexes.py checks the queries
+-- registered in db/hot_queries.py against these.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_bills_user_date ON bills(user_id, bill_date);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_bills_user_status ON bills(user_id, status);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_bills_user_customer ON bills(user_id, customer_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_bill_items_bill ON bill_items(bill_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_bill_items_user_product ON bill_items(user_id, product_name);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_customers_user_name ON customers(user_id, name);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_expenses_user_date ON expenses(user_id, expense_date);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_expense_categories_user ON expense_categories(user_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_loyalty_tx_user_type ON loyalty_transactions(user_id, transaction_type);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_loyalty_tx_user_customer ON loyalty_transactions(user_id, customer_id, created_at);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_customer_loyalty_user_customer ON customer_loyalty(user_id, customer_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_products_user_type ON products(user_id, type_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_products_user_barcode ON products(user_id, barcode);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_employees_user_name ON employees(user_id, name);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_shop_settings_user ON shop_settings(user_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_user_plans_user_active ON user_plans(user_id, is_active);
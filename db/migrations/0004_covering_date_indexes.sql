@@ -0,0 +1,14 @@
+-- migrate: no-transaction
+-- Date-range reports aggregate a few columns over many rows. Carrying those
+-- columns in the (user_id, date) indexes lets Postgres answer them with
+-- index-only scans instead of fetching every matching bill from the heap.
+-- Payment columns (advance_paid, balance_amount, status) are left out so
+-- recording a payment stays a HOT update.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_bills_user_date_covering
+    ON bills(user_id, bill_date) INCLUDE (total_amount, subtotal, vat_amount, customer_id, payment_method);
+DROP INDEX CONCURRENTLY IF EXISTS idx_bills_user_date;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_expenses_user_date_covering
+    ON expenses(user_id, expense_date) INCLUDE (amount, category_id);
+DROP INDEX CONCURRENTLY IF EXISTS idx_expenses_user_date;
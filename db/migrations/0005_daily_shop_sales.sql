@@ -0,0 +1,66 @@
+-- Per-shop, per-day sales rollup maintained by db/sales_rollup.py in the same
+-- transaction as every bill create, payment and delete. Analytics and
+-- report endpoints read it instead of rescanning bills.
+CREATE TABLE IF NOT EXISTS daily_shop_sales (
+    user_id INTEGER NOT NULL,
+    sales_day DATE NOT NULL,
+    invoice_count INTEGER NOT NULL DEFAULT 0,
+    customer_count INTEGER NOT NULL DEFAULT 0,
+    customer_ids INTEGER[] NOT NULL DEFAULT '{}',  -- distinct customers billed that day
+    revenue DECIMAL(14,2) NOT NULL DEFAULT 0,
+    subtotal DECIMAL(14,2) NOT NULL DEFAULT 0,
+    vat_amount DECIMAL(14,2) NOT NULL DEFAULT 0,
+    advance_paid DECIMAL(14,2) NOT NULL DEFAULT 0,
+    balance_amount DECIMAL(14,2) NOT NULL DEFAULT 0,
+    payment_methods JSONB NOT NULL DEFAULT '{}',   -- {"Cash": {"count": 3, "amount": 120.50}, ...}
+    status_counts JSONB NOT NULL DEFAULT '{}',     -- {"Pending": 2, "Paid": 1, ...}
+    refreshed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id, sales_day),
+    FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
+);
+
+-- Backfill from existing bills; `python -m db.sales_rollup rebuild` does the same on demand.
+INSERT INTO daily_shop_sales (
+    user_id, sales_day, invoice_count, customer_count, customer_ids, revenue, subtotal,
+    vat_amount, advance_paid, balance_amount, payment_methods, status_counts
+)
+WITH grouped AS (
+    SELECT user_id, bill_date, payment_method, status,
+           GROUPING(payment_method, status) AS grouping_set,
+           COUNT(*) AS invoice_count,
+           COUNT(DISTINCT customer_id) AS customer_count,
+           ARRAY_AGG(DISTINCT customer_id) FILTER (WHERE customer_id IS NOT NULL) AS customer_ids,
+           COALESCE(SUM(total_amount), 0) AS revenue,
+           COALESCE(SUM(subtotal), 0) AS subtotal,
+           COALESCE(SUM(vat_amount), 0) AS vat_amount,
+           COALESCE(SUM(advance_paid), 0) AS advance_paid,
+           COALESCE(SUM(balance_amount), 0) AS balance_amount
+    FROM (
+        SELECT user_id, bill_date, customer_id, total_amount, subtotal, vat_amount,
+               advance_paid, balance_amount,
+               COALESCE(NULLIF(payment_method, ''), 'Unknown') AS payment_method,
+               COALESCE(NULLIF(status, ''), 'Unknown') AS status
+        FROM bills
+    ) scoped
+    GROUP BY GROUPING SETS (
+        (user_id, bill_date),
+        (user_id, bill_date, payment_method),
+        (user_id, bill_date, status)
+    )
+)
+-- grouping_set: 3 = day totals, 1 = per payment method, 2 = per status
+SELECT user_id, bill_date AS sales_day,
+       MAX(invoice_count) FILTER (WHERE grouping_set = 3) AS invoice_count,
+       MAX(customer_count) FILTER (WHERE grouping_set = 3) AS customer_count,
+       COALESCE(MAX(customer_ids) FILTER (WHERE grouping_set = 3), '{}') AS customer_ids,
+       MAX(revenue) FILTER (WHERE grouping_set = 3) AS revenue,
+       MAX(subtotal) FILTER (WHERE grouping_set = 3) AS subtotal,
+       MAX(vat_amount) FILTER (WHERE grouping_set = 3) AS vat_amount,
+       MAX(advance_paid) FILTER (WHERE grouping_set = 3) AS advance_paid,
+       MAX(balance_amount) FILTER (WHERE grouping_set = 3) AS balance_amount,
+       jsonb_object_agg(payment_method, jsonb_build_object('count', invoice_count, 'amount', revenue))
+           FILTER (WHERE grouping_set = 1) AS payment_methods,
+       jsonb_object_agg(status, invoice_count) FILTER (WHERE grouping_set = 2) AS status_counts
+FROM grouped
+GROUP BY user_id, bill_date
+ON CONFLICT (user_id, sales_day) DO NOTHING;
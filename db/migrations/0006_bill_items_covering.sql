@@ -0,0 +1,9 @@
+-- migrate: no-transaction
+-- Per-product reports (dashboard trending products, top products) find the
+-- bills of a date range first and then their items. Carrying the summed
+-- columns in the bill_id index turns the item lookups into index-only probes,
+-- which the planner prefers over hashing the whole bill_items table.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_bill_items_bill_covering
+    ON bill_items(bill_id) INCLUDE (product_name, quantity, total_amount);
+DROP INDEX CONCURRENTLY IF EXISTS idx_bill_items_bill;
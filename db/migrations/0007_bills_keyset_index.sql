@@ -0,0 +1,10 @@
+-- migrate: no-transaction
+-- Bill lists and the invoice report page through a shop's bills newest first
+-- on (bill_date, bill_id). With bill_id in the key the page boundary
+-- `(bill_date, bill_id) < (...)` becomes an index condition, so every page
+-- costs the same however far back the owner scrolls. The INCLUDE columns are
+-- kept so date-range totals remain index-only scans.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_bills_user_date_id_covering
+    ON bills(user_id, bill_date, bill_id) INCLUDE (total_amount, subtotal, vat_amount, customer_id, payment_method);
+DROP INDEX CONCURRENTLY IF EXISTS idx_bills_user_date_covering;
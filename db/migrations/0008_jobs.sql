@@ -0,0 +1,21 @@
+-- Background jobs (batch invoice PDFs, ...) run outside the request that
+-- created them. The row is the job's shared state: any worker can answer a
+-- status poll, and output files live under JOBS_DIR/<job_id>/.
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id VARCHAR(32) PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    kind VARCHAR(50) NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'queued' CHECK (status IN ('queued', 'running', 'done', 'failed')),
+    params JSONB NOT NULL DEFAULT '{}',
+    total INTEGER NOT NULL DEFAULT 0,
+    completed INTEGER NOT NULL DEFAULT 0,
+    result JSONB,
+    error TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_jobs_user_created ON jobs(user_id, created_at DESC);
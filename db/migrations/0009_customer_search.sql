@@ -0,0 +1,35 @@
+-- Indexes behind customer search (api/customer_search.py).
+--
+-- Prefix matching (typeahead on the first letters of a name, phone number
+-- prefixes) uses plain btree indexes with text_pattern_ops, so it works on
+-- every server. Substring and fuzzy matching use pg_trgm GIN indexes; the
+-- extension is created when the server ships it, and skipped with a notice
+-- when it does not (search then falls back to prefix and LIKE matching).
+-- Installing pg_trgm later needs the trigram statements below run by hand.
+--
+-- Not CONCURRENTLY: the trigram part has to run inside a DO block. The
+-- customers table is small next to bills, so the write lock is brief.
+
+CREATE INDEX IF NOT EXISTS idx_customers_user_name_prefix
+    ON customers (user_id, lower(name) text_pattern_ops);
+CREATE INDEX IF NOT EXISTS idx_customers_user_phone_digits
+    ON customers (user_id, regexp_replace(phone, '[^0-9]', '', 'g') text_pattern_ops);
+
+DO $$
+BEGIN
+    IF to_regproc('similarity') IS NULL THEN
+        BEGIN
+            CREATE EXTENSION IF NOT EXISTS pg_trgm;
+        EXCEPTION WHEN OTHERS THEN
+            RAISE NOTICE 'pg_trgm is not available (%), customer search uses prefix and LIKE matching', SQLERRM;
+        END;
+    END IF;
+    IF to_regproc('similarity') IS NOT NULL THEN
+        CREATE INDEX IF NOT EXISTS idx_customers_name_trgm
+            ON customers USING gin (lower(name) gin_trgm_ops);
+        CREATE INDEX IF NOT EXISTS idx_customers_business_name_trgm
+            ON customers USING gin (lower(business_name) gin_trgm_ops);
+        CREATE INDEX IF NOT EXISTS idx_customers_phone_digits_trgm
+            ON customers USING gin (regexp_replace(phone, '[^0-9]', '', 'g') gin_trgm_ops);
+    END IF;
+END $$;
@@ -0,0 +1,142 @@
+-- Customers are identified by their phone number in E.164 form
+-- (+971501234567), whatever way it was typed. The form path used to store
+-- digits only and the JSON path +<country code>, so the same person could
+-- exist twice; those duplicates are merged here.
+--
+-- normalize_phone_e164() mirrors api.phone_numbers.normalize_phone (numbers
+-- without a country code are UAE numbers) and is kept for manual imports:
+--     INSERT INTO customers (..., phone, phone_e164) VALUES (..., p, normalize_phone_e164(p))
+
+CREATE OR REPLACE FUNCTION normalize_phone_e164(phone TEXT) RETURNS TEXT AS $$
+    -- At least 8 digits after the country code (one digit assumed for '+' and '00' numbers)
+    SELECT CASE WHEN length(national) <= 15 AND length(national) - code_length >= 8 THEN '+' || national END
+    FROM (
+        SELECT CASE WHEN full_number LIKE '9710%' THEN '971' || substr(full_number, 5) ELSE full_number END AS national,
+               code_length
+        FROM (
+            SELECT CASE
+                WHEN btrim(phone) LIKE '+%' THEN digits
+                WHEN digits LIKE '00%' THEN substr(digits, 3)
+                WHEN digits LIKE '971%' AND length(digits) >= 11 THEN digits
+                WHEN digits LIKE '0%' THEN '971' || substr(digits, 2)
+                ELSE '971' || digits
+            END AS full_number,
+            CASE WHEN btrim(phone) LIKE '+%' OR digits LIKE '00%' THEN 1 ELSE 3 END AS code_length
+            FROM (SELECT regexp_replace(phone, '[^0-9]', '', 'g') AS digits) d
+            WHERE digits <> ''
+        ) f
+    ) n
+$$ LANGUAGE sql IMMUTABLE;
+
+ALTER TABLE customers ADD COLUMN IF NOT EXISTS phone_e164 VARCHAR(32);
+
+UPDATE customers SET phone_e164 = normalize_phone_e164(phone);
+
+-- Every customer sharing a number with an earlier one is merged into it,
+-- preferring an active customer over a deleted one.
+CREATE TEMP TABLE customer_merges ON COMMIT DROP AS
+SELECT customer_id, keeper_id FROM (
+    SELECT customer_id,
+           first_value(customer_id) OVER (
+               PARTITION BY user_id, phone_e164
+               ORDER BY COALESCE(is_active, TRUE) DESC, customer_id
+           ) AS keeper_id
+    FROM customers
+    WHERE phone_e164 IS NOT NULL
+) ranked
+WHERE customer_id <> keeper_id;
+
+UPDATE bills b SET customer_id = m.keeper_id
+FROM customer_merges m WHERE b.customer_id = m.customer_id;
+
+UPDATE loyalty_transactions t SET customer_id = m.keeper_id
+FROM customer_merges m WHERE t.customer_id = m.customer_id;
+
+-- One loyalty profile per merged customer: the keeper's own if it has one,
+-- with the duplicates' points and purchases added to it.
+CREATE TEMP TABLE loyalty_merges ON COMMIT DROP AS
+SELECT cl.loyalty_id, g.keeper_id,
+       first_value(cl.loyalty_id) OVER (
+           PARTITION BY g.keeper_id
+           ORDER BY (cl.customer_id = g.keeper_id) DESC, cl.loyalty_id
+       ) AS survivor_id
+FROM customer_loyalty cl
+JOIN (
+    SELECT customer_id, keeper_id FROM customer_merges
+    UNION
+    SELECT keeper_id, keeper_id FROM customer_merges
+) g ON cl.customer_id = g.customer_id;
+
+UPDATE customer_loyalty s SET
+    customer_id = t.keeper_id,
+    total_points = t.total_points,
+    available_points = t.available_points,
+    lifetime_points = t.lifetime_points,
+    total_purchases = t.total_purchases,
+    total_spent = t.total_spent,
+    last_purchase_date = t.last_purchase_date,
+    join_date = t.join_date
+FROM (
+    SELECT lm.survivor_id, lm.keeper_id,
+           SUM(COALESCE(cl.total_points, 0)) AS total_points,
+           SUM(COALESCE(cl.available_points, 0)) AS available_points,
+           SUM(COALESCE(cl.lifetime_points, 0)) AS lifetime_points,
+           SUM(COALESCE(cl.total_purchases, 0)) AS total_purchases,
+           SUM(COALESCE(cl.total_spent, 0)) AS total_spent,
+           MAX(cl.last_purchase_date) AS last_purchase_date,
+           MIN(cl.join_date) AS join_date
+    FROM loyalty_merges lm
+    JOIN customer_loyalty cl ON cl.loyalty_id = lm.loyalty_id
+    GROUP BY lm.survivor_id, lm.keeper_id
+) t
+WHERE s.loyalty_id = t.survivor_id;
+
+-- Before the merged-away profiles are deleted: their transactions would
+-- go with them (loyalty_id ... ON DELETE CASCADE).
+UPDATE loyalty_transactions t SET loyalty_id = lm.survivor_id
+FROM loyalty_merges lm WHERE t.loyalty_id = lm.loyalty_id AND lm.loyalty_id <> lm.survivor_id;
+
+-- Tables that only some installations have.
+DO $$
+BEGIN
+    IF to_regclass('reward_redemptions') IS NOT NULL THEN
+        UPDATE reward_redemptions r SET loyalty_id = lm.survivor_id
+        FROM loyalty_merges lm WHERE r.loyalty_id = lm.loyalty_id AND lm.loyalty_id <> lm.survivor_id;
+    END IF;
+    IF to_regclass('personalized_offers') IS NOT NULL THEN
+        UPDATE personalized_offers o SET customer_id = m.keeper_id
+        FROM customer_merges m WHERE o.customer_id = m.customer_id;
+    END IF;
+END $$;
+
+DELETE FROM customer_loyalty
+WHERE loyalty_id IN (SELECT loyalty_id FROM loyalty_merges WHERE loyalty_id <> survivor_id);
+
+-- Distinct customers per day in the sales rollup count a merged pair once.
+UPDATE daily_shop_sales d SET
+    customer_ids = fixed.customer_ids,
+    customer_count = cardinality(fixed.customer_ids)
+FROM (
+    SELECT ds.user_id, ds.sales_day,
+           ARRAY(
+               SELECT DISTINCT COALESCE(m.keeper_id, id)
+               FROM unnest(ds.customer_ids) id
+               LEFT JOIN customer_merges m ON m.customer_id = id
+               ORDER BY 1
+           ) AS customer_ids
+    FROM daily_shop_sales ds
+    WHERE ds.customer_ids && ARRAY(SELECT customer_id FROM customer_merges)
+) fixed
+WHERE d.user_id = fixed.user_id AND d.sales_day = fixed.sales_day;
+
+-- Merged duplicates stay for history, deleted and without a number.
+UPDATE customers c SET is_active = FALSE, phone_e164 = NULL
+FROM customer_merges m WHERE c.customer_id = m.customer_id;
+
+-- phone_e164 replaces the raw phone as the customer key. text_pattern_ops
+-- also serves the phone-prefix search in api/customer_search.py.
+CREATE UNIQUE INDEX IF NOT EXISTS idx_customers_user_phone_e164
+    ON customers (user_id, phone_e164 text_pattern_ops);
+ALTER TABLE customers DROP CONSTRAINT IF EXISTS customers_user_id_phone_key;
+DROP INDEX IF EXISTS idx_customers_user_phone_digits;
+DROP INDEX IF EXISTS idx_customers_phone_digits_trgm;
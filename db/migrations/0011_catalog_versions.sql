@@ -0,0 +1,57 @@
+-- One version number per shop catalog (products and product types). Every
+-- statement that writes either table moves the shop's version forward, so
+-- the in-process catalog cache (api/product_catalog.py) in every worker can
+-- tell with a single primary-key read whether its copy is still current.
+-- Triggers rather than application code, so imports and manual SQL count too.
+--
+-- Versions come from one sequence: they never repeat, even if a shop's row
+-- is deleted and recreated.
+CREATE SEQUENCE IF NOT EXISTS catalog_version_seq;
+
+CREATE TABLE IF NOT EXISTS catalog_versions (
+    user_id INTEGER PRIMARY KEY,
+    version BIGINT NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
+);
+
+-- Statement-level with transition tables: a bulk import of 10,000 products
+-- bumps each shop once, not once per row.
+CREATE OR REPLACE FUNCTION bump_catalog_version() RETURNS TRIGGER AS $$
+DECLARE
+    shops INTEGER[];
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        shops := ARRAY(SELECT DISTINCT user_id FROM new_rows);
+    ELSIF TG_OP = 'UPDATE' THEN
+        shops := ARRAY(SELECT user_id FROM new_rows UNION SELECT user_id FROM old_rows);
+    ELSE
+        shops := ARRAY(SELECT DISTINCT user_id FROM old_rows);
+    END IF;
+    INSERT INTO catalog_versions (user_id, version)
+    SELECT shop, nextval('catalog_version_seq') FROM unnest(shops) shop
+    WHERE EXISTS (SELECT 1 FROM users WHERE users.user_id = shop)
+    ON CONFLICT (user_id) DO UPDATE SET version = EXCLUDED.version, updated_at = CURRENT_TIMESTAMP;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS products_catalog_version_insert ON products;
+DROP TRIGGER IF EXISTS products_catalog_version_update ON products;
+DROP TRIGGER IF EXISTS products_catalog_version_delete ON products;
+CREATE TRIGGER products_catalog_version_insert AFTER INSERT ON products
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION bump_catalog_version();
+CREATE TRIGGER products_catalog_version_update AFTER UPDATE ON products
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION bump_catalog_version();
+CREATE TRIGGER products_catalog_version_delete AFTER DELETE ON products
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION bump_catalog_version();
+
+DROP TRIGGER IF EXISTS product_types_catalog_version_insert ON product_types;
+DROP TRIGGER IF EXISTS product_types_catalog_version_update ON product_types;
+DROP TRIGGER IF EXISTS product_types_catalog_version_delete ON product_types;
+CREATE TRIGGER product_types_catalog_version_insert AFTER INSERT ON product_types
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION bump_catalog_version();
+CREATE TRIGGER product_types_catalog_version_update AFTER UPDATE ON product_types
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION bump_catalog_version();
+CREATE TRIGGER product_types_catalog_version_delete AFTER DELETE ON product_types
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION bump_catalog_version();
@@ -0,0 +1,22 @@
+-- Jobs made of independent items (one OCR image each) that any worker
+-- process can pick up. An item is leased while it runs: if the process dies,
+-- the lease runs out and another worker takes the item over, so queued and
+-- interrupted jobs resume after a restart. user_id is copied from the job so
+-- the per-shop limit on running items is a single index probe.
+CREATE TABLE IF NOT EXISTS job_items (
+    job_id VARCHAR(32) NOT NULL,
+    position INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'queued' CHECK (status IN ('queued', 'running', 'done', 'failed')),
+    params JSONB NOT NULL DEFAULT '{}',
+    result JSONB,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_until TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (job_id, position),
+    FOREIGN KEY (job_id) REFERENCES jobs(job_id) ON DELETE CASCADE
+);
+
+-- Claims scan only unfinished items; the running ones are counted per shop.
+CREATE INDEX IF NOT EXISTS idx_job_items_unfinished ON job_items(status, lease_until) WHERE status IN ('queued', 'running');
+CREATE INDEX IF NOT EXISTS idx_job_items_user_running ON job_items(user_id, lease_until) WHERE status = 'running';
@@ -0,0 +1,267 @@
+"""
+Thread-safe PostgreSQL connection pool for Tajir POS.
+
+Connections are checked out per Flask request (see db.connection) and handed
+back on teardown, so a request that calls get_db_connection() several times
+reuses a single server connection instead of paying a TCP + auth handshake
+for each call.
+"""
+import logging
+import threading
+import time
+from collections import deque
+
+import psycopg2
+from psycopg2 import extensions
+from psycopg2.pool import PoolError
+
+logger = logging.getLogger(__name__)
+
+
+class PoolExhausted(PoolError):
+    """Raised when no connection became available within the checkout timeout."""
+
+
+class ConnectionPool:
+    """Bounded pool of psycopg2 connections.
+
+    - min_size connections are kept open even when idle
+    - max_size caps the number of open connections; callers block up to
+      `timeout` seconds when the pool is exhausted
+    - connections older than max_lifetime are closed instead of reused
+    - idle connections above min_size are reaped after max_idle seconds
+    - every checkout verifies the connection; one that has been idle longer
+      than ping_interval is pinged with SELECT 1 first
+    """
+
+    def __init__(self, connect, min_size=1, max_size=10, max_lifetime=1800,
+                 max_idle=300, timeout=10, ping_interval=5):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError('Invalid pool size: min=%s max=%s' % (min_size, max_size))
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_lifetime = max_lifetime
+        self.max_idle = max_idle
+        self.timeout = timeout
+        self.ping_interval = ping_interval
+
+        self._lock = threading.Condition(threading.Lock())
+        self._idle = deque()      # (conn, created_at, last_used)
+        self._in_use = {}         # id(conn) -> created_at
+        self._size = 0            # open + currently opening connections
+        self._closed = False
+
+        self._stats = {
+            'checkouts': 0,
+            'checkout_wait_total': 0.0,
+            'checkout_wait_max': 0.0,
+            'exhaustion_events': 0,
+            'timeouts': 0,
+            'connections_created': 0,
+            'connections_closed': 0,
+            'health_check_failures': 0,
+        }
+
+    # ------------------------------------------------------------------
+    # checkout / return
+    # ------------------------------------------------------------------
+    def getconn(self, timeout=None):
+        """Check a healthy connection out of the pool."""
+        timeout = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+        waited = False
+
+        while True:
+            entry = None
+            create = False
+            with self._lock:
+                if self._closed:
+                    raise PoolError('connection pool is closed')
+                self._reap_idle_locked()
+                if self._idle:
+                    entry = self._idle.pop()
+                elif self._size < self.max_size:
+                    self._size += 1
+                    create = True
+                else:
+                    if not waited:
+                        waited = True
+                        self._stats['exhaustion_events'] += 1
+                        logger.warning('Database pool exhausted (%d connections in use)', len(self._in_use))
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats['timeouts'] += 1
+                        raise PoolExhausted('no database connection available after %.1fs' % timeout)
+                    self._lock.wait(remaining)
+                    continue
+
+            if create:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._lock:
+                        self._size -= 1
+                        self._lock.notify()
+                    raise
+                created_at = time.monotonic()
+                with self._lock:
+                    self._stats['connections_created'] += 1
+            else:
+                conn, created_at, last_used = entry
+                if not self._is_usable(conn, created_at, last_used):
+                    self._discard(conn)
+                    continue
+
+            with self._lock:
+                self._in_use[id(conn)] = created_at
+                wait = time.monotonic() - started
+                self._stats['checkouts'] += 1
+                self._stats['checkout_wait_total'] += wait
+                if wait > self._stats['checkout_wait_max']:
+                    self._stats['checkout_wait_max'] = wait
+            return conn
+
+    def putconn(self, conn, discard=False):
+        """Return a connection to the pool, rolling back any open transaction."""
+        with self._lock:
+            created_at = self._in_use.pop(id(conn), None)
+        if created_at is None:
+            logger.warning('Returned a connection that was not checked out from this pool')
+            return
+
+        if not discard and not conn.closed:
+            try:
+                if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except Exception:
+                discard = True
+        if discard or conn.closed or self._closed or self._expired(created_at):
+            self._discard(conn)
+            return
+
+        with self._lock:
+            self._idle.append((conn, created_at, time.monotonic()))
+            self._lock.notify()
+
+    # ------------------------------------------------------------------
+    # health / lifecycle
+    # ------------------------------------------------------------------
+    def _expired(self, created_at):
+        return self.max_lifetime and time.monotonic() - created_at > self.max_lifetime
+
+    def _is_usable(self, conn, created_at, last_used):
+        if conn.closed or self._expired(created_at):
+            return False
+        try:
+            if conn.get_transaction_status() == extensions.TRANSACTION_STATUS_UNKNOWN:
+                raise psycopg2.InterfaceError('connection in unknown state')
+            if time.monotonic() - last_used > self.ping_interval:
+                cursor = conn.cursor()
+                cursor.execute('SELECT 1')
+                cursor.close()
+                conn.rollback()
+            return True
+        except Exception as e:
+            with self._lock:
+                self._stats['health_check_failures'] += 1
+            logger.info(f"Discarding unhealthy pooled connection: {e}")
+            return False
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._lock:
+            self._size -= 1
+            self._stats['connections_closed'] += 1
+            self._lock.notify()
+
+    def _reap_idle_locked(self):
+        if not self.max_idle:
+            return
+        now = time.monotonic()
+        # Oldest-returned connections sit at the left end of the deque.
+        while self._idle and self._size > self.min_size:
+            conn, created_at, last_used = self._idle[0]
+            if now - last_used <= self.max_idle:
+                break
+            self._idle.popleft()
+            try:
+                conn.close()
+            except Exception:
+                pass
+            self._size -= 1
+            self._stats['connections_closed'] += 1
+
+    def reap(self):
+        """Close connections that have been idle longer than max_idle."""
+        with self._lock:
+            self._reap_idle_locked()
+
+    def closeall(self):
+        with self._lock:
+            self._closed = True
+            idle, self._idle = list(self._idle), deque()
+            self._lock.notify_all()
+        for conn, _, _ in idle:
+            self._discard(conn)
+
+    def metrics(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['in_use'] = len(self._in_use)
+            stats['idle'] = len(self._idle)
+            stats['size'] = self._size
+        checkouts = stats['checkouts']
+        stats['checkout_wait_avg_ms'] = round(stats['checkout_wait_total'] / checkouts * 1000, 3) if checkouts else 0.0
+        stats['checkout_wait_max_ms'] = round(stats.pop('checkout_wait_max') * 1000, 3)
+        stats['checkout_wait_total_ms'] = round(stats.pop('checkout_wait_total') * 1000, 3)
+        stats['min_size'] = self.min_size
+        stats['max_size'] = self.max_size
+        return stats
+
+
+class PooledConnection:
+    """Caller-facing handle around a pooled connection.
+
+    Behaves like a psycopg2 connection, except that close() hands the
+    connection back through `release` instead of closing the socket.
+    """
+
+    def __init__(self, conn, release):
+        self._conn = conn
+        self._release = release
+        self._handle_closed = False
+
+    def close(self):
+        if self._handle_closed:
+            return
+        self._handle_closed = True
+        self._release(self._conn)
+
+    @property
+    def closed(self):
+        return 1 if self._handle_closed else self._conn.closed
+
+    def cursor(self, *args, **kwargs):
+        if self._handle_closed:
+            raise psycopg2.InterfaceError('connection already closed')
+        return self._conn.cursor(*args, **kwargs)
+
+    def __getattr__(self, name):
+        if self._handle_closed and name in ('commit', 'rollback'):
+            raise psycopg2.InterfaceError('connection already closed')
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self._conn.commit()
+        else:
+            self._conn.rollback()
+        return False
@@ -0,0 +1,151 @@
+"""
+Daily sales rollup (daily_shop_sales).
+
+One row per shop and day with the bill totals the dashboards and reports
+need, so their cost depends on the number of days in the range instead of
+the number of bills. Every write that changes a bill (create, payment,
+delete) calls refresh_days() inside its own transaction; the day is
+re-aggregated from bills under a row lock, which keeps the rollup exact
+(including distinct customers) without any delta bookkeeping.
+
+Usage:
+    python -m db.sales_rollup rebuild [--user-id N] [--from YYYY-MM-DD] [--to YYYY-MM-DD]
+"""
+import argparse
+import sys
+
+from db.connection import create_connection, get_placeholder
+
+ROLLUP_COLUMNS = (
+    'user_id', 'sales_day', 'invoice_count', 'customer_count', 'customer_ids',
+    'revenue', 'subtotal', 'vat_amount', 'advance_paid', 'balance_amount',
+    'payment_methods', 'status_counts',
+)
+
+
+def rollup_select_sql(where):
+    """Aggregate bills matching `where` (on alias-free bills columns) per shop and day.
+
+    One pass over the bills: the day totals, the per-payment-method and the
+    per-status groups come out of a single GROUPING SETS aggregate and are
+    folded into one row per day, so a full rebuild never joins large
+    intermediate results.
+    """
+    return f'''
+        WITH grouped AS (
+            SELECT user_id, bill_date, payment_method, status,
+                   GROUPING(payment_method, status) AS grouping_set,
+                   COUNT(*) AS invoice_count,
+                   COUNT(DISTINCT customer_id) AS customer_count,
+                   ARRAY_AGG(DISTINCT customer_id) FILTER (WHERE customer_id IS NOT NULL) AS customer_ids,
+                   COALESCE(SUM(total_amount), 0) AS revenue,
+                   COALESCE(SUM(subtotal), 0) AS subtotal,
+                   COALESCE(SUM(vat_amount), 0) AS vat_amount,
+                   COALESCE(SUM(advance_paid), 0) AS advance_paid,
+                   COALESCE(SUM(balance_amount), 0) AS balance_amount
+            FROM (
+                SELECT user_id, bill_date, customer_id, total_amount, subtotal, vat_amount,
+                       advance_paid, balance_amount,
+                       COALESCE(NULLIF(payment_method, ''), 'Unknown') AS payment_method,
+                       COALESCE(NULLIF(status, ''), 'Unknown') AS status
+                FROM bills
+                WHERE {where}
+            ) scoped
+            GROUP BY GROUPING SETS (
+                (user_id, bill_date),
+                (user_id, bill_date, payment_method),
+                (user_id, bill_date, status)
+            )
+        )
+        -- grouping_set: 3 = day totals, 1 = per payment method, 2 = per status
+        SELECT user_id, bill_date AS sales_day,
+               MAX(invoice_count) FILTER (WHERE grouping_set = 3) AS invoice_count,
+               MAX(customer_count) FILTER (WHERE grouping_set = 3) AS customer_count,
+               COALESCE(MAX(customer_ids) FILTER (WHERE grouping_set = 3), '{{}}') AS customer_ids,
+               MAX(revenue) FILTER (WHERE grouping_set = 3) AS revenue,
+               MAX(subtotal) FILTER (WHERE grouping_set = 3) AS subtotal,
+               MAX(vat_amount) FILTER (WHERE grouping_set = 3) AS vat_amount,
+               MAX(advance_paid) FILTER (WHERE grouping_set = 3) AS advance_paid,
+               MAX(balance_amount) FILTER (WHERE grouping_set = 3) AS balance_amount,
+               jsonb_object_agg(payment_method, jsonb_build_object('count', invoice_count, 'amount', revenue))
+                   FILTER (WHERE grouping_set = 1) AS payment_methods,
+               jsonb_object_agg(status, invoice_count) FILTER (WHERE grouping_set = 2) AS status_counts
+        FROM grouped
+        GROUP BY user_id, bill_date
+    '''
+
+
+def refresh_days(cursor, user_id, days):
+    """Re-aggregate the rollup rows of one shop for the given bill days.
+
+    Must run in the transaction that changed the bills. The day row is
+    locked first, so a concurrent writer for the same day waits and then
+    aggregates with a snapshot that includes this transaction's bills.
+    """
+    placeholder = get_placeholder()
+    for day in sorted({d for d in days if d is not None}):
+        cursor.execute(f'''
+            INSERT INTO daily_shop_sales (user_id, sales_day) VALUES ({placeholder}, {placeholder})
+            ON CONFLICT (user_id, sales_day) DO UPDATE SET refreshed_at = CURRENT_TIMESTAMP;
+            DELETE FROM daily_shop_sales WHERE user_id = {placeholder} AND sales_day = {placeholder};
+            INSERT INTO daily_shop_sales ({', '.join(ROLLUP_COLUMNS)})
+            {rollup_select_sql(f'user_id = {placeholder} AND bill_date = {placeholder}')}
+        ''', (user_id, day, user_id, day, user_id, day))
+
+
+def rebuild(conn, user_id=None, from_date=None, to_date=None):
+    """Recompute the rollup from bills for a shop and/or day range (all by default).
+
+    Returns the number of rollup rows written. Used for the initial backfill
+    and to repair the rollup after bills were changed outside the app.
+    """
+    placeholder = get_placeholder()
+
+    def where_for(day_column):
+        conditions = []
+        if user_id is not None:
+            conditions.append(f'user_id = {placeholder}')
+        if from_date:
+            conditions.append(f'{day_column} >= {placeholder}')
+        if to_date:
+            conditions.append(f'{day_column} <= {placeholder}')
+        return ' AND '.join(conditions) or 'TRUE'
+
+    params = ([user_id] if user_id is not None else []) + [day for day in (from_date, to_date) if day]
+    cursor = conn.cursor()
+    try:
+        # Block bill writers for the rebuilt shops until the new rows are in.
+        cursor.execute('LOCK TABLE daily_shop_sales IN EXCLUSIVE MODE')
+        cursor.execute(f"DELETE FROM daily_shop_sales WHERE {where_for('sales_day')}", params)
+        cursor.execute(f'''
+            INSERT INTO daily_shop_sales ({', '.join(ROLLUP_COLUMNS)})
+            {rollup_select_sql(where_for('bill_date'))}
+        ''', params)
+        written = cursor.rowcount
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m db.sales_rollup', description='Maintain the daily_shop_sales rollup.')
+    parser.add_argument('command', choices=['rebuild'])
+    parser.add_argument('--user-id', type=int)
+    parser.add_argument('--from', dest='from_date')
+    parser.add_argument('--to', dest='to_date')
+    args = parser.parse_args(argv)
+    conn = create_connection()
+    try:
+        written = rebuild(conn, args.user_id, args.from_date, args.to_date)
+    finally:
+        conn.close()
+    print(f"Rebuilt {written} daily_shop_sales row(s)")
+    return 0
+
+
+if __name__ == '__main__':
+    from dotenv import load_dotenv
+    load_dotenv()
+    sys.exit(main())
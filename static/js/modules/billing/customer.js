@@ -221,14 +221,11 @@
             // Search customers by mobile number
             async function searchCustomersByMobile(query) {
                 try {
-                    const response = await fetch(`/api/customers?search=${encodeURIComponent(query)}`);
+                    // Phone-like queries match number prefixes server-side, whatever the formatting
+                    const response = await fetch(`/api/customers/search?q=${encodeURIComponent(query)}&limit=5`);
                     if (response.ok) {
-                        const customers = await response.json();
-                        const filteredCustomers = customers.filter(customer => {
-                            if (!customer.phone) return false;
-                            return customer.phone.includes(query) || (customer.phone.replace(/^\+\d+/, '')).startsWith(query);
-                        });
-                        return filteredCustomers.slice(0, 5); // Limit to 5 suggestions
+                        const { customers = [] } = await response.json();
+                        return customers;
                     }
                     return [];
                 } catch (error) {
@@ -713,7 +710,7 @@
             }
 
             try {
-                const response = await fetch(`/api/customers?search=${encodeURIComponent(query)}`);
+                const response = await fetch(`/api/customers/search?q=${encodeURIComponent(query)}`);
 
                 if (!response.ok) {
                     console.error('Customer search failed:', response.status, response.statusText);
@@ -721,7 +718,7 @@
                     return;
                 }
 
-                const customers = await response.json();
+                const { customers } = await response.json();
 
                 if (customers && customers.length > 0) {
                     showCustomerSuggestions(customers);
@@ -909,14 +909,11 @@ function setupCustomerMobileAutocomplete() {
     // Search customers by mobile number
     async function searchCustomersByMobile(query) {
       try {
-        const response = await fetch(`/api/customers?search=${encodeURIComponent(query)}`);
+        // Phone-like queries match number prefixes server-side, whatever the formatting
+        const response = await fetch(`/api/customers/search?q=${encodeURIComponent(query)}&limit=5`);
         if (response.ok) {
-          const customers = await response.json();
-          // Filter customers whose phone number starts with the query
-          const filteredCustomers = customers.filter(customer => 
-            customer.phone && customer.phone.startsWith(query)
-          );
-          return filteredCustomers.slice(0, 5); // Limit to 5 suggestions
+          const { customers = [] } = await response.json();
+          return customers;
         }
         return [];
       } catch (error) {
@@ -1961,8 +1961,8 @@ if (typeof window.MobileBilling === 'undefined') {
 
   async searchCustomers(query, modal) {
     try {
-      const response = await fetch(`/api/customers?search=${encodeURIComponent(query)}`);
-      const customers = await response.json();
+      const response = await fetch(`/api/customers/search?q=${encodeURIComponent(query)}`);
+      const { customers = [] } = await response.json();
       
       const container = modal.querySelector('#customer-list-container');
       this.renderCustomerList(container, customers, modal);
@@ -387,7 +387,7 @@ class OCRScanner {
             progressText.textContent = 'Uploading images...';
             progressBar.style.width = '20%';
 
-            // Add timeout for better UX
+            // Add timeout for better UX; the upload returns once the images are queued
             const controller = new AbortController();
             const timeoutId = setTimeout(() => controller.abort(), 60000); // 60 second timeout
 
@@ -399,7 +399,7 @@ class OCRScanner {
 
             clearTimeout(timeoutId);
 
-            progressBar.style.width = '60%';
+            progressBar.style.width = '30%';
             progressText.textContent = 'Processing images with OCR...';
 
             if (!response.ok) {
@@ -419,10 +419,10 @@ class OCRScanner {
                 throw new Error(errorMessage);
             }
 
-            progressBar.style.width = '80%';
-            progressText.textContent = 'Extracting text...';
-
-            const result = await response.json();
+            let result = await response.json();
+            if (result.success && result.status !== 'done') {
+                result = await this.waitForBatch(result, progressBar, progressText);
+            }
 
             progressBar.style.width = '100%';
             progressText.textContent = 'Complete!';
@@ -477,6 +477,53 @@ class OCRScanner {
         }
     }
 
+    /**
+     * Follow a queued OCR batch until every image is recognized.
+     * Listens to the job's server-sent events and falls back to polling.
+     */
+    waitForBatch(job, progressBar, progressText) {
+        const showProgress = (status) => {
+            progressBar.style.width = `${30 + Math.round(status.progress * 0.7)}%`;
+            progressText.textContent = `Extracting text... ${status.completed}/${status.total} images`;
+        };
+
+        const poll = async (resolve, reject) => {
+            try {
+                const response = await fetch(job.status_url);
+                const status = await response.json();
+                if (!response.ok || !status.success) {
+                    throw new Error(status.error || `HTTP ${response.status}`);
+                }
+                showProgress(status);
+                if (status.status === 'done') {
+                    resolve(status);
+                } else {
+                    setTimeout(() => poll(resolve, reject), 1500);
+                }
+            } catch (error) {
+                reject(error);
+            }
+        };
+
+        return new Promise((resolve, reject) => {
+            if (!window.EventSource) {
+                poll(resolve, reject);
+                return;
+            }
+            const events = new EventSource(job.events_url);
+            events.addEventListener('progress', (event) => showProgress(JSON.parse(event.data)));
+            events.addEventListener('done', (event) => {
+                events.close();
+                resolve(JSON.parse(event.data));
+            });
+            events.onerror = () => {
+                // Stream closed or blocked by a proxy: the browser would reconnect, poll instead
+                events.close();
+                poll(resolve, reject);
+            };
+        });
+    }
+
     /**
      * Display OCR results
      */
@@ -222,6 +222,103 @@ async function populateAreas(selectId, city = null) {
   }
 }
 
+function buildInvoiceParams() {
+  // Build query parameters
+  const params = new URLSearchParams();
+  const fromDate = document.getElementById('invFromDate')?.value;
+  const toDate = document.getElementById('invToDate')?.value;
+  const city = document.getElementById('invCity')?.value;
+  const area = document.getElementById('invArea')?.value;
+  const status = document.getElementById('invStatus')?.value;
+  const productsSelect = document.getElementById('invProducts');
+  const employeesSelect = document.getElementById('invEmployees');
+  
+  if (fromDate) params.append('from_date', fromDate);
+  if (toDate) params.append('to_date', toDate);
+  if (city && city !== 'All') params.append('city', city);
+  if (area && area !== 'All') params.append('area', area);
+  if (status && status !== 'All') params.append('status', status);
+  
+  // Add client_id for testing (you can make this dynamic later)
+  params.append('client_id', '2');
+  
+  const selectedProducts = Array.from(productsSelect?.selectedOptions || [])
+    .map(opt => opt.value)
+    .filter(val => val && val !== 'All');
+  selectedProducts.forEach(p => params.append('products[]', p));
+  
+  const selectedEmployees = Array.from(employeesSelect?.selectedOptions || [])
+    .map(opt => opt.value)
+    .filter(val => val && val !== 'All');
+  selectedEmployees.forEach(e => params.append('employees[]', e));
+  
+  return params;
+}
+
+function renderInvoiceRow(invoice, index) {
+  // Calculate total discount amount from discount percentages and amounts
+  let totalDiscountAmount = 0;
+  if (invoice.discount_amounts && invoice.discount_amounts.length > 0) {
+    totalDiscountAmount = invoice.discount_amounts.reduce((sum, amount) => sum + parseFloat(amount || 0), 0);
+  }
+
+  return `
+    <tr class="hover:bg-neutral-800/50 transition-colors" style="animation-delay: ${index * 0.1}s;">
+      <td class="px-4 py-3">${invoice.bill_number}</td>
+      <td class="px-4 py-3">${invoice.bill_date}</td>
+      <td class="px-4 py-3">${invoice.customer_name}</td>
+      <td class="px-4 py-3">${invoice.delivery_date}</td>
+      <td class="px-4 py-3">AED ${parseFloat(invoice.subtotal || invoice.total_amount).toFixed(2)}</td>
+      <td class="px-4 py-3">AED ${totalDiscountAmount.toFixed(2)}</td>
+      <td class="px-4 py-3">AED ${parseFloat(invoice.vat_amount || 0).toFixed(2)}</td>
+      <td class="px-4 py-3">AED ${parseFloat(invoice.total_amount).toFixed(2)}</td>
+      <td class="px-4 py-3">
+        <span class="px-2 py-1 rounded-full text-xs font-medium ${
+          invoice.status === 'Completed' ? 'bg-green-500/20 text-green-400' :
+          invoice.status === 'Pending' ? 'bg-yellow-500/20 text-yellow-400' :
+          'bg-red-500/20 text-red-400'
+        }">${invoice.status}</span>
+      </td>
+      <td class="px-4 py-3">${invoice.products || 'N/A'}</td>
+    </tr>
+  `;
+}
+
+// Invoices are paged with a keyset cursor: "Load more" appends the next
+// page after the last row instead of reloading the table.
+function renderLoadMoreInvoices(tbody, nextCursor) {
+  if (!nextCursor) return;
+  tbody.insertAdjacentHTML('beforeend', `
+    <tr id="invoices-load-more">
+      <td colspan="9" class="px-6 py-4 text-center">
+        <button type="button" class="px-4 py-2 rounded-lg bg-neutral-800 hover:bg-neutral-700 text-neutral-200 text-sm">Load more</button>
+      </td>
+    </tr>
+  `);
+  document.querySelector('#invoices-load-more button').addEventListener('click', () => loadMoreInvoices(nextCursor));
+}
+
+async function loadMoreInvoices(cursor) {
+  const tbody = document.getElementById('invoices-table-body');
+  const loadMoreRow = document.getElementById('invoices-load-more');
+  if (!tbody || !loadMoreRow) return;
+  loadMoreRow.querySelector('button').disabled = true;
+  try {
+    const params = buildInvoiceParams();
+    params.append('cursor', cursor);
+    const response = await fetch(`/api/reports/invoices?${params.toString()}`, { credentials: 'include' });
+    const data = await response.json();
+    if (!data.success) throw new Error(data.error || 'Failed to load invoices');
+    const offset = tbody.querySelectorAll('tr').length - 1;
+    loadMoreRow.remove();
+    tbody.insertAdjacentHTML('beforeend', (data.invoices || []).map((invoice, index) => renderInvoiceRow(invoice, offset + index)).join(''));
+    renderLoadMoreInvoices(tbody, data.next_cursor);
+  } catch (error) {
+    console.error('Error loading more invoices:', error);
+    loadMoreRow.querySelector('button').disabled = false;
+  }
+}
+
 async function fetchAndRenderInvoices() {
   const tbody = document.getElementById('invoices-table-body');
   if (!tbody) return;
@@ -240,35 +337,7 @@ async function fetchAndRenderInvoices() {
   updateSummaryCardsLoading();
   
   try {
-    // Build query parameters
-    const params = new URLSearchParams();
-    const fromDate = document.getElementById('invFromDate')?.value;
-    const toDate = document.getElementById('invToDate')?.value;
-    const city = document.getElementById('invCity')?.value;
-    const area = document.getElementById('invArea')?.value;
-    const status = document.getElementById('invStatus')?.value;
-    const productsSelect = document.getElementById('invProducts');
-    const employeesSelect = document.getElementById('invEmployees');
-    
-    if (fromDate) params.append('from_date', fromDate);
-    if (toDate) params.append('to_date', toDate);
-    if (city && city !== 'All') params.append('city', city);
-    if (area && area !== 'All') params.append('area', area);
-    if (status && status !== 'All') params.append('status', status);
-    
-    // Add client_id for testing (you can make this dynamic later)
-    params.append('client_id', '2');
-    
-    const selectedProducts = Array.from(productsSelect?.selectedOptions || [])
-      .map(opt => opt.value)
-      .filter(val => val && val !== 'All');
-    selectedProducts.forEach(p => params.append('products[]', p));
-    
-    const selectedEmployees = Array.from(employeesSelect?.selectedOptions || [])
-      .map(opt => opt.value)
-      .filter(val => val && val !== 'All');
-    selectedEmployees.forEach(e => params.append('employees[]', e));
-    
+    const params = buildInvoiceParams();
     const response = await fetch(`/api/reports/invoices?${params.toString()}`, { credentials: 'include' });
     const data = await response.json();
     
@@ -276,34 +345,7 @@ async function fetchAndRenderInvoices() {
       const invoices = data.invoices || [];
       
              tbody.innerHTML = invoices.length
-         ? invoices.map((invoice, index) => {
-             // Calculate total discount amount from discount percentages and amounts
-             let totalDiscountAmount = 0;
-             if (invoice.discount_amounts && invoice.discount_amounts.length > 0) {
-                 totalDiscountAmount = invoice.discount_amounts.reduce((sum, amount) => sum + parseFloat(amount || 0), 0);
-             }
-             
-             return `
-           <tr class="hover:bg-neutral-800/50 transition-colors" style="animation-delay: ${index * 0.1}s;">
-             <td class="px-4 py-3">${invoice.bill_number}</td>
-             <td class="px-4 py-3">${invoice.bill_date}</td>
-             <td class="px-4 py-3">${invoice.customer_name}</td>
-             <td class="px-4 py-3">${invoice.delivery_date}</td>
-             <td class="px-4 py-3">AED ${parseFloat(invoice.subtotal || invoice.total_amount).toFixed(2)}</td>
-             <td class="px-4 py-3">AED ${totalDiscountAmount.toFixed(2)}</td>
-             <td class="px-4 py-3">AED ${parseFloat(invoice.vat_amount || 0).toFixed(2)}</td>
-             <td class="px-4 py-3">AED ${parseFloat(invoice.total_amount).toFixed(2)}</td>
-             <td class="px-4 py-3">
-               <span class="px-2 py-1 rounded-full text-xs font-medium ${
-                 invoice.status === 'Completed' ? 'bg-green-500/20 text-green-400' :
-                 invoice.status === 'Pending' ? 'bg-yellow-500/20 text-yellow-400' :
-                 'bg-red-500/20 text-red-400'
-               }">${invoice.status}</span>
-             </td>
-             <td class="px-4 py-3">${invoice.products || 'N/A'}</td>
-           </tr>
-         `;
-         }).join('')
+         ? invoices.map(renderInvoiceRow).join('')
                  : `
            <tr>
              <td colspan="9" class="px-6 py-8 text-center">
@@ -317,6 +359,7 @@ async function fetchAndRenderInvoices() {
              </td>
            </tr>
          `;
+      renderLoadMoreInvoices(tbody, data.next_cursor);
     } else {
       throw new Error(data.error || 'Failed to load invoices');
     }
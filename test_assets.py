@@ -0,0 +1,55 @@
+import gzip
+import sys
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+
+def test_build_fingerprints_and_precompresses(tmp_path):
+    from api import assets
+
+    static_dir, build_dir = tmp_path / 'static', tmp_path / 'static' / 'build'
+    (static_dir / 'js').mkdir(parents=True)
+    (static_dir / 'js' / 'app.js').write_text('console.log("tajir");\n' * 200)
+    (static_dir / 'logo.png').write_bytes(b'\x89PNG')
+
+    manifest = assets.build(str(static_dir), str(build_dir))
+    hashed = manifest['js/app.js']
+    assert hashed.startswith('js/app.') and hashed.endswith('.js') and hashed != 'js/app.js'
+    assert gzip.decompress((build_dir / (hashed + '.gz')).read_bytes()) == (static_dir / 'js' / 'app.js').read_bytes()
+    assert not (build_dir / (manifest['logo.png'] + '.gz')).exists()
+    assert assets.load_manifest(str(build_dir)) == manifest
+
+    (static_dir / 'js' / 'app.js').write_text('console.log("changed");\n')
+    assert assets.build(str(static_dir), str(build_dir))['js/app.js'] != hashed
+
+
+def test_hashed_assets_are_immutable_and_negotiate_encoding():
+    from app import create_app
+
+    app = create_app()
+    client = app.test_client()
+    with app.test_request_context():
+        url = app.jinja_env.globals['asset_url']('js/app.js')
+    assert url.startswith('/static/build/js/app.')
+
+    response = client.get(url, headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == 'public, max-age=31536000, immutable'
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert gzip.decompress(response.data) == client.get('/static/js/app.js').data
+
+    response = client.get(url, headers={'Accept-Encoding': 'identity'})
+    assert 'Content-Encoding' not in response.headers
+
+    plain = client.get('/static/js/app.js')
+    assert plain.headers['Cache-Control'] == 'no-cache'
+    assert client.get('/static/js/app.js', headers={'If-None-Match': plain.headers['ETag']}).status_code == 304
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,60 @@
+import os
+import sys
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+PARALLEL_BILLS = int(os.getenv('BILL_NUMBER_TEST_BILLS', 300))
+WORKERS = 32
+
+
+def test_parallel_bill_numbers_are_unique_and_contiguous(test_shop):
+    from app import create_app
+
+    app = create_app()
+
+    def create(i):
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['user_id'] = test_shop
+        response = client.post('/api/bills', json={
+            'bill': {
+                'customer_name': f'Parallel {i}',
+                'customer_phone': f'50{2000000 + i}',
+                'country_code': '971',
+                'subtotal': 10,
+                # A stale preview number from /api/next-bill-number must not matter.
+                'bill_number': f"BILL-{date.today().strftime('%Y%m%d')}-001",
+            },
+            'items': [{'product_name': 'Shirt', 'quantity': 1, 'rate': 10}],
+        })
+        return response.status_code, response.get_json()
+
+    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+        results = list(pool.map(create, range(PARALLEL_BILLS)))
+
+    failures = [r for r in results if r[0] != 200]
+    assert not failures, json.dumps(failures[:3])
+
+    numbers = [body['bill_number'] for _, body in results]
+    assert len(set(numbers)) == PARALLEL_BILLS
+
+    prefix = f"BILL-{date.today().strftime('%Y%m%d')}-"
+    sequences = sorted(int(n[len(prefix):]) for n in numbers)
+    assert sequences == list(range(1, PARALLEL_BILLS + 1))
+
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = test_shop
+    preview = client.get('/api/next-bill-number').get_json()['next_number']
+    assert preview == f'{prefix}{PARALLEL_BILLS + 1:03d}'
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, '-q']))
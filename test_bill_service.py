@@ -0,0 +1,42 @@
+import sys
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+
+def test_identical_custom_lines_are_all_saved(test_shop):
+    from app import create_app
+    from db.connection import get_db_connection
+
+    client = create_app().test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = test_shop
+    line = {'product_name': 'Hemming', 'quantity': 1, 'rate': 15}
+    response = client.post('/api/bills', json={
+        'bill': {'customer_name': 'Two Hems', 'customer_phone': '501234567', 'subtotal': 30},
+        'items': [dict(line), dict(line)],
+    })
+    assert response.status_code == 200, response.get_data(as_text=True)
+    bill_id = response.get_json()['bill_id']
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('SELECT total_amount FROM bills WHERE bill_id = %s', (bill_id,))
+    bill = cursor.fetchone()
+    cursor.execute('''
+        SELECT product_id, product_name, quantity, rate, total_amount
+        FROM bill_items WHERE bill_id = %s
+    ''', (bill_id,))
+    items = cursor.fetchall()
+    conn.close()
+
+    assert len(items) == 2
+    assert all(item['product_id'] is None and item['product_name'] == 'Hemming' for item in items)
+    assert round(sum(item['total_amount'] for item in items), 2) == bill['total_amount']
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, '-q']))
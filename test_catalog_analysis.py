@@ -0,0 +1,67 @@
+import sys
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+
+def test_name_patterns_match_whole_words():
+    from api.catalog import extract_name_patterns
+
+    assert extract_name_patterns('Silk Shirts XL') == ['material_silk', 'shirt', 'size_xl']
+    assert extract_name_patterns("Men's T-Shirt (M)") == ['shirt', 'size_m']
+    assert extract_name_patterns('Dresses, dress, XXL') == ['dress', 'size_xxl']
+    # Substrings no longer count: no size in "slacks", no suit in "jumpsuit"
+    assert extract_name_patterns('Slacks') == []
+    assert extract_name_patterns('Jumpsuit') == ['jumpsuit']
+    assert extract_name_patterns('') == []
+
+
+def test_analyzer_single_pass():
+    from api.catalog import CatalogAnalyzer, analyze_catalog_data
+
+    items = [
+        {'name': 'Silk Shirt', 'price': 8, 'category': 'ironing'},
+        {'name': 'Cotton Shirt', 'price': 12, 'category': 'ironing', 'description': 'folded'},
+        {'name': 'Abaya', 'price': 40, 'category': 'dry clean'},
+        {'name': 'Curtain', 'price': 120},
+    ]
+    analyzer = analyze_catalog_data(iter(items))
+    assert isinstance(analyzer, CatalogAnalyzer)
+    analysis = analyzer.analysis()
+    assert analysis['total_items'] == 4
+    assert analysis['categories']['ironing'] == {'count': 2, 'avg_price': 10, 'min_price': 8, 'max_price': 12}
+    assert analysis['categories']['dry clean']['count'] == 1
+    assert analysis['price_ranges'] == {'Budget (≤10)': 1, 'Standard (11-25)': 1, 'Premium (26-50)': 1, 'Luxury (>100)': 1}
+    assert analysis['common_patterns'][0] == 'shirt'
+    assert set(analysis['common_patterns']) == {'shirt', 'material_silk', 'material_cotton', 'abaya'}
+
+    suggestions = analyzer.suggestions()
+    assert [t['name'] for t in suggestions['product_types']] == ['Ironing']
+    assert suggestions['product_types'][0]['products'] == [
+        {'name': 'Silk Shirt', 'rate': 8, 'description': ''},
+        {'name': 'Cotton Shirt', 'rate': 12, 'description': 'folded'},
+    ]
+    assert suggestions['recommendations'][0]['pattern'] == 'shirt'
+    assert not any('price_range' in r for r in suggestions['recommendations'])
+
+
+def test_scan_route():
+    from app import create_app
+
+    client = create_app().test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = 1
+    catalog = [{'name': f'Shirt {i}', 'price': 5, 'category': 'ironing'} for i in range(5)]
+    data = client.post('/api/catalog/scan', json={'catalog': catalog}).get_json()
+    assert data['success'], data
+    assert data['analysis']['categories']['ironing']['count'] == 5
+    assert len(data['suggestions']['product_types'][0]['products']) == 5
+    # One bulk-pricing recommendation per range, not one per range seen so far
+    assert [r['count'] for r in data['suggestions']['recommendations'] if 'price_range' in r] == [5]
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,68 @@
+import sys
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+
+def test_auto_create_is_set_based_and_idempotent(test_shop):
+    from app import create_app
+    from api.product_catalog import cache
+    from db.connection import get_db_connection
+
+    user_id = test_shop
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('INSERT INTO product_types (user_id, type_name) VALUES (%s, %s) RETURNING type_id', (user_id, 'Ironing'))
+    ironing_id = cursor.fetchone()['type_id']
+    cursor.execute("INSERT INTO products (user_id, type_id, product_name, rate) VALUES (%s, %s, 'Shirt', 4)", (user_id, ironing_id))
+    conn.commit()
+    conn.close()
+
+    client = create_app().test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = user_id
+
+    suggestions = {'product_types': [
+        {'name': 'Ironing', 'products': [{'name': 'Shirt', 'rate': 5}, {'name': 'Kandura', 'rate': '6.50'}]},
+        {'name': 'Dry Clean', 'description': 'DC', 'products': [
+            {'name': f'Suit {i}', 'rate': 20 + i, 'description': 'two piece'} for i in range(300)
+        ] + [{'name': 'Kandura', 'rate': 9}]},
+    ]}
+    try:
+        assert cache.get(user_id).products  # cached before the import
+        data = client.post('/api/catalog/auto-create', json={'suggestions': suggestions}).get_json()
+        assert data['success'], data
+        assert [t['name'] for t in data['created_types']] == ['Dry Clean']
+        assert isinstance(data['created_types'][0]['type_id'], int)
+        created = data['created_products']
+        assert [p['name'] for p in created] == ['Kandura'] + [f'Suit {i}' for i in range(300)]
+        assert all(isinstance(p['product_id'], int) for p in created)
+        assert created[0]['type_name'] == 'Ironing' and created[1]['type_name'] == 'Dry Clean'
+
+        # Committed, with the right types and rates, and visible through the catalog at once.
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT p.product_name, p.rate, p.description, pt.type_name
+            FROM products p JOIN product_types pt ON pt.type_id = p.type_id
+            WHERE p.user_id = %s ORDER BY p.product_id
+        ''', (user_id,))
+        rows = cursor.fetchall()
+        conn.close()
+        assert len(rows) == 302
+        assert (rows[0]['product_name'], float(rows[0]['rate'])) == ('Shirt', 4.0)
+        assert (rows[1]['product_name'], float(rows[1]['rate']), rows[1]['type_name']) == ('Kandura', 6.5, 'Ironing')
+        assert rows[-1]['description'] == 'two piece' and rows[-1]['type_name'] == 'Dry Clean'
+        assert len(client.get('/api/products').get_json()) == 302
+
+        again = client.post('/api/catalog/auto-create', json={'suggestions': suggestions}).get_json()
+        assert again['success'] and again['created_types'] == [] and again['created_products'] == []
+    finally:
+        cache.invalidate(user_id)
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,92 @@
+import gzip
+import json
+import sys
+import zlib
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+
+def _app():
+    from flask import Response, jsonify
+    from app import create_app
+    from api.compression import no_compression
+
+    app = create_app()
+    rows = [{'customer_id': n, 'name': f'Customer {n}', 'city': 'Dubai'} for n in range(500)]
+
+    @app.route('/test-compression/big')
+    def big():
+        return jsonify(rows)
+
+    @app.route('/test-compression/small')
+    def small():
+        return jsonify({'ok': True})
+
+    @app.route('/test-compression/stream')
+    def stream():
+        return Response((f'{n},Customer {n}\n' for n in range(2000)), mimetype='text/csv')
+
+    @app.route('/test-compression/raw')
+    @no_compression
+    def raw():
+        return jsonify(rows)
+
+    return app, rows
+
+
+def test_json_is_compressed_when_accepted():
+    from api import compression
+
+    app, rows = _app()
+    client = app.test_client()
+    before = compression.stats.metrics()['encodings'].get('gzip', {}).get('responses', 0)
+
+    response = client.get('/test-compression/big', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert json.loads(gzip.decompress(response.data)) == rows
+    assert int(response.headers['Content-Length']) == len(response.data)
+
+    metrics = compression.stats.metrics()
+    assert metrics['encodings']['gzip']['responses'] == before + 1
+    assert metrics['ratio'] > 1 and metrics['cpu_seconds'] >= 0
+
+    if compression.BROTLI_AVAILABLE:
+        response = client.get('/test-compression/big', headers={'Accept-Encoding': 'gzip, br'})
+        assert response.headers['Content-Encoding'] == 'br'
+        assert json.loads(compression.brotli.decompress(response.data)) == rows
+
+    for path, headers in (('/test-compression/big', {}),
+                          ('/test-compression/big', {'Accept-Encoding': 'identity'}),
+                          ('/test-compression/small', {'Accept-Encoding': 'gzip'}),
+                          ('/test-compression/raw', {'Accept-Encoding': 'gzip'})):
+        response = client.get(path, headers=headers)
+        assert 'Content-Encoding' not in response.headers, path
+        assert response.get_json()
+
+
+def test_streamed_responses_are_compressed_per_chunk():
+    app, _ = _app()
+    client = app.test_client()
+    response = client.get('/test-compression/stream', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Length' not in response.headers
+    text = zlib.decompress(response.data, 31).decode('utf-8')
+    assert text.splitlines()[1999] == '1999,Customer 1999'
+
+
+def test_etag_revalidation_survives_compression():
+    app, _ = _app()
+    client = app.test_client()
+    response = client.get('/api/currencies', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    etag = response.headers['ETag']
+    assert client.get('/api/currencies', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag}).status_code == 304
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, '-q']))
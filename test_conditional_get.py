@@ -0,0 +1,58 @@
+import sys
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+
+def test_reference_data_revalidates_with_etag():
+    from app import create_app
+
+    client = create_app().test_client()
+    response = client.get('/api/currencies')
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == 'private, no-cache'
+    etag = response.headers['ETag']
+    assert etag.startswith('W/"')
+
+    not_modified = client.get('/api/currencies', headers={'If-None-Match': etag})
+    assert not_modified.status_code == 304
+    assert not_modified.data == b''
+    assert not_modified.headers['ETag'] == etag
+
+    assert client.get('/api/currencies', headers={'If-None-Match': 'W/"stale"'}).status_code == 200
+
+    # Another shop's copy of the same body never matches.
+    with client.session_transaction() as sess:
+        sess['user_id'] = 99999
+    assert client.get('/api/currencies', headers={'If-None-Match': etag}).status_code == 200
+
+    # Endpoints without conditional_response keep the no-store policy.
+    assert 'no-store' in client.get('/api/backups').headers['Cache-Control']
+
+
+def test_write_changes_etag(test_shop):
+    from app import create_app
+    from db.connection import get_db_connection
+
+    client = create_app().test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = test_shop
+    etag = client.get('/api/employees').headers['ETag']
+    assert client.get('/api/employees', headers={'If-None-Match': etag}).status_code == 304
+
+    conn = get_db_connection()
+    conn.cursor().execute("INSERT INTO employees (user_id, name) VALUES (%s, 'ETag Test Tailor')", (test_shop,))
+    conn.commit()
+    conn.close()
+
+    response = client.get('/api/employees', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert [e['name'] for e in response.get_json()] == ['ETag Test Tailor']
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,85 @@
+import sys
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+
+def test_search_mode():
+    from api.customer_search import search_mode
+
+    assert search_mode('050 123') == 'phone'
+    assert search_mode('+971 50') == 'phone'
+    assert search_mode('mo') == 'prefix'
+    assert search_mode('moh') == 'text'
+    assert search_mode('---') == 'text'
+
+
+def test_customer_search(test_shop):
+    from app import create_app
+    from db.connection import get_db_connection
+
+    user_id = test_shop
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        INSERT INTO customers (user_id, name, phone, business_name, customer_type)
+        VALUES (%(u)s, 'Mohammed Khan', '0501234567', NULL, 'Individual'),
+               (%(u)s, 'Mo', '0509999999', NULL, 'Individual'),
+               (%(u)s, 'Aisha Mohammed', '+971 55 111 2222', NULL, 'Individual'),
+               (%(u)s, 'Ravi', '0527654321', 'Khan Tailoring LLC', 'Business'),
+               (%(u)s, '100%% Cotton', '0530000000', NULL, 'Individual')
+    ''', {'u': user_id})
+    cursor.execute('''
+        INSERT INTO customers (user_id, name, phone)
+        SELECT %s, 'Customer ' || n, '0600' || lpad(n::text, 6, '0') FROM generate_series(1, 30) n
+    ''', (user_id,))
+    cursor.execute('UPDATE customers SET phone_e164 = normalize_phone_e164(phone) WHERE user_id = %s', (user_id,))
+    conn.commit()
+    conn.close()
+
+    client = create_app().test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = user_id
+
+    def names(query, **args):
+        response = client.get('/api/customers/search', query_string={'q': query, **args})
+        assert response.status_code == 200
+        return [c['name'] for c in response.get_json()['customers']]
+
+    # Exact name first, then other prefix matches.
+    assert names('mo') == ['Mo', 'Mohammed Khan']
+    # A business name starting with the query outranks a match later in a name.
+    assert names('khan') == ['Ravi', 'Mohammed Khan']
+    assert names('mohammed')[0] == 'Mohammed Khan' and 'Aisha Mohammed' in names('mohammed')
+    # Phone prefixes ignore formatting on both sides.
+    assert names('050 123') == ['Mohammed Khan']
+    assert names('97155') == ['Aisha Mohammed']
+    # LIKE wildcards in the query are literal.
+    assert names('100%') == ['100% Cotton']
+    assert names('_') == []
+
+    # Bounded pages that continue from the cursor without repeats.
+    seen, cursor = [], None
+    while True:
+        args = {'limit': 7, **({'cursor': cursor} if cursor else {})}
+        page = client.get('/api/customers/search', query_string={'q': 'customer', **args}).get_json()
+        assert len(page['customers']) <= 7
+        seen += [c['customer_id'] for c in page['customers']]
+        cursor = page['next_cursor']
+        assert page['has_more'] == bool(cursor)
+        if not cursor:
+            break
+    assert len(seen) == len(set(seen)) == 30
+
+    # The customer list page still gets every match.
+    listed = client.get('/api/customers?search=customer').get_json()
+    assert len(listed) == 30
+    assert [c['name'] for c in listed] == sorted(c['name'] for c in listed)
+    assert client.get('/api/customers/search?q=mo&cursor=oops').status_code == 400
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,63 @@
+import sys
+from datetime import date
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+TODAY = date(2025, 6, 15)   # trending window starts 2025-05-16, the 6-month window 2024-12-15
+
+# bill_date, customer_area, customer_name, customer_phone, total_amount, [(product_name, quantity, total_amount)]
+BILLS = [
+    ('2025-06-15', 'Karama', 'Aisha', '+971500000001', 100, [('Shirt', 3, 30), ('Abaya', 1, 70)]),
+    ('2025-06-10', None, 'Aisha', None, 10, [('Shirt', 1, 10)]),
+    ('2025-06-01', '', '', None, 40, [(None, 1, 40)]),
+    ('2025-05-16', 'Deira', 'Aisha', '+971500000001', 200, [('Shirt', 2, 20), ('Kandura', 4, 180)]),
+    # Outside the trending window, inside the 6-month window
+    ('2025-05-15', 'Deira', 'Omar', '+971500000002', 300, [('Suit', 10, 300)]),
+    ('2025-03-01', 'Karama', 'Aisha', '+971500000001', 5, [('Suit', 50, 5)]),
+    ('2024-12-15', 'Karama', 'Omar', '+971500000002', 50, [('Shirt', 100, 50)]),
+    # Outside both windows
+    ('2024-12-14', 'Satwa', 'Aisha', '+971500000001', 1000, [('Shirt', 100, 1000)]),
+]
+
+
+def test_dashboard_windows_and_rankings(test_shop):
+    from db.connection import get_db_connection
+    from api.analytics import _fetch_dashboard
+
+    user_id = test_shop
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    for n, (bill_date, area, name, phone, total, items) in enumerate(BILLS):
+        cursor.execute('''
+            INSERT INTO bills (user_id, bill_number, bill_date, customer_area, customer_name, customer_phone,
+                               subtotal, vat_amount, total_amount, status)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, 0, %s, 'Paid') RETURNING bill_id
+        ''', (user_id, f'DASH-{n}', bill_date, area, name, phone, total, total))
+        bill_id = cursor.fetchone()['bill_id']
+        for product_name, quantity, amount in items:
+            cursor.execute('''
+                INSERT INTO bill_items (user_id, bill_id, product_name, quantity, rate, total_amount)
+                VALUES (%s, %s, %s, %s, %s, %s)
+            ''', (user_id, bill_id, product_name, quantity, amount / quantity, amount))
+    conn.commit()
+
+    try:
+        dashboard = _fetch_dashboard(conn, user_id, today=TODAY)
+        assert [(p['product_name'], p['qty_sold'], p['total_revenue']) for p in dashboard['trending_products']] == [
+            ('Shirt', 6, 60), ('Kandura', 4, 180), ('Abaya', 1, 70), ('Unknown', 1, 40),
+        ]
+        assert [(r['area'], r['sales']) for r in dashboard['top_regions']] == [('Deira', 500), ('Karama', 155)]
+        assert [(c['customer_name'], c['customer_phone'], c['invoice_count'], c['total_revenue'])
+                for c in dashboard['repeated_customers']] == [
+            ('Aisha', '+971500000001', 3, 305), ('Omar', '+971500000002', 2, 350), ('Aisha', '', 1, 10),
+        ]
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, '-q']))
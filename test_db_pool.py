@@ -0,0 +1,248 @@
+import sys
+import time
+import threading
+
+from dotenv import load_dotenv
+from psycopg2 import extensions, OperationalError
+
+# Load environment variables
+load_dotenv()
+
+
+class FakeConnection:
+    """Just enough of a psycopg2 connection for the pool."""
+
+    def __init__(self):
+        self.closed = 0
+        self.broken = False
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+        self.rollbacks = 0
+
+    def get_transaction_status(self):
+        return self.status
+
+    def cursor(self, *args, **kwargs):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, sql, params=None):
+        if self.conn.broken:
+            raise OperationalError('server closed the connection unexpectedly')
+        self.conn.status = extensions.TRANSACTION_STATUS_INTRANS
+
+    def close(self):
+        pass
+
+
+def _pool(**options):
+    from db.pool import ConnectionPool
+
+    created = []
+
+    def connect():
+        created.append(FakeConnection())
+        return created[-1]
+
+    options = dict({'min_size': 0, 'max_size': 2, 'timeout': 1, 'ping_interval': 0}, **options)
+    return ConnectionPool(connect, **options), created
+
+
+def test_checkout_blocks_at_max_size_and_times_out():
+    from db.pool import PoolExhausted
+
+    pool, created = _pool(max_size=1)
+    conn = pool.getconn()
+
+    try:
+        pool.getconn(timeout=0.05)
+        assert False, 'checkout should time out while the only connection is in use'
+    except PoolExhausted:
+        pass
+
+    waiter = {}
+    thread = threading.Thread(target=lambda: waiter.setdefault('conn', pool.getconn(timeout=5)))
+    thread.start()
+    time.sleep(0.1)
+    assert thread.is_alive()          # still waiting for a free connection
+    pool.putconn(conn)
+    thread.join(2)
+    assert waiter['conn'] is conn and len(created) == 1
+
+    metrics = pool.metrics()
+    assert metrics['timeouts'] == 1
+    assert metrics['exhaustion_events'] == 2
+    assert metrics['in_use'] == 1 and metrics['size'] == 1
+    assert metrics['checkout_wait_max_ms'] >= 100
+
+
+def test_broken_and_expired_connections_are_replaced():
+    pool, created = _pool()
+
+    # Closed while idle
+    conn = pool.getconn()
+    pool.putconn(conn)
+    conn.closed = 1
+    assert pool.getconn() is created[1]
+    pool.putconn(created[1])
+
+    # Fails the ping
+    created[1].broken = True
+    assert pool.getconn() is created[2]
+    assert pool.metrics()['health_check_failures'] == 1
+
+    # Left in a transaction: rolled back on return, then reused
+    created[2].cursor().execute('SELECT 1')
+    pool.putconn(created[2])
+    assert created[2].rollbacks == 1 and not created[2].closed
+
+    # Returned with discard=True
+    conn = pool.getconn()
+    pool.putconn(conn, discard=True)
+    assert conn.closed
+
+    # Older than max_lifetime
+    pool.max_lifetime = 0.05
+    conn = pool.getconn()
+    time.sleep(0.1)
+    pool.putconn(conn)
+    assert conn.closed
+
+    metrics = pool.metrics()
+    assert metrics['size'] == 0 and metrics['idle'] == 0 and metrics['in_use'] == 0
+    assert metrics['connections_closed'] == metrics['connections_created'] == len(created)
+
+
+def test_idle_connections_above_min_size_are_reaped():
+    pool, created = _pool(min_size=1, max_size=3, max_idle=0.05)
+    conns = [pool.getconn() for _ in range(3)]
+    for conn in conns:
+        pool.putconn(conn)
+    assert pool.metrics()['idle'] == 3
+
+    time.sleep(0.1)
+    pool.reap()
+    metrics = pool.metrics()
+    assert metrics['idle'] == 1 and metrics['size'] == 1
+    assert sum(1 for conn in created if conn.closed) == 2
+
+
+def test_request_handles_share_one_connection(monkeypatch):
+    from flask import Flask
+    from db import connection
+
+    pool, created = _pool()
+    monkeypatch.setattr(connection, '_pool', pool)
+    monkeypatch.setattr(connection, '_pool_pid', connection.os.getpid())
+    app = Flask(__name__)
+    connection.init_app(app)
+
+    with app.test_request_context():
+        first = connection.get_db_connection()
+        second = connection.get_db_connection()
+        assert first._conn is second._conn
+
+        first.cursor().execute('INSERT INTO ...')
+        first.close()
+        # The other handle is still open: its transaction is left alone
+        assert second._conn.status == extensions.TRANSACTION_STATUS_INTRANS
+
+        own = connection.get_own_connection()
+        assert own._conn is not second._conn
+        own.close()
+
+        second.close()
+        # Last handle released: uncommitted work is discarded, the lease is kept
+        assert created[0].rollbacks == 1
+        assert pool.metrics()['in_use'] == 1
+        assert connection.get_db_connection()._conn is created[0]
+
+    # App-context teardown returns the lease
+    metrics = pool.metrics()
+    assert metrics['in_use'] == 0 and metrics['idle'] == 2 and len(created) == 2
+
+
+def test_admin_pool_metrics(monkeypatch):
+    from flask import Flask
+    from api.admin import admin_api
+    from db import connection
+
+    pool, _ = _pool()
+    monkeypatch.setattr(connection, '_pool', pool)
+    monkeypatch.setattr(connection, '_pool_pid', connection.os.getpid())
+    pool.putconn(pool.getconn())
+
+    app = Flask(__name__)
+    app.secret_key = 'test'
+    app.register_blueprint(admin_api)
+    client = app.test_client()
+    assert client.get('/api/admin/db-pool').status_code == 302
+    with client.session_transaction() as sess:
+        sess['admin_logged_in'] = True
+    metrics = client.get('/api/admin/db-pool').get_json()
+    assert metrics['checkouts'] == 1 and metrics['idle'] == 1 and metrics['in_use'] == 0
+    assert metrics['max_size'] == 2
+    for key in ('checkout_wait_avg_ms', 'checkout_wait_max_ms', 'exhaustion_events', 'timeouts'):
+        assert key in metrics
+
+
+def test_logging_commits_apart_from_the_request():
+    import pytest
+    from flask import Flask
+    from db.connection import get_db_connection, init_app
+    from api.utils import log_user_action, log_dml_error
+
+    app = Flask(__name__)
+    init_app(app)
+    marker = f'pool-test-{time.time_ns()}'
+    with app.app_context():
+        try:
+            conn = get_db_connection()
+        except Exception as e:
+            pytest.skip(f"PostgreSQL not available: {e}")
+        try:
+            cursor = conn.cursor()
+            cursor.execute('CREATE TEMP TABLE pool_test_rows (x INTEGER)')
+            cursor.execute('INSERT INTO pool_test_rows VALUES (1)')
+            log_user_action(marker)
+            # The audit insert did not commit the caller's open transaction
+            conn.rollback()
+            cursor.execute("SELECT to_regclass('pg_temp.pool_test_rows') AS t")
+            assert cursor.fetchone()['t'] is None
+
+            # An aborted transaction does not lose the error log
+            try:
+                cursor.execute('SELECT 1 / 0')
+            except Exception as e:
+                log_dml_error('INSERT', marker, e)
+            conn.rollback()
+
+            cursor.execute('SELECT COUNT(*) AS n FROM user_actions WHERE action = %s', (marker,))
+            assert cursor.fetchone()['n'] == 1
+            cursor.execute('SELECT COUNT(*) AS n FROM error_logs WHERE table_name = %s', (marker,))
+            assert cursor.fetchone()['n'] == 1
+        finally:
+            conn.rollback()
+            cursor = conn.cursor()
+            cursor.execute('DELETE FROM user_actions WHERE action = %s', (marker,))
+            cursor.execute('DELETE FROM error_logs WHERE table_name = %s', (marker,))
+            conn.commit()
+            conn.close()
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,75 @@
+import io
+import sys
+import csv
+import zipfile
+from datetime import date
+from decimal import Decimal
+from xml.etree import ElementTree
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+SHEET_NS = {'s': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'}
+
+
+def _sheet_rows(data):
+    sheet = zipfile.ZipFile(io.BytesIO(data)).read('xl/worksheets/sheet1.xml')
+    rows = []
+    for row in ElementTree.fromstring(sheet).iterfind('.//s:row', SHEET_NS):
+        rows.append([''.join(cell.itertext()) for cell in row.iterfind('s:c', SHEET_NS)])
+    return rows
+
+
+def test_xlsx_chunks_builds_a_valid_workbook():
+    from api import export_service
+
+    rows = ((f'BILL-{n}', date(2024, 1, 1), Decimal('10.50'), 'A & B <x>\x01') for n in range(5000))
+    chunks = list(export_service.xlsx_chunks(['Bill Number', 'Date', 'Total', 'Notes'], rows))
+    assert len(chunks) > 2  # flushed per batch, not once at the end
+
+    sheet = _sheet_rows(b''.join(chunks))
+    assert sheet[0] == ['Bill Number', 'Date', 'Total', 'Notes']
+    assert sheet[1] == ['BILL-0', '2024-01-01', '10.50', 'A & B <x>']
+    assert len(sheet) == 5001
+
+
+def test_bill_export_streams_csv_and_xlsx(test_shop):
+    from app import create_app
+    from db.connection import get_db_connection
+
+    user_id = test_shop
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        INSERT INTO bills (user_id, bill_number, bill_date, customer_name, subtotal, vat_amount, total_amount, status)
+        SELECT %s, 'EXP-' || n, DATE '2024-01-01' + n, 'Customer ' || n, 100, 5, 105,
+               CASE WHEN n %% 2 = 0 THEN 'Paid' ELSE 'Pending' END
+        FROM generate_series(0, 29) n
+    ''', (user_id,))
+    conn.commit()
+    conn.close()
+
+    client = create_app().test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = user_id
+
+    response = client.get('/api/exports/bills?from_date=2024-01-01&to_date=2024-01-10&status=Paid')
+    assert response.status_code == 200
+    assert response.is_streamed
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert [row['Bill Number'] for row in rows] == ['EXP-0', 'EXP-2', 'EXP-4', 'EXP-6', 'EXP-8']
+
+    response = client.get('/api/exports/bills?format=xlsx')
+    assert response.status_code == 200
+    sheet = _sheet_rows(response.get_data())
+    assert len(sheet) == 31 and sheet[1][0] == 'EXP-0'
+
+    assert client.get('/api/exports/bills?format=pdf').status_code == 400
+    assert client.get('/api/exports/passwords').status_code == 400
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,46 @@
+import os
+import sys
+import json
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+
+def test_catalog_lookup_and_fallbacks():
+    from api import i18n
+
+    assert i18n.translate_text('dashboard', 'en') == 'Dashboard'
+    assert i18n.translate_text('dashboard', 'ar') != 'Dashboard'
+    # Regional variants use the base language, unknown languages use English,
+    # unknown keys come back unchanged.
+    assert i18n.translate_text('dashboard', 'ar-AE') == i18n.translate_text('dashboard', 'ar')
+    assert i18n.translate_text('dashboard', 'fr') == 'Dashboard'
+    assert i18n.translate_text('no_such_key', 'ar') == 'no_such_key'
+    assert i18n.get_catalog('ar') is i18n.get_catalog('ar')
+
+
+def test_catalogs_hot_reload(tmp_path, monkeypatch):
+    from api import i18n
+
+    (tmp_path / 'en.json').write_text(json.dumps({'greeting': 'Hello'}), encoding='utf-8')
+    monkeypatch.setattr(i18n, 'TRANSLATIONS_DIR', str(tmp_path))
+    try:
+        i18n.load_catalogs()
+        assert i18n.translate_text('greeting', 'en') == 'Hello'
+        assert not i18n.reload_catalogs_if_changed()
+
+        catalog = tmp_path / 'en.json'
+        catalog.write_text(json.dumps({'greeting': 'Hi'}), encoding='utf-8')
+        os.utime(catalog, (os.path.getmtime(catalog) + 5,) * 2)
+        assert i18n.reload_catalogs_if_changed()
+        assert i18n.translate_text('greeting', 'en') == 'Hi'
+    finally:
+        monkeypatch.undo()
+        i18n.load_catalogs()
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,77 @@
+import io
+import sys
+import time
+import zipfile
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+
+def _wait_for(client, status_url, timeout=120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = client.get(status_url).get_json()
+        if job['status'] in ('done', 'failed'):
+            return job
+        time.sleep(0.2)
+    raise AssertionError(f'{status_url} did not finish')
+
+
+def test_invoice_batch_jobs(test_shop, tmp_path, monkeypatch):
+    from api import jobs, pdf_renderer
+    from app import create_app
+    from db.connection import get_db_connection
+
+    user_id = test_shop
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        INSERT INTO bills (user_id, bill_number, bill_date, customer_name, subtotal, vat_amount, total_amount, status)
+        SELECT %s, 'BAT-' || n, DATE '2024-05-01' + n, 'Customer ' || n, 100, 5, 105,
+               CASE WHEN n %% 2 = 0 THEN 'Paid' ELSE 'Pending' END
+        FROM generate_series(0, 3) n
+    ''', (user_id,))
+    cursor.execute('''
+        INSERT INTO bill_items (user_id, bill_id, product_name, quantity, rate, discount, total_amount)
+        SELECT user_id, bill_id, 'Shirt', 1, 105, 0, 105 FROM bills WHERE user_id = %s
+    ''', (user_id,))
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setattr(jobs, 'JOBS_DIR', str(tmp_path))
+    client = create_app().test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = user_id
+
+    response = client.post('/api/invoice-batches', json={
+        'from_date': '2024-05-01', 'to_date': '2024-05-31', 'status': 'Paid', 'format': 'html'})
+    assert response.status_code == 202
+    job = _wait_for(client, response.get_json()['status_url'])
+    assert job['status'] == 'done' and job['completed'] == job['total'] == 2
+    archive = zipfile.ZipFile(io.BytesIO(client.get(job['download_url']).data))
+    assert archive.namelist() == ['2024-05-01_BAT-0.html', '2024-05-03_BAT-2.html']
+    assert 'BAT-2' in archive.read('2024-05-03_BAT-2.html').decode('utf-8')
+
+    if pdf_renderer.PDF_RENDERER:
+        response = client.post('/api/invoice-batches', json={
+            'from_date': '2024-05-01', 'to_date': '2024-05-31', 'template': 'receipt', 'format': 'zip'})
+        job = _wait_for(client, response.get_json()['status_url'])
+        assert job['status'] == 'done', job['error']
+        archive = zipfile.ZipFile(io.BytesIO(client.get(job['download_url']).data))
+        assert len(archive.namelist()) == 4
+        assert all(archive.read(name).startswith(b'%PDF') for name in archive.namelist())
+
+    assert client.post('/api/invoice-batches', json={'bill_ids': [], 'format': 'html'}).status_code == 400
+    assert client.post('/api/invoice-batches', json={'from_date': '2030-01-01', 'format': 'html'}).status_code == 400
+    assert client.post('/api/invoice-batches', json={'from_date': '2024-05-01', 'format': 'docx'}).status_code == 400
+
+    with client.session_transaction() as sess:
+        sess['user_id'] = 2
+    assert client.get(f"/api/invoice-batches/{job['job_id']}").status_code == 404
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, '-q']))
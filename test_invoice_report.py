@@ -0,0 +1,87 @@
+import sys
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+BILLS = 23
+
+
+def test_invoice_report_pages_by_keyset(test_shop):
+    from app import create_app
+    from db.connection import get_db_connection
+
+    user_id = test_shop
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    # Four dates only, so most pages start and end inside a run of equal bill_date.
+    cursor.execute('''
+        INSERT INTO bills (user_id, bill_number, bill_date, customer_name, subtotal, vat_amount, total_amount, status)
+        SELECT %s, 'RPT-' || n, DATE '2024-03-01' + n %% 4, 'Customer ' || n, 200, 10, 210, 'Paid'
+        FROM generate_series(0, %s) n
+    ''', (user_id, BILLS - 1))
+    # Every bill but the last gets a discounted shirt, then an undiscounted trouser
+    # (named on even bills only, so blank names are left out of `products`).
+    cursor.execute('''
+        INSERT INTO bill_items (user_id, bill_id, product_name, quantity, rate, discount, total_amount)
+        SELECT b.user_id, b.bill_id, item.product_name, item.quantity, item.rate, item.discount, 100
+        FROM bills b
+        CROSS JOIN LATERAL (VALUES
+            (1, 'Shirt', 1, 100, 12.5),
+            (2, CASE WHEN split_part(b.bill_number, '-', 2)::int %% 2 = 0 THEN 'Trouser' ELSE '' END, 2, 50, 0)
+        ) AS item(position, product_name, quantity, rate, discount)
+        WHERE b.user_id = %s AND b.bill_number <> %s
+        ORDER BY b.bill_id, item.position
+    ''', (user_id, f'RPT-{BILLS - 1}'))
+    cursor.execute('''
+        SELECT bill_id, bill_number FROM bills WHERE user_id = %s ORDER BY bill_date DESC, bill_id DESC
+    ''', (user_id,))
+    expected = [(row['bill_id'], row['bill_number']) for row in cursor.fetchall()]
+    conn.commit()
+    conn.close()
+
+    client = create_app().test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = user_id
+    dates = {'from_date': '2024-03-01', 'to_date': '2024-03-31'}
+
+    seen, next_cursor, pages = [], None, 0
+    while True:
+        args = dict(dates, limit=5, **({'cursor': next_cursor} if next_cursor else {}))
+        response = client.get('/api/reports/invoices', query_string=args)
+        assert response.status_code == 200, response.get_data(as_text=True)
+        page = response.get_json()
+        pages += 1
+        assert len(page['invoices']) <= 5
+        seen += page['invoices']
+        next_cursor = page['next_cursor']
+        assert page['has_more'] == bool(next_cursor)
+        if not next_cursor:
+            break
+        last = page['invoices'][-1]
+        assert next_cursor.endswith(f":{last['bill_id']}")
+    # Nothing skipped or repeated, in (bill_date, bill_id) descending order
+    assert pages == 5
+    assert [(invoice['bill_id'], invoice['bill_number']) for invoice in seen] == expected
+
+    # A full last page still reports has_more=False
+    page = client.get('/api/reports/invoices', query_string=dict(dates, limit=BILLS)).get_json()
+    assert len(page['invoices']) == BILLS and not page['has_more'] and page['next_cursor'] is None
+
+    by_number = {invoice['bill_number']: invoice for invoice in seen}
+    assert by_number['RPT-2']['discount_amounts'] == [12.5, 0.0]
+    assert by_number['RPT-2']['products'] == 'Shirt, Trouser'
+    assert by_number['RPT-3']['products'] == 'Shirt'
+    assert by_number[f'RPT-{BILLS - 1}']['discount_amounts'] == []
+    assert by_number[f'RPT-{BILLS - 1}']['products'] is None
+    assert by_number['RPT-2']['customer_name'] == ''
+
+    for bad in ('oops', '2024-03-01', '2024-13-01:5', '2024-03-01:x', '2024-03-01:1:2'):
+        response = client.get('/api/reports/invoices', query_string=dict(dates, cursor=bad))
+        assert response.status_code == 400, bad
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,88 @@
+import os
+import sys
+import time
+
+from dotenv import load_dotenv
+from PIL import Image
+
+# Load environment variables
+load_dotenv()
+
+
+def _data(words, conf):
+    return {'text': words.split(), 'conf': [conf] * len(words.split())}
+
+
+def _fake_tesseract(monkeypatch, results, calls):
+    """Replace image_to_data: config -> (seconds, data); records (config, path, whether it existed)."""
+    import pytesseract
+
+    def image_to_data(path, config, output_type, timeout):
+        calls.append((config, path, os.path.exists(path)))
+        seconds, data = results[config]
+        time.sleep(seconds)
+        if isinstance(data, Exception):
+            raise data
+        return data
+
+    monkeypatch.setattr(pytesseract, 'image_to_data', image_to_data)
+
+
+def test_passes_run_in_parallel_and_best_wins(monkeypatch):
+    from api.ocr_engine import OcrEngine
+
+    calls = []
+    _fake_tesseract(monkeypatch, {
+        'a': (0.3, _data('Shirt 5.00', 70)),
+        'b': (0.3, _data('Shirt 5.00 Total', 75)),
+        'c': (0.3, RuntimeError('tesseract crashed')),
+        'd': (0.3, _data('', -1)),
+    }, calls)
+    engine = OcrEngine(workers=4, confidence_threshold=90, configs=['a', 'b', 'c', 'd'])
+    started = time.perf_counter()
+    text, confidence = engine.recognize(Image.new('L', (20, 20), 255))
+    assert time.perf_counter() - started < 0.9
+    assert (text, confidence) == ('Shirt 5.00 Total', 75)
+    assert sorted(config for config, _, _ in calls) == ['a', 'b', 'c', 'd']
+    assert all(existed for _, _, existed in calls)
+    assert engine.metrics()['wins'] == {'b': 1}
+    assert engine.ordered_configs() == ['b', 'a', 'c', 'd']
+
+
+def test_confident_pass_ends_recognition_early(monkeypatch):
+    from api.ocr_engine import OcrEngine
+
+    calls = []
+    _fake_tesseract(monkeypatch, {
+        'slow': (1.0, _data('TOTAL AED 485.10', 95)),
+        'fast': (0.05, _data('TOTAL AED 485.10', 88)),
+        'never': (1.0, _data('x', 99)),
+    }, calls)
+    engine = OcrEngine(workers=2, confidence_threshold=80, configs=['fast', 'slow', 'never'])
+    started = time.perf_counter()
+    assert engine.recognize(Image.new('L', (20, 20), 255)) == ('TOTAL AED 485.10', 88)
+    assert time.perf_counter() - started < 0.5
+    metrics = engine.metrics()
+    assert metrics['early_exits'] == 1 and metrics['skipped_passes'] == 1
+    # The running pass still finishes with its image, which is removed afterwards.
+    time.sleep(1.2)
+    assert [config for config, _, _ in calls] == ['fast', 'slow']
+    assert all(existed for _, _, existed in calls)
+    assert not os.path.exists(calls[0][1])
+
+
+def test_fallback_uses_automatic_segmentation_words(monkeypatch):
+    from api.ocr_engine import OcrEngine, FALLBACK_CONFIG
+
+    calls = []
+    _fake_tesseract(monkeypatch, {
+        '--oem 3 --psm 6': (0, _data('faint', 20)),
+        FALLBACK_CONFIG: (0, {'text': ['', 'faint', 'receipt'], 'conf': ['-1', '20', '25']}),
+    }, calls)
+    engine = OcrEngine(workers=1, configs=['--oem 3 --psm 6', FALLBACK_CONFIG])
+    assert engine.recognize(Image.new('L', (20, 20), 255)) == ('faint receipt', 0)
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, '-q']))
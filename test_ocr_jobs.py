@@ -0,0 +1,85 @@
+import io
+import sys
+import time
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+
+def test_claims_lease_and_per_shop_limit(make_test_shop):
+    from api.jobs import create_job, add_job_items, claim_job_item, finish_job_item, get_job, get_job_items
+
+    busy, other = make_test_shop(), make_test_shop()
+    job_id = create_job(busy, 'test-items', total=4)
+    add_job_items(job_id, busy, [{'params': {'n': 0}}, {'params': {'n': 1}}, {'params': {'n': 2}},
+                                 {'params': {'n': 3}, 'result': {'error': 'bad'}}])
+    assert get_job(job_id, busy)['completed'] == 1
+    other_job = create_job(other, 'test-items', total=1)
+    add_job_items(other_job, other, [{'params': {'n': 0}}])
+
+    first = claim_job_item('test-items', per_shop=1)
+    assert (first['job_id'], first['position'], first['attempts']) == (job_id, 0, 1)
+    assert get_job(job_id, busy)['status'] == 'running'
+    # The busy shop is at its limit: the other shop goes next, then nobody
+    second = claim_job_item('test-items', per_shop=1)
+    assert second['job_id'] == other_job
+    assert claim_job_item('test-items', per_shop=1) is None
+    assert finish_job_item(second, {'ok': True}) == 'done'
+
+    # A lease that ran out (its worker died) is taken over; the old worker's result is dropped
+    assert finish_job_item(first, {'n': 0}) == 'running'
+    stale = claim_job_item('test-items', per_shop=1, lease=0)
+    retried = claim_job_item('test-items', per_shop=1)
+    assert (retried['position'], retried['attempts']) == (stale['position'], 2)
+    assert finish_job_item(stale, {'n': 'stale'}) is None
+    assert finish_job_item(retried, {'n': 1}) == 'running'
+    last = claim_job_item('test-items', per_shop=1)
+    assert finish_job_item(last, {'n': 2}, failed=True) == 'done'
+
+    job = get_job(job_id, busy)
+    assert (job['status'], job['completed']) == ('done', 4)
+    items = get_job_items(job_id)
+    assert [item['status'] for item in items] == ['done', 'done', 'failed', 'failed']
+    assert [item['result'] for item in items] == [{'n': 0}, {'n': 1}, {'n': 2}, {'error': 'bad'}]
+
+
+def test_extract_batch_is_queued_and_streamed(test_shop, monkeypatch):
+    from app import create_app
+    from api import ocr
+
+    def fake_extract(path):
+        return {'success': True, 'text': f'text of {path.rsplit("/", 1)[1]}', 'confidence': 90}
+
+    monkeypatch.setattr(ocr, 'extract_text_from_image', fake_extract)
+    client = create_app().test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = test_shop
+    response = client.post('/api/ocr/extract-batch', content_type='multipart/form-data', data={'images': [
+        (io.BytesIO(b'png'), 'a.png'), (io.BytesIO(b'txt'), 'notes.txt'), (io.BytesIO(b'jpg'), 'b.jpg'),
+    ]})
+    assert response.status_code == 202
+    job = response.get_json()
+    assert job['total'] == 3 and len(job['results']) == 3
+    assert job['results'][1] == {'filename': 'notes.txt', 'success': False, 'text': '',
+                                 'confidence': 0, 'error': 'Invalid file type'}
+
+    deadline = time.monotonic() + 20
+    while job['status'] != 'done' and time.monotonic() < deadline:
+        time.sleep(0.2)
+        job = client.get(job['status_url']).get_json()
+    assert job['status'] == 'done' and job['progress'] == 100
+    assert [r['text'] for r in job['results']] == ['text of 0000_a.png', '', 'text of 0002_b.jpg']
+
+    events = client.get(job['events_url'])
+    assert events.mimetype == 'text/event-stream'
+    body = events.get_data(as_text=True)
+    assert 'event: progress' in body and 'event: done' in body and 'text of 0002_b.jpg' in body
+
+    assert client.get('/api/ocr/jobs/nope').status_code == 404
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,188 @@
+import os
+import shutil
+import sys
+import uuid
+from datetime import date
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+SAMPLES = [
+    '050 123 4567', '0501234567', '501234567', '971501234567', '+971 50 123 4567',
+    '+971 050 123 4567', '00971501234567', '(050) 123-4567', '+44 20 7946 0958',
+    '0044 20 7946 0958', '97155', '+1 555', '12', '12345', '0501234', '9711234567', '+12345678',
+    '0012345678', '', '   ', 'none',
+]
+
+
+def test_normalize_phone():
+    from api.phone_numbers import normalize_phone, phone_prefix
+
+    for phone in ('050 123 4567', '0501234567', '501234567', '971501234567',
+                  '+971 50 123 4567', '+971 050 123 4567', '00971501234567'):
+        assert normalize_phone(phone) == '+971501234567', phone
+    assert normalize_phone('+44 20 7946 0958') == '+442079460958'
+    assert normalize_phone('50123456', '965') == '+96550123456'
+    assert normalize_phone('96550123456', '+965') == '+96550123456'
+    assert normalize_phone('12') is None
+    # Too few digits after the country code, however it is supplied
+    for phone in ('12345', '0501234', '+12345678', '0012345678'):
+        assert normalize_phone(phone) is None, phone
+    assert normalize_phone('1234567', '965') is None
+    assert normalize_phone('+123456789') == '+123456789'
+    assert normalize_phone('') is None and normalize_phone(None) is None
+
+    assert phone_prefix('050 12') == '+9715012'
+    assert phone_prefix('97155') == '+97155'
+    assert phone_prefix('97') == '+97'
+    assert phone_prefix('+44 20') == '+4420'
+
+
+def _connect():
+    import pytest
+    from db.connection import create_connection
+
+    try:
+        return create_connection()
+    except Exception as e:
+        pytest.skip(f"PostgreSQL not available: {e}")
+
+
+def test_sql_function_matches_python():
+    from api.phone_numbers import normalize_phone
+
+    conn = _connect()
+    try:
+        cursor = conn.cursor()
+        cursor.execute('SELECT p, normalize_phone_e164(p) AS e164 FROM unnest(%s::text[]) p', (SAMPLES,))
+        for row in cursor.fetchall():
+            assert row['e164'] == normalize_phone(row['p']), row['p']
+    finally:
+        conn.close()
+
+
+def test_migration_merges_duplicate_customers(tmp_path):
+    from db.init import apply_schema_file
+    from db.migrate import MIGRATIONS_DIR, run_migrations
+
+    conn = _connect()
+    schema = f'phone_test_{uuid.uuid4().hex[:8]}'
+    cursor = conn.cursor()
+    cursor.execute(f'CREATE SCHEMA {schema}')
+    cursor.execute(f'SET search_path TO {schema}')
+    conn.commit()
+    try:
+        # Everything up to the migration under test.
+        for name in os.listdir(MIGRATIONS_DIR):
+            if name < '0010':
+                shutil.copy(os.path.join(MIGRATIONS_DIR, name), tmp_path)
+        apply_schema_file(conn)
+        run_migrations(conn, directory=str(tmp_path))
+
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT INTO users (user_id, email, shop_name, password_hash) VALUES (1, 'a@tajir.local', 'A', 'x');
+            INSERT INTO customers (customer_id, user_id, name, phone, is_active) VALUES
+                (1, 1, 'Digits', '0501234567', TRUE),
+                (2, 1, 'Plus', '+971501234567', TRUE),
+                (3, 1, 'Deleted', '501234567', FALSE),
+                (4, 1, 'Other', '0559876543', TRUE),
+                (5, 1, 'Foreign', '+442079460958', TRUE);
+            INSERT INTO bills (bill_id, user_id, customer_id, bill_number, bill_date, total_amount)
+            VALUES (1, 1, 1, 'B1', CURRENT_DATE, 10), (2, 1, 2, 'B2', CURRENT_DATE, 20);
+            INSERT INTO customer_loyalty (user_id, customer_id, total_points, available_points, total_purchases)
+            VALUES (1, 1, 10, 10, 1), (1, 2, 20, 5, 2);
+            INSERT INTO loyalty_transactions (loyalty_id, user_id, customer_id, transaction_type, points_change, bill_id)
+            SELECT loyalty_id, 1, customer_id, 'earned', total_points, customer_id FROM customer_loyalty;
+        ''')
+        conn.commit()
+
+        run_migrations(conn)
+
+        cursor = conn.cursor()
+        cursor.execute('SELECT customer_id, phone_e164, is_active FROM customers ORDER BY customer_id')
+        customers = [(r['customer_id'], r['phone_e164'], r['is_active']) for r in cursor.fetchall()]
+        assert customers == [
+            (1, '+971501234567', True),
+            (2, None, False),
+            (3, None, False),
+            (4, '+971559876543', True),
+            (5, '+442079460958', True),
+        ]
+        cursor.execute('SELECT DISTINCT customer_id FROM bills')
+        assert [r['customer_id'] for r in cursor.fetchall()] == [1]
+        cursor.execute('SELECT customer_id, total_points, available_points, total_purchases FROM customer_loyalty')
+        assert [dict(r) for r in cursor.fetchall()] == [
+            {'customer_id': 1, 'total_points': 30, 'available_points': 15, 'total_purchases': 3}
+        ]
+        # Both profiles' transactions survive, on the merged profile and customer.
+        cursor.execute('''
+            SELECT t.bill_id, t.customer_id, t.points_change, cl.customer_id AS profile_customer_id
+            FROM loyalty_transactions t JOIN customer_loyalty cl ON cl.loyalty_id = t.loyalty_id
+            ORDER BY t.bill_id
+        ''')
+        assert [dict(r) for r in cursor.fetchall()] == [
+            {'bill_id': 1, 'customer_id': 1, 'points_change': 10, 'profile_customer_id': 1},
+            {'bill_id': 2, 'customer_id': 1, 'points_change': 20, 'profile_customer_id': 1},
+        ]
+    finally:
+        conn.rollback()
+        cursor = conn.cursor()
+        cursor.execute(f'DROP SCHEMA {schema} CASCADE')
+        conn.commit()
+        conn.close()
+
+
+def test_customers_and_bills_share_one_record_per_number(test_shop):
+    from app import create_app
+    from db.connection import get_db_connection
+
+    user_id = test_shop
+
+    client = create_app().test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = user_id
+
+    response = client.post('/api/customers', json={'name': 'Fatima', 'phone': '050 123 4567'})
+    assert response.status_code == 200
+    customer_id = response.get_json()['id']
+
+    duplicate = client.post('/api/customers', json={'name': 'Fatima', 'phone': '+971501234567'})
+    assert duplicate.status_code == 400
+    assert client.post('/api/customers', json={'name': 'X', 'phone': '12'}).status_code == 400
+    assert client.post('/api/customers', json={'name': 'X', 'phone': '12345'}).status_code == 400
+
+    found = client.get('/api/customers', query_string={'phone': '00971 50 123 4567'}).get_json()
+    assert [c['customer_id'] for c in found] == [customer_id]
+    assert found[0]['phone'] == '+971501234567'
+
+    # The JSON and form bill paths both find the existing customer.
+    response = client.post('/api/bills', json={
+        'bill': {'customer_name': 'Fatima', 'customer_phone': '501234567', 'country_code': '971', 'subtotal': 10},
+        'items': [{'product_name': 'Shirt', 'quantity': 1, 'rate': 10}],
+    })
+    assert response.status_code == 200
+    response = client.post('/api/bills', data={
+        'customer_name': 'Fatima', 'customer_phone': '(050) 123-4567',
+        'bill_date': date.today().isoformat(), 'delivery_date': date.today().isoformat(),
+        'items': '[{"product_name": "Shirt", "quantity": 1, "rate": 10}]',
+    })
+    assert response.status_code == 200
+    response = client.post('/api/bills', json={
+        'bill': {'customer_name': 'Nobody', 'customer_phone': '12', 'subtotal': 10},
+        'items': [{'product_name': 'Shirt', 'quantity': 1, 'rate': 10}],
+    })
+    assert response.status_code == 400
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('SELECT DISTINCT customer_id FROM bills WHERE user_id = %s', (user_id,))
+    assert [r['customer_id'] for r in cursor.fetchall()] == [customer_id]
+    conn.close()
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,62 @@
+import sys
+from datetime import date
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+
+def test_print_bill_runs_three_queries_and_summary_is_lazy(test_shop, monkeypatch):
+    from api import reports, utils
+    from app import create_app
+    from db.connection import get_db_connection
+    from db.sales_rollup import refresh_days
+
+    user_id = test_shop
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        INSERT INTO bills (user_id, bill_number, bill_date, customer_name, subtotal, vat_amount, total_amount, status)
+        VALUES (%s, 'PRN-1', DATE '2024-03-10', 'Customer', 100, 5, 105, 'Paid')
+        RETURNING bill_id
+    ''', (user_id,))
+    bill_id = cursor.fetchone()['bill_id']
+    cursor.execute('''
+        INSERT INTO bill_items (user_id, bill_id, product_name, quantity, rate, discount, total_amount)
+        VALUES (%s, %s, 'Shirt', 1, 105, 0, 105)
+    ''', (user_id, bill_id))
+    refresh_days(cursor, user_id, [date(2024, 3, 10)])
+    conn.commit()
+    conn.close()
+
+    queries = []
+    original = reports.execute_query
+
+    def counting_execute_query(*args, **kwargs):
+        queries.append(args[1])
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(reports, 'execute_query', counting_execute_query)
+    monkeypatch.setattr(utils, 'execute_query', counting_execute_query)
+    client = create_app().test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = user_id
+
+    response = client.get(f'/api/bills/{bill_id}/print')
+    assert response.status_code == 200
+    assert len(queries) == 3
+    assert 'invoice-summary' not in response.get_data(as_text=True)
+
+    response = client.get(f'/api/bills/{bill_id}/print?summary=1')
+    assert '/api/invoice-summary?date=2024-03-10' in response.get_data(as_text=True)
+
+    response = client.get('/api/invoice-summary?date=2024-03-10')
+    assert response.status_code == 200
+    assert response.get_json()['current_month']['total_invoices'] == 1
+    assert client.get('/api/invoice-summary?date=10-03-2024').status_code == 400
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, '-q']))
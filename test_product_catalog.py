@@ -0,0 +1,91 @@
+import sys
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+
+def _product(product_id, name, type_id, type_name, barcode=None):
+    return {'product_id': product_id, 'product_name': name, 'type_id': type_id,
+            'type_name': type_name, 'barcode': barcode, 'rate': 10}
+
+
+def test_catalog_indexes():
+    from api.product_catalog import ProductCatalog
+
+    catalog = ProductCatalog(7, [], [
+        _product(1, 'Abaya', 1, 'Dry Clean', 'A-1'),
+        _product(2, 'Kandura Ironing', 2, 'Ironing'),
+        _product(3, 'Shirt', 2, 'Ironing', 'A-1'),
+        _product(4, 'Suit 2pc', 3, 'Wash & Press', 'S-2'),
+    ])
+    assert [p['product_id'] for p in catalog.find_barcode('A-1')] == [1, 3]
+    assert catalog.find_barcode('nope') == []
+    assert [p['product_id'] for p in catalog.products_of_type(2)] == [2, 3]
+    assert catalog.by_id[4]['product_name'] == 'Suit 2pc'
+    # Substring of the product or type name, any case, in catalog order.
+    assert [p['product_id'] for p in catalog.search('IRON')] == [2, 3]
+    assert [p['product_id'] for p in catalog.search('dura')] == [2]
+    assert [p['product_id'] for p in catalog.search('& p')] == [4]
+    assert [p['product_id'] for p in catalog.search('2p')] == [4]
+    assert catalog.search('xyz') == []
+
+
+def test_catalog_cache_and_versions(test_shop):
+    from app import create_app
+    from api.product_catalog import CatalogCache, cache
+    from db.connection import get_db_connection
+
+    user_id = test_shop
+
+    client = create_app().test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = user_id
+
+    def no_database():
+        raise AssertionError('catalog lookup hit the database')
+
+    try:
+        type_id = client.post('/api/product-types', json={'name': 'Ironing'}).get_json()['id']
+        response = client.post('/api/products', json={'type_id': type_id, 'name': 'Shirt', 'rate': 5, 'barcode': '629100'})
+        product_id = response.get_json()['id']
+
+        # The write dropped this worker's copy: the new product is visible at once.
+        found = client.get('/api/products?barcode=629100').get_json()
+        assert [p['product_id'] for p in found] == [product_id]
+        assert found[0]['type_name'] == 'Ironing'
+        assert [p['product_id'] for p in client.get('/api/products?search=shi').get_json()] == [product_id]
+        assert [p['product_id'] for p in client.get(f'/api/products?type_id={type_id}').get_json()] == [product_id]
+        assert client.get(f'/api/products/{product_id}').get_json()['product_name'] == 'Shirt'
+        assert [t['type_name'] for t in client.get('/api/product-types').get_json()] == ['Ironing']
+
+        # Steady state: scans within the check interval never reach Postgres.
+        version = cache.get(user_id).version
+        assert version > 0
+        assert cache.get(user_id, connect=no_database).version == version
+
+        # Another worker notices a write made elsewhere through the version.
+        other_worker = CatalogCache(check_interval=60)
+        assert other_worker.get(user_id).find_barcode('629100')
+        conn = get_db_connection()
+        conn.cursor().execute('UPDATE products SET barcode = %s WHERE product_id = %s', ('629101', product_id))
+        conn.commit()
+        conn.close()
+        assert other_worker.get(user_id, connect=no_database).find_barcode('629100')  # until the next check
+        other_worker.check_interval = 0
+        catalog = other_worker.get(user_id)
+        assert catalog.version > version
+        assert catalog.find_barcode('629100') == [] and catalog.find_barcode('629101')
+        assert other_worker.metrics()['loads'] == 2
+
+        client.delete(f'/api/products/{product_id}')
+        assert client.get('/api/products?barcode=629101').get_json() == []
+        assert client.get(f'/api/products/{product_id}').status_code == 404
+    finally:
+        cache.invalidate(user_id)
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, '-q']))
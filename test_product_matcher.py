@@ -0,0 +1,103 @@
+import sys
+import random
+from difflib import SequenceMatcher
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+
+def _products(names):
+    return [{'product_id': i, 'product_name': name, 'rate': 10} for i, name in enumerate(names, 1)]
+
+
+def test_matcher_agrees_with_difflib():
+    from api.product_matcher import ProductMatcher
+
+    rng = random.Random(7)
+    words = ['Shirt', 'Trouser', 'Abaya', 'Kandura', 'Silk', 'Cotton', 'White', 'Navy', 'Dry Clean', 'Press']
+    names = sorted({' '.join(rng.sample(words, rng.randint(1, 3))) for _ in range(300)})
+    products = _products(names)
+    matcher = ProductMatcher(products)
+    queries = names[:40] + [name[:-1] for name in names[40:60]] + [name.upper() for name in names[60:80]] + ['Curtain', '']
+    for query in queries:
+        expected = {
+            p['product_id'] for p in products
+            if SequenceMatcher(None, query.lower(), p['product_name'].lower()).ratio() >= 0.8
+        }
+        found = matcher.find(query)
+        assert {p['product_id'] for p in found} <= expected
+        if query in names:
+            assert found[0]['product_name'] == query and found[0]['similarity'] == 1.0
+        similarities = [p['similarity'] for p in found]
+        assert similarities == sorted(similarities, reverse=True)
+
+
+def test_matcher_limit_keeps_best():
+    from api.product_matcher import ProductMatcher
+
+    matcher = ProductMatcher(_products(['Kandura White', 'Kandura Whites', 'Kandura Whit', 'Kandura Wite', 'Abaya']))
+    everything = matcher.find('Kandura White')
+    assert [p['product_name'] for p in everything][0] == 'Kandura White'
+    assert len(everything) == 4
+    assert matcher.find('Kandura White', limit=2) == everything[:2]
+    assert matcher.find('abaya') == [{'product_id': 5, 'product_name': 'Abaya', 'rate': 10, 'similarity': 1.0}]
+    # Loose thresholds skip the blocking and still score every product.
+    loose = [p['product_id'] for p in matcher.find('Abaya', threshold=0.2)]
+    assert loose[0] == 5 and sorted(loose) == [1, 2, 3, 4, 5]
+
+
+def test_lcs_bound_matches_dynamic_programming():
+    from api.product_matcher import _char_masks, _lcs_length
+
+    rng = random.Random(3)
+    for _ in range(300):
+        a = ''.join(rng.choice('abcd ') for _ in range(rng.randint(0, 12)))
+        b = ''.join(rng.choice('abcde') for _ in range(rng.randint(0, 12)))
+        table = [[0] * (len(b) + 1) for _ in range(len(a) + 1)]
+        for i, x in enumerate(a):
+            for j, y in enumerate(b):
+                table[i + 1][j + 1] = table[i][j] + 1 if x == y else max(table[i][j + 1], table[i + 1][j])
+        assert _lcs_length(a, _char_masks(b), len(b)) == table[-1][-1]
+        # difflib's matching blocks are a common subsequence: the bound never cuts a match.
+        assert sum(block.size for block in SequenceMatcher(None, a, b).get_matching_blocks()) <= table[-1][-1]
+
+
+def test_check_duplicates_route(test_shop):
+    from app import create_app
+    from db.connection import get_db_connection
+
+    user_id = test_shop
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('INSERT INTO product_types (user_id, type_name) VALUES (%s, %s) RETURNING type_id', (user_id, 'Ironing'))
+    type_id = cursor.fetchone()['type_id']
+    for name in ('Kandura White', 'Abaya Silk'):
+        cursor.execute('INSERT INTO products (user_id, type_id, product_name, rate) VALUES (%s, %s, %s, 10)',
+                       (user_id, type_id, name))
+    conn.commit()
+    conn.close()
+
+    client = create_app().test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = user_id
+
+    response = client.post('/api/catalog/check-duplicates', json={'suggestions': {'product_types': [
+        {'name': 'Ironing', 'products': [{'name': 'Kandura White', 'rate': 12}, {'name': 'Kandora White', 'rate': 12}]},
+        {'name': 'Dry Clean', 'products': [{'name': 'Curtain', 'rate': 30}]},
+    ]}})
+    data = response.get_json()
+    assert data['success'], data
+    assert data['existing_items']['product_types']['Ironing']['type_id'] == type_id
+    assert not data['existing_items']['product_types']['Dry Clean']['exists']
+    assert data['existing_items']['products']['Kandura White']['current_rate'] == '10.00'
+    assert not data['existing_items']['products']['Kandora White']['exists']
+    assert data['analysis']['existing_products'] == 1
+    assert [p['product_name'] for p in data['similar_products']['Kandora White']] == ['Kandura White']
+    assert 'Curtain' not in data['similar_products']
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,59 @@
+import io
+import sys
+import base64
+from xml.etree import ElementTree
+
+
+def test_png_matches_qrcode_pil_rendering():
+    import qrcode
+    from PIL import Image
+    from api.qr_codes import render_qr_code
+
+    payload = "Tajir Laundry\n100234567890003\n2024-02-29\n105.0\n5.0"
+    qr = qrcode.QRCode(version=1, error_correction=qrcode.constants.ERROR_CORRECT_L, box_size=10, border=4)
+    qr.add_data(payload)
+    qr.make(fit=True)
+    buffer = io.BytesIO()
+    qr.make_image(fill_color="black", back_color="white").save(buffer, format='PNG')
+
+    expected = Image.open(buffer).convert('L')
+    rendered = Image.open(io.BytesIO(base64.b64decode(render_qr_code(payload, 'png')))).convert('L')
+    assert rendered.size == expected.size
+    assert list(rendered.getdata()) == list(expected.getdata())
+
+
+def test_receipt_level_matches_qrcode_make():
+    import qrcode
+    from PIL import Image
+    from api.qr_codes import render_qr_code
+
+    payload = "INV:BILL-20240229-001|DATE:29/02/2024|TOTAL:100.00|VAT:5.00"
+    buffer = io.BytesIO()
+    qrcode.make(payload).save(buffer, format='PNG')
+
+    expected = Image.open(buffer).convert('L')
+    rendered = Image.open(io.BytesIO(base64.b64decode(render_qr_code(payload, 'png', 'M')))).convert('L')
+    assert rendered.size == expected.size
+    assert list(rendered.getdata()) == list(expected.getdata())
+    # The level is part of the cache key: the bill rendering of the same payload differs
+    assert render_qr_code(payload, 'png', 'L') != render_qr_code(payload, 'png', 'M')
+
+
+def test_qr_codes_are_cached_by_payload():
+    from api.qr_codes import render_qr_code
+    from api.utils import generate_zatca_qr_code
+
+    render_qr_code.cache_clear()
+    first = generate_zatca_qr_code('Shop', '100', 'BILL-1', '2024-02-29', 105.0, 5.0)
+    second = generate_zatca_qr_code('Shop', '100', 'BILL-1', '2024-02-29', 105.0, 5.0)
+    assert first == second
+    assert render_qr_code.cache_info().hits == 1
+
+    svg = base64.b64decode(generate_zatca_qr_code('Shop', '100', 'BILL-1', '2024-02-29', 105.0, 5.0, image_format='svg'))
+    assert ElementTree.fromstring(svg).tag == '{http://www.w3.org/2000/svg}svg'
+    assert render_qr_code.cache_info().misses == 2
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,82 @@
+import sys
+import time
+from datetime import date
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+
+def test_memory_backend_lru_and_ttl():
+    from api.response_cache import MemoryBackend
+
+    backend = MemoryBackend(max_entries=2)
+    backend.set('a', b'1', ttl=60)
+    backend.set('b', b'2', ttl=60)
+    assert backend.get('a') == b'1'      # 'a' is now most recently used
+    backend.set('c', b'3', ttl=60)
+    assert backend.get('b') is None
+    assert backend.get('a') == b'1' and backend.get('c') == b'3'
+    assert backend.evictions == 1
+
+    backend.set('d', b'4', ttl=0.01)
+    time.sleep(0.02)
+    assert backend.get('d') is None
+    assert backend.expirations == 1
+
+    assert backend.versions(1, ('bills', 'expenses')) == [0, 0]
+    backend.bump(1, ('bills',))
+    assert backend.versions(1, ('bills', 'expenses')) == [1, 0]
+    assert backend.versions(2, ('bills',)) == [0]
+
+
+def test_dashboard_cached_until_bill_write(test_shop, monkeypatch):
+    from api import response_cache
+    from app import create_app
+
+    monkeypatch.setenv('RESPONSE_CACHE_BACKEND', 'memory')
+    monkeypatch.setenv('RESPONSE_CACHE_DISABLED', 'cash-flow')
+    monkeypatch.setattr(response_cache, '_cache', None)
+    app = create_app()
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = test_shop
+
+    try:
+        first = client.get('/api/dashboard')
+        second = client.get('/api/dashboard')
+        assert first.status_code == second.status_code == 200
+        assert (first.headers['X-Cache'], second.headers['X-Cache']) == ('MISS', 'HIT')
+        assert second.get_json() == first.get_json()
+        assert first.get_json()['total_bills_today'] == 0
+
+        response = client.post('/api/bills', json={
+            'bill': {
+                'customer_name': 'Cache Test',
+                'customer_phone': '501234567',
+                'country_code': '971',
+                'bill_date': date.today().isoformat(),
+                'subtotal': 100,
+            },
+            'items': [{'product_name': 'Shirt', 'quantity': 1, 'rate': 100}],
+        })
+        assert response.status_code == 200
+
+        after_write = client.get('/api/dashboard')
+        assert after_write.headers['X-Cache'] == 'MISS'
+        assert after_write.get_json()['total_bills_today'] == 1
+
+        # Disabled endpoints go straight to the view.
+        assert 'X-Cache' not in client.get('/api/analytics/cash-flow').headers
+
+        metrics = response_cache.get_response_cache().metrics()
+        assert metrics['endpoints']['dashboard'] == {'hits': 1, 'misses': 2, 'bypassed': 0}
+        assert metrics['endpoints']['cash-flow']['bypassed'] == 1
+    finally:
+        monkeypatch.setattr(response_cache, '_cache', None)
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, '-q']))
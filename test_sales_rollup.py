@@ -0,0 +1,93 @@
+import os
+import sys
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+PARALLEL_BILLS = int(os.getenv('SALES_ROLLUP_TEST_BILLS', 60))
+WORKERS = 16
+
+
+def _rollup_rows(user_id):
+    from db.connection import get_db_connection
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('SELECT * FROM daily_shop_sales WHERE user_id = %s ORDER BY sales_day', (user_id,))
+    rows = [{k: v for k, v in row.items() if k != 'refreshed_at'} for row in cursor.fetchall()]
+    conn.close()
+    return rows
+
+
+def _aggregated_rows(user_id):
+    """What the rollup should contain, aggregated straight from bills."""
+    from db.connection import get_db_connection
+    from db.sales_rollup import rollup_select_sql
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(rollup_select_sql('user_id = %s') + ' ORDER BY sales_day', (user_id,))
+    rows = [dict(row) for row in cursor.fetchall()]
+    conn.close()
+    return rows
+
+
+def test_rollup_tracks_bill_writes(test_shop):
+    from app import create_app
+
+    user_id = test_shop
+    app = create_app()
+
+    def client_for_shop():
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['user_id'] = user_id
+        return client
+
+    def create(i):
+        # Every bill lands on one of two days so concurrent writers share rollup rows.
+        response = client_for_shop().post('/api/bills', json={
+            'bill': {
+                'customer_name': f'Rollup {i % 7}',
+                'customer_phone': f'50{3000000 + i % 7}',
+                'country_code': '971',
+                'bill_date': date.today().isoformat() if i % 2 else '2024-02-29',
+                'payment_method': ('Cash', 'Card', 'Tabby')[i % 3],
+                'subtotal': 10 + i,
+            },
+            'items': [{'product_name': 'Shirt', 'quantity': 1, 'rate': 10 + i}],
+        })
+        return response.status_code, response.get_json()
+
+    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+        results = list(pool.map(create, range(PARALLEL_BILLS)))
+    failures = [r for r in results if r[0] != 200]
+    assert not failures, json.dumps(failures[:3])
+
+    rollup = _rollup_rows(user_id)
+    assert rollup == _aggregated_rows(user_id)
+    assert sum(row['invoice_count'] for row in rollup) == PARALLEL_BILLS
+    assert all(row['customer_count'] == 7 for row in rollup)
+
+    client = client_for_shop()
+    bill_ids = [body['bill_id'] for _, body in results]
+    response = client.put(f'/api/bills/{bill_ids[0]}/payment', json={'amount_paid': 5})
+    assert response.status_code == 200
+    for bill_id in bill_ids[1:4]:
+        assert client.delete(f'/api/bills/{bill_id}').status_code == 200
+
+    rollup = _rollup_rows(user_id)
+    assert rollup == _aggregated_rows(user_id)
+    assert sum(row['invoice_count'] for row in rollup) == PARALLEL_BILLS - 3
+
+    summary = client.get(f'/api/analytics/financial-overview?from_date=2024-01-01&to_date={date.today().isoformat()}').get_json()
+    assert summary['revenue']['total_invoices'] == PARALLEL_BILLS - 3
+    assert summary['revenue']['unique_customers'] == 7
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,145 @@
+import os
+import sys
+import json
+import uuid
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+SHOPS = int(os.getenv('INDEX_TEST_SHOPS', 200))
+BILLS_PER_SHOP = int(os.getenv('INDEX_TEST_BILLS_PER_SHOP', 200))
+
+SEED_SQL = '''
+    INSERT INTO users (user_id, email, shop_name, password_hash)
+    SELECT s, 'shop' || s || '@tajir.local', 'Shop ' || s, 'x' FROM generate_series(1, %(shops)s) s;
+
+    INSERT INTO expense_categories (user_id, category_name)
+    SELECT s, 'Category ' || c FROM generate_series(1, %(shops)s) s, generate_series(1, 5) c;
+
+    INSERT INTO product_types (user_id, type_name)
+    SELECT s, 'Type ' || t FROM generate_series(1, %(shops)s) s, generate_series(1, 3) t;
+
+    INSERT INTO products (user_id, type_id, product_name, rate, barcode)
+    SELECT pt.user_id, pt.type_id, 'Product ' || pt.type_id || '-' || p, 10 + p, 'BC' || pt.type_id || '-' || p
+    FROM product_types pt, generate_series(1, 20) p;
+
+    INSERT INTO customers (user_id, name, phone, phone_e164)
+    SELECT s, 'Customer ' || c, '5' || lpad((s * 1000 + c)::text, 8, '0'),
+           normalize_phone_e164('5' || lpad((s * 1000 + c)::text, 8, '0'))
+    FROM generate_series(1, %(shops)s) s, generate_series(1, %(bills)s / 4) c;
+
+    INSERT INTO bills (user_id, customer_id, bill_number, bill_date, total_amount, status, payment_method)
+    SELECT c.user_id, c.customer_id, 'BILL-' || c.customer_id || '-' || n,
+           CURRENT_DATE - ((c.customer_id * 7 + n * 13) %% 365),
+           (c.customer_id %% 90) + 10,
+           CASE WHEN n = 1 THEN 'Pending' ELSE 'Paid' END,
+           CASE WHEN n %% 2 = 0 THEN 'Cash' ELSE 'Card' END
+    FROM customers c, generate_series(1, 4) n;
+
+    INSERT INTO bill_items (user_id, bill_id, product_name, quantity, rate, total_amount)
+    SELECT b.user_id, b.bill_id, 'Product ' || i, 1, 10, 10
+    FROM bills b, generate_series(1, 3) i;
+
+    INSERT INTO expenses (user_id, category_id, expense_date, amount)
+    SELECT ec.user_id, ec.category_id, CURRENT_DATE - (e %% 365), e
+    FROM expense_categories ec, generate_series(1, %(bills)s / 5) e;
+
+    INSERT INTO customer_loyalty (user_id, customer_id, tier_level)
+    SELECT user_id, customer_id, 'Bronze' FROM customers;
+
+    INSERT INTO loyalty_transactions (user_id, customer_id, bill_id, points_earned, transaction_type)
+    SELECT user_id, customer_id, bill_id, 10, CASE WHEN bill_id %% 10 = 0 THEN 'redeemed' ELSE 'earned' END
+    FROM bills;
+'''
+
+QUERY_PARAMS = {
+    'user_id': 42,
+    'bill_id': None,
+    'customer_id': None,
+    'bill_number': None,
+    'phone': '+971500042001',
+    'barcode': None,
+    'from_date': '2024-01-01',
+    'to_date': '2024-01-31',
+    'q': 'cu',
+    'prefix': 'cu%',
+    'contains': '%cu%',
+    'phone_prefix': '+9715000420%',
+    'limit': 26,
+    'candidates': 500,
+}
+
+
+def _seq_scans(plan, tables):
+    """Yield the tables a plan reads with a sequential scan."""
+    if plan.get('Node Type') == 'Seq Scan' and plan.get('Relation Name') in tables:
+        yield plan['Relation Name']
+    for child in plan.get('Plans', []):
+        yield from _seq_scans(child, tables)
+
+
+def test_hot_queries_use_indexes():
+    import pytest
+    from db.connection import create_connection
+    from db.hot_queries import HOT_QUERIES, INDEXED_TABLES
+    from db.init import apply_schema_file
+    from db.migrate import run_migrations, discover_migrations
+    from db.sales_rollup import rebuild
+
+    try:
+        conn = create_connection()
+    except Exception as e:
+        pytest.skip(f"PostgreSQL not available: {e}")
+
+    schema = f'index_test_{uuid.uuid4().hex[:8]}'
+    cursor = conn.cursor()
+    cursor.execute(f'CREATE SCHEMA {schema}')
+    cursor.execute(f'SET search_path TO {schema}')
+    conn.commit()
+    try:
+        apply_schema_file(conn)
+        applied = run_migrations(conn)
+        assert [m.version for m in applied] == [m.version for m in discover_migrations()]
+        # A second run is a no-op
+        assert run_migrations(conn) == []
+
+        cursor = conn.cursor()
+        cursor.execute(SEED_SQL, {'shops': SHOPS, 'bills': BILLS_PER_SHOP})
+        conn.commit()
+        rebuild(conn)
+        cursor = conn.cursor()
+        for table in INDEXED_TABLES + ('expense_categories', 'product_types'):
+            cursor.execute(f'ANALYZE {table}')
+        conn.commit()
+
+        params = dict(QUERY_PARAMS)
+        cursor.execute('''
+            SELECT b.bill_id, b.bill_number, b.customer_id,
+                   (SELECT barcode FROM products WHERE user_id = b.user_id LIMIT 1) AS barcode
+            FROM bills b WHERE b.user_id = %(user_id)s LIMIT 1
+        ''', params)
+        params.update(cursor.fetchone())
+
+        failures = {}
+        for name, sql in HOT_QUERIES.items():
+            cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+            row = cursor.fetchone()
+            plan = row['QUERY PLAN'][0]['Plan']
+            scanned = sorted(set(_seq_scans(plan, INDEXED_TABLES)))
+            if scanned:
+                failures[name] = scanned
+        conn.rollback()
+        assert not failures, f"Sequential scans on hot queries: {json.dumps(failures)}"
+    finally:
+        conn.rollback()
+        cursor = conn.cursor()
+        cursor.execute(f'DROP SCHEMA {schema} CASCADE')
+        conn.commit()
+        conn.close()
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, '-q']))